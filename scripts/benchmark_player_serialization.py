@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark player list serialization
+===================================
+Compares the default FastAPI response path (validate every row against the
+response_model, then jsonable_encoder + stdlib json) with the fast path in
+app.core.serialization (precompiled field copy + orjson) on a 1000-row
+GET /api/players payload, and reports gzip sizes for the result.
+
+Run from the repository root:
+    python scripts/benchmark_player_serialization.py
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "backend"))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.serialization import dumps, get_serializer
+from app.models import Player as PlayerModel, Team as TeamModel
+from app.schemas import Player
+
+ROWS = 1000
+ROUNDS = 20
+
+
+def build_rows(n=ROWS):
+    """Build n transient ORM players spread across 30 teams."""
+    now = datetime.now()
+    teams = [
+        TeamModel(id=i, name=f"Team {i}", city=f"City {i}", abbreviation=f"T{i:02d}",
+                  conference="Eastern" if i % 2 else "Western", division="Atlantic",
+                  founded_year=1970, is_active=True, created_at=now, updated_at=now)
+        for i in range(1, 31)
+    ]
+    positions = ["PG", "SG", "SF", "PF", "C"]
+    return [
+        PlayerModel(id=i, external_id=str(10000 + i), name=f"Player {i}", first_name="Player",
+                    last_name=str(i), position=positions[i % 5], height="6-7", weight="220",
+                    birth_date=now, birth_place="Somewhere", jersey_number=i % 100,
+                    years_pro=i % 20, college="State", team_id=teams[i % 30].id,
+                    team=teams[i % 30], is_active=True, is_rookie=False,
+                    created_at=now, updated_at=now)
+        for i in range(1, n + 1)
+    ]
+
+
+def default_path(rows):
+    adapter = TypeAdapter(List[Player])
+    validated = adapter.validate_python(rows, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def fast_path(rows):
+    return dumps(get_serializer(Player).to_list(rows))
+
+
+def timeit(fn, rows):
+    fn(rows)  # warm up
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = fn(rows)
+    elapsed = (time.perf_counter() - start) / ROUNDS
+    return elapsed, body
+
+
+def main():
+    print(f"🏀 Serializing {ROWS} players, {ROUNDS} rounds each")
+    print("-" * 50)
+    rows = build_rows()
+
+    default_time, default_body = timeit(default_path, rows)
+    fast_time, fast_body = timeit(fast_path, rows)
+
+    assert json.loads(default_body) == json.loads(fast_body), "fast path output differs"
+
+    for label, elapsed, body in (
+        ("response_model + json", default_time, default_body),
+        ("precompiled + orjson", fast_time, fast_body),
+    ):
+        print(f"{label:<24} {elapsed * 1000:8.2f} ms/response "
+              f"{1 / elapsed:8.1f} responses/s  {len(body) / 1024:7.1f} KiB")
+
+    print(f"\nSpeedup: {default_time / fast_time:.1f}x")
+    print(f"gzip size: {len(gzip.compress(fast_body, 6)) / 1024:.1f} KiB "
+          f"(from {len(fast_body) / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark API startup time
+==========================
+Measures, in fresh interpreters, how long a worker takes to import main (cold
+import), run the lifespan startup, and serve its first response. Also lists
+heavy data/ML libraries that got imported at startup: those should only be
+imported on first use, so the script exits non-zero if any show up.
+
+Run from the repository root:
+    python scripts/benchmark_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "backend"))
+
+HEAVY_MODULES = ["numpy", "pandas", "scipy", "sklearn", "pyarrow", "xgboost"]
+
+# Runs inside a fresh interpreter; prints one JSON line of timings
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    started = time.perf_counter()
+    status = client.get("/health").status_code
+    first_response = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "startup_s": started - imported,
+    "first_response_s": first_response - start,
+    "status": status,
+    "heavy": [m for m in %r if m in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def run_probe(env):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+        env.setdefault("REDIS_URL", "")
+        env.setdefault("METRICS_MULTIPROC_DIR", "")
+
+        print(f"🏀 API startup, {args.runs} fresh interpreters")
+        print("-" * 50)
+        runs = [run_probe(env) for _ in range(args.runs)]
+
+    for label, key in (
+        ("cold import", "import_s"),
+        ("lifespan startup", "startup_s"),
+        ("time to first response", "first_response_s"),
+    ):
+        values = [r[key] * 1000 for r in runs]
+        print(f"{label:<24} median {statistics.median(values):8.1f} ms   "
+              f"min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+
+    statuses = {r["status"] for r in runs}
+    heavy = sorted({m for r in runs for m in r["heavy"]})
+    print(f"\n/health status: {', '.join(map(str, sorted(statuses)))}")
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        sys.exit(1)
+    print("✅ No heavy data/ML modules imported at startup")
+
+
+if __name__ == "__main__":
+    main()
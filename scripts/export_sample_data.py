@@ -8,34 +8,36 @@ NOTE: Due to limitations in TheSportsDB's team-based player search API
 curated list of known NBA players to get basketball player samples.
 """
 
-import requests
+import asyncio
+import sys
 import pandas as pd
 import json
 from datetime import datetime
 import os
 
-def fetch_nba_teams():
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "backend"))
+
+from app.services.nba_api_client import NBAApiClient, UpstreamError
+
+async def fetch_nba_teams(client):
     """Fetch all NBA teams from TheSportsDB"""
     print("Fetching NBA teams from TheSportsDB...")
-    url = "https://www.thesportsdb.com/api/v1/json/3/search_all_teams.php?l=NBA"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        teams = await client.thesportsdb_teams("NBA")
         
-        if 'teams' in data and data['teams']:
-            print(f"✅ Successfully fetched {len(data['teams'])} teams")
-            return data['teams']
+        if teams:
+            print(f"✅ Successfully fetched {len(teams)} teams")
+            return teams
         else:
             print("⚠️ No teams found in response")
             return []
             
-    except requests.exceptions.RequestException as e:
+    except UpstreamError as e:
         print(f"❌ Error fetching teams: {e}")
         return []
 
-def get_sample_nba_players():
+async def get_sample_nba_players(client):
     """Get a sample of current NBA players by searching for known stars"""
     print("Fetching sample NBA players by searching for known current players...")
     
@@ -48,33 +50,39 @@ def get_sample_nba_players():
         "Zion Williamson", "Paolo Banchero", "Victor Wembanyama", "Scottie Barnes"
     ]
     
+    # Searches run concurrently over pooled connections, within TheSportsDB's quota
+    results = await client.gather(
+        (client.thesportsdb_player_search(name) for name in known_players),
+        return_exceptions=True
+    )
+    
     all_players = []
     found_player_ids = set()  # Track player IDs to avoid duplicates
     
-    for player_name in known_players:
-        try:
-            url = f"https://www.thesportsdb.com/api/v1/json/3/searchplayers.php?p={player_name}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'player' in data and data['player']:
-                # Find the basketball player among results
-                for player in data['player']:
-                    if (player.get('strSport', '').lower() == 'basketball' and 
-                        player.get('idPlayer') not in found_player_ids):
-                        print(f"✅ Found {player.get('strPlayer')} - {player.get('strTeam')}")
-                        all_players.append(player)
-                        found_player_ids.add(player.get('idPlayer'))
-                        break  # Take the first basketball match
-                        
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching {player_name}: {e}")
+    for player_name, candidates in zip(known_players, results):
+        if isinstance(candidates, Exception):
+            print(f"❌ Error fetching {player_name}: {candidates}")
             continue
+        
+        # Find the basketball player among results
+        for player in candidates:
+            if (player.get('strSport', '').lower() == 'basketball' and 
+                player.get('idPlayer') not in found_player_ids):
+                print(f"✅ Found {player.get('strPlayer')} - {player.get('strTeam')}")
+                all_players.append(player)
+                found_player_ids.add(player.get('idPlayer'))
+                break  # Take the first basketball match
     
     print(f"Successfully collected {len(all_players)} unique NBA players")
     return all_players
 
+async def fetch_sample_data():
+    """Fetch teams and sample players with one pooled client"""
+    async with NBAApiClient() as client:
+        teams = await fetch_nba_teams(client)
+        players = await get_sample_nba_players(client)
+    return teams, players
+
 def export_teams_to_csv(teams, filename="../data/sample_nba_teams.csv"):
     """Export teams data to CSV"""
     if not teams:
@@ -209,13 +217,10 @@ def main():
     print("🏀 NBA Sample Data Export from TheSportsDB")
     print("=" * 50)
     
-    # Fetch teams data
-    teams = fetch_nba_teams()
+    # Fetch teams and a sample of known NBA players
+    teams, all_players = asyncio.run(fetch_sample_data())
     teams_df = export_teams_to_csv(teams) if teams else None
     
-    # Fetch players data using a sample of known NBA players
-    all_players = get_sample_nba_players()
-    
     players_df = export_players_to_csv(all_players) if all_players else None
     
     # Create summary
@@ -234,7 +239,7 @@ if __name__ == "__main__":
         import pandas
     except ImportError:
         print("Installing required packages...")
-        os.system("pip install pandas requests")
+        os.system("pip install pandas")
         import pandas as pd
     
     main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Import a Parquet file into the NBA Analytics database
+=====================================================
+Historical backfills for box scores and games. Reads the file in batches and
+upserts them through the backend's bulk ingestion path, so the same file can
+be imported twice without creating duplicates.
+
+Accepts files written by GET /api/exports/{dataset}?format=parquet.
+
+Usage (from the repository root):
+    python scripts/import_parquet.py player-stats data/player_stats_2023-24.parquet
+    python scripts/import_parquet.py games data/games.parquet --batch-size 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "backend"))
+
+from app.core.config import settings
+from app.db.database import engine
+from app.services.arrow_service import IMPORT_TARGETS, import_parquet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill NBA data from a Parquet file")
+    parser.add_argument("dataset", choices=sorted(IMPORT_TARGETS), help="Dataset to import")
+    parser.add_argument("path", help="Path to the Parquet file")
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_SIZE,
+                        help="Rows per upsert batch (default: BATCH_SIZE)")
+    args = parser.parse_args()
+
+    print(f"🏀 Importing {args.dataset} from {args.path}")
+    start = time.perf_counter()
+    written = import_parquet(engine, args.path, args.dataset, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Upserted {written} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Incremental sync from balldontlie into the NBA Analytics database
+=================================================================
+Fetches teams, players and games, skips upstream items whose content hash is
+unchanged since the last run, and upserts only what changed. Games are read
+from the last completed game date (minus a short lookback); an interrupted
+players pass resumes from its last page cursor.
+
+Usage (from the repository root):
+    python scripts/sync_upstream.py
+    python scripts/sync_upstream.py --streams games
+    python scripts/sync_upstream.py --full     # ignore checkpoints and fingerprints
+
+    # Record upstream responses once, then re-run offline and deterministically
+    # (replay against a fresh database or with --full, so requests match the recording)
+    python scripts/sync_upstream.py --http-cache record --http-cache-dir data/http_cache
+    python scripts/sync_upstream.py --http-cache replay --http-cache-dir data/http_cache
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src", "backend"))
+
+from app.core.config import settings
+from app.db.database import engine
+from app.services.http_cache import MODES, HttpCache
+from app.services.nba_api_client import NBAApiClient
+from app.services.sync_service import STREAMS, SyncService
+
+
+async def run(streams, full, cache):
+    async with NBAApiClient(cache=cache) as client:
+        reports = await SyncService(engine, client, full=full).run(streams)
+    return reports, client
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental upstream sync")
+    parser.add_argument("--streams", nargs="+", choices=STREAMS, default=list(STREAMS),
+                        help="Streams to sync (default: all)")
+    parser.add_argument("--full", action="store_true",
+                        help="Refetch and rewrite everything, ignoring checkpoints")
+    parser.add_argument("--http-cache", choices=MODES, default=settings.HTTP_CACHE_MODE,
+                        help="Record upstream responses or replay recorded ones (default: HTTP_CACHE_MODE)")
+    parser.add_argument("--http-cache-dir", default=settings.HTTP_CACHE_DIR)
+    args = parser.parse_args()
+    cache = (
+        HttpCache(args.http_cache_dir, args.http_cache, settings.HTTP_CACHE_TTL)
+        if args.http_cache != "off" else None
+    )
+
+    print(f"🏀 Syncing {', '.join(args.streams)}{' (full)' if args.full else ''}")
+    print("-" * 50)
+    reports, client = asyncio.run(run(args.streams, args.full, cache))
+    for r in reports:
+        print(f"{r.stream:<8} fetched {r.fetched:6d}  skipped {r.skipped:6d}  "
+              f"written {r.written:6d}  {r.duration:6.1f}s")
+    if cache is not None:
+        print(f"HTTP cache ({cache.mode}): {cache.hits} hits, {cache.revalidated} revalidated, "
+              f"{cache.stored} stored, {client.requests} network requests")
+    print("✅ Sync complete")
+
+
+if __name__ == "__main__":
+    main()
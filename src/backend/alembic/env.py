@@ -0,0 +1,76 @@
+"""
+Alembic environment for NBA Analytics migrations.
+
+Uses DATABASE_URL from app settings (or -x url=... on the command line) and
+the models' metadata for autogenerate.
+"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import get_database_url
+from app.models import Base
+
+config = context.config
+
+# Skip logging setup when called from the app (which configures its own)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _database_url() -> str:
+    return context.get_x_argument(as_dictionary=True).get("url") or get_database_url()
+
+
+def _configure_options(url: str) -> dict:
+    # SQLite can't ALTER most constraints in place; batch mode recreates the table
+    return {"render_as_batch": url.startswith("sqlite"), "compare_type": True}
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL to stdout without connecting (alembic upgrade --sql)."""
+    url = _database_url()
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        **_configure_options(url),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the database (or a connection passed in by the app)."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            **_configure_options(str(connection.engine.url)),
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    url = _database_url()
+    engine = create_engine(url, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            **_configure_options(url),
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,156 @@
+"""Initial schema: teams, players, games and player_stats
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('teams',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(length=50), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('city', sa.String(length=50), nullable=False),
+    sa.Column('abbreviation', sa.String(length=3), nullable=False),
+    sa.Column('conference', sa.String(length=20), nullable=True),
+    sa.Column('division', sa.String(length=30), nullable=True),
+    sa.Column('founded_year', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('abbreviation')
+    )
+    op.create_index('ix_teams_conference', 'teams', ['conference'], unique=False)
+    op.create_index('ix_teams_external_id', 'teams', ['external_id'], unique=True)
+    op.create_index('ix_teams_id', 'teams', ['id'], unique=False)
+
+    op.create_table('games',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(length=50), nullable=True),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('game_date', sa.DateTime(), nullable=False),
+    sa.Column('home_team_id', sa.Integer(), nullable=False),
+    sa.Column('away_team_id', sa.Integer(), nullable=False),
+    sa.Column('home_score', sa.Integer(), nullable=True),
+    sa.Column('away_score', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('quarter', sa.Integer(), nullable=True),
+    sa.Column('time_remaining', sa.String(length=10), nullable=True),
+    sa.Column('game_type', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['away_team_id'], ['teams.id'], ),
+    sa.ForeignKeyConstraint(['home_team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_games_away_team_game_date', 'games', ['away_team_id', 'game_date'], unique=False)
+    op.create_index('ix_games_external_id', 'games', ['external_id'], unique=True)
+    op.create_index('ix_games_home_team_game_date', 'games', ['home_team_id', 'game_date'], unique=False)
+    op.create_index('ix_games_id', 'games', ['id'], unique=False)
+    op.create_index('ix_games_season_game_date', 'games', ['season', 'game_date'], unique=False)
+
+    op.create_table('players',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('external_id', sa.String(length=50), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('first_name', sa.String(length=50), nullable=True),
+    sa.Column('last_name', sa.String(length=50), nullable=True),
+    sa.Column('position', sa.String(length=2), nullable=True),
+    sa.Column('height', sa.String(length=10), nullable=True),
+    sa.Column('weight', sa.String(length=10), nullable=True),
+    sa.Column('birth_date', sa.DateTime(), nullable=True),
+    sa.Column('birth_place', sa.String(length=100), nullable=True),
+    sa.Column('jersey_number', sa.Integer(), nullable=True),
+    sa.Column('years_pro', sa.Integer(), nullable=True),
+    sa.Column('college', sa.String(length=100), nullable=True),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('is_rookie', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_players_external_id', 'players', ['external_id'], unique=True)
+    op.create_index('ix_players_id', 'players', ['id'], unique=False)
+    op.create_index('ix_players_name', 'players', ['name'], unique=False)
+    op.create_index('ix_players_team_id', 'players', ['team_id'], unique=False)
+
+    op.create_table('player_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('minutes_played', sa.Float(), nullable=True),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('rebounds', sa.Integer(), nullable=False),
+    sa.Column('assists', sa.Integer(), nullable=False),
+    sa.Column('steals', sa.Integer(), nullable=False),
+    sa.Column('blocks', sa.Integer(), nullable=False),
+    sa.Column('turnovers', sa.Integer(), nullable=False),
+    sa.Column('fouls', sa.Integer(), nullable=False),
+    sa.Column('field_goals_made', sa.Integer(), nullable=False),
+    sa.Column('field_goals_attempted', sa.Integer(), nullable=False),
+    sa.Column('three_pointers_made', sa.Integer(), nullable=False),
+    sa.Column('three_pointers_attempted', sa.Integer(), nullable=False),
+    sa.Column('free_throws_made', sa.Integer(), nullable=False),
+    sa.Column('free_throws_attempted', sa.Integer(), nullable=False),
+    sa.Column('plus_minus', sa.Integer(), nullable=True),
+    sa.Column('field_goal_percentage', sa.Float(), nullable=True),
+    sa.Column('three_point_percentage', sa.Float(), nullable=True),
+    sa.Column('free_throw_percentage', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('player_id', 'game_id', name='uq_player_stats_player_game')
+    )
+    op.create_index('ix_player_stats_game_id', 'player_stats', ['game_id'], unique=False)
+    op.create_index('ix_player_stats_id', 'player_stats', ['id'], unique=False)
+    op.create_index('ix_player_stats_team_id', 'player_stats', ['team_id'], unique=False)
+
+
+
+def downgrade() -> None:
+    op.drop_index('ix_player_stats_team_id', table_name='player_stats')
+    op.drop_index('ix_player_stats_id', table_name='player_stats')
+    op.drop_index('ix_player_stats_game_id', table_name='player_stats')
+    op.drop_table('player_stats')
+
+    op.drop_index('ix_players_team_id', table_name='players')
+    op.drop_index('ix_players_name', table_name='players')
+    op.drop_index('ix_players_id', table_name='players')
+    op.drop_index('ix_players_external_id', table_name='players')
+    op.drop_table('players')
+
+    op.drop_index('ix_games_season_game_date', table_name='games')
+    op.drop_index('ix_games_id', table_name='games')
+    op.drop_index('ix_games_home_team_game_date', table_name='games')
+    op.drop_index('ix_games_external_id', table_name='games')
+    op.drop_index('ix_games_away_team_game_date', table_name='games')
+    op.drop_table('games')
+
+    op.drop_index('ix_teams_id', table_name='teams')
+    op.drop_index('ix_teams_external_id', table_name='teams')
+    op.drop_index('ix_teams_conference', table_name='teams')
+    op.drop_table('teams')
@@ -0,0 +1,48 @@
+"""Upstream sync checkpoints and content fingerprints
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sync_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('stream', sa.String(length=50), nullable=False),
+    sa.Column('cursor', sa.String(length=200), nullable=True),
+    sa.Column('last_game_date', sa.DateTime(), nullable=True),
+    sa.Column('last_run_at', sa.DateTime(), nullable=True),
+    sa.Column('last_fetched', sa.Integer(), nullable=False),
+    sa.Column('last_skipped', sa.Integer(), nullable=False),
+    sa.Column('last_written', sa.Integer(), nullable=False),
+    sa.Column('last_duration', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source', 'stream', name='uq_sync_checkpoints_source_stream')
+    )
+    op.create_table('sync_fingerprints',
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('entity', sa.String(length=50), nullable=False),
+    sa.Column('external_id', sa.String(length=50), nullable=False),
+    sa.Column('content_hash', sa.String(length=32), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('source', 'entity', 'external_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_fingerprints')
+    op.drop_table('sync_checkpoints')
@@ -0,0 +1,98 @@
+"""Player season aggregates and team season standings
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('team_season_standings',
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('wins', sa.Integer(), nullable=False),
+    sa.Column('losses', sa.Integer(), nullable=False),
+    sa.Column('points_for', sa.Integer(), nullable=False),
+    sa.Column('points_against', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('team_id', 'season')
+    )
+    op.create_table('player_season_aggregates',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('minutes_played', sa.Float(), nullable=False),
+    sa.Column('points', sa.Integer(), nullable=False),
+    sa.Column('rebounds', sa.Integer(), nullable=False),
+    sa.Column('assists', sa.Integer(), nullable=False),
+    sa.Column('steals', sa.Integer(), nullable=False),
+    sa.Column('blocks', sa.Integer(), nullable=False),
+    sa.Column('turnovers', sa.Integer(), nullable=False),
+    sa.Column('fouls', sa.Integer(), nullable=False),
+    sa.Column('field_goals_made', sa.Integer(), nullable=False),
+    sa.Column('field_goals_attempted', sa.Integer(), nullable=False),
+    sa.Column('three_pointers_made', sa.Integer(), nullable=False),
+    sa.Column('three_pointers_attempted', sa.Integer(), nullable=False),
+    sa.Column('free_throws_made', sa.Integer(), nullable=False),
+    sa.Column('free_throws_attempted', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('player_id', 'season')
+    )
+    with op.batch_alter_table('player_season_aggregates', schema=None) as batch_op:
+        batch_op.create_index('ix_player_season_aggregates_season_points', ['season', 'points'], unique=False)
+
+    # Backfill from existing box scores and results; later writes keep them in step
+    stats = (
+        'minutes_played', 'points', 'rebounds', 'assists', 'steals', 'blocks', 'turnovers', 'fouls',
+        'field_goals_made', 'field_goals_attempted', 'three_pointers_made', 'three_pointers_attempted',
+        'free_throws_made', 'free_throws_attempted',
+    )
+    latest_team = (
+        "(SELECT latest.team_id FROM player_stats latest "
+        "JOIN games latest_game ON latest_game.id = latest.game_id "
+        "WHERE latest.player_id = player_stats.player_id AND latest_game.season = games.season "
+        "ORDER BY latest_game.game_date DESC, latest_game.id DESC LIMIT 1)"
+    )
+    op.execute(
+        f"INSERT INTO player_season_aggregates (player_id, season, team_id, games_played, {', '.join(stats)}) "
+        f"SELECT player_stats.player_id, games.season, {latest_team}, COUNT(player_stats.id), "
+        + ", ".join(f"COALESCE(SUM(player_stats.{stat}), 0)" for stat in stats)
+        + " FROM player_stats JOIN games ON games.id = player_stats.game_id "
+        "GROUP BY player_stats.player_id, games.season"
+    )
+
+    completed = "status = 'completed' AND home_score IS NOT NULL AND away_score IS NOT NULL"
+    op.execute(
+        "INSERT INTO team_season_standings (team_id, season, wins, losses, points_for, points_against) "
+        "SELECT team_id, season, SUM(CASE WHEN scored > allowed THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN scored < allowed THEN 1 ELSE 0 END), SUM(scored), SUM(allowed) "
+        "FROM ("
+        f"SELECT home_team_id AS team_id, season, home_score AS scored, away_score AS allowed FROM games WHERE {completed} "
+        "UNION ALL "
+        f"SELECT away_team_id, season, away_score, home_score FROM games WHERE {completed}"
+        ") AS sides GROUP BY team_id, season"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('player_season_aggregates', schema=None) as batch_op:
+        batch_op.drop_index('ix_player_season_aggregates_season_points')
+
+    op.drop_table('player_season_aggregates')
+    op.drop_table('team_season_standings')
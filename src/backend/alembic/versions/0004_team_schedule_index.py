@@ -0,0 +1,58 @@
+"""Team schedule index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('team_schedule',
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('game_date', sa.DateTime(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('opponent_id', sa.Integer(), nullable=False),
+    sa.Column('is_home', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['opponent_id'], ['teams.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('team_id', 'game_date', 'game_id')
+    )
+    with op.batch_alter_table('team_schedule', schema=None) as batch_op:
+        batch_op.create_index('ix_team_schedule_game_id', ['game_id'], unique=False)
+        batch_op.create_index('ix_team_schedule_team_season_date', ['team_id', 'season', 'game_date', 'game_id'], unique=False)
+
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.create_index('ix_games_game_date', ['game_date'], unique=False)
+
+    # Backfill: one row per side of every existing game
+    op.execute(
+        "INSERT INTO team_schedule (team_id, game_date, game_id, season, opponent_id, is_home) "
+        "SELECT home_team_id, game_date, id, season, away_team_id, TRUE FROM games "
+        "UNION ALL "
+        "SELECT away_team_id, game_date, id, season, home_team_id, FALSE FROM games"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_index('ix_games_game_date')
+
+    with op.batch_alter_table('team_schedule', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_schedule_team_season_date')
+        batch_op.drop_index('ix_team_schedule_game_id')
+
+    op.drop_table('team_schedule')
@@ -0,0 +1,56 @@
+"""Head-to-head team matchups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('team_matchups',
+    sa.Column('min_team_id', sa.Integer(), nullable=False),
+    sa.Column('max_team_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('min_team_wins', sa.Integer(), nullable=False),
+    sa.Column('max_team_wins', sa.Integer(), nullable=False),
+    sa.Column('min_team_points', sa.Integer(), nullable=False),
+    sa.Column('max_team_points', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.CheckConstraint('min_team_id < max_team_id', name='ck_team_matchups_ordered'),
+    sa.ForeignKeyConstraint(['max_team_id'], ['teams.id'], ),
+    sa.ForeignKeyConstraint(['min_team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('min_team_id', 'max_team_id', 'season')
+    )
+
+    # Backfill from completed games; later results arrive through live deltas
+    low = "CASE WHEN home_team_id < away_team_id THEN home_team_id ELSE away_team_id END"
+    high = "CASE WHEN home_team_id < away_team_id THEN away_team_id ELSE home_team_id END"
+    low_points = "CASE WHEN home_team_id < away_team_id THEN home_score ELSE away_score END"
+    high_points = "CASE WHEN home_team_id < away_team_id THEN away_score ELSE home_score END"
+    op.execute(
+        "INSERT INTO team_matchups (min_team_id, max_team_id, season, games_played, min_team_wins, "
+        "max_team_wins, min_team_points, max_team_points) "
+        f"SELECT {low}, {high}, season, COUNT(*), "
+        f"SUM(CASE WHEN {low_points} > {high_points} THEN 1 ELSE 0 END), "
+        f"SUM(CASE WHEN {high_points} > {low_points} THEN 1 ELSE 0 END), "
+        f"SUM({low_points}), SUM({high_points}) "
+        "FROM games WHERE status = 'completed' AND home_score IS NOT NULL AND away_score IS NOT NULL "
+        f"GROUP BY {low}, {high}, season"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('team_matchups')
@@ -0,0 +1,50 @@
+"""Standings box score totals and season indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('team_matchups', schema=None) as batch_op:
+        batch_op.create_index('ix_team_matchups_season', ['season'], unique=False)
+
+    with op.batch_alter_table('team_season_standings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rebounds', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('assists', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_team_season_standings_season', ['season'], unique=False)
+
+    # Backfill from the box scores of each team's completed games
+    for stat in ('rebounds', 'assists'):
+        op.execute(
+            f"UPDATE team_season_standings SET {stat} = COALESCE(("
+            f"SELECT SUM(player_stats.{stat}) FROM player_stats "
+            "JOIN games ON games.id = player_stats.game_id "
+            "WHERE player_stats.team_id = team_season_standings.team_id "
+            "AND games.season = team_season_standings.season "
+            "AND games.status = 'completed' "
+            "AND games.home_score IS NOT NULL AND games.away_score IS NOT NULL), 0)"
+        )
+
+def downgrade() -> None:
+    with op.batch_alter_table('team_season_standings', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_season_standings_season')
+        batch_op.drop_column('assists')
+        batch_op.drop_column('rebounds')
+
+    with op.batch_alter_table('team_matchups', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_matchups_season')
+
@@ -0,0 +1,49 @@
+"""Team Elo ratings
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('team_elo_ratings',
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('game_date', sa.DateTime(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('opponent_id', sa.Integer(), nullable=False),
+    sa.Column('is_home', sa.Boolean(), nullable=False),
+    sa.Column('rating_before', sa.Float(), nullable=False),
+    sa.Column('rating', sa.Float(), nullable=False),
+    sa.Column('win_probability', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['opponent_id'], ['teams.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('team_id', 'game_date', 'game_id')
+    )
+    with op.batch_alter_table('team_elo_ratings', schema=None) as batch_op:
+        batch_op.create_index('ix_team_elo_ratings_game_date', ['game_date'], unique=False)
+        batch_op.create_index('ix_team_elo_ratings_game_id', ['game_id'], unique=False)
+
+    # Ratings need the replay in app.services.elo_service; run the elo.rebuild task after upgrading
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('team_elo_ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_team_elo_ratings_game_id')
+        batch_op.drop_index('ix_team_elo_ratings_game_date')
+
+    op.drop_table('team_elo_ratings')
@@ -0,0 +1,45 @@
+"""Player feature states
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('player_feature_states',
+    sa.Column('player_id', sa.Integer(), nullable=False),
+    sa.Column('season', sa.String(length=7), nullable=False),
+    sa.Column('team_id', sa.Integer(), nullable=True),
+    sa.Column('games_played', sa.Integer(), nullable=False),
+    sa.Column('last_game_id', sa.Integer(), nullable=False),
+    sa.Column('last_game_date', sa.DateTime(), nullable=False),
+    sa.Column('recent', sa.JSON(), nullable=False),
+    sa.Column('window_sums', sa.JSON(), nullable=False),
+    sa.Column('home_games', sa.Integer(), nullable=False),
+    sa.Column('away_games', sa.Integer(), nullable=False),
+    sa.Column('home_totals', sa.JSON(), nullable=False),
+    sa.Column('away_totals', sa.JSON(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['player_id'], ['players.id'], ),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('player_id', 'season')
+    )
+
+    # States are replayed from box scores; run the features.rebuild task for each season after upgrading
+
+
+def downgrade() -> None:
+    op.drop_table('player_feature_states')
@@ -8,9 +8,20 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.etag import generation_etag
 from app.db.database import get_db
+from app.core.config import settings
+from app.services.aggregate_service import LEADER_STATS, latest_season, league_leaders_query
+from app.services.elo_service import EloService
+from app.services.ratings_service import get_season_ratings
+from app.services.standings_service import StandingsService
 
-router = APIRouter()
+# Every analytics response is derived from box scores, games and players (or the
+# season totals built from them), so its ETag changes only when one of those is written.
+router = APIRouter(dependencies=[Depends(generation_etag(
+    "player_stats", "games", "players", "player_season_aggregates", "team_season_standings",
+    "team_elo_ratings",
+))])
 
 
 @router.get("/")
@@ -28,6 +39,7 @@ async def get_analytics_overview():
             "team_comparisons": "/api/analytics/team-comparisons", 
             "player_efficiency": "/api/analytics/player-efficiency",
             "advanced_metrics": "/api/analytics/advanced-metrics",
+            "elo": "/api/analytics/elo",
             "trends": "/api/analytics/trends"
         },
         "focus": "Database optimization, complex queries, and statistical calculations"
@@ -37,29 +49,38 @@ async def get_analytics_overview():
 @router.get("/league-leaders")
 async def get_league_leaders(
     stat: str = Query("points", description="Statistic to rank by (points, rebounds, assists, etc.)"),
-    season: Optional[str] = Query(None, description="Season (e.g., '2023-24')"),
+    season: Optional[str] = Query(None, description="Season (e.g., '2023-24'); defaults to the latest"),
     limit: int = Query(10, ge=1, le=50),
+    min_games: int = Query(1, ge=1, description="Only players with at least this many games"),
     db: Session = Depends(get_db)
 ):
     """
     Get league leaders for various statistics.
     
-    Perfect for showcasing database query optimization skills.
+    Players are ranked by per-game average, read from the season aggregates
+    that live box score deltas keep current (no scan of box scores).
     """
-    # Placeholder for complex SQL queries
+    if stat not in LEADER_STATS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown stat '{stat}' (expected one of {', '.join(LEADER_STATS)})"
+        )
+    season = season or latest_season(db)
+    rows = db.execute(league_leaders_query(season, stat, limit, min_games)).all() if season else []
     return {
-        "message": f"Top {limit} players by {stat} - to be implemented",
-        "sql_query_example": f"""
-        SELECT p.name, AVG(ps.{stat}) as avg_{stat}
-        FROM players p
-        JOIN player_stats ps ON p.id = ps.player_id
-        JOIN games g ON ps.game_id = g.id
-        WHERE g.season = '{season or '2023-24'}'
-        GROUP BY p.id, p.name
-        ORDER BY avg_{stat} DESC
-        LIMIT {limit};
-        """,
-        "focus": "Complex SQL aggregations and performance optimization"
+        "season": season,
+        "stat": stat,
+        "leaders": [
+            {
+                "rank": rank,
+                "player_id": row.player_id,
+                "player_name": row.player_name,
+                "team_id": row.team_id,
+                "games_played": row.games_played,
+                "total": row.total,
+                "per_game": round(row.per_game, 2),
+            }
+            for rank, row in enumerate(rows, start=1)
+        ],
     }
 
 
@@ -128,31 +149,62 @@ async def calculate_player_efficiency(
 @router.get("/advanced-metrics")
 async def get_advanced_metrics(
     metric_type: str = Query("team", description="Type: 'team' or 'player'"),
-    season: Optional[str] = Query(None),
+    season: Optional[str] = Query(None, description="Season (e.g., '2023-24'); defaults to the latest"),
     db: Session = Depends(get_db)
 ):
     """
     Get advanced NBA metrics and analytics.
-    
-    Perfect for showcasing data engineering and analytics expertise.
+
+    Team metrics are opponent-adjusted ratings for every team in the season,
+    solved by least squares over all of its completed games:
+
+    - **offensive_rating** / **defensive_rating**: points scored / allowed per
+      game against an average opponent
+    - **srs**: offensive minus defensive rating (adjusted point margin)
+    - **strength_of_schedule**: srs minus raw margin of victory
+
+    Ratings are cached per season and re-solved when a result changes.
     """
+    if metric_type not in ("team", "player"):
+        raise HTTPException(status_code=400, detail="metric_type must be 'team' or 'player'")
+    if metric_type == "player":
+        return {
+            "message": "Advanced player metrics - to be implemented",
+            "player_metrics": [
+                "Real Plus-Minus",
+                "Defensive Rating",
+                "Assist Rate",
+                "Rebound Rate",
+                "Steal/Block Rates"
+            ],
+        }
+
+    try:
+        season = season or StandingsService(db).latest_season()
+        if season is None:
+            return {"season": None, "games": 0, "teams": []}
+        return get_season_ratings(db, season)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing team ratings: {str(e)}")
+
+
+@router.get("/elo")
+async def get_elo_ratings(db: Session = Depends(get_db)):
+    """
+    Current Elo rating of every team, best first.
+
+    Each team's rating after its latest completed game, with home-court and
+    margin-of-victory adjustments; a team's full series is at
+    /api/teams/{team_id}/elo.
+    """
+    try:
+        teams = EloService(db).current_ratings()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving Elo ratings: {str(e)}")
     return {
-        "message": f"Advanced {metric_type} metrics - to be implemented",
-        "team_metrics": [
-            "Offensive/Defensive Rating",
-            "Pace Factor",
-            "Four Factors (eFG%, TOV%, ORB%, FTR)",
-            "Net Rating",
-            "Strength of Schedule"
-        ],
-        "player_metrics": [
-            "Real Plus-Minus",
-            "Defensive Rating",
-            "Assist Rate",
-            "Rebound Rate",
-            "Steal/Block Rates"
-        ],
-        "implementation_focus": "Complex SQL window functions and statistical calculations"
+        "k_factor": settings.ELO_K_FACTOR,
+        "home_advantage": settings.ELO_HOME_ADVANTAGE,
+        "teams": teams,
     }
 
 
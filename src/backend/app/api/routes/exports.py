@@ -0,0 +1,84 @@
+"""
+Bulk export API routes for NBA Analytics.
+
+Streaming NDJSON/CSV and Arrow/Parquet downloads of box scores, games and
+season aggregates.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.config import settings
+from app.core.profiling import profile_iteration
+from app.db.database import get_db
+from app.services.export_service import (
+    EXPORT_FORMATS,
+    EXPORT_QUERIES,
+    encode_stream,
+    stream_batches,
+)
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_exports_overview():
+    """List the available bulk exports and formats."""
+    return {
+        "message": "NBA Analytics - Bulk Data Export",
+        "datasets": {name: f"/api/exports/{name}" for name in EXPORT_QUERIES},
+        "formats": list(EXPORT_FORMATS) + ["arrow", "parquet"],
+        "filters": ["season", "team_id", "player_id"],
+    }
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("ndjson", description="Output format: 'ndjson', 'csv', 'arrow' or 'parquet'"),
+    season: Optional[str] = Query(None, description="Filter by season (e.g., '2023-24')"),
+    team_id: Optional[int] = Query(None, description="Filter by team ID"),
+    player_id: Optional[int] = Query(None, description="Filter by player ID"),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a dataset as NDJSON, CSV, an Arrow IPC stream or Parquet.
+    
+    Rows are read from a server-side cursor and written in chunks of
+    BATCH_SIZE, so memory use stays flat for multi-season exports.
+    Arrow and Parquet are built from typed column batches and load
+    directly into pandas (`pd.read_parquet`, `pa.ipc.open_stream`).
+    
+    - **dataset**: player-stats, games or season-aggregates
+    - **format**: ndjson (default), csv, arrow or parquet
+    """
+    if dataset not in EXPORT_QUERIES:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset '{dataset}'")
+    if format not in EXPORT_FORMATS and format not in ("arrow", "parquet"):
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+
+    stmt = EXPORT_QUERIES[dataset](season=season, team_id=team_id, player_id=player_id)
+    # The stream outlives the request's session, so it reads through its own connection
+    engine = db.get_bind()
+    filename = "_".join(filter(None, [dataset.replace("-", "_"), season])) + f".{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+    if format in EXPORT_FORMATS:
+        batches = stream_batches(engine, stmt, batch_size=settings.BATCH_SIZE)
+        return StreamingResponse(
+            profile_iteration(encode_stream(batches, format)),
+            media_type=EXPORT_FORMATS[format],
+            headers=headers,
+        )
+
+    # pyarrow is only needed for columnar exports, so import it on demand
+    from app.services.arrow_service import ARROW_FORMATS, ENCODERS, arrow_schema, record_batches
+
+    batches = record_batches(engine, stmt, batch_size=settings.BATCH_SIZE)
+    return StreamingResponse(
+        profile_iteration(ENCODERS[format](batches, arrow_schema(stmt))),
+        media_type=ARROW_FORMATS[format],
+        headers=headers,
+    )
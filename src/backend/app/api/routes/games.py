@@ -0,0 +1,119 @@
+"""
+Game API routes for NBA Analytics.
+
+Endpoints for game search, daily slates and team schedules.
+"""
+
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.core.etag import etag_matches, generation_etag, make_etag, not_modified
+from app.core.serialization import fast_json_response, fast_responses_enabled, get_serializer
+from app.db.database import get_db
+from app.schemas import Game, GameSearch, GameStatus, PaginatedResponse
+from app.services.game_service import GameService
+
+router = APIRouter()
+
+# List responses change whenever a game or team is written
+_games_etag = generation_etag("games", "teams")
+
+
+@router.get("/", response_model=PaginatedResponse, dependencies=[Depends(_games_etag)])
+async def search_games(
+    season: Optional[str] = Query(None, description="Season (e.g., '2023-24')"),
+    team_id: Optional[int] = Query(None, description="Games where this team is home or away"),
+    date_from: Optional[datetime] = Query(None, description="Earliest game date (inclusive)"),
+    date_to: Optional[datetime] = Query(None, description="Latest game date (inclusive)"),
+    status: Optional[GameStatus] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Search games in date order.
+
+    - **team_id**: read from the per-team schedule index, so home and away
+      games come from one index range
+    - **season** / **date_from** / **date_to**: range on (season, game_date)
+    """
+    try:
+        search = GameSearch(
+            season=season, team_id=team_id, date_from=date_from, date_to=date_to,
+            status=status, limit=limit, offset=offset
+        )
+        games, total = GameService(db).search_games(search)
+        return {
+            "items": get_serializer(Game).to_list(games),
+            "total": total,
+            "limit": limit,
+            "offset": offset,
+            "has_next": offset + len(games) < total,
+            "has_previous": offset > 0,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching games: {str(e)}")
+
+
+@router.get("/on/{day}", response_model=List[Game], dependencies=[Depends(_games_etag)])
+async def get_games_on(day: date, response: Response, db: Session = Depends(get_db)):
+    """All games on a calendar day (YYYY-MM-DD), in tip-off order."""
+    try:
+        games = GameService(db).get_games_on(day)
+        if fast_responses_enabled():
+            return fast_json_response(games, Game, response=response)
+        return games
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving games: {str(e)}")
+
+
+# No generation ETag: with the default window the answer moves with the clock
+@router.get("/schedule/{team_id}", response_model=List[Game])
+async def get_team_schedule(
+    team_id: int,
+    response: Response,
+    after: Optional[datetime] = Query(None, description="Start of the window (default: now)"),
+    limit: int = Query(5, ge=1, le=82, description="Number of games"),
+    db: Session = Depends(get_db)
+):
+    """A team's next games, home and away, from the per-team schedule index."""
+    try:
+        games = GameService(db).get_team_schedule(team_id, after=after, limit=limit)
+        if fast_responses_enabled():
+            return fast_json_response(games, Game, response=response)
+        return games
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving schedule: {str(e)}")
+
+
+@router.get("/{game_id}", response_model=Game)
+async def get_game(
+    game_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """
+    Get a specific game by ID, with both teams.
+
+    Supports conditional GET via ETag / If-None-Match.
+    """
+    try:
+        game_service = GameService(db)
+
+        version = game_service.get_game_version(game_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        etag = make_etag("game", game_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+
+        return game_service.get_game_by_id(game_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving game: {str(e)}")
@@ -0,0 +1,161 @@
+"""
+Live game API routes for NBA Analytics.
+
+Push score and box-score updates for a game over Server-Sent Events or a
+WebSocket instead of having clients poll, and accept the live deltas that
+feed them.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.live import Subscriber, live_hub
+from app.core.security import require_admin_token
+from app.core.serialization import dumps
+from app.core.tasks import get_task_queue
+from app.db.database import engine
+from app.schemas import LiveGameDelta
+from app.services import task_service  # noqa: F401  (registers games.reconcile)
+from app.services.live_service import game_snapshot
+from app.services.live_stats_service import LiveStatsService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {dumps(payload).decode()}\n\n"
+
+
+async def _event_stream(game_id: int, snapshot: dict, subscriber: Subscriber) -> AsyncIterator[str]:
+    try:
+        yield "retry: 3000\n" + _sse("snapshot", snapshot)
+        while True:
+            batch = await subscriber.next_batch(timeout=settings.LIVE_HEARTBEAT_INTERVAL)
+            if batch is None:
+                snapshot = await run_in_threadpool(game_snapshot, engine, game_id)
+                yield _sse("snapshot", snapshot)
+            elif batch:
+                yield _sse("update", batch)
+            else:
+                yield ": keep-alive\n\n"
+    finally:
+        live_hub.unsubscribe(subscriber)
+
+
+@router.get("/games/{game_id}/events")
+async def game_events(game_id: int):
+    """
+    Server-Sent Events stream of a game's live updates.
+
+    The first `snapshot` event holds the current score and box score; each
+    `update` event is a list of patches (`score` or `box_score`) carrying the
+    new values of the fields that changed. Updates arriving in quick
+    succession are merged into one event. A client that falls far behind
+    receives a new snapshot instead of the backlog.
+    """
+    # Subscribe before reading the snapshot so nothing committed in between is
+    # missed; patches carry absolute values, so re-applying one is harmless
+    subscriber = live_hub.subscribe(game_id)
+    snapshot = await run_in_threadpool(game_snapshot, engine, game_id)
+    if snapshot is None:
+        live_hub.unsubscribe(subscriber)
+        raise HTTPException(status_code=404, detail="Game not found")
+    return StreamingResponse(
+        _event_stream(game_id, snapshot, subscriber),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            # Keep GZipMiddleware from buffering events inside the compressor
+            "Content-Encoding": "identity",
+        },
+    )
+
+
+async def _send_updates(websocket: WebSocket, game_id: int, snapshot: dict, subscriber: Subscriber) -> None:
+    message = snapshot
+    while True:
+        await asyncio.wait_for(websocket.send_text(dumps(message).decode()), settings.LIVE_SEND_TIMEOUT)
+        batch = await subscriber.next_batch(timeout=settings.LIVE_HEARTBEAT_INTERVAL)
+        if batch is None:
+            message = await run_in_threadpool(game_snapshot, engine, game_id)
+        elif batch:
+            message = {"type": "update", "game_id": game_id, "updates": batch}
+        else:
+            message = {"type": "heartbeat", "game_id": game_id}
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    # Incoming messages are ignored; reading them is how a closed socket is noticed
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/games/{game_id}/ws")
+async def game_websocket(websocket: WebSocket, game_id: int):
+    """
+    WebSocket feed of a game's live updates.
+
+    Sends the same messages as the SSE stream as JSON text frames: a
+    snapshot, then lists of patches, with heartbeats while the game is idle.
+    Clients that cannot take a message within LIVE_SEND_TIMEOUT are
+    disconnected.
+    """
+    subscriber = live_hub.subscribe(game_id)
+    try:
+        snapshot = await run_in_threadpool(game_snapshot, engine, game_id)
+        if snapshot is None:
+            await websocket.close(code=1008, reason="Game not found")
+            return
+        await websocket.accept()
+        sender = asyncio.ensure_future(_send_updates(websocket, game_id, snapshot, subscriber))
+        receiver = asyncio.ensure_future(_wait_for_disconnect(websocket))
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if sender in done and isinstance(sender.exception(), asyncio.TimeoutError):
+            logger.info(f"Disconnecting slow live subscriber for game {game_id}")
+            try:
+                await websocket.close(code=1013, reason="Too slow")
+            except Exception:
+                pass
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        live_hub.unsubscribe(subscriber)
+
+
+@router.post("/games/{game_id}/deltas", dependencies=[Depends(require_admin_token)])
+def apply_game_deltas(game_id: int, delta: LiveGameDelta):
+    """
+    Apply a batch of live changes to a game and its box score.
+
+    Send only what changed: new score fields in `game` and, per player, the
+    box score fields with their new values. Season aggregates, leaders and
+    standings are adjusted by the differences, and subscribers of the game
+    receive the changes. When the game becomes final, a games.reconcile task
+    checks the running totals against a full recompute. Unknown players get
+    a 404 and players on neither team a 422; the batch is then not applied.
+    """
+    try:
+        result = LiveStatsService(engine).apply(
+            game_id,
+            delta.game.model_dump(mode="json", exclude_unset=True) if delta.game else None,
+            [b.model_dump(exclude_unset=True) for b in delta.box_scores],
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    response = result.as_dict()
+    if result.completed:
+        task, _ = get_task_queue().submit("games.reconcile", {"game_id": game_id})
+        response["reconcile_task"] = f"/api/tasks/status/{task['id']}"
+    return response
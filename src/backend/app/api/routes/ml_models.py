@@ -4,12 +4,19 @@ Machine Learning API routes for NBA Analytics.
 ML model endpoints for predictions and advanced analytics.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.db.database import get_db
-from app.schemas import PredictionRequest, PredictionResponse
+from app.schemas import PlayerPerformanceRequest, PredictionRequest, PredictionResponse
+from app.services.prediction_service import FEATURES, TARGETS, predict_players
+from app.services.simulation_service import latest_season, model_version, simulate_season
 
 router = APIRouter()
 
@@ -28,7 +35,8 @@ async def get_ml_overview():
             "game_predictor": "Predict game outcomes based on team statistics",
             "player_performance": "Predict individual player performance",
             "injury_risk": "Assess player injury risk factors",
-            "draft_analytics": "College to NBA transition predictions"
+            "draft_analytics": "College to NBA transition predictions",
+            "season_simulator": "Monte Carlo playoff, seed and win-total odds from Elo ratings"
         },
         "ml_engineering_features": [
             "Model versioning and A/B testing",
@@ -81,41 +89,77 @@ async def predict_game_outcome(
 
 @router.post("/predict/player-performance")
 async def predict_player_performance(
-    player_id: int,
-    game_id: Optional[int] = None,
-    opponent_team_id: Optional[int] = None,
+    prediction_request: PlayerPerformanceRequest,
     db: Session = Depends(get_db)
 ):
     """
-    Predict individual player performance for upcoming games.
-    
-    Demonstrates time-series forecasting and feature engineering.
+    Predict points, rebounds, assists and minutes for a batch of players.
+
+    Each player's game on game_date is found on their team's schedule.
+    Features come from stored per-player state (rolling 5/10/20-game
+    averages, home/away splits, rest days, opponent points allowed), and
+    the whole batch is scored in one model call. Until the first model has
+    been trained (predictions.train, queued by the first request) this
+    returns 503.
     """
-    return {
-        "message": f"Player performance prediction for player {player_id} - to be implemented",
-        "prediction_targets": [
-            "Points scored",
-            "Rebounds",
-            "Assists", 
-            "Field goal percentage",
-            "Minutes played",
-            "Plus/minus"
-        ],
-        "feature_engineering": [
-            "Rolling averages (5, 10, 20 games)",
-            "Opponent defensive ratings",
-            "Rest days between games",
-            "Home vs away performance",
-            "Historical matchup performance",
-            "Seasonal trends and fatigue"
-        ],
-        "model_architecture": {
-            "type": "Multi-output regression",
-            "algorithm": "Random Forest + XGBoost ensemble", 
-            "validation": "Time-series cross-validation",
-            "feature_selection": "Recursive feature elimination"
-        }
-    }
+    try:
+        result = await run_in_threadpool(
+            predict_players,
+            db,
+            prediction_request.player_ids,
+            prediction_request.game_date or date.today(),
+            prediction_request.season,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error predicting player performance: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=503, detail="The player performance model is not trained yet; try again shortly")
+    return {**result, "targets": list(TARGETS), "features_used": list(FEATURES[1:])}
+
+
+@router.get("/simulate/season")
+def simulate_season_outcomes(
+    request: Request,
+    response: Response,
+    season: Optional[str] = Query(None, description="Season to simulate (defaults to the latest)"),
+    as_of_date: Optional[date] = Query(None, description="Simulate from this date (defaults to today)"),
+    simulations: int = Query(10000, ge=100, le=settings.SIMULATION_MAX_RUNS),
+    db: Session = Depends(get_db)
+):
+    """
+    Monte Carlo simulation of the rest of a regular season.
+
+    Games completed before as_of_date stand; every other game is drawn from
+    Elo win probabilities. Returns each team's playoff, play-in and seed
+    probabilities and its win-total distribution, by conference. Results
+    are cached per (season, as_of_date, model version, simulations).
+
+    The ETag is built from the resolved season and as_of_date, so a request
+    that relies on the defaults is not revalidated across days or seasons.
+    A sync route: the season lookup, the cache generation read and the
+    simulation all block, so they run in the threadpool.
+    """
+    try:
+        season = season or latest_season(db)
+        as_of_date = as_of_date or date.today()
+        etag = make_etag(
+            "simulation",
+            season,
+            as_of_date.isoformat(),
+            model_version(),
+            simulations,
+            cache.generation("games", "team_elo_ratings"),
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+
+        result = simulate_season(db, season, as_of_date, simulations) if season else None
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error simulating season: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="No regular season games found")
+    return result
 
 
 @router.get("/models/status")
@@ -4,12 +4,15 @@ Player API routes for NBA Analytics.
 Endpoints for player data, statistics, and analytics.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.etag import etag_matches, generation_etag, make_etag, not_modified
+from app.core.serialization import fast_json_response, fast_responses_enabled
 from app.db.database import get_db
 from app.schemas import Player, PlayerCreate, PlayerUpdate, PlayerSearch, PlayerAnalytics
+from app.services.percentile_service import get_index, latest_player_season, player_profile
 from app.services.player_service import PlayerService
 
 router = APIRouter()
@@ -42,6 +45,9 @@ async def get_players(
             position=position,
             is_active=is_active
         )
+        if fast_responses_enabled():
+            # Rows come straight from our own tables; skip response_model re-validation
+            return fast_json_response(players, Player)
         return players
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving players: {str(e)}")
@@ -68,20 +74,38 @@ async def search_players(
             team_name=team_name,
             limit=limit
         )
+        if fast_responses_enabled():
+            return fast_json_response(players, Player)
         return players
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error searching players: {str(e)}")
 
 
 @router.get("/{player_id}", response_model=Player)
-async def get_player(player_id: int, db: Session = Depends(get_db)):
+async def get_player(
+    player_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """
     Get a specific player by ID.
     
     Returns detailed player information including team data.
+    Supports conditional GET via ETag / If-None-Match.
     """
     try:
         player_service = PlayerService(db)
+        
+        version = player_service.get_player_version(player_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Player not found")
+        
+        etag = make_etag("player", player_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
         player = player_service.get_player_by_id(player_id)
         
         if not player:
@@ -168,6 +192,38 @@ async def get_player_analytics(
         raise HTTPException(status_code=500, detail=f"Error calculating player analytics: {str(e)}")
 
 
+@router.get(
+    "/{player_id}/percentiles",
+    dependencies=[Depends(generation_etag("player_season_aggregates", "players"))],
+)
+async def get_player_percentiles(
+    player_id: int,
+    season: Optional[str] = Query(None, description="Season (defaults to the player's latest)"),
+    db: Session = Depends(get_db)
+):
+    """
+    A player's full percentile profile in one call.
+
+    For every per-game and efficiency stat (points, rebounds, assists, TS%,
+    usage, ...): the player's value and its rank and percentile among the
+    league's and the player's position's qualified players. Looked up by
+    bisection in a precomputed per-season index.
+    """
+    try:
+        player = PlayerService(db).get_player_by_id(player_id)
+        if not player:
+            raise HTTPException(status_code=404, detail="Player not found")
+        season = season or latest_player_season(db, player_id)
+        profile = player_profile(get_index(db, season), player_id) if season else None
+        if profile is None:
+            raise HTTPException(status_code=404, detail=f"No season totals found for player {player_id}")
+        return {"player_name": player.name, **profile}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving player percentiles: {str(e)}")
+
+
 @router.get("/{player_id}/similar")
 async def get_similar_players(
     player_id: int,
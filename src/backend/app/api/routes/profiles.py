@@ -0,0 +1,47 @@
+"""
+Profiling admin API routes for NBA Analytics.
+
+List and download request profiles captured by the profiling middleware.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import Optional
+
+from app.core.profiling import profile_path, read_index
+from app.core.security import require_admin_token
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/")
+async def list_profiles(
+    limit: int = Query(20, ge=1, le=200),
+    route: Optional[str] = Query(None, description="Only profiles for this route template"),
+):
+    """
+    List captured profiles, slowest first.
+    
+    Each entry has the request's route, status and duration, plus the id used
+    to download the profile (.prof for cProfile/snakeviz, .html for pyinstrument).
+    """
+    entries = read_index()
+    if route:
+        entries = [e for e in entries if e.get("route") == route]
+    entries.sort(key=lambda e: e["duration_ms"], reverse=True)
+    return {
+        "total": len(entries),
+        "profiles": [
+            {**entry, "download_url": f"/api/admin/profiles/{entry['id']}"}
+            for entry in entries[:limit]
+        ],
+    }
+
+
+@router.get("/{profile_id}")
+async def download_profile(profile_id: str):
+    """Download a stored profile."""
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=path.rsplit("/", 1)[-1])
@@ -0,0 +1,59 @@
+"""
+Background task API routes for NBA Analytics.
+
+Trigger ingestion and recomputation tasks and poll their status. Task
+parameters and results name internal data, so every route needs the admin
+token.
+"""
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from typing import Any, Dict, Optional
+
+from app.core.security import require_admin_token
+from app.core.tasks import TASK_REGISTRY, UnknownTask, get_task_queue
+from app.services import task_service  # noqa: F401  (registers the tasks)
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/")
+async def list_tasks(limit: int = Query(20, ge=1, le=200)):
+    """Registered task names and the most recent submissions, newest first."""
+    return {
+        "available": sorted(TASK_REGISTRY),
+        "tasks": get_task_queue().recent(limit),
+    }
+
+
+@router.post("/{name}", status_code=202)
+def submit_task(
+    name: str,
+    response: Response,
+    params: Dict[str, Any] = Body(default_factory=dict),
+    idempotency_key: Optional[str] = Header(None),
+):
+    """
+    Start a background task and return its status record.
+
+    The JSON body holds the task parameters (e.g. `{"season": "2023-24"}` for
+    aggregates.rebuild). If the same task with the same parameters (or the
+    same Idempotency-Key header) is still pending or running, that task is
+    returned with 200 instead of starting a duplicate.
+    """
+    try:
+        task, created = get_task_queue().submit(name, params, key=idempotency_key)
+    except UnknownTask:
+        raise HTTPException(status_code=404, detail=f"Unknown task '{name}'")
+    response.headers["Location"] = f"/api/tasks/status/{task['id']}"
+    if not created:
+        response.status_code = 200
+    return {**task, "deduplicated": not created}
+
+
+@router.get("/status/{task_id}")
+async def get_task_status(task_id: str):
+    """Status, chunk progress and summed result counts of a task."""
+    task = get_task_queue().status(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
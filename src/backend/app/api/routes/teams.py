@@ -4,18 +4,25 @@ Team API routes for NBA Analytics.
 Endpoints for team data, statistics, and analytics.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from app.core.etag import etag_matches, generation_etag, make_etag, not_modified
+from app.core.serialization import fast_json_response, fast_responses_enabled
 from app.db.database import get_db
-from app.schemas import Team, TeamCreate, TeamUpdate, TeamAnalytics
+from app.schemas import HeadToHead, Player, Team, TeamCreate, TeamEloHistory, TeamUpdate, TeamAnalytics
+from app.services.elo_service import EloService
+from app.services.standings_service import STANDINGS_GROUPS, StandingsService
+from app.services.team_service import TeamService
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[Team])
 async def get_teams(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(30, ge=1, le=50),
     conference: Optional[str] = Query(None, description="Filter by conference (Eastern/Western)"),
@@ -26,45 +33,183 @@ async def get_teams(
     Get list of NBA teams with optional filtering.
     
     Perfect for populating dropdowns and team selection interfaces.
+    Supports conditional GET via ETag / If-None-Match.
     """
-    # Placeholder implementation
-    return {
-        "message": "Teams endpoint - to be implemented",
-        "parameters": {
-            "skip": skip,
-            "limit": limit,
-            "conference": conference,
-            "is_active": is_active
-        }
-    }
+    try:
+        team_service = TeamService(db)
+        
+        version = team_service.get_teams_version(conference=conference, is_active=is_active)
+        etag = make_etag("teams", version, skip, limit, conference, is_active)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        return team_service.get_teams(
+            skip=skip,
+            limit=limit,
+            conference=conference,
+            is_active=is_active
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving teams: {str(e)}")
+
+
+@router.get(
+    "/standings",
+    dependencies=[Depends(generation_etag("team_season_standings", "team_matchups", "teams"))],
+)
+async def get_standings(
+    season: Optional[str] = Query(None, description="Season (e.g., '2023-24'); defaults to the latest"),
+    group: str = Query("conference", description="league, conference or division"),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranked standings with games behind, conference and division records.
+
+    Ties on win percentage are broken by head-to-head record among the
+    tied teams, then division record (same division only), conference
+    record and point differential.
+    """
+    if group not in STANDINGS_GROUPS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown group '{group}' (expected one of {', '.join(STANDINGS_GROUPS)})"
+        )
+    try:
+        standings_service = StandingsService(db)
+        season = season or standings_service.latest_season()
+        groups = standings_service.get_standings(season, group) if season else {}
+        return {"season": season, "group": group, "standings": groups}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving standings: {str(e)}")
 
 
 @router.get("/{team_id}", response_model=Team)
-async def get_team(team_id: int, db: Session = Depends(get_db)):
+async def get_team(
+    team_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get a specific team by ID."""
-    # Placeholder implementation
-    return {
-        "message": f"Get team {team_id} - to be implemented"
-    }
+    try:
+        team_service = TeamService(db)
+        
+        version = team_service.get_team_version(team_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Team not found")
+        
+        etag = make_etag("team", team_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        return team_service.get_team_by_id(team_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving team: {str(e)}")
 
 
-@router.get("/{team_id}/players")
-async def get_team_roster(team_id: int, db: Session = Depends(get_db)):
+@router.get("/{team_id}/players", response_model=List[Player])
+async def get_team_roster(
+    team_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """Get current roster for a team."""
-    # Placeholder implementation
-    return {
-        "message": f"Get roster for team {team_id} - to be implemented"
-    }
+    try:
+        team_service = TeamService(db)
+        
+        team_version = team_service.get_team_version(team_id)
+        if team_version is None:
+            raise HTTPException(status_code=404, detail="Team not found")
+        
+        etag = make_etag("roster", team_id, team_version, team_service.get_roster_version(team_id))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        
+        roster = team_service.get_roster(team_id)
+        if fast_responses_enabled():
+            return fast_json_response(roster, Player, response=response)
+        return roster
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving roster: {str(e)}")
+
+
+@router.get(
+    "/{team_id}/vs/{other_id}",
+    response_model=HeadToHead,
+    dependencies=[Depends(generation_etag("team_matchups"))],
+)
+async def get_head_to_head(
+    team_id: int,
+    other_id: int,
+    season: Optional[str] = Query(None, description="Only this season (e.g., '2023-24')"),
+    db: Session = Depends(get_db)
+):
+    """
+    Head-to-head record of a team against another, season by season.
+
+    Includes wins, losses and average margin from the first team's side and
+    the running series record after each season.
+    """
+    if team_id == other_id:
+        raise HTTPException(status_code=400, detail="A team has no head-to-head record against itself")
+    try:
+        return TeamService(db).get_head_to_head(team_id, other_id, season=season)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving head-to-head record: {str(e)}")
 
 
-@router.get("/{team_id}/analytics", response_model=TeamAnalytics)
+@router.get(
+    "/{team_id}/analytics",
+    response_model=TeamAnalytics,
+    dependencies=[Depends(generation_etag("team_season_standings", "teams"))],
+)
 async def get_team_analytics(
     team_id: int,
-    season: Optional[str] = Query(None),
+    season: Optional[str] = Query(None, description="Season (e.g., '2023-24'); defaults to the team's latest"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a team's season record and per-game averages.
+
+    Read from the team's standings row, which is updated as each game is
+    completed, so no games are aggregated per request.
+    """
+    try:
+        analytics = StandingsService(db).get_team_analytics(team_id, season=season)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving team analytics: {str(e)}")
+    if analytics is None:
+        raise HTTPException(status_code=404, detail="No standings for this team and season")
+    return analytics
+
+
+@router.get(
+    "/{team_id}/elo",
+    response_model=TeamEloHistory,
+    dependencies=[Depends(generation_etag("team_elo_ratings"))],
+)
+async def get_team_elo(
+    team_id: int,
+    season: Optional[str] = Query(None, description="Only this season (e.g., '2023-24')"),
     db: Session = Depends(get_db)
 ):
-    """Get advanced analytics for a team."""
-    # Placeholder implementation
-    return {
-        "message": f"Get analytics for team {team_id} - to be implemented"
-    }
+    """
+    A team's Elo rating before and after each completed game, in date order.
+
+    Ratings are written as games complete, so this is one index range of
+    team_elo_ratings.
+    """
+    try:
+        history = EloService(db).team_history(team_id, season=season)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving Elo ratings: {str(e)}")
+    if not history:
+        raise HTTPException(status_code=404, detail="No Elo ratings for this team and season")
+    return {"team_id": team_id, "rating": history[-1].rating, "history": history}
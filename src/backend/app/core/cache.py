@@ -0,0 +1,500 @@
+"""
+Two-level cache for NBA Analytics API.
+
+L1 is a small in-process TTL cache per worker, L2 is Redis shared by all
+workers. Entries carry invalidation tags (e.g. "player:23", "season:2023-24")
+so a write can evict exactly the entries it affects instead of waiting for
+the TTL. Tag invalidations are broadcast over Redis pub/sub so every worker
+drops its L1 copies too.
+
+get_or_set runs one load per key at a time in each process, and does not
+store a value whose tags were invalidated while it was loading: such a value
+may have been read before the write and would otherwise be served until the
+TTL expires.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+import json
+import logging
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_TAG_KEY_PREFIX = "nba:cache:tag:"
+_VALUE_KEY_PREFIX = "nba:cache:key:"
+_GENERATION_KEY_PREFIX = "nba:cache:gen:"
+
+
+class LocalCache:
+    """
+    Thread-safe in-process TTL cache with a tag index.
+
+    Oldest entries are evicted first once max_entries is reached.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value) for a key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return False, None
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        tags = tuple(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while len(self._entries) >= self.max_entries:
+                self._remove(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Evict every entry carrying any of the tags. Returns the number evicted."""
+        evicted = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        # Caller must hold the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class PubSubListener:
+    """
+    Background thread handing the messages of a Redis pub/sub channel to a handler.
+
+    The subscription survives Redis restarts: on a connection error the
+    thread resubscribes with exponential backoff (capped at max_backoff).
+    Messages published while disconnected are lost, so on_reconnect runs
+    after every resubscribe to let the owner resynchronize.
+    """
+
+    def __init__(
+        self,
+        client_provider: Callable[[], Any],
+        channel: str,
+        handler: Callable[[Any], None],
+        name: str,
+        on_reconnect: Optional[Callable[[], None]] = None,
+        initial_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+    ):
+        self.client_provider = client_provider
+        self.channel = channel
+        self.handler = handler
+        self.name = name
+        self.on_reconnect = on_reconnect
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.reconnects = 0
+        self._pubsub = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def subscribed(self) -> bool:
+        return self._pubsub is not None
+
+    def start(self) -> None:
+        # Subscribe before returning when Redis is up, so nothing published from here on is missed
+        self._subscribe()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _subscribe(self) -> bool:
+        client = self.client_provider()
+        if client is None:
+            return False
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(self.channel)
+        except Exception as e:
+            logger.warning(f"{self.name} could not subscribe to {self.channel}: {e}")
+            return False
+        self._pubsub = pubsub
+        return True
+
+    def _close(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        backoff = self.initial_backoff
+        while not self._stop.is_set():
+            if self._pubsub is None:
+                if not self._subscribe():
+                    self._stop.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+                self.reconnects += 1
+                logger.info(f"{self.name} resubscribed to {self.channel}")
+                if self.on_reconnect is not None:
+                    self.on_reconnect()
+            try:
+                message = self._pubsub.get_message(timeout=1.0)
+            except Exception as e:
+                logger.error(f"{self.name} lost its subscription, retrying in {backoff:.1f}s: {e}")
+                self._close()
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            backoff = self.initial_backoff
+            if message is not None:
+                try:
+                    self.handler(message.get("data"))
+                except Exception as e:
+                    logger.warning(f"{self.name} failed to handle a message: {e}")
+        self._close()
+
+
+class Cache:
+    """
+    L1 (in-process) + L2 (Redis) cache with tag-based invalidation.
+
+    Redis is optional: if it cannot be reached the cache degrades to L1 only,
+    which is what development and tests use, and tries to connect again every
+    reconnect_interval seconds. Values stored in L2 must be JSON serializable,
+    so cache plain dicts/lists rather than ORM objects.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        default_ttl: int = 3600,
+        l1_ttl: int = 60,
+        l1_max_entries: int = 10000,
+        channel: str = "nba:cache:invalidate",
+        reconnect_interval: float = 30.0,
+    ):
+        self.redis_url = redis_url
+        self.default_ttl = default_ttl
+        self.l1_ttl = l1_ttl
+        self.channel = channel
+        self.reconnect_interval = reconnect_interval
+        self.local = LocalCache(max_entries=l1_max_entries)
+        self.instance_id = uuid.uuid4().hex
+        self.hits = 0
+        self.misses = 0
+        self._redis = None
+        self._redis_retry_at = 0.0
+        self._redis_lock = threading.Lock()
+        self._listener: Optional[PubSubListener] = None
+        self._generations: Dict[str, int] = {}
+        self._generation_epoch = 0  # Bumped when missed invalidations make every local generation suspect
+        self._generation_lock = threading.Lock()
+        self._loading: Dict[str, list] = {}
+        self._loading_lock = threading.Lock()
+
+    # Redis connection
+
+    @property
+    def redis(self):
+        """
+        Lazily connect to Redis, or return None if it is unavailable.
+
+        A failed connection is retried after reconnect_interval seconds. Once
+        connected the client is kept: redis-py reconnects it per command.
+        """
+        if self._redis is not None or not self.redis_url:
+            return self._redis
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        with self._redis_lock:
+            if self._redis is not None or time.monotonic() < self._redis_retry_at:
+                return self._redis
+            try:
+                import redis
+
+                client = redis.Redis.from_url(self.redis_url, socket_connect_timeout=0.5)
+                client.ping()
+                self._redis = client
+                logger.info("Cache L2 connected to Redis")
+            except Exception as e:
+                self._redis_retry_at = time.monotonic() + self.reconnect_interval
+                logger.warning(
+                    f"Redis unavailable, using in-process cache only (retrying in {self.reconnect_interval:g}s): {e}"
+                )
+        return self._redis
+
+    # Read / write
+
+    def get(self, key: str) -> Optional[Any]:
+        found, value = self.local.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        client = self.redis
+        if client is not None:
+            try:
+                raw = client.get(_VALUE_KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"Cache L2 read failed for {key}: {e}")
+                raw = None
+            if raw is not None:
+                payload = json.loads(raw)
+                self.local.set(key, payload["v"], self.l1_ttl, payload.get("t", ()))
+                self.hits += 1
+                return payload["v"]
+
+        self.misses += 1
+        return None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        ttl = ttl or self.default_ttl
+        tags = tuple(tags)
+        self.local.set(key, value, min(ttl, self.l1_ttl), tags)
+
+        client = self.redis
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            pipe.set(_VALUE_KEY_PREFIX + key, json.dumps({"v": value, "t": tags}, default=str), ex=ttl)
+            for tag in tags:
+                pipe.sadd(_TAG_KEY_PREFIX + tag, key)
+                pipe.expire(_TAG_KEY_PREFIX + tag, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cache L2 write failed for {key}: {e}")
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+
+        Concurrent misses for a key in this process wait for a single load.
+        The loaded value is returned but not kept if any of its tags was
+        invalidated while it loaded.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        tags = tuple(tags)
+        with self._load_lock(key):
+            # Whoever held the lock may have stored the value already
+            found, value = self.local.get(key)
+            if found:
+                return value
+            before = self.generation(*tags) if tags else None
+            value = loader()
+            if value is None or (tags and self.generation(*tags) != before):
+                if value is not None:
+                    logger.debug(f"Not caching {key}: {tags} invalidated during load")
+                return value
+            self.set(key, value, ttl=ttl, tags=tags)
+            # An invalidation between the check and the write may have missed the new entry
+            if tags and self.generation(*tags) != before:
+                self.delete(key)
+        return value
+
+    @contextmanager
+    def _load_lock(self, key: str):
+        with self._loading_lock:
+            entry = self._loading.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._loading_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._loading[key]
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        client = self.redis
+        if client is not None:
+            try:
+                client.delete(_VALUE_KEY_PREFIX + key)
+            except Exception as e:
+                logger.warning(f"Cache L2 delete failed for {key}: {e}")
+
+    # Invalidation
+
+    def invalidate_tags(self, tags: Iterable[str], broadcast: bool = True) -> None:
+        """
+        Evict every entry tagged with any of the given tags.
+
+        Evicts this worker's L1 and the shared L2, then publishes the tags so
+        the other workers evict their own L1 copies.
+        """
+        tags = sorted(set(tags))
+        if not tags:
+            return
+        self._bump_generations(tags)
+        evicted = self.local.invalidate_tags(tags)
+        logger.debug(f"Invalidated {evicted} local cache entries for tags {tags}")
+
+        client = self.redis
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            for tag in tags:
+                pipe.smembers(_TAG_KEY_PREFIX + tag)
+            members = pipe.execute()
+            keys = {_VALUE_KEY_PREFIX + k.decode() for group in members for k in group}
+            pipe = client.pipeline()
+            if keys:
+                pipe.delete(*keys)
+            pipe.delete(*[_TAG_KEY_PREFIX + tag for tag in tags])
+            for tag in tags:
+                pipe.incr(_GENERATION_KEY_PREFIX + tag)
+            if broadcast:
+                pipe.publish(self.channel, json.dumps({"origin": self.instance_id, "tags": tags}))
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cache L2 invalidation failed for tags {tags}: {e}")
+
+    def _bump_generations(self, tags: Iterable[str]) -> None:
+        with self._generation_lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def generation(self, *tags: str) -> str:
+        """
+        Return an opaque token that changes whenever any of the tags is invalidated.
+
+        Backed by Redis counters when available so the token is the same on
+        every worker; otherwise the token is scoped to this process.
+        """
+        client = self.redis
+        if client is not None:
+            try:
+                values = client.mget([_GENERATION_KEY_PREFIX + tag for tag in tags])
+                return ".".join((v or b"0").decode() for v in values)
+            except Exception as e:
+                logger.warning(f"Cache generation read failed for {tags}: {e}")
+        counts = ".".join(str(self._generations.get(tag, 0)) for tag in tags)
+        return f"{self.instance_id}.{self._generation_epoch}.{counts}"
+
+    def start_invalidation_listener(self) -> None:
+        """
+        Subscribe to invalidation broadcasts from other workers (no-op without a Redis URL).
+
+        The subscription is retried in the background if Redis is down or
+        drops it; after a resubscribe this worker's L1 is cleared and its
+        local generations are invalidated, since invalidations sent in the
+        meantime were missed.
+        """
+        if not self.redis_url or self._listener is not None:
+            return
+        self._listener = PubSubListener(
+            lambda: self.redis,
+            self.channel,
+            self._handle_message,
+            name="cache-invalidation-listener",
+            on_reconnect=self._resync,
+            initial_backoff=min(0.5, self.reconnect_interval),
+            max_backoff=self.reconnect_interval,
+        )
+        self._listener.start()
+
+    def stop_invalidation_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+        self._listener = None
+
+    def _resync(self) -> None:
+        """Forget everything that missed invalidations could have left stale."""
+        self.local.clear()
+        with self._generation_lock:
+            self._generation_epoch += 1
+
+    def _handle_message(self, data) -> None:
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.instance_id:
+            return
+        tags = payload.get("tags", ())
+        self._bump_generations(tags)
+        self.local.invalidate_tags(tags)
+
+    def clear(self) -> None:
+        """Clear this worker's L1 cache."""
+        self.local.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Shared cache instance
+cache = Cache(
+    redis_url=settings.REDIS_URL,
+    default_ttl=settings.CACHE_TTL,
+    l1_ttl=settings.CACHE_L1_TTL,
+    l1_max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    channel=settings.CACHE_INVALIDATION_CHANNEL,
+    reconnect_interval=settings.CACHE_REDIS_RETRY_INTERVAL,
+)
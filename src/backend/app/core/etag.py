@@ -0,0 +1,62 @@
+"""
+ETag and conditional GET helpers for NBA Analytics API.
+
+Routes compute a cheap version token (row versions or cache generations)
+before running their main query. If the client's If-None-Match matches,
+they return 304 without loading or serializing the body.
+"""
+
+from fastapi import HTTPException, Request, Response
+from typing import Any, Callable
+import hashlib
+
+from app.core.cache import cache
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from version parts (row versions, ids, query params)."""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check the request's If-None-Match header against an ETag.
+
+    Uses the weak comparison required for If-None-Match, so W/"x" matches "x".
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def not_modified(etag: str) -> Response:
+    """304 response carrying the current ETag."""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def generation_etag(*tags: str) -> Callable:
+    """
+    Route dependency for ETags over aggregate data.
+
+    The ETag combines the request path and query with the cache generation
+    of the given invalidation tags, so it changes whenever a commit touches
+    those tables. A matching If-None-Match short-circuits with 304 before
+    the route body runs.
+    """
+    def dependency(request: Request, response: Response) -> str:
+        etag = make_etag(
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            cache.generation(*tags),
+        )
+        if etag_matches(request, etag):
+            raise HTTPException(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return etag
+
+    return dependency
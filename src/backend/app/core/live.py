@@ -0,0 +1,261 @@
+"""
+Live game push hub for NBA Analytics API.
+
+Score and box-score changes are published as small patches:
+
+    {"type": "score", "game_id": 812, "home_score": 88, "quarter": 3, ...}
+    {"type": "box_score", "game_id": 812, "player_id": 23, "points": 31, ...}
+
+Each patch carries the new values of the fields that changed. Every worker
+keeps a per-game set of subscribers (WebSocket / SSE connections); a patch is
+dispatched to this worker's subscribers and broadcast over Redis pub/sub so
+the other workers deliver it to theirs.
+
+Subscribers never block the publisher. Patches for the same target (the
+score, or one player's line) are merged into a single pending patch until
+the connection asks for the next batch, so a slow consumer or a burst of
+updates costs one merged patch per player rather than a growing queue.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import threading
+import uuid
+
+from app.core.cache import PubSubListener
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCORE_FIELDS = ("home_score", "away_score", "status", "quarter", "time_remaining")
+BOX_SCORE_FIELDS = (
+    "minutes_played", "points", "rebounds", "assists", "steals", "blocks", "turnovers",
+    "fouls", "field_goals_made", "field_goals_attempted", "three_pointers_made",
+    "three_pointers_attempted", "free_throws_made", "free_throws_attempted", "plus_minus",
+)
+
+
+def score_update(game_id: int, **fields) -> Dict[str, Any]:
+    return {"type": "score", "game_id": game_id, **fields}
+
+
+def box_score_update(game_id: int, player_id: int, **fields) -> Dict[str, Any]:
+    return {"type": "box_score", "game_id": game_id, "player_id": player_id, **fields}
+
+
+def _patch_key(update: Dict[str, Any]) -> Tuple[str, Optional[int]]:
+    return update["type"], update.get("player_id")
+
+
+class Subscriber:
+    """
+    One connection's view of a game.
+
+    offer() runs on the subscriber's event loop and merges the patch into the
+    pending set; next_batch() hands the merged patches to the connection.
+    """
+
+    def __init__(
+        self,
+        game_id: int,
+        loop: asyncio.AbstractEventLoop,
+        coalesce_seconds: float = 0.0,
+        max_pending: int = 1000
+    ):
+        self.game_id = game_id
+        self.loop = loop
+        self.coalesce_seconds = coalesce_seconds
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[Tuple[str, Optional[int]], Dict[str, Any]]" = OrderedDict()
+        self.overflowed = False
+        self.received = 0
+        self.coalesced = 0
+        self._ready = asyncio.Event()
+
+    def offer(self, update: Dict[str, Any]) -> None:
+        self.received += 1
+        key = _patch_key(update)
+        if key in self.pending:
+            self.pending[key].update(update)
+            self.coalesced += 1
+        elif len(self.pending) >= self.max_pending:
+            # Too far behind to merge; the connection resends a full snapshot instead
+            self.pending.clear()
+            self.overflowed = True
+        else:
+            self.pending[key] = dict(update)
+        self._ready.set()
+
+    def resync(self) -> None:
+        """Drop pending patches and have the connection send a fresh snapshot."""
+        self.pending.clear()
+        self.overflowed = True
+        self._ready.set()
+
+    async def next_batch(self, timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Wait for updates and return them merged.
+
+        Returns [] when nothing arrived within timeout (time for a heartbeat)
+        and None when the subscriber overflowed and needs a fresh snapshot.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        if self.coalesce_seconds:
+            # Let a burst of updates land so it goes out as one message
+            await asyncio.sleep(self.coalesce_seconds)
+        self._ready.clear()
+        if self.overflowed:
+            self.overflowed = False
+            self.pending.clear()
+            return None
+        batch = list(self.pending.values())
+        self.pending.clear()
+        return batch
+
+
+class LiveHub:
+    """Per-game fan-out of live patches, shared across workers through Redis pub/sub."""
+
+    def __init__(
+        self,
+        redis_provider: Optional[Callable[[], Any]] = None,
+        channel: str = "nba:live:updates",
+        coalesce_seconds: float = 0.25,
+        max_pending: int = 1000,
+    ):
+        self.redis_provider = redis_provider or (lambda: None)
+        self._broadcasts = redis_provider is not None
+        self.channel = channel
+        self.coalesce_seconds = coalesce_seconds
+        self.max_pending = max_pending
+        self.instance_id = uuid.uuid4().hex
+        self.published = 0
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[PubSubListener] = None
+
+    # Subscriptions
+
+    def subscribe(self, game_id: int) -> Subscriber:
+        """Register a connection for a game; call from the connection's event loop."""
+        subscriber = Subscriber(
+            game_id, asyncio.get_running_loop(), self.coalesce_seconds, self.max_pending
+        )
+        with self._lock:
+            self._subscribers.setdefault(game_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.game_id]
+
+    def subscriber_count(self, game_id: Optional[int] = None) -> int:
+        with self._lock:
+            if game_id is not None:
+                return len(self._subscribers.get(game_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    # Publishing
+
+    def publish(self, updates: Iterable[Dict[str, Any]]) -> None:
+        """
+        Deliver patches to every subscriber of their games, on every worker.
+
+        Safe to call from any thread (request handlers, session events, tasks).
+        """
+        updates = list(updates)
+        if not updates:
+            return
+        self.published += len(updates)
+        self.dispatch(updates)
+        client = self.redis_provider()
+        if client is None:
+            return
+        try:
+            client.publish(
+                self.channel,
+                json.dumps({"origin": self.instance_id, "updates": updates}, default=str),
+            )
+        except Exception as e:
+            logger.warning(f"Live update broadcast failed: {e}")
+
+    def dispatch(self, updates: Iterable[Dict[str, Any]]) -> None:
+        """Hand patches to this worker's subscribers without blocking."""
+        for update in updates:
+            with self._lock:
+                subscribers = list(self._subscribers.get(update["game_id"], ()))
+            for subscriber in subscribers:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.offer, update)
+                except RuntimeError:
+                    # The connection's loop is gone; it will be unsubscribed on close
+                    pass
+
+    # Cross-worker listener
+
+    def start_listener(self) -> None:
+        """
+        Receive patches published by other workers (no-op without Redis).
+
+        The listener resubscribes with backoff when Redis goes away. Patches
+        sent in the meantime are lost, so every subscriber is then sent a
+        fresh snapshot.
+        """
+        if self._listener is not None or not self._broadcasts:
+            return
+        self._listener = PubSubListener(
+            self.redis_provider,
+            self.channel,
+            self._handle_message,
+            name="live-hub-listener",
+            on_reconnect=self._resync,
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+        self._listener = None
+
+    def _resync(self) -> None:
+        with self._lock:
+            subscribers = [s for game in self._subscribers.values() for s in game]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.resync)
+            except RuntimeError:
+                pass
+
+    def _handle_message(self, data) -> None:
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if payload.get("origin") == self.instance_id:
+            return
+        self.dispatch(payload.get("updates", ()))
+
+
+def _redis():
+    from app.core.cache import cache
+
+    return cache.redis
+
+
+# Shared hub instance
+live_hub = LiveHub(
+    redis_provider=_redis,
+    channel=settings.LIVE_CHANNEL,
+    coalesce_seconds=settings.LIVE_COALESCE_MS / 1000,
+    max_pending=settings.LIVE_MAX_PENDING,
+)
@@ -0,0 +1,357 @@
+"""
+Metrics for NBA Analytics API.
+
+A small Prometheus-compatible metrics registry: counters, gauges and latency
+histograms keyed by labels, rendered in the Prometheus text format on
+/metrics. Request metrics are labelled with the route template
+("/api/players/{player_id}"), never the raw path, so cardinality stays bounded.
+
+Recording is a dict update under a lock, cheap enough for every request. With
+several workers, set METRICS_MULTIPROC_DIR: each worker periodically writes a
+snapshot there and /metrics merges the snapshots of all workers.
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from app.core.config import settings
+from app.db import instrumentation
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Iterable[Tuple[str, str]], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and histograms.
+
+    Gauges that are cheapest to read at scrape time (pool sizes, cache hit
+    rate) are registered as collectors instead of being updated on every
+    request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+        self._last_flush = 0.0
+
+    # Definition
+
+    def counter(self, name: str, description: str) -> None:
+        self._help[name] = ("counter", description)
+        self._counters.setdefault(name, {})
+
+    def gauge(self, name: str, description: str) -> None:
+        self._help[name] = ("gauge", description)
+        self._gauges.setdefault(name, {})
+
+    def histogram(self, name: str, description: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._help[name] = ("histogram", description)
+        self._histograms.setdefault(name, {})
+        self._buckets[name] = tuple(sorted(buckets))
+
+    def add_collector(self, collector: Callable[["MetricsRegistry"], None]) -> None:
+        """Register a callback that sets gauges right before each scrape."""
+        self._collectors.append(collector)
+
+    # Recording
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._gauges[name][_label_key(labels)] = value
+
+    def add(self, name: str, amount: float, **labels) -> None:
+        """Increment (or decrement) a gauge."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        buckets = self._buckets[name]
+        key = _label_key(labels)
+        index = bisect_left(buckets, value)
+        with self._lock:
+            series = self._histograms[name]
+            # Per-bucket counts (not cumulative), then +Inf, sum, count
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    # Export
+
+    def snapshot(self) -> dict:
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        with self._lock:
+            def dump(store):
+                return {
+                    name: [[list(map(list, key)), value] for key, value in series.items()]
+                    for name, series in store.items()
+                }
+            return {
+                "pid": os.getpid(),
+                "counters": dump(self._counters),
+                "gauges": dump(self._gauges),
+                "histograms": {
+                    name: [[list(map(list, key)), list(value)] for key, value in series.items()]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def maybe_flush(self) -> None:
+        """Write this worker's snapshot to METRICS_MULTIPROC_DIR (rate limited)."""
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        self.flush(directory)
+
+    def flush(self, directory: Optional[str] = None) -> None:
+        directory = directory or settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def collect(self) -> List[dict]:
+        """Snapshots of every worker (or just this one in single-process mode)."""
+        directory = settings.METRICS_MULTIPROC_DIR
+        if not directory:
+            return [self.snapshot()]
+        self.flush(directory)
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics_*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        """Merge worker snapshots and render the Prometheus text format."""
+        counters: Dict[str, Dict[LabelKey, float]] = {}
+        gauges: Dict[str, Dict[LabelKey, float]] = {}
+        histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+        for snapshot in self.collect():
+            # Counters and histograms of exited workers still count toward totals;
+            # gauges only make sense for workers that are still alive.
+            alive = _pid_alive(snapshot.get("pid"))
+            for name, series in snapshot["counters"].items():
+                merged = counters.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(map(tuple, key))
+                    merged[key] = merged.get(key, 0) + value
+            if alive:
+                for name, series in snapshot["gauges"].items():
+                    merged = gauges.setdefault(name, {})
+                    for key, value in series:
+                        key = tuple(map(tuple, key))
+                        merged[key] = merged.get(key, 0) + value
+            for name, series in snapshot["histograms"].items():
+                merged = histograms.setdefault(name, {})
+                for key, value in series:
+                    key = tuple(map(tuple, key))
+                    if key in merged:
+                        merged[key] = [a + b for a, b in zip(merged[key], value)]
+                    else:
+                        merged[key] = list(value)
+
+        # Ratios can't be summed across workers; recompute from the merged totals
+        hits = sum(gauges.get("cache_hits", {}).values())
+        lookups = hits + sum(gauges.get("cache_misses", {}).values())
+        if lookups:
+            gauges["cache_hit_ratio"] = {(): hits / lookups}
+
+        lines: List[str] = []
+        for name, (kind, description) in sorted(self._help.items()):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                buckets = self._buckets[name]
+                for key, state in sorted(histograms.get(name, {}).items()):
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float("inf"),), state[:-2]):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(state[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {int(state[-1])}")
+            else:
+                store = counters if kind == "counter" else gauges
+                for key, value in sorted(store.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if pid is None or pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+# Shared registry and standard metrics
+metrics = MetricsRegistry()
+
+metrics.counter("http_requests_total", "HTTP requests by method, route template and status code.")
+metrics.counter("http_request_errors_total", "HTTP requests that raised or returned a 5xx status.")
+metrics.histogram("http_request_duration_seconds", "HTTP request latency by method and route template.")
+metrics.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+metrics.gauge("db_pool_size", "Configured size of the database connection pool.")
+metrics.gauge("db_pool_checked_out", "Database connections currently checked out.")
+metrics.gauge("db_pool_overflow", "Database connections opened beyond the pool size.")
+metrics.counter("db_queries_total", "SQL statements executed.")
+metrics.counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_THRESHOLD_MS, by fingerprint.")
+metrics.counter("db_n_plus_one_total", "Requests flagged for repeating one statement shape (likely N+1).")
+metrics.histogram("db_query_duration_seconds", "SQL statement latency.")
+metrics.histogram(
+    "db_queries_per_request", "SQL statements executed per request.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+metrics.histogram("db_time_per_request_seconds", "Total SQL time per request.")
+metrics.gauge("cache_hits", "Cache lookups served from L1 or L2 since start.")
+metrics.gauge("cache_misses", "Cache lookups that missed both levels since start.")
+metrics.gauge("cache_hit_ratio", "Cache hits / lookups since start.")
+
+
+def _collect_db_pool(registry: MetricsRegistry) -> None:
+    from app.db.database import engine
+
+    pool = engine.pool
+    for name, attr in (
+        ("db_pool_size", "size"),
+        ("db_pool_checked_out", "checkedout"),
+        ("db_pool_overflow", "overflow"),
+    ):
+        reader = getattr(pool, attr, None)
+        if reader is not None:
+            registry.set(name, reader())
+
+
+def _collect_cache(registry: MetricsRegistry) -> None:
+    from app.core.cache import cache
+
+    registry.set("cache_hits", cache.hits)
+    registry.set("cache_misses", cache.misses)
+    registry.set("cache_hit_ratio", cache.hit_rate)
+
+
+metrics.add_collector(_collect_db_pool)
+metrics.add_collector(_collect_cache)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, errors, in-flight and latency.
+
+    Latency is measured with perf_counter and also returned in the
+    X-Process-Time header for ad-hoc debugging, together with the request's
+    SQL statement count and DB time (Server-Timing, X-DB-*).
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+        registry.add("http_requests_in_flight", 1)
+        query_stats, stats_token = instrumentation.begin_request()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - start
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-process-time", f"{elapsed:.6f}".encode()),
+                    *instrumentation.timing_headers(query_stats, elapsed),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            registry.add("http_requests_in_flight", -1)
+            instrumentation.end_request(query_stats, stats_token, template, registry)
+            registry.inc("http_requests_total", method=method, route=template, status=status_code)
+            registry.observe("http_request_duration_seconds", elapsed, method=method, route=template)
+            if status_code >= 500:
+                registry.inc("http_request_errors_total", method=method, route=template)
+            registry.maybe_flush()
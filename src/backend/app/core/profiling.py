@@ -0,0 +1,352 @@
+"""
+On-demand request profiling for NBA Analytics API.
+
+A request is profiled when it carries X-Profile: 1 together with a valid
+X-Admin-Token (the token is never accepted in the query string, which ends up
+in access logs), or is picked by PROFILING_SAMPLE_RATE. The result is written
+to PROFILING_DIR together with an entry in index.jsonl that the
+/api/admin/profiles endpoint lists by duration.
+
+Only the profiled request's own work is recorded, not that of requests it
+shares the event loop with:
+
+- with cProfile, the profiler is switched on only while the request's
+  coroutine is running a step, and sync (def) routes and streamed bodies get
+  their own profile on the worker thread that runs them (merged on save);
+- pyinstrument runs in its async mode, which attributes awaited time to the
+  request's own await points, plus the same per-thread profiles.
+
+Only one request is profiled at a time per worker; concurrent requests that
+would also qualify simply run unprofiled.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.security import admin_token_is_valid
+
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = "index.jsonl"
+_profile_lock = threading.Lock()
+_active_profiler: ContextVar[Optional["_Profiler"]] = ContextVar("active_profiler", default=None)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def profiling_requested(scope) -> bool:
+    """Whether the request opted in: X-Profile: 1 and a valid X-Admin-Token."""
+    return _header(scope, b"x-profile") == "1" and admin_token_is_valid(_header(scope, b"x-admin-token"))
+
+
+class _Stepped:
+    """Awaitable running a coroutine with a cProfile.Profile enabled only during its own steps."""
+
+    def __init__(self, coroutine, profile: cProfile.Profile):
+        self.coroutine = coroutine
+        self.profile = profile
+
+    def __await__(self):
+        send, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                if error is not None:
+                    yielded = self.coroutine.throw(error)
+                else:
+                    yielded = self.coroutine.send(send)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                send, error = (yield yielded), None
+            except BaseException as e:
+                send, error = None, e
+
+
+class _Profiler:
+    """
+    One request's profile: cProfile or pyinstrument, on the event loop and on worker threads.
+
+    Worker threads record into profiles of their own, which are merged with
+    the event loop's on save.
+    """
+
+    def __init__(self, backend: str):
+        self.backend = backend
+        self._threads: List[Any] = []
+        self._lock = threading.Lock()
+        if backend == "pyinstrument":
+            from pyinstrument import Profiler
+
+            self._profiler = Profiler(async_mode="enabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    @property
+    def extension(self) -> str:
+        return "html" if self.backend == "pyinstrument" else "prof"
+
+    async def run(self, awaitable) -> Any:
+        """Await the request's ASGI call, profiling only its own steps."""
+        if self.backend == "pyinstrument":
+            self._profiler.start()
+            try:
+                return await awaitable
+            finally:
+                self._profiler.stop()
+        return await _Stepped(awaitable, self._profiler)
+
+    @contextmanager
+    def thread_slice(self):
+        """Profile a block of the request running on a worker thread."""
+        if self.backend == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler(async_mode="disabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with self._lock:
+                    self._threads.append(profiler.last_session)
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._threads.append(profile)
+
+    def save(self, path: str) -> str:
+        """Write the profile to path; return a short text summary."""
+        if self.backend == "pyinstrument":
+            from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer
+            from pyinstrument.session import Session
+
+            session = self._profiler.last_session
+            for other in self._threads:
+                session = Session.combine(session, other)
+            with open(path, "w") as f:
+                f.write(HTMLRenderer().render(session))
+            return ConsoleRenderer(unicode=False, color=False).render(session)[:4000]
+        stats = pstats.Stats(self._profiler, *self._threads)
+        stats.dump_stats(path)
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats("cumulative").print_stats(25)
+        return buffer.getvalue()
+
+
+def _profiled(call: Callable) -> Callable:
+    @wraps(call)
+    def wrapper(*args, **kwargs):
+        profiler = _active_profiler.get()
+        if profiler is None:
+            return call(*args, **kwargs)
+        with profiler.thread_slice():
+            return call(*args, **kwargs)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def profile_sync_routes(app) -> None:
+    """
+    Profile sync (def) route handlers on the worker thread that runs them.
+
+    FastAPI calls them through the threadpool, where a profiler running on
+    the event loop does not see them. Call once all routers are included.
+    """
+    from fastapi.routing import APIRoute
+
+    for route in app.routes:
+        call = getattr(route, "dependant", None) and route.dependant.call
+        if (
+            isinstance(route, APIRoute)
+            and not asyncio.iscoroutinefunction(call)
+            and not getattr(call, "profiled", False)
+        ):
+            route.dependant.call = _profiled(call)
+
+
+def profile_iteration(iterable: Iterable) -> Iterator:
+    """
+    Wrap a sync streaming body so each chunk is profiled on its worker thread.
+
+    Returns the iterable unchanged when the request is not being profiled.
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return iter(iterable)
+
+    def steps():
+        iterator = iter(iterable)
+        while True:
+            with profiler.thread_slice():
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+            yield chunk
+
+    return steps()
+
+
+def _profiler_backend() -> str:
+    if settings.PROFILER == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+
+            return "pyinstrument"
+        except ImportError:
+            logger.warning("pyinstrument not installed, falling back to cProfile")
+    return "cprofile"
+
+
+def _write_profile(profiler: _Profiler, entry: dict) -> None:
+    directory = settings.PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, entry["file"])
+    summary = profiler.save(path)
+    with open(os.path.join(directory, entry["id"] + ".txt"), "w") as f:
+        f.write(summary)
+    with open(os.path.join(directory, _INDEX_FILE), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    _prune(directory)
+
+
+def _prune(directory: str) -> None:
+    """Keep only the newest PROFILING_MAX_FILES profiles."""
+    entries = read_index()
+    excess = len(entries) - settings.PROFILING_MAX_FILES
+    if excess <= 0:
+        return
+    entries.sort(key=lambda e: e["timestamp"])
+    for entry in entries[:excess]:
+        for name in (entry["file"], entry["id"] + ".txt"):
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+    with open(os.path.join(directory, _INDEX_FILE), "w") as f:
+        for entry in entries[excess:]:
+            f.write(json.dumps(entry) + "\n")
+
+
+def read_index() -> List[dict]:
+    """All captured profile entries (any order)."""
+    path = os.path.join(settings.PROFILING_DIR, _INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored profile, or None if unknown."""
+    if not re.fullmatch(r"[0-9a-f]{32}", profile_id):
+        return None
+    for entry in read_index():
+        if entry["id"] == profile_id:
+            path = os.path.join(settings.PROFILING_DIR, entry["file"])
+            return path if os.path.exists(path) else None
+    return None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles opted-in or sampled requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def _should_profile(self, scope) -> bool:
+        if scope["path"].startswith("/api/admin/profiles"):
+            return False
+        if profiling_requested(scope):
+            return True
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.PROFILING_ENABLED
+            or not self._should_profile(scope)
+            or not _profile_lock.acquire(blocking=False)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_with_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        profiler = token = None
+        start = time.perf_counter()
+        try:
+            profiler = _Profiler(_profiler_backend())
+            token = _active_profiler.set(profiler)
+            await profiler.run(self.app(scope, receive, send_with_id))
+        finally:
+            duration = time.perf_counter() - start
+            if token is not None:
+                _active_profiler.reset(token)
+            _profile_lock.release()
+            if profiler is not None:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                entry = {
+                    "id": profile_id,
+                    "file": f"{profile_id}.{profiler.extension}",
+                    "timestamp": time.time(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                    "profiler": profiler.backend,
+                }
+                try:
+                    await run_in_threadpool(_write_profile, profiler, entry)
+                except Exception as e:
+                    logger.error(f"Could not store profile {profile_id}: {e}")
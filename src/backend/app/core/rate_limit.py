@@ -0,0 +1,257 @@
+"""
+Token-bucket rate limiting for NBA Analytics API.
+
+Every request draws from two buckets: one per client (refilled at
+REQUESTS_PER_MINUTE tokens) and, for expensive route groups, one shared by all
+clients of that group (RATE_LIMIT_ROUTE_LIMITS requests per minute, one per
+request). Expensive routes cost the client more tokens than cheap lookups, so
+a scraper hammering /api/analytics runs dry long before it can starve
+everyone else. Buckets live in Redis (updated atomically by a Lua script) when
+it is available, and in process memory otherwise.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import json
+import logging
+import math
+import threading
+import time
+
+from app.core.cache import cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (key, capacity, refill tokens per second, tokens this request draws)
+Bucket = Tuple[str, float, float, float]
+
+_EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json", "/metrics")
+
+# Atomically refill and draw each bucket's cost from every bucket, or from none.
+# KEYS: bucket keys. ARGV: capacity/rate/cost triples per key.
+# Returns {allowed, retry_after_ms, min_remaining}.
+_TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local tokens = {}
+local retry_after = 0
+local remaining = -1
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1]) / 1000
+    local cost = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + (now - ts) * rate)
+    tokens[i] = level
+    if level < cost then
+        retry_after = math.max(retry_after, math.ceil((cost - level) / rate))
+    end
+end
+if retry_after > 0 then
+    return {0, retry_after, 0}
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1]) / 1000
+    local level = tokens[i] - tonumber(ARGV[i * 3])
+    redis.call('HSET', key, 'tokens', tostring(level), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+    if remaining < 0 or level < remaining then
+        remaining = level
+    end
+end
+return {1, 0, math.floor(remaining)}
+"""
+
+
+class LocalRateLimiter:
+    """
+    In-process token buckets (single worker, development and tests).
+
+    Buckets are kept in least recently used order. A bucket idle long enough
+    to have refilled is the same as no bucket, so those are dropped as they
+    reach the old end; beyond max_buckets the least recently used go too.
+    """
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        # key -> (tokens, updated_at, full_at)
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets: List[Bucket]) -> Tuple[bool, float, int]:
+        """Draw every bucket's cost from all buckets or none. Returns (allowed, retry_after_s, remaining)."""
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            retry_after = 0.0
+            for key, capacity, rate, cost in buckets:
+                level, ts, _ = self._buckets.get(key, (capacity, now, now))
+                level = min(capacity, level + (now - ts) * rate)
+                levels.append(level)
+                if level < cost:
+                    retry_after = max(retry_after, (cost - level) / rate)
+            if retry_after > 0:
+                return False, retry_after, 0
+            remaining = []
+            for (key, capacity, rate, cost), level in zip(buckets, levels):
+                level -= cost
+                self._buckets[key] = (level, now, now + (capacity - level) / rate)
+                self._buckets.move_to_end(key)
+                remaining.append(level)
+            self._evict(now)
+            return True, 0.0, int(min(remaining))
+
+    def _evict(self, now: float) -> None:
+        # Caller must hold the lock
+        while self._buckets:
+            key, (_, _, full_at) = next(iter(self._buckets.items()))
+            if full_at > now and len(self._buckets) <= self.max_buckets:
+                break
+            del self._buckets[key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisRateLimiter:
+    """Token buckets shared by all workers, updated atomically in Redis."""
+
+    def __init__(self, client, prefix: str = "nba:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_LUA)
+
+    def acquire(self, buckets: List[Bucket]) -> Tuple[bool, float, int]:
+        keys = [self.prefix + key for key, _, _, _ in buckets]
+        args: List[float] = []
+        for _, capacity, rate, cost in buckets:
+            args.extend([capacity, rate, cost])
+        allowed, retry_after_ms, remaining = self._script(keys=keys, args=args)
+        return bool(allowed), retry_after_ms / 1000, int(remaining)
+
+
+class RateLimiter:
+    """
+    Chooses the bucket set and cost for a request and applies it.
+
+    Falls back to in-process buckets if Redis is unavailable or errors.
+    """
+
+    def __init__(self, max_local_buckets: int = 100000):
+        self.local = LocalRateLimiter(max_buckets=max_local_buckets)
+        self._redis_limiter: Optional[RedisRateLimiter] = None
+
+    @property
+    def backend(self):
+        client = cache.redis
+        if client is None:
+            return self.local
+        if self._redis_limiter is None or self._redis_limiter.client is not client:
+            self._redis_limiter = RedisRateLimiter(client)
+        return self._redis_limiter
+
+    @staticmethod
+    def route_group(path: str) -> Optional[str]:
+        """Longest configured prefix matching the path (e.g. "/api/analytics")."""
+        matches = [prefix for prefix in settings.RATE_LIMIT_COSTS if path.startswith(prefix)]
+        return max(matches, key=len) if matches else None
+
+    def cost(self, path: str) -> float:
+        group = self.route_group(path)
+        return settings.RATE_LIMIT_COSTS[group] if group else 1
+
+    def buckets_for(self, client_id: str, path: str) -> List[Bucket]:
+        """The client's bucket (debited the route's cost) and the route group's (debited one request)."""
+        per_minute = settings.REQUESTS_PER_MINUTE
+        buckets: List[Bucket] = [(f"client:{client_id}", per_minute, per_minute / 60, self.cost(path))]
+        group = self.route_group(path)
+        route_limit = settings.RATE_LIMIT_ROUTE_LIMITS.get(group) if group else None
+        if route_limit:
+            buckets.append((f"route:{group}", route_limit, route_limit / 60, 1))
+        return buckets
+
+    def check(self, client_id: str, path: str) -> Tuple[bool, float, int]:
+        buckets = self.buckets_for(client_id, path)
+        backend = self.backend
+        if backend is not self.local:
+            try:
+                return backend.acquire(buckets)
+            except Exception as e:
+                logger.warning(f"Redis rate limiter failed, using local buckets: {e}")
+        return self.local.acquire(buckets)
+
+
+rate_limiter = RateLimiter(max_local_buckets=settings.RATE_LIMIT_LOCAL_MAX_BUCKETS)
+
+
+def _client_id(scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing the token buckets.
+
+    Rejected requests get a 429 with Retry-After; accepted ones carry
+    X-RateLimit-Limit / X-RateLimit-Remaining headers.
+    """
+
+    def __init__(self, app, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if path == "/" or path.startswith(_EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        allowed, retry_after, remaining = self.limiter.check(_client_id(scope), path)
+        limit_headers = [
+            (b"x-ratelimit-limit", str(settings.REQUESTS_PER_MINUTE).encode()),
+            (b"x-ratelimit-remaining", str(max(remaining, 0)).encode()),
+        ]
+
+        if not allowed:
+            retry_after_s = max(1, math.ceil(retry_after))
+            body = json.dumps({
+                "error": "Too many requests",
+                "message": f"Rate limit exceeded. Retry in {retry_after_s} seconds.",
+                "path": path,
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after_s).encode()),
+                    *limit_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + limit_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,26 @@
+"""
+Admin access checks for NBA Analytics API.
+
+Write and operations endpoints (task triggers, live data feeds, request
+profiling) require the shared ADMIN_TOKEN in the X-Admin-Token header.
+"""
+
+from fastapi import Header, HTTPException
+from typing import Optional
+import hmac
+
+from app.core.config import settings
+
+
+def admin_token_is_valid(token: Optional[str]) -> bool:
+    """Constant-time check of the admin token (always False while ADMIN_TOKEN is unset)."""
+    expected = settings.ADMIN_TOKEN
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Route dependency: reject callers without a valid X-Admin-Token."""
+    if not admin_token_is_valid(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
@@ -0,0 +1,114 @@
+"""
+Fast JSON serialization for trusted service results.
+
+FastAPI validates every returned row against the route's response_model and
+then encodes it with the stdlib json module. For large lists of ORM rows that
+the service layer already produced from our own tables, that validation is
+redundant. ModelSerializer precompiles the field layout of a response schema
+once and copies attributes straight off ORM rows; fast_json_response encodes
+the result with orjson and returns it directly, bypassing response_model.
+"""
+
+from functools import lru_cache
+from pydantic import BaseModel
+from typing import Any, Iterable, List, Optional, Type, Union, get_args, get_origin
+import orjson
+
+from fastapi import Response
+
+from app.core.config import settings
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    """Return the Pydantic model inside Optional[Model] / List[Model], if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        model = _nested_model(arg)
+        if model is not None:
+            return model
+    return None
+
+
+def _is_list(annotation) -> bool:
+    if get_origin(annotation) in (list, List):
+        return True
+    if get_origin(annotation) is Union:
+        return any(_is_list(arg) for arg in get_args(annotation))
+    return False
+
+
+class ModelSerializer:
+    """
+    Precompiled ORM-row to dict converter for a response schema.
+
+    Reads exactly the schema's fields from each row (recursing into nested
+    schemas such as Player.team) without running Pydantic validation.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self.fields = []
+        for name, field in schema.model_fields.items():
+            nested = _nested_model(field.annotation)
+            self.fields.append((
+                name,
+                get_serializer(nested) if nested is not None else None,
+                _is_list(field.annotation),
+            ))
+
+    def to_dict(self, obj: Any) -> dict:
+        out = {}
+        for name, nested, many in self.fields:
+            value = getattr(obj, name, None)
+            if nested is not None and value is not None:
+                value = [nested.to_dict(v) for v in value] if many else nested.to_dict(value)
+            out[name] = value
+        return out
+
+    def to_list(self, rows: Iterable[Any]) -> List[dict]:
+        to_dict = self.to_dict
+        return [to_dict(row) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def get_serializer(schema: Type[BaseModel]) -> ModelSerializer:
+    """Return the (cached) serializer for a response schema."""
+    return ModelSerializer(schema)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content with orjson (datetimes, enums and numpy values included)."""
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def fast_json_response(
+    rows: Any,
+    schema: Type[BaseModel],
+    response: Optional[Response] = None,
+    many: bool = True,
+    status_code: int = 200,
+) -> Response:
+    """
+    Serialize trusted ORM rows for a schema and return a ready JSON response.
+
+    Pass the route's injected Response to carry over headers already set on
+    it (e.g. ETag). Only use this for rows produced by our own service layer;
+    anything built from client input should go through response_model.
+    """
+    serializer = get_serializer(schema)
+    content = serializer.to_list(rows) if many else serializer.to_dict(rows)
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(
+        content=dumps(content),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def fast_responses_enabled() -> bool:
+    """Whether routes that opt in should use the fast path (settings kill switch)."""
+    return settings.FAST_JSON_RESPONSES
@@ -0,0 +1,426 @@
+"""
+Background task queue for NBA Analytics.
+
+Ingestion, aggregate rebuilds and other heavy recomputation run outside the
+request handlers. A task is a registered function plus an optional planner:
+the planner lists the work items (player ids, files, ...), which are split
+into chunks of BATCH_SIZE and executed independently; per-chunk results
+(counts) are summed into the task's result.
+
+Backends (TASK_BACKEND):
+    local   in-process thread pool of MAX_WORKERS threads (development)
+    eager   run inline in the caller (tests, scripts)
+    celery  one Celery message per chunk on the Redis broker; run workers with
+            `celery -A app.worker worker --concurrency $MAX_WORKERS`
+
+Every submission carries an idempotency key (by default the task name and
+its parameters). While a task with the same key is pending or running, a
+duplicate trigger returns the existing task instead of starting another.
+Task status lives in Redis when it is reachable (shared by the API and the
+workers) and in process memory otherwise.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("local", "eager", "celery")
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATES = (PENDING, RUNNING)
+
+_TASK_KEY_PREFIX = "nba:task:"
+_IDEMPOTENCY_KEY_PREFIX = "nba:task:key:"
+_RECENT_KEY = "nba:task:recent"
+
+
+class UnknownTask(KeyError):
+    """Raised when submitting a task name that was never registered."""
+
+
+@dataclass
+class TaskDefinition:
+    """A registered background task."""
+
+    name: str
+    run: Callable[..., Optional[Dict[str, int]]]
+    plan: Optional[Callable[..., List[Any]]] = None
+
+
+TASK_REGISTRY: Dict[str, TaskDefinition] = {}
+
+
+def register_task(name: str, plan: Optional[Callable[..., List[Any]]] = None):
+    """
+    Register a task.
+
+    Without a planner the function is called once as run(**params). With one,
+    plan(**params) returns JSON-serializable work items and the function is
+    called as run(items, **params) for each chunk of BATCH_SIZE items. The
+    function returns a dict of counts, which are summed across chunks.
+    """
+    def decorator(fn):
+        TASK_REGISTRY[name] = TaskDefinition(name, fn, plan)
+        return fn
+    return decorator
+
+
+def idempotency_key(name: str, params: Dict[str, Any]) -> str:
+    """Default key: the task name plus a hash of its canonical parameters."""
+    canonical = json.dumps(params, sort_keys=True, default=str)
+    return f"{name}:{hashlib.sha256(canonical.encode()).hexdigest()[:16]}"
+
+
+def chunked(items: List[Any], size: int) -> List[List[Any]]:
+    size = max(1, size)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _new_record(task_id: str, name: str, key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": task_id,
+        "name": name,
+        "key": key,
+        "params": params,
+        "status": PENDING,
+        "chunks_total": 0,
+        "chunks_done": 0,
+        "result": {},
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+class MemoryTaskStore:
+    """Task status and idempotency keys in process memory."""
+
+    def __init__(self, max_tasks: int = 1000):
+        self.max_tasks = max_tasks
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def create(self, name: str, key: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Return (record, created); an active task holding the key is returned as is."""
+        with self._lock:
+            existing = self._keys.get(key)
+            if existing is not None and self._tasks.get(existing, {}).get("status") in ACTIVE_STATES:
+                return dict(self._tasks[existing]), False
+            record = _new_record(uuid.uuid4().hex, name, key, params)
+            self._tasks[record["id"]] = record
+            self._keys[key] = record["id"]
+            # Oldest finished records go first; pending and running ones are kept until they finish
+            excess = len(self._tasks) - self.max_tasks
+            if excess > 0:
+                finished = [task_id for task_id, r in self._tasks.items() if r["status"] not in ACTIVE_STATES]
+                for task_id in finished[:excess]:
+                    del self._tasks[task_id]
+            return dict(record), True
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._tasks.get(task_id)
+            return dict(record) if record else None
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(r) for r in list(self._tasks.values())[-limit:][::-1]]
+
+    def start(self, task_id: str, chunks_total: int) -> None:
+        with self._lock:
+            record = self._tasks[task_id]
+            record.update(status=RUNNING, chunks_total=chunks_total, started_at=time.time())
+            if chunks_total == 0:
+                self._finish(record, SUCCEEDED)
+
+    def chunk_done(self, task_id: str, result: Dict[str, int]) -> None:
+        with self._lock:
+            record = self._tasks[task_id]
+            for field, value in (result or {}).items():
+                record["result"][field] = record["result"].get(field, 0) + value
+            record["chunks_done"] += 1
+            if record["status"] == RUNNING and record["chunks_done"] >= record["chunks_total"]:
+                self._finish(record, SUCCEEDED)
+
+    def fail(self, task_id: str, error: str) -> None:
+        with self._lock:
+            record = self._tasks[task_id]
+            record["error"] = error
+            self._finish(record, FAILED)
+
+    def _finish(self, record: Dict[str, Any], status: str) -> None:
+        # Caller must hold the lock
+        record.update(status=status, finished_at=time.time())
+        if self._keys.get(record["key"]) == record["id"]:
+            del self._keys[record["key"]]
+
+
+class RedisTaskStore:
+    """
+    Task status in Redis hashes, shared by API workers and queue workers.
+
+    Idempotency keys are claimed with SET NX and released when the task
+    finishes; they also expire after TASK_RESULT_TTL so a crashed worker
+    cannot block a task forever.
+    """
+
+    def __init__(self, client, ttl: int = 86400):
+        self.client = client
+        self.ttl = ttl
+
+    def _key(self, task_id: str) -> str:
+        return _TASK_KEY_PREFIX + task_id
+
+    def create(self, name: str, key: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        record = _new_record(uuid.uuid4().hex, name, key, params)
+        claim = _IDEMPOTENCY_KEY_PREFIX + key
+        # Write the record before claiming the key, so a key holder always has a record
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(record["id"]), mapping=self._encode(record))
+        pipe.expire(self._key(record["id"]), self.ttl)
+        pipe.execute()
+        for _ in range(3):
+            if self.client.set(claim, record["id"], nx=True, ex=self.ttl):
+                pipe = self.client.pipeline()
+                pipe.lpush(_RECENT_KEY, record["id"])
+                pipe.ltrim(_RECENT_KEY, 0, 999)
+                pipe.execute()
+                return record, True
+            holder = self.client.get(claim)
+            existing = self.get(holder.decode()) if holder else None
+            if existing is not None and existing["status"] in ACTIVE_STATES:
+                self.client.delete(self._key(record["id"]))
+                return existing, False
+            if holder is not None:
+                # The holder finished (or expired) without releasing the key
+                self.client.delete(claim)
+        raise RuntimeError(f"Could not claim idempotency key {key}")
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> Dict[str, str]:
+        fields = {k: json.dumps(v) for k, v in record.items() if k != "result"}
+        fields.update({f"result:{k}": str(v) for k, v in record["result"].items()})
+        return fields
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.hgetall(self._key(task_id))
+        if not raw:
+            return None
+        record: Dict[str, Any] = {"result": {}}
+        for field, value in raw.items():
+            field, value = field.decode(), value.decode()
+            if field.startswith("result:"):
+                record["result"][field[len("result:"):]] = int(value)
+            else:
+                record[field] = json.loads(value)
+        if record["status"] == RUNNING and record["chunks_done"] >= record["chunks_total"]:
+            record["status"] = SUCCEEDED
+        return record
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        ids = [i.decode() for i in self.client.lrange(_RECENT_KEY, 0, limit - 1)]
+        return [r for r in (self.get(i) for i in ids) if r is not None]
+
+    def start(self, task_id: str, chunks_total: int) -> None:
+        self.client.hset(self._key(task_id), mapping={
+            "status": json.dumps(RUNNING),
+            "chunks_total": json.dumps(chunks_total),
+            "started_at": json.dumps(time.time()),
+        })
+        if chunks_total == 0:
+            self._finish(task_id, SUCCEEDED)
+
+    def chunk_done(self, task_id: str, result: Dict[str, int]) -> None:
+        # HINCRBY is atomic, so chunks finishing on different workers never lose counts
+        pipe = self.client.pipeline()
+        for field, value in (result or {}).items():
+            pipe.hincrby(self._key(task_id), f"result:{field}", int(value))
+        pipe.hincrby(self._key(task_id), "chunks_done", 1)
+        pipe.hget(self._key(task_id), "chunks_total")
+        pipe.hget(self._key(task_id), "status")
+        *_, done, total, status = pipe.execute()
+        if json.loads(status) == RUNNING and done >= json.loads(total):
+            self._finish(task_id, SUCCEEDED)
+
+    def fail(self, task_id: str, error: str) -> None:
+        self.client.hset(self._key(task_id), "error", json.dumps(error))
+        self._finish(task_id, FAILED)
+
+    def _finish(self, task_id: str, status: str) -> None:
+        self.client.hset(self._key(task_id), mapping={
+            "status": json.dumps(status),
+            "finished_at": json.dumps(time.time()),
+        })
+        key = json.loads(self.client.hget(self._key(task_id), "key"))
+        claim = _IDEMPOTENCY_KEY_PREFIX + key
+        holder = self.client.get(claim)
+        if holder is not None and holder.decode() == task_id:
+            self.client.delete(claim)
+
+
+def run_chunk(store, task_id: str, name: str, items: Optional[List[Any]], params: Dict[str, Any]) -> None:
+    """Execute one chunk of a task and record its outcome."""
+    definition = TASK_REGISTRY[name]
+    try:
+        if items is None:
+            result = definition.run(**params)
+        else:
+            result = definition.run(items, **params)
+        store.chunk_done(task_id, result or {})
+    except Exception as e:
+        logger.error(f"Task {name} ({task_id}) failed: {e}")
+        store.fail(task_id, f"{type(e).__name__}: {e}")
+
+
+class TaskQueue:
+    """Submits registered tasks to the configured backend and reports their status."""
+
+    def __init__(
+        self,
+        backend: str = "local",
+        store=None,
+        batch_size: int = 1000,
+        concurrency: int = 4,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown task backend '{backend}' (expected one of {', '.join(BACKENDS)})")
+        self.backend = backend
+        self.store = store if store is not None else MemoryTaskStore()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "TaskQueue":
+        from app.core.cache import cache
+
+        client = cache.redis
+        if settings.TASK_BACKEND == "celery" and client is None:
+            raise RuntimeError("TASK_BACKEND=celery needs Redis for task status")
+        store = RedisTaskStore(client, settings.TASK_RESULT_TTL) if client is not None else MemoryTaskStore()
+        return cls(settings.TASK_BACKEND, store, settings.BATCH_SIZE, settings.MAX_WORKERS)
+
+    def submit(
+        self,
+        name: str,
+        params: Optional[Dict[str, Any]] = None,
+        key: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Start a task unless one with the same idempotency key is still active.
+
+        Returns (status record, created).
+        """
+        if name not in TASK_REGISTRY:
+            raise UnknownTask(name)
+        params = params or {}
+        record, created = self.store.create(name, key or idempotency_key(name, params), params)
+        if not created:
+            logger.info(f"Task {name} already active as {record['id']}; not starting another")
+            return record, False
+
+        definition = TASK_REGISTRY[name]
+        try:
+            chunks = [None] if definition.plan is None else chunked(
+                list(definition.plan(**params)), self.batch_size
+            )
+        except Exception as e:
+            self.store.fail(record["id"], f"{type(e).__name__}: {e}")
+            return self.store.get(record["id"]), True
+        self.store.start(record["id"], len(chunks))
+        for items in chunks:
+            self._dispatch(record["id"], name, items, params)
+        logger.info(f"Submitted task {name} ({record['id']}) in {len(chunks)} chunks")
+        return self.store.get(record["id"]), True
+
+    def _dispatch(self, task_id: str, name: str, items: Optional[List[Any]], params: Dict[str, Any]) -> None:
+        if self.backend == "eager":
+            run_chunk(self.store, task_id, name, items, params)
+        elif self.backend == "local":
+            self._local_executor().submit(run_chunk, self.store, task_id, name, items, params)
+        else:
+            celery_app().send_task("nba.run_chunk", args=[task_id, name, items, params])
+
+    def _local_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency, thread_name_prefix="task-worker"
+                )
+            return self._executor
+
+    def status(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(task_id)
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return self.store.recent(limit)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+_queue: Optional[TaskQueue] = None
+_celery = None
+
+
+def get_task_queue() -> TaskQueue:
+    """Process-wide queue built from settings on first use."""
+    global _queue
+    if _queue is None:
+        _queue = TaskQueue.from_settings()
+    return _queue
+
+
+def shutdown_task_queue() -> None:
+    """Wait for in-process tasks on shutdown (no-op if the queue was never used)."""
+    if _queue is not None:
+        _queue.shutdown(wait=True)
+
+
+def celery_app():
+    """
+    The Celery application (broker: CELERY_BROKER_URL, or REDIS_URL).
+
+    Celery is only imported here, so the API and the local executor do not
+    need it installed.
+    """
+    global _celery
+    if _celery is not None:
+        return _celery
+    from celery import Celery
+
+    broker = settings.CELERY_BROKER_URL or settings.REDIS_URL
+    app = Celery("nba_analytics", broker=broker)
+    app.conf.update(
+        task_serializer="json",
+        accept_content=["json"],
+        task_ignore_result=True,  # Status lives in the task store, not the Celery backend
+        task_acks_late=True,  # Redeliver chunks from a worker that dies mid-run
+        worker_prefetch_multiplier=1,  # Chunks are long; don't hoard them on one worker
+        worker_concurrency=settings.MAX_WORKERS,
+    )
+
+    @app.task(name="nba.run_chunk")
+    def run_chunk_task(task_id, name, items, params):
+        run_chunk(get_task_queue().store, task_id, name, items, params)
+
+    _celery = app
+    return app
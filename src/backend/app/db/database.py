@@ -98,7 +98,7 @@ def check_database_connection() -> bool:
 # Initialize database on import
 def init_db():
     """
-    Initialize database with tables and basic setup.
+    Initialize database: check the connection and apply Alembic migrations.
     """
     logger.info(f"Initializing database with URL: {DATABASE_URL}")
     
@@ -106,7 +106,8 @@ def init_db():
     if not check_database_connection():
         raise Exception("Cannot connect to database")
     
-    # Create tables
-    create_tables()
+    # Apply schema migrations
+    from app.db.migrations import upgrade_database
+    upgrade_database(engine)
     
     logger.info("Database initialization completed")
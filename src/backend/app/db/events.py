@@ -0,0 +1,237 @@
+"""
+Write-driven cache invalidation for NBA Analytics API.
+
+SQLAlchemy session events collect invalidation tags for every player, team,
+game and box score row touched in a flush, and publish them to the cache once
+the transaction commits. Rolled back transactions publish nothing.
+
+Tags are table-scoped ("players") and entity-scoped ("player:23",
+"team:5", "game:812", "season:2023-24"), so updating one box score only
+evicts the cached entries for that player, their team, the game and the season.
+
+The same hooks turn score and box-score changes into live patches, which are
+pushed to WebSocket/SSE subscribers (app.core.live) after the commit.
+
+Separately, register_data_upkeep() keeps the data derived from games in step
+with ORM writes, inside the flushing transaction: the per-team schedule index
+(team_schedule) for games that are added, removed or rescheduled, and the
+standings, head-to-head rows and Elo ratings for games that become final or
+whose final result changes. Unlike cache invalidation
+this is data, not bookkeeping: every process that writes games through an
+ORM session (the API, the Celery worker, scripts) must call it before its
+first write. Core writes go through bulk_upsert, which does the same upkeep.
+"""
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Iterable, Optional, Set, Type
+import logging
+
+from app.core.cache import cache
+from app.core.live import BOX_SCORE_FIELDS, SCORE_FIELDS, box_score_update, live_hub, score_update
+from app.models import Game, Player, PlayerStats, Team
+from app.services.game_service import refresh_team_schedule
+
+logger = logging.getLogger(__name__)
+
+_PENDING_TAGS_KEY = "cache_invalidation_tags"
+_PENDING_LIVE_KEY = "live_updates"
+_SCHEDULE_FIELDS = ("game_date", "season", "home_team_id", "away_team_id")
+_RESULT_FIELDS = ("status", "home_score", "away_score", *_SCHEDULE_FIELDS)
+
+
+def _previous_value(obj, attr: str):
+    """Return the value an attribute had before this flush, if it changed."""
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else None
+
+
+def _team_tags(session: Session, team: Team) -> Set[str]:
+    return {"teams", f"team:{team.id}"}
+
+
+def _player_tags(session: Session, player: Player) -> Set[str]:
+    tags = {"players", f"player:{player.id}"}
+    for team_id in (player.team_id, _previous_value(player, "team_id")):
+        if team_id is not None:
+            tags.add(f"team:{team_id}")
+    return tags
+
+
+def _game_tags(session: Session, game: Game) -> Set[str]:
+    tags = {"games", f"game:{game.id}", f"season:{game.season}"}
+    for team_id in (game.home_team_id, game.away_team_id):
+        if team_id is not None:
+            tags.add(f"team:{team_id}")
+    return tags
+
+
+def _player_stats_tags(session: Session, stats: PlayerStats) -> Set[str]:
+    tags = {"player_stats", f"player:{stats.player_id}", f"game:{stats.game_id}"}
+    if stats.team_id is not None:
+        tags.add(f"team:{stats.team_id}")
+    # Identity map lookup first; only hits the database if the game isn't loaded
+    game = stats.game or (session.get(Game, stats.game_id) if stats.game_id else None)
+    if game is not None:
+        tags.add(f"season:{game.season}")
+    return tags
+
+
+_TAG_BUILDERS: Dict[Type, Callable[[Session, object], Set[str]]] = {
+    Team: _team_tags,
+    Player: _player_tags,
+    Game: _game_tags,
+    PlayerStats: _player_stats_tags,
+}
+
+
+def tags_for(session: Session, obj) -> Set[str]:
+    """Return the invalidation tags for a model instance (empty for untracked models)."""
+    builder = _TAG_BUILDERS.get(type(obj))
+    return builder(session, obj) if builder else set()
+
+
+def _changed_values(obj, fields: Iterable[str], is_new: bool) -> Dict[str, object]:
+    state = inspect(obj)
+    return {
+        name: getattr(obj, name)
+        for name in fields
+        if is_new or state.attrs[name].history.has_changes()
+    }
+
+
+def live_update_for(obj, is_new: bool) -> Optional[dict]:
+    """Live patch for a changed game score or box score line (None if nothing to push)."""
+    if isinstance(obj, Game) and not is_new:
+        changed = _changed_values(obj, SCORE_FIELDS, is_new)
+        return score_update(obj.id, **changed) if changed else None
+    if isinstance(obj, PlayerStats):
+        changed = _changed_values(obj, BOX_SCORE_FIELDS, is_new)
+        if changed:
+            return box_score_update(obj.game_id, obj.player_id, team_id=obj.team_id, **changed)
+    return None
+
+
+def _schedule_changed(session: Session, game: Game) -> bool:
+    if game in session.new or game in session.deleted:
+        return True
+    state = inspect(game)
+    return any(state.attrs[name].history.has_changes() for name in _SCHEDULE_FIELDS)
+
+
+def _before_flush_value(obj, attr: str):
+    """The value an attribute had before this flush (its current value if unchanged)."""
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+
+def _result_changed(session: Session, game: Game) -> bool:
+    """Whether a flushed game adds, removes or changes a final result."""
+    if game in session.new or game in session.deleted:
+        return game.status == "completed"
+    if "completed" not in (game.status, _before_flush_value(game, "status")):
+        return False
+    state = inspect(game)
+    return any(state.attrs[name].history.has_changes() for name in _RESULT_FIELDS)
+
+
+def _pending_tags(session: Session) -> Set[str]:
+    return session.info.setdefault(_PENDING_TAGS_KEY, set())
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    pending = _pending_tags(session)
+    live = session.info.setdefault(_PENDING_LIVE_KEY, [])
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if type(obj) not in _TAG_BUILDERS:
+            continue
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        try:
+            pending.update(tags_for(session, obj))
+        except Exception as e:
+            # Never fail a write because of cache bookkeeping; fall back to the table tag
+            logger.warning(f"Could not build cache tags for {obj!r}: {e}")
+            pending.add(obj.__tablename__)
+        if obj not in session.deleted:
+            try:
+                update = live_update_for(obj, obj in session.new)
+            except Exception as e:
+                logger.warning(f"Could not build live update for {obj!r}: {e}")
+                update = None
+            if update is not None:
+                live.append(update)
+
+
+def _maintain_derived_data(session: Session, flush_context) -> None:
+    # Unlike the cache bookkeeping this is data: let a failure fail the flush
+    from app.services.aggregate_service import refresh_team_results
+    from app.services.elo_service import refresh_elo
+
+    games = [
+        obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if isinstance(obj, Game)
+    ]
+    rescheduled = {game.id for game in games if _schedule_changed(session, game)}
+    if rescheduled:
+        refresh_team_schedule(session.connection(), rescheduled)
+
+    results = [game for game in games if _result_changed(session, game)]
+    if results:
+        # Both the teams the game was between and the ones it is between now
+        refresh_team_results(session.connection(), [
+            (value(game, "season"), value(game, "home_team_id"), value(game, "away_team_id"))
+            for game in results for value in (getattr, _before_flush_value)
+        ])
+        tags = {"team_season_standings", "team_matchups"}
+        if refresh_elo(session.connection(), [game.id for game in results]):
+            tags.add("team_elo_ratings")
+        _pending_tags(session).update(tags)
+
+
+def _after_commit(session: Session) -> None:
+    tags = session.info.pop(_PENDING_TAGS_KEY, None)
+    if tags:
+        publish_invalidation(tags)
+    updates = session.info.pop(_PENDING_LIVE_KEY, None)
+    if updates:
+        live_hub.publish(updates)
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_TAGS_KEY, None)
+    session.info.pop(_PENDING_LIVE_KEY, None)
+
+
+def publish_invalidation(tags: Iterable[str]) -> None:
+    """Evict cached entries for the given tags on every worker."""
+    tags = set(tags)
+    logger.debug(f"Publishing cache invalidation for {len(tags)} tags")
+    cache.invalidate_tags(tags)
+
+
+def register_data_upkeep(session_factory: Optional[object] = None) -> None:
+    """
+    Attach the derived data listener to a sessionmaker (or Session; default: every session).
+
+    Safe to call more than once.
+    """
+    target = session_factory if session_factory is not None else Session
+    if not event.contains(target, "after_flush", _maintain_derived_data):
+        event.listen(target, "after_flush", _maintain_derived_data)
+
+
+def register_cache_invalidation(session_factory: Optional[object] = None) -> None:
+    """
+    Attach the invalidation and live update listeners to a sessionmaker (or Session).
+
+    Safe to call more than once.
+    """
+    target = session_factory if session_factory is not None else Session
+    for name, fn in (
+        ("after_flush", _after_flush),
+        ("after_commit", _after_commit),
+        ("after_rollback", _after_rollback),
+    ):
+        if not event.contains(target, name, fn):
+            event.listen(target, name, fn)
@@ -0,0 +1,162 @@
+"""
+SQL instrumentation for NBA Analytics API.
+
+Engine cursor events time every statement. Per request we keep the number of
+statements, total DB time and a count per statement shape, which feed the
+timing headers and /metrics. Statements slower than SLOW_QUERY_THRESHOLD_MS
+are logged with a normalized fingerprint, and a request that runs the same
+statement shape N_PLUS_ONE_THRESHOLD times or more is flagged as a likely N+1.
+
+This replaces DATABASE_ECHO for production use: nothing is logged for normal
+queries, only slow statements and N+1 patterns.
+"""
+
+from collections import Counter
+from contextvars import ContextVar, Token
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import re
+import time
+import weakref
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize SQL to its shape: literals and bind markers become ?, IN lists
+    collapse to (?+) and whitespace is squeezed, so the same query with
+    different parameters yields the same fingerprint.
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?+)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint_id(shape: str) -> str:
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+
+
+class QueryStats:
+    """Statements executed while serving one request."""
+
+    __slots__ = ("count", "total_time", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, shape: str, elapsed: float) -> None:
+        self.count += 1
+        self.total_time += elapsed
+        self.shapes[shape] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least threshold times (likely N+1)."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+_instrumented_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def begin_request() -> Tuple[QueryStats, Token]:
+    """Start collecting query stats for the current request context."""
+    stats = QueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request(stats: QueryStats, token: Token, route: str, registry=None) -> None:
+    """Stop collecting, record per-request metrics and report N+1 patterns."""
+    _current_stats.reset(token)
+    if registry is not None:
+        registry.observe("db_queries_per_request", stats.count, route=route)
+        registry.observe("db_time_per_request_seconds", stats.total_time, route=route)
+    for shape, n in stats.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+        logger.warning(
+            f"Possible N+1 on {route}: {n} executions of [{fingerprint_id(shape)}] {shape[:300]}"
+        )
+        if registry is not None:
+            registry.inc("db_n_plus_one_total", route=route)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def timing_headers(stats: QueryStats, elapsed: float) -> List[Tuple[bytes, bytes]]:
+    """Response headers describing DB work so far (Server-Timing + X-DB-*)."""
+    db_ms = stats.total_time * 1000
+    server_timing = (
+        f'db;dur={db_ms:.2f};desc="{stats.count} queries", app;dur={elapsed * 1000:.2f}'
+    )
+    return [
+        (b"server-timing", server_timing.encode()),
+        (b"x-db-query-count", str(stats.count).encode()),
+        (b"x-db-time", f"{stats.total_time:.6f}".encode()),
+    ]
+
+
+def register_sql_instrumentation(engine: Engine, registry=None) -> None:
+    """Attach the cursor timing listeners to an engine (idempotent)."""
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    shape_cache: Dict[str, str] = {}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start_time")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+
+        shape = shape_cache.get(statement)
+        if shape is None:
+            shape = fingerprint(statement)
+            if len(shape_cache) < 5000:
+                shape_cache[statement] = shape
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(shape, elapsed)
+
+        if registry is not None:
+            registry.inc("db_queries_total")
+            registry.observe("db_query_duration_seconds", elapsed)
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            slow_query_logger.warning(
+                f"Slow query {elapsed * 1000:.1f}ms [{fingerprint_id(shape)}] {shape[:1000]}"
+            )
+            if registry is not None:
+                registry.inc("db_slow_queries_total", fingerprint=fingerprint_id(shape))
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        conn = exception_context.connection
+        if conn is None or exception_context.statement is None:
+            return
+        starts = conn.info.get("query_start_time")
+        if starts:
+            starts.pop()
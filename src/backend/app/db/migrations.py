@@ -0,0 +1,53 @@
+"""
+Schema migrations for NBA Analytics API.
+
+The schema is owned by the Alembic migrations in alembic/versions. Deployments
+run `alembic upgrade head` before starting workers; the app only upgrades the
+database itself when DATABASE_AUTO_MIGRATE is set (local development).
+"""
+
+from sqlalchemy.engine import Engine
+from typing import Optional
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def current_revision(engine: Engine) -> Optional[str]:
+    """Revision the database is at, or None for an unmigrated database."""
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    """Apply pending migrations (no-op when the database is already current)."""
+    from alembic import command
+
+    if revision == "head" and current_revision(engine) == head_revision():
+        return
+    config = _alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+    logger.info(f"Database upgraded to {revision}")
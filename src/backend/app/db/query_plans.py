@@ -0,0 +1,114 @@
+"""
+Query plan inspection for NBA Analytics service queries.
+
+Services register representative queries here with @register_query. The
+query-plan regression tests run EXPLAIN (SQLite EXPLAIN QUERY PLAN, PostgreSQL
+EXPLAIN) for each one against a seeded database, snapshot the plans, and fail
+on full table or full index scans of the large tables (player_stats, games,
+team_elo_ratings), which is how a missing index or a changed join order
+usually shows up.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.orm import Query, Session
+from typing import Callable, Dict, Iterable, List
+import importlib
+import pkgutil
+import re
+
+# Tables too large to scan in full on any request path
+LARGE_TABLES = ("player_stats", "games", "team_elo_ratings")
+
+QUERY_REGISTRY: Dict[str, Callable[[Session], object]] = {}
+
+
+def register_query(name: str) -> Callable:
+    """
+    Register a function building a representative service query.
+
+    The function receives a Session and returns a Select or ORM Query using
+    sample parameters that exist in the synthetic test dataset (season
+    "2023-24", team_id 1, player_id 1).
+    """
+    def decorator(fn: Callable[[Session], object]) -> Callable[[Session], object]:
+        if name in QUERY_REGISTRY:
+            raise ValueError(f"Query '{name}' is already registered")
+        QUERY_REGISTRY[name] = fn
+        return fn
+
+    return decorator
+
+
+def load_service_queries() -> Dict[str, Callable[[Session], object]]:
+    """Import every app.services module so their queries are registered."""
+    import app.services
+
+    for module in pkgutil.iter_modules(app.services.__path__):
+        importlib.import_module(f"app.services.{module.name}")
+    return QUERY_REGISTRY
+
+
+def compile_query(db: Session, query) -> str:
+    """Render a Select/Query to SQL with literal parameters for the session's dialect."""
+    if isinstance(query, Query):
+        query = query.statement
+    return str(query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+
+
+def explain(db: Session, query) -> List[str]:
+    """Return the plan for a query, one line per plan node."""
+    sql = compile_query(db, query)
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        # Rebuild the tree indentation from (id, parent, notused, detail)
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append("  " * depth[node_id] + detail)
+        return lines
+    if dialect == "postgresql":
+        rows = db.execute(text(f"EXPLAIN (COSTS OFF) {sql}")).fetchall()
+        return [row[0] for row in rows]
+    raise NotImplementedError(f"EXPLAIN is not supported for dialect '{dialect}'")
+
+
+def full_scans(plan: Iterable[str], tables: Iterable[str] = LARGE_TABLES) -> List[str]:
+    """
+    Plan lines that read a whole large table or a whole index on it.
+
+    A full index scan is no cheaper than a table scan on a large table, so
+    SQLite's "SCAN player_stats USING INDEX ..." and a PostgreSQL
+    "Index Scan using ... on player_stats" without an Index Cond count too.
+    Index seeks show up as "SEARCH ..." (SQLite) or carry an Index Cond
+    (PostgreSQL).
+    """
+    plan = list(plan)
+    tables = "|".join(re.escape(table) for table in tables)
+    # SQLite: "SCAN player_stats", with or without "USING [COVERING] INDEX"
+    sqlite_scan = re.compile(rf"^\s*SCAN ({tables})\b")
+    # PostgreSQL: "Seq Scan on player_stats"
+    seq_scan = re.compile(rf"Seq Scan on ({tables})\b")
+    # PostgreSQL: "Index [Only] Scan [Backward] using ix on player_stats"
+    index_scan = re.compile(rf"Index (Only )?Scan (Backward )?using \S+ on ({tables})\b")
+    scans = []
+    for i, line in enumerate(plan):
+        if sqlite_scan.search(line) or seq_scan.search(line):
+            scans.append(line)
+        elif index_scan.search(line) and not _has_index_cond(plan, i):
+            scans.append(line)
+    return scans
+
+
+def _has_index_cond(plan: List[str], node: int) -> bool:
+    """Whether the PostgreSQL plan node at plan[node] lists an Index Cond."""
+    indent = len(plan[node]) - len(plan[node].lstrip())
+    for line in plan[node + 1:]:
+        detail = line.lstrip()
+        # The node's details end at its first child or the next node up
+        if detail.startswith("->") or len(line) - len(detail) <= indent:
+            break
+        if detail.startswith("Index Cond:"):
+            return True
+    return False
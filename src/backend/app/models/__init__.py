@@ -0,0 +1,329 @@
+"""
+SQLAlchemy models for NBA Analytics API.
+
+Database tables backing the Pydantic schemas in app.schemas.
+"""
+
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    JSON,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.database import Base
+
+
+class Team(Base):
+    """NBA team."""
+    __tablename__ = "teams"
+
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(50), unique=True, index=True)
+    name = Column(String(100), nullable=False)
+    city = Column(String(50), nullable=False)
+    abbreviation = Column(String(3), nullable=False, unique=True)
+    conference = Column(String(20), index=True)
+    division = Column(String(30))
+    founded_year = Column(Integer)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+    # Incremented on every ORM update; used for ETags and optimistic locking
+    version = Column(Integer, nullable=False, default=1)
+
+    players = relationship("Player", back_populates="team")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class Player(Base):
+    """NBA player."""
+    __tablename__ = "players"
+
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(50), unique=True, index=True)
+    name = Column(String(100), nullable=False, index=True)
+    first_name = Column(String(50))
+    last_name = Column(String(50))
+    position = Column(String(2))
+    height = Column(String(10))
+    weight = Column(String(10))
+    birth_date = Column(DateTime)
+    birth_place = Column(String(100))
+    jersey_number = Column(Integer)
+    years_pro = Column(Integer)
+    college = Column(String(100))
+    team_id = Column(Integer, ForeignKey("teams.id"), index=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    is_rookie = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1)
+
+    team = relationship("Team", back_populates="players")
+    stats = relationship("PlayerStats", back_populates="player")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class Game(Base):
+    """A scheduled, live or completed game between two teams."""
+    __tablename__ = "games"
+    __table_args__ = (
+        Index("ix_games_season_game_date", "season", "game_date"),
+        Index("ix_games_home_team_game_date", "home_team_id", "game_date"),
+        Index("ix_games_away_team_game_date", "away_team_id", "game_date"),
+        Index("ix_games_game_date", "game_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(50), unique=True, index=True)
+    season = Column(String(7), nullable=False)
+    game_date = Column(DateTime, nullable=False)
+    home_team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    away_team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    home_score = Column(Integer)
+    away_score = Column(Integer)
+    status = Column(String(20), default="scheduled", nullable=False)
+    quarter = Column(Integer)
+    time_remaining = Column(String(10))
+    game_type = Column(String(20), default="regular", nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1)
+
+    home_team = relationship("Team", foreign_keys=[home_team_id])
+    away_team = relationship("Team", foreign_keys=[away_team_id])
+    player_stats = relationship("PlayerStats", back_populates="game")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class PlayerStats(Base):
+    """One player's box score line for one game."""
+    __tablename__ = "player_stats"
+    __table_args__ = (
+        UniqueConstraint("player_id", "game_id", name="uq_player_stats_player_game"),
+        Index("ix_player_stats_game_id", "game_id"),
+        Index("ix_player_stats_team_id", "team_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    player_id = Column(Integer, ForeignKey("players.id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    # Team the player suited up for in this game (players change teams mid-season)
+    team_id = Column(Integer, ForeignKey("teams.id"))
+    minutes_played = Column(Float)
+    points = Column(Integer, default=0, nullable=False)
+    rebounds = Column(Integer, default=0, nullable=False)
+    assists = Column(Integer, default=0, nullable=False)
+    steals = Column(Integer, default=0, nullable=False)
+    blocks = Column(Integer, default=0, nullable=False)
+    turnovers = Column(Integer, default=0, nullable=False)
+    fouls = Column(Integer, default=0, nullable=False)
+    field_goals_made = Column(Integer, default=0, nullable=False)
+    field_goals_attempted = Column(Integer, default=0, nullable=False)
+    three_pointers_made = Column(Integer, default=0, nullable=False)
+    three_pointers_attempted = Column(Integer, default=0, nullable=False)
+    free_throws_made = Column(Integer, default=0, nullable=False)
+    free_throws_attempted = Column(Integer, default=0, nullable=False)
+    plus_minus = Column(Integer)
+    field_goal_percentage = Column(Float)
+    three_point_percentage = Column(Float)
+    free_throw_percentage = Column(Float)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime, onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1)
+
+    player = relationship("Player", back_populates="stats")
+    game = relationship("Game", back_populates="player_stats")
+
+    __mapper_args__ = {"version_id_col": version}
+
+
+class SyncCheckpoint(Base):
+    """Where an upstream sync stream left off, and its last run's counts."""
+    __tablename__ = "sync_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("source", "stream", name="uq_sync_checkpoints_source_stream"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(50), nullable=False)
+    stream = Column(String(50), nullable=False)
+    cursor = Column(String(200))  # Next page cursor of an interrupted run
+    last_game_date = Column(DateTime)  # Newest game date synced so far
+    last_run_at = Column(DateTime)
+    last_fetched = Column(Integer, default=0, nullable=False)
+    last_skipped = Column(Integer, default=0, nullable=False)
+    last_written = Column(Integer, default=0, nullable=False)
+    last_duration = Column(Float)
+
+
+class SyncFingerprint(Base):
+    """Content hash of the last upstream payload written for one entity."""
+    __tablename__ = "sync_fingerprints"
+
+    source = Column(String(50), primary_key=True)
+    entity = Column(String(50), primary_key=True)
+    external_id = Column(String(50), primary_key=True)
+    content_hash = Column(String(32), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class PlayerSeasonAggregate(Base):
+    """A player's running season totals, kept current from box score deltas."""
+    __tablename__ = "player_season_aggregates"
+    __table_args__ = (
+        Index("ix_player_season_aggregates_season_points", "season", "points"),
+    )
+
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    season = Column(String(7), primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id"))  # Team of the latest box score
+    games_played = Column(Integer, default=0, nullable=False)
+    minutes_played = Column(Float, default=0, nullable=False)
+    points = Column(Integer, default=0, nullable=False)
+    rebounds = Column(Integer, default=0, nullable=False)
+    assists = Column(Integer, default=0, nullable=False)
+    steals = Column(Integer, default=0, nullable=False)
+    blocks = Column(Integer, default=0, nullable=False)
+    turnovers = Column(Integer, default=0, nullable=False)
+    fouls = Column(Integer, default=0, nullable=False)
+    field_goals_made = Column(Integer, default=0, nullable=False)
+    field_goals_attempted = Column(Integer, default=0, nullable=False)
+    three_pointers_made = Column(Integer, default=0, nullable=False)
+    three_pointers_attempted = Column(Integer, default=0, nullable=False)
+    free_throws_made = Column(Integer, default=0, nullable=False)
+    free_throws_attempted = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class TeamSeasonStanding(Base):
+    """A team's record, points for/against and box score totals over its completed games in one season."""
+    __tablename__ = "team_season_standings"
+    __table_args__ = (
+        Index("ix_team_season_standings_season", "season"),
+    )
+
+    team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    season = Column(String(7), primary_key=True)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    points_for = Column(Integer, default=0, nullable=False)
+    points_against = Column(Integer, default=0, nullable=False)
+    rebounds = Column(Integer, default=0, nullable=False)
+    assists = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class TeamMatchup(Base):
+    """
+    Head-to-head results of two teams in one season.
+
+    Each pair is stored once, under (min_team_id, max_team_id), so either
+    team's view of the matchup is a primary key lookup.
+    """
+    __tablename__ = "team_matchups"
+    __table_args__ = (
+        CheckConstraint("min_team_id < max_team_id", name="ck_team_matchups_ordered"),
+        Index("ix_team_matchups_season", "season"),
+    )
+
+    min_team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    max_team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    season = Column(String(7), primary_key=True)
+    games_played = Column(Integer, default=0, nullable=False)
+    min_team_wins = Column(Integer, default=0, nullable=False)
+    max_team_wins = Column(Integer, default=0, nullable=False)
+    min_team_points = Column(Integer, default=0, nullable=False)
+    max_team_points = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class TeamSchedule(Base):
+    """
+    Each game listed once per team, home or away, in date order.
+
+    A per-team schedule index maintained alongside games (see
+    app.services.game_service.refresh_team_schedule), so "a team's games"
+    is one index range instead of home_team_id = ? OR away_team_id = ?.
+    """
+    __tablename__ = "team_schedule"
+    __table_args__ = (
+        Index("ix_team_schedule_team_season_date", "team_id", "season", "game_date", "game_id"),
+        Index("ix_team_schedule_game_id", "game_id"),
+    )
+
+    team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    game_date = Column(DateTime, primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
+    season = Column(String(7), nullable=False)
+    opponent_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    is_home = Column(Boolean, nullable=False)
+
+
+class TeamEloRating(Base):
+    """
+    A team's Elo rating before and after each of its completed games.
+
+    Written by app.services.elo_service as games complete; the rows of one
+    team in date order are its rating history.
+    """
+    __tablename__ = "team_elo_ratings"
+    __table_args__ = (
+        Index("ix_team_elo_ratings_game_id", "game_id"),
+        Index("ix_team_elo_ratings_game_date", "game_date"),
+    )
+
+    team_id = Column(Integer, ForeignKey("teams.id"), primary_key=True)
+    game_date = Column(DateTime, primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
+    season = Column(String(7), nullable=False)
+    opponent_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    is_home = Column(Boolean, nullable=False)
+    rating_before = Column(Float, nullable=False)
+    rating = Column(Float, nullable=False)  # After the game
+    win_probability = Column(Float, nullable=False)  # Pre-game, from the two ratings
+
+
+class PlayerFeatureState(Base):
+    """
+    A player's rolling prediction features for one season, as of their latest completed game.
+
+    Maintained by app.services.prediction_service: each completed game adds
+    to the running window sums, and recent keeps the last box score lines so
+    the one leaving each window can be subtracted.
+    """
+    __tablename__ = "player_feature_states"
+
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    season = Column(String(7), primary_key=True)
+    team_id = Column(Integer, ForeignKey("teams.id"))  # Team of the latest box score
+    games_played = Column(Integer, default=0, nullable=False)
+    last_game_id = Column(Integer, nullable=False)
+    last_game_date = Column(DateTime, nullable=False)
+    recent = Column(JSON, nullable=False)  # Latest box score lines, oldest first
+    window_sums = Column(JSON, nullable=False)  # {"5": [points, rebounds, ...], "10": ..., "20": ...}
+    home_games = Column(Integer, default=0, nullable=False)
+    away_games = Column(Integer, default=0, nullable=False)
+    home_totals = Column(JSON, nullable=False)
+    away_totals = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+__all__ = [
+    "Base", "Team", "Player", "Game", "PlayerStats", "SyncCheckpoint", "SyncFingerprint",
+    "PlayerSeasonAggregate", "TeamSeasonStanding", "TeamMatchup", "TeamSchedule", "TeamEloRating",
+    "PlayerFeatureState",
+]
@@ -6,7 +6,7 @@ Define data models for API requests and responses with automatic validation.
 
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 
@@ -30,6 +30,13 @@ class GameStatus(str, Enum):
     COMPLETED = "completed"
 
 
+def _reject_null(v):
+    """Partial updates omit unchanged fields; an explicit null is an error."""
+    if v is None:
+        raise ValueError('may be omitted but not null')
+    return v
+
+
 # Base schemas
 class TeamBase(BaseModel):
     """Base schema for team data."""
@@ -142,6 +149,8 @@ class GameUpdate(BaseModel):
     quarter: Optional[int] = Field(None, ge=1, le=4)
     time_remaining: Optional[str] = None
 
+    _not_null = validator('*', pre=True, allow_reuse=True)(_reject_null)
+
 
 class Game(GameBase):
     """Schema for game response data."""
@@ -198,6 +207,35 @@ class PlayerStats(PlayerStatsBase):
         from_attributes = True
 
 
+class PlayerStatsUpdate(BaseModel):
+    """Schema for a live box score update (only the fields that changed)."""
+    player_id: int
+    team_id: Optional[int] = None  # Needed for a player's first line in a game
+    minutes_played: Optional[float] = Field(None, ge=0, le=48)
+    points: Optional[int] = Field(None, ge=0)
+    rebounds: Optional[int] = Field(None, ge=0)
+    assists: Optional[int] = Field(None, ge=0)
+    steals: Optional[int] = Field(None, ge=0)
+    blocks: Optional[int] = Field(None, ge=0)
+    turnovers: Optional[int] = Field(None, ge=0)
+    fouls: Optional[int] = Field(None, ge=0)
+    field_goals_made: Optional[int] = Field(None, ge=0)
+    field_goals_attempted: Optional[int] = Field(None, ge=0)
+    three_pointers_made: Optional[int] = Field(None, ge=0)
+    three_pointers_attempted: Optional[int] = Field(None, ge=0)
+    free_throws_made: Optional[int] = Field(None, ge=0)
+    free_throws_attempted: Optional[int] = Field(None, ge=0)
+    plus_minus: Optional[int] = None
+
+    _not_null = validator('*', pre=True, allow_reuse=True)(_reject_null)
+
+
+class LiveGameDelta(BaseModel):
+    """Schema for one batch of live changes to a game and its box score."""
+    game: Optional[GameUpdate] = None
+    box_scores: List[PlayerStatsUpdate] = []
+
+
 # Analytics schemas
 class PlayerAnalytics(BaseModel):
     """Schema for player analytics data."""
@@ -228,6 +266,52 @@ class TeamAnalytics(BaseModel):
     avg_assists: float
 
 
+class HeadToHeadSeason(BaseModel):
+    """One season of a head-to-head series, from the requesting team's side."""
+    season: str
+    games_played: int
+    wins: int
+    losses: int
+    points_for: int
+    points_against: int
+    avg_margin: float
+    running_wins: int  # Series record through this season
+    running_losses: int
+
+
+class HeadToHead(BaseModel):
+    """Head-to-head record of a team against one opponent."""
+    team_id: int
+    opponent_id: int
+    games_played: int
+    wins: int
+    losses: int
+    avg_margin: float
+    seasons: List[HeadToHeadSeason]
+
+
+class EloRatingPoint(BaseModel):
+    """A team's Elo rating around one game."""
+    game_id: int
+    game_date: datetime
+    season: str
+    opponent_id: int
+    is_home: bool
+    rating_before: float
+    rating: float
+    win_probability: float  # Pre-game
+
+    class Config:
+        from_attributes = True
+
+
+class TeamEloHistory(BaseModel):
+    """A team's Elo rating series, for charting."""
+    team_id: int
+    rating: float  # After the latest game in the series
+    history: List[EloRatingPoint]
+
+
 # Search and filter schemas
 class PlayerSearch(BaseModel):
     """Schema for player search parameters."""
@@ -293,3 +377,10 @@ class PredictionResponse(BaseModel):
             if not (0.99 <= total <= 1.01):  # Allow small floating point errors
                 raise ValueError('Win probabilities must sum to 1.0')
         return v
+
+
+class PlayerPerformanceRequest(BaseModel):
+    """Schema for a batch of player performance predictions (e.g. a night's slate)."""
+    player_ids: List[int] = Field(..., min_length=1, max_length=500)
+    game_date: Optional[date] = None  # Defaults to today
+    season: Optional[str] = Field(None, min_length=7, max_length=7)  # Defaults to the latest
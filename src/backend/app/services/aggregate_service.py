@@ -0,0 +1,524 @@
+"""
+Season aggregate service for NBA Analytics.
+
+player_season_aggregates, team_season_standings and team_matchups hold
+running totals so leaderboards, standings and head-to-head records never
+scan box scores or games. They are maintained two ways:
+
+- incrementally: live deltas add the difference between a box score's (or a
+  game's) old and new values, as an INSERT ... ON CONFLICT that adds to the
+  stored totals;
+- by full recompute from player_stats / games, used to rebuild a season, to
+  reconcile the incremental totals once a game is final, and for the teams
+  of games written in bulk or through the ORM (refresh_team_results, called
+  from bulk_upsert and app.db.events.register_data_upkeep).
+"""
+
+from sqlalchemy import and_, case, func, select, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from app.db.query_plans import register_query
+from app.models import (
+    Game, Player, PlayerSeasonAggregate, PlayerStats, TeamMatchup, TeamSeasonStanding,
+)
+from app.services.ingestion_service import _insert_for, bulk_upsert
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_STATS = (
+    "minutes_played", "points", "rebounds", "assists", "steals", "blocks", "turnovers",
+    "fouls", "field_goals_made", "field_goals_attempted", "three_pointers_made",
+    "three_pointers_attempted", "free_throws_made", "free_throws_attempted",
+)
+STANDING_FIELDS = ("wins", "losses", "points_for", "points_against", "rebounds", "assists")
+TEAM_BOX_STATS = ("rebounds", "assists")
+MATCHUP_FIELDS = ("games_played", "min_team_wins", "max_team_wins", "min_team_points", "max_team_points")
+LEADER_STATS = ("points", "rebounds", "assists", "steals", "blocks", "minutes_played",
+                "three_pointers_made", "turnovers")
+
+
+def _add_to_totals(connection: Connection, model, rows: List[dict], key_columns: Tuple[str, ...]) -> None:
+    """Insert rows of deltas, adding them to the stored totals where a row exists."""
+    if not rows:
+        return
+    table = model.__table__
+    stmt = _insert_for(connection, table)
+    counters = set().union(*(row.keys() for row in rows)) - set(key_columns) - {"team_id"}
+    set_ = {name: table.c[name] + stmt.excluded[name] for name in counters}
+    if "team_id" in table.c:
+        set_["team_id"] = func.coalesce(stmt.excluded.team_id, table.c.team_id)
+    set_["updated_at"] = func.now()
+    # Every row needs the same keys for an executemany
+    defaults = {name: 0 for name in counters}
+    rows = [{**defaults, **row} for row in rows]
+    connection.execute(stmt.on_conflict_do_update(index_elements=list(key_columns), set_=set_), rows)
+
+
+def add_player_deltas(connection: Connection, season: str, deltas: Dict[int, dict]) -> None:
+    """Add per-player stat differences ({player_id: {"points": 2, "team_id": 5, ...}})."""
+    rows = [
+        {"player_id": player_id, "season": season, **delta}
+        for player_id, delta in deltas.items()
+        if any(v for k, v in delta.items() if k != "team_id")
+    ]
+    _add_to_totals(connection, PlayerSeasonAggregate, rows, ("player_id", "season"))
+
+
+def game_contribution(game: dict, box: Optional[Dict[int, dict]] = None) -> Dict[int, Dict[str, int]]:
+    """
+    What a game adds to each team's standing: nothing until it is completed.
+
+    box holds the game's per-team box score totals (see team_box_totals).
+    """
+    if game.get("status") != "completed" or game.get("home_score") is None or game.get("away_score") is None:
+        return {}
+    home, away = game["home_score"], game["away_score"]
+    contribution = {
+        game["home_team_id"]: {"wins": int(home > away), "losses": int(home < away),
+                               "points_for": home, "points_against": away},
+        game["away_team_id"]: {"wins": int(away > home), "losses": int(away < home),
+                               "points_for": away, "points_against": home},
+    }
+    for team_id, totals in contribution.items():
+        team_box = (box or {}).get(team_id, {})
+        totals.update({stat: team_box.get(stat, 0) for stat in TEAM_BOX_STATS})
+    return contribution
+
+
+def team_box_totals(connection: Connection, game_id: int) -> Dict[int, Dict[str, int]]:
+    """Per-team sums of a game's box scores ({team_id: {"rebounds": ..., "assists": ...}})."""
+    rows = connection.execute(
+        select(
+            PlayerStats.team_id,
+            *[func.coalesce(func.sum(getattr(PlayerStats, s)), 0).label(s) for s in TEAM_BOX_STATS],
+        )
+        .where(PlayerStats.game_id == game_id)
+        .group_by(PlayerStats.team_id)
+    )
+    return {row.team_id: {s: row._mapping[s] for s in TEAM_BOX_STATS} for row in rows}
+
+
+def add_standings_delta(
+    connection: Connection,
+    old_game: dict,
+    new_game: dict,
+    old_box: Optional[Dict[int, dict]] = None,
+    new_box: Optional[Dict[int, dict]] = None
+) -> bool:
+    """
+    Apply the change in a game's contribution to both teams' standings.
+
+    Covers a game becoming final, a final score or box score being corrected
+    and a result being withdrawn. old_box/new_box are the game's per-team box
+    score totals before and after the change. Returns whether anything changed.
+    """
+    old, new = game_contribution(old_game, old_box), game_contribution(new_game, new_box)
+    rows = []
+    for team_id in set(old) | set(new):
+        delta = {
+            f: new.get(team_id, {}).get(f, 0) - old.get(team_id, {}).get(f, 0)
+            for f in STANDING_FIELDS
+        }
+        if any(delta.values()):
+            rows.append({"team_id": team_id, "season": new_game["season"], **delta})
+    _add_to_totals(connection, TeamSeasonStanding, rows, ("team_id", "season"))
+    return bool(rows)
+
+
+def matchup_contribution(game: dict) -> Dict[Tuple[int, int], Dict[str, int]]:
+    """What a completed game adds to its pair's head-to-head row, keyed (min_team_id, max_team_id)."""
+    if not game_contribution(game):
+        return {}
+    home, away = game["home_team_id"], game["away_team_id"]
+    points = {home: game["home_score"], away: game["away_score"]}
+    low, high = min(home, away), max(home, away)
+    return {
+        (low, high): {
+            "games_played": 1,
+            "min_team_wins": int(points[low] > points[high]),
+            "max_team_wins": int(points[high] > points[low]),
+            "min_team_points": points[low],
+            "max_team_points": points[high],
+        }
+    }
+
+
+def add_matchup_delta(connection: Connection, old_game: dict, new_game: dict) -> bool:
+    """Apply the change in a game's contribution to its head-to-head row, like add_standings_delta."""
+    old, new = matchup_contribution(old_game), matchup_contribution(new_game)
+    rows = []
+    for low, high in set(old) | set(new):
+        delta = {
+            f: new.get((low, high), {}).get(f, 0) - old.get((low, high), {}).get(f, 0)
+            for f in MATCHUP_FIELDS
+        }
+        if any(delta.values()):
+            rows.append({"min_team_id": low, "max_team_id": high, "season": new_game["season"], **delta})
+    _add_to_totals(connection, TeamMatchup, rows, ("min_team_id", "max_team_id", "season"))
+    return bool(rows)
+
+
+# Full recompute
+
+def _player_totals_query(season: str, player_ids: List[int]):
+    return (
+        select(
+            PlayerStats.player_id,
+            func.count(PlayerStats.id).label("games_played"),
+            *[func.coalesce(func.sum(getattr(PlayerStats, s)), 0).label(s) for s in AGGREGATE_STATS],
+        )
+        .join(Game, PlayerStats.game_id == Game.id)
+        .where(Game.season == season, PlayerStats.player_id.in_(player_ids))
+        .group_by(PlayerStats.player_id)
+    )
+
+
+def _latest_teams(connection: Connection, season: str, player_ids: List[int]) -> Dict[int, int]:
+    rows = connection.execute(
+        select(PlayerStats.player_id, PlayerStats.team_id)
+        .join(Game, PlayerStats.game_id == Game.id)
+        .where(Game.season == season, PlayerStats.player_id.in_(player_ids))
+        .order_by(Game.game_date)
+    )
+    return {player_id: team_id for player_id, team_id in rows}
+
+
+def recompute_player_aggregates(connection: Connection, season: str, player_ids: List[int]) -> Dict[int, dict]:
+    """Season totals for the players, computed from their box scores."""
+    teams = _latest_teams(connection, season, player_ids)
+    return {
+        row.player_id: {**row._mapping, "season": season, "team_id": teams.get(row.player_id)}
+        for row in connection.execute(_player_totals_query(season, player_ids))
+    }
+
+
+def _team_results_query(season: str, team_ids: List[int]):
+    completed = and_(
+        Game.season == season,
+        Game.status == "completed",
+        Game.home_score.is_not(None),
+        Game.away_score.is_not(None),
+    )
+    sides = union_all(
+        select(Game.home_team_id.label("team_id"), Game.home_score.label("scored"),
+               Game.away_score.label("allowed"))
+        .where(completed, Game.home_team_id.in_(team_ids)),
+        select(Game.away_team_id.label("team_id"), Game.away_score.label("scored"),
+               Game.home_score.label("allowed"))
+        .where(completed, Game.away_team_id.in_(team_ids)),
+    ).subquery()
+    return (
+        select(
+            sides.c.team_id,
+            func.sum(case((sides.c.scored > sides.c.allowed, 1), else_=0)).label("wins"),
+            func.sum(case((sides.c.scored < sides.c.allowed, 1), else_=0)).label("losses"),
+            func.sum(sides.c.scored).label("points_for"),
+            func.sum(sides.c.allowed).label("points_against"),
+        )
+        .group_by(sides.c.team_id)
+    )
+
+
+def _team_box_query(season: str, team_ids: List[int]):
+    return (
+        select(
+            PlayerStats.team_id,
+            *[func.coalesce(func.sum(getattr(PlayerStats, s)), 0).label(s) for s in TEAM_BOX_STATS],
+        )
+        .join(Game, PlayerStats.game_id == Game.id)
+        .where(
+            Game.season == season,
+            Game.status == "completed",
+            Game.home_score.is_not(None),
+            Game.away_score.is_not(None),
+            PlayerStats.team_id.in_(team_ids),
+        )
+        .group_by(PlayerStats.team_id)
+    )
+
+
+def recompute_standings(connection: Connection, season: str, team_ids: List[int]) -> Dict[int, dict]:
+    """Season records and box score totals for the teams, computed from completed games."""
+    standings = {
+        row.team_id: {**row._mapping, "season": season}
+        for row in connection.execute(_team_results_query(season, team_ids))
+    }
+    for row in connection.execute(_team_box_query(season, team_ids)):
+        if row.team_id in standings:
+            standings[row.team_id].update({s: row._mapping[s] for s in TEAM_BOX_STATS})
+    return standings
+
+
+def _season_team_ids(connection: Connection, season: str) -> List[int]:
+    """Teams that played, or have a standings row, in the season."""
+    return sorted(set(connection.execute(
+        union_all(
+            select(Game.home_team_id).where(Game.season == season),
+            select(Game.away_team_id).where(Game.season == season),
+            select(TeamSeasonStanding.team_id).where(TeamSeasonStanding.season == season),
+        )
+    ).scalars()))
+
+
+def _matchup_results_query(season: str, team_ids: Optional[List[int]] = None):
+    home_is_low = Game.home_team_id < Game.away_team_id
+    low = case((home_is_low, Game.home_team_id), else_=Game.away_team_id)
+    high = case((home_is_low, Game.away_team_id), else_=Game.home_team_id)
+    low_points = case((home_is_low, Game.home_score), else_=Game.away_score)
+    high_points = case((home_is_low, Game.away_score), else_=Game.home_score)
+    query = (
+        select(
+            low.label("min_team_id"),
+            high.label("max_team_id"),
+            func.count(Game.id).label("games_played"),
+            func.sum(case((low_points > high_points, 1), else_=0)).label("min_team_wins"),
+            func.sum(case((high_points > low_points, 1), else_=0)).label("max_team_wins"),
+            func.sum(low_points).label("min_team_points"),
+            func.sum(high_points).label("max_team_points"),
+        )
+        .where(
+            Game.season == season,
+            Game.status == "completed",
+            Game.home_score.is_not(None),
+            Game.away_score.is_not(None),
+        )
+        .group_by(low, high)
+    )
+    if team_ids is not None:
+        query = query.where(Game.home_team_id.in_(team_ids), Game.away_team_id.in_(team_ids))
+    return query
+
+
+def recompute_matchups(
+    connection: Connection,
+    season: str,
+    pairs: Optional[List[Tuple[int, int]]] = None
+) -> Dict[Tuple[int, int], dict]:
+    """Head-to-head rows for (min_team_id, max_team_id) pairs (all pairs if None), from completed games."""
+    team_ids = sorted({t for pair in pairs for t in pair}) if pairs is not None else None
+    rows = {
+        (row.min_team_id, row.max_team_id): {**row._mapping, "season": season}
+        for row in connection.execute(_matchup_results_query(season, team_ids))
+    }
+    if pairs is None:
+        return rows
+    return {pair: rows[pair] for pair in pairs if pair in rows}
+
+
+def _stored(connection: Connection, model, key: str, season: str, ids: List[int]) -> Dict[int, dict]:
+    table = model.__table__
+    rows = connection.execute(
+        select(table).where(table.c.season == season, table.c[key].in_(ids))
+    )
+    return {row._mapping[key]: dict(row._mapping) for row in rows}
+
+
+def _differences(stored: Optional[dict], expected: dict, fields: Iterable[str]) -> Dict[str, Tuple]:
+    stored = stored or {}
+    diffs = {}
+    for field in fields:
+        have, want = stored.get(field, 0) or 0, expected.get(field, 0) or 0
+        if abs(have - want) > 1e-6:
+            diffs[field] = (have, want)
+    return diffs
+
+
+def reconcile_player_aggregates(connection: Connection, season: str, player_ids: List[int]) -> Dict[int, dict]:
+    """
+    Compare the stored totals with a full recompute and overwrite any that differ.
+
+    Returns {player_id: {field: (stored, recomputed)}} for the players that
+    were wrong (an empty dict means the incremental totals were exact).
+    """
+    if not player_ids:
+        return {}
+    expected = recompute_player_aggregates(connection, season, player_ids)
+    stored = _stored(connection, PlayerSeasonAggregate, "player_id", season, player_ids)
+    fields = ("games_played",) + AGGREGATE_STATS
+    mismatches = {}
+    for player_id in player_ids:
+        diffs = _differences(stored.get(player_id), expected.get(player_id, {}), fields)
+        if diffs:
+            mismatches[player_id] = diffs
+    rows = [
+        {"player_id": pid, "season": season, "team_id": None, **{f: 0 for f in fields}, **expected.get(pid, {})}
+        for pid in mismatches
+    ]
+    bulk_upsert(connection, PlayerSeasonAggregate, rows, ["player_id", "season"])
+    return mismatches
+
+
+def reconcile_standings(
+    connection: Connection,
+    season: str,
+    team_ids: Optional[List[int]] = None
+) -> Dict[int, dict]:
+    """Compare stored standings with a recompute from games (all teams if None); overwrite any that differ."""
+    if team_ids is None:
+        team_ids = _season_team_ids(connection, season)
+    if not team_ids:
+        return {}
+    expected = recompute_standings(connection, season, team_ids)
+    stored = _stored(connection, TeamSeasonStanding, "team_id", season, team_ids)
+    mismatches = {}
+    for team_id in team_ids:
+        diffs = _differences(stored.get(team_id), expected.get(team_id, {}), STANDING_FIELDS)
+        if diffs:
+            mismatches[team_id] = diffs
+    rows = [
+        {"team_id": tid, "season": season, **{f: 0 for f in STANDING_FIELDS}, **expected.get(tid, {})}
+        for tid in mismatches
+    ]
+    bulk_upsert(connection, TeamSeasonStanding, rows, ["team_id", "season"])
+    return mismatches
+
+
+def reconcile_matchups(
+    connection: Connection,
+    season: str,
+    pairs: Optional[List[Tuple[int, int]]] = None
+) -> Dict[Tuple[int, int], dict]:
+    """Compare stored head-to-head rows with a recompute from games; overwrite any that differ."""
+    if pairs is not None and not pairs:
+        return {}
+    expected = recompute_matchups(connection, season, pairs)
+    stored_query = select(TeamMatchup.__table__).where(TeamMatchup.season == season)
+    stored = {
+        (row.min_team_id, row.max_team_id): dict(row._mapping)
+        for row in connection.execute(stored_query)
+        if pairs is None or (row.min_team_id, row.max_team_id) in pairs
+    }
+    mismatches = {}
+    for pair in (pairs if pairs is not None else sorted(set(stored) | set(expected))):
+        diffs = _differences(stored.get(pair), expected.get(pair, {}), MATCHUP_FIELDS)
+        if diffs:
+            mismatches[pair] = diffs
+    rows = [
+        {"min_team_id": low, "max_team_id": high, "season": season, **{f: 0 for f in MATCHUP_FIELDS},
+         **expected.get((low, high), {})}
+        for low, high in mismatches
+    ]
+    bulk_upsert(connection, TeamMatchup, rows, ["min_team_id", "max_team_id", "season"])
+    return mismatches
+
+
+def refresh_game_results(connection: Connection, game_ids: List[int]) -> None:
+    """
+    Bring standings and head-to-head rows in line with games written in bulk.
+
+    Bulk upserts (upstream sync, backfills) don't know a game's previous
+    result, so instead of a delta the touched teams and pairs are recomputed
+    from games, inside the same transaction as the upsert.
+    """
+    if not game_ids:
+        return
+    refresh_team_results(connection, connection.execute(
+        select(Game.season, Game.home_team_id, Game.away_team_id).where(Game.id.in_(game_ids))
+    ).all())
+
+
+def refresh_team_results(connection: Connection, games: Iterable[Tuple[str, int, int]]) -> None:
+    """Recompute the standings and head-to-head rows of the teams in the given (season, home, away) games."""
+    by_season: Dict[str, set] = {}
+    for season, home, away in games:
+        if season is not None and home is not None and away is not None:
+            by_season.setdefault(season, set()).add((min(home, away), max(home, away)))
+    for season, pairs in by_season.items():
+        reconcile_standings(connection, season, sorted({t for pair in pairs for t in pair}))
+        reconcile_matchups(connection, season, sorted(pairs))
+
+
+
+def refresh_box_scores(connection: Connection, rows: List[dict]) -> None:
+    """
+    Bring player season totals and team box totals in line with box scores written in bulk.
+
+    Like refresh_game_results: the upsert doesn't know the previous lines, so
+    the players' season aggregates and the standings of both teams in each
+    touched game are recomputed inside the same transaction.
+    """
+    pairs, ids = set(), []
+    for row in rows:
+        if row.get("player_id") is not None and row.get("game_id") is not None:
+            pairs.add((row["game_id"], row["player_id"]))
+        elif row.get("id") is not None:
+            ids.append(row["id"])
+    if ids:
+        pairs.update(connection.execute(
+            select(PlayerStats.game_id, PlayerStats.player_id).where(PlayerStats.id.in_(ids))
+        ).tuples())
+    if not pairs:
+        return
+    games = connection.execute(
+        select(Game.id, Game.season, Game.home_team_id, Game.away_team_id)
+        .where(Game.id.in_({game_id for game_id, _ in pairs}))
+    ).all()
+    by_game = {game.id: game for game in games}
+    players: Dict[str, set] = {}
+    teams: Dict[str, set] = {}
+    for game_id, player_id in pairs:
+        game = by_game.get(game_id)
+        if game is None:
+            continue
+        players.setdefault(game.season, set()).add(player_id)
+        teams.setdefault(game.season, set()).update((game.home_team_id, game.away_team_id))
+    for season in players:
+        reconcile_player_aggregates(connection, season, sorted(players[season]))
+        reconcile_standings(connection, season, sorted(teams[season]))
+
+
+# Reads
+
+def league_leaders_query(season: str, stat: str = "points", limit: int = 10, min_games: int = 1):
+    """Players ranked by per-game average of a stat, from the season aggregates."""
+    column = getattr(PlayerSeasonAggregate, stat)
+    per_game = (column * 1.0 / PlayerSeasonAggregate.games_played).label("per_game")
+    return (
+        select(
+            PlayerSeasonAggregate.player_id,
+            Player.name.label("player_name"),
+            PlayerSeasonAggregate.team_id,
+            PlayerSeasonAggregate.games_played,
+            column.label("total"),
+            per_game,
+        )
+        .join(Player, Player.id == PlayerSeasonAggregate.player_id)
+        .where(
+            PlayerSeasonAggregate.season == season,
+            PlayerSeasonAggregate.games_played >= max(min_games, 1),
+        )
+        .order_by(per_game.desc(), PlayerSeasonAggregate.player_id)
+        .limit(limit)
+    )
+
+
+def head_to_head_query(team_id: int, other_id: int, season: Optional[str] = None):
+    """A pair's head-to-head rows, oldest season first: one primary key range."""
+    query = (
+        select(TeamMatchup)
+        .where(
+            TeamMatchup.min_team_id == min(team_id, other_id),
+            TeamMatchup.max_team_id == max(team_id, other_id),
+        )
+        .order_by(TeamMatchup.season)
+    )
+    if season:
+        query = query.where(TeamMatchup.season == season)
+    return query
+
+
+def latest_season(db: Session) -> Optional[str]:
+    return db.query(func.max(PlayerSeasonAggregate.season)).scalar()
+
+
+@register_query("aggregates.league_leaders")
+def _league_leaders_plan(db: Session):
+    return league_leaders_query("2023-24")
+
+
+@register_query("aggregates.head_to_head")
+def _head_to_head_plan(db: Session):
+    return head_to_head_query(1, 2)
@@ -0,0 +1,161 @@
+"""
+Apache Arrow / Parquet service for NBA Analytics.
+
+Turns the bulk export queries into Arrow record batches (one per cursor
+partition, transposed straight into typed column arrays) and encodes them as
+an Arrow IPC stream or Parquet file while streaming. Also reads Parquet files
+back in batches for historical backfills through the bulk ingestion path.
+"""
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, Numeric, Select, String
+from sqlalchemy.engine import Engine
+from typing import Iterator, List
+import logging
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.models import Game, PlayerStats
+from app.services.export_service import stream_batches
+from app.services.ingestion_service import ingest_batches
+
+logger = logging.getLogger(__name__)
+
+ARROW_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Datasets that can be imported, with the natural key used for upserts
+IMPORT_TARGETS = {
+    "player-stats": (PlayerStats, ["player_id", "game_id"]),
+    "games": (Game, ["external_id"]),
+}
+
+
+def _arrow_type(sql_type) -> pa.DataType:
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sql_type, String):
+        return pa.string()
+    # e.g. a bare AVG(): its value type differs by database (Decimal on PostgreSQL)
+    raise TypeError(f"No Arrow type for {sql_type!r}; cast the column in the export query")
+
+
+def arrow_schema(stmt: Select) -> pa.Schema:
+    """Arrow schema for an export query, derived from its column types."""
+    return pa.schema([
+        pa.field(column.key, _arrow_type(column.type))
+        for column in stmt.selected_columns
+    ])
+
+
+def record_batches(
+    engine: Engine,
+    stmt: Select,
+    batch_size: int = 1000
+) -> Iterator[pa.RecordBatch]:
+    """Yield one RecordBatch per server-side cursor partition."""
+    schema = arrow_schema(stmt)
+    for _, rows in stream_batches(engine, stmt, batch_size):
+        columns = list(zip(*rows)) if rows else [[] for _ in schema]
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+            schema=schema,
+        )
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def encode_arrow_stream(batches: Iterator[pa.RecordBatch], schema: pa.Schema) -> Iterator[bytes]:
+    """Encode record batches as an Arrow IPC stream, yielding bytes per batch."""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def encode_parquet(batches: Iterator[pa.RecordBatch], schema: pa.Schema) -> Iterator[bytes]:
+    """Encode record batches as a Parquet file, one row group per batch."""
+    sink = _ChunkSink()
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd") as writer:
+        for batch in batches:
+            if batch.num_rows:
+                writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "arrow": encode_arrow_stream,
+    "parquet": encode_parquet,
+}
+
+
+def read_parquet_batches(path: str, batch_size: int = 1000) -> Iterator[List[dict]]:
+    """Read a Parquet file in batches of row dicts without loading it whole."""
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield batch.to_pylist()
+
+
+def import_parquet(
+    engine: Engine,
+    path: str,
+    dataset: str,
+    batch_size: int = 1000
+) -> int:
+    """
+    Backfill a dataset from a Parquet file through the bulk ingestion path.
+
+    Accepts files produced by the Parquet export; columns that are not part
+    of the target table (e.g. the joined season/game_date) are ignored.
+    """
+    if dataset not in IMPORT_TARGETS:
+        raise ValueError(f"Dataset '{dataset}' cannot be imported")
+    model, conflict_columns = IMPORT_TARGETS[dataset]
+
+    columns = set(pq.read_schema(path).names)
+    if dataset == "games" and "external_id" not in columns:
+        conflict_columns = ["id"]
+
+    def batches():
+        for rows in read_parquet_batches(path, batch_size):
+            if conflict_columns != ["id"]:
+                # Surrogate ids from another database must not clash with ours
+                for row in rows:
+                    row.pop("id", None)
+            yield rows
+
+    written = ingest_batches(engine, model, batches(), conflict_columns)
+    logger.info(f"Imported {written} rows into {model.__tablename__} from {path}")
+    return written
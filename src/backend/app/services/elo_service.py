@@ -0,0 +1,433 @@
+"""
+Elo team ratings for NBA Analytics.
+
+Every team starts at 1500. After each completed game the home team gains,
+and the away team loses, K x MOV multiplier x (result - expected result),
+where the expected result comes from the rating gap plus a home-court edge
+and the multiplier ((|margin| + 3) ^ 0.8 / (7.5 + 0.006 x winner's edge))
+scales with the margin of victory but less so for heavy favourites. At a
+team's first game of a new season its rating moves a quarter of the way
+back to 1500.
+
+Ratings are stored per team per game in team_elo_ratings:
+
+- update_elo() rates a newly completed game from the two teams' latest
+  rows, two index lookups and two inserts, independent of history size;
+- replay_elo() recomputes every game from a date on (a backfill, a late or
+  corrected result) from columnar game arrays. Elo is sequential per team,
+  but games that share no team are independent: each game is placed one
+  step after its teams' previous games and every step is one NumPy update,
+  so a season takes ~100 steps rather than 1,230. The same loop runs a
+  whole grid of K factors at once (tune_k_factor).
+
+NumPy is imported inside the functions that need it so it stays out of API
+startup.
+"""
+
+from datetime import datetime
+from sqlalchemy import and_, delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+from typing import Dict, Iterable, List, Optional, Sequence
+import logging
+
+from app.core.config import settings
+from app.db.query_plans import register_query
+from app.models import Game, Team, TeamEloRating
+
+logger = logging.getLogger(__name__)
+
+INITIAL_RATING = 1500.0
+SEASON_REVERSION = 0.25  # Share of the gap to INITIAL_RATING closed at a team's first game of a season
+K_GRID = tuple(range(8, 42, 2))
+
+
+def win_probability(home_rating, away_rating, home_advantage: Optional[float] = None):
+    """Pre-game probability that the home team wins (floats or NumPy arrays)."""
+    edge = settings.ELO_HOME_ADVANTAGE if home_advantage is None else home_advantage
+    return 1.0 / (1.0 + 10 ** ((away_rating - home_rating - edge) / 400.0))
+
+
+def _carry_over(rating):
+    return rating + SEASON_REVERSION * (INITIAL_RATING - rating)
+
+
+def _margin_terms(margin):
+    """The parts of an update that depend only on the final margin: result (1, 0.5, 0), MOV factor, winner's sign."""
+    won = 1.0 * (margin > 0) - 1.0 * (margin < 0)
+    return 0.5 * (won + 1), (abs(margin) + 3) ** 0.8, won
+
+
+def _shift(home_rating, away_rating, terms, k, home_advantage: float):
+    """Pre-game home win probability and the rating points the home team gains."""
+    result, mov, won = terms
+    edge = home_rating + home_advantage - away_rating
+    expected = 1.0 / (1.0 + 10 ** (-edge / 400.0))
+    return expected, k * mov / (7.5 + 0.006 * won * edge) * (result - expected)
+
+
+def _update(home_rating, away_rating, margin, k, home_advantage: float):
+    """
+    Pre-game home win probability and the rating points the home team gains.
+
+    Works element-wise on NumPy arrays, so one call updates a batch of games
+    (and, with k as a column, every K factor of a grid).
+    """
+    return _shift(home_rating, away_rating, _margin_terms(margin), k, home_advantage)
+
+
+def _levels(home: List[int], away: List[int], season: List[int]) -> List[int]:
+    """
+    Step at which each game can be rated.
+
+    A game goes one step after the latest game of either of its teams, so
+    games sharing a step share no team and each team's games keep their
+    order; a new season starts after every step of the previous one. A
+    season then takes roughly as many steps as a team plays games.
+    """
+    latest: dict = {}
+    levels, floor, top, current = [], 0, -1, None
+    for h, a, s in zip(home, away, season):
+        if s != current:
+            floor, current = top + 1, s
+        level = max(latest.get(h, -1) + 1, latest.get(a, -1) + 1, floor)
+        latest[h] = latest[a] = level
+        top = max(top, level)
+        levels.append(level)
+    return levels
+
+
+def replay(home, away, margin, season, ratings, last_season, k, home_advantage: Optional[float] = None):
+    """
+    Run games through Elo in order.
+
+    home / away are team column indexes into ratings, margin is home minus
+    away points and season an integer code per game; last_season holds the
+    code of each team's last rated season (-1 if none) and is updated in
+    place. k is a scalar or a sequence of K factors, all replayed together.
+    Returns (home_before, away_before, expected, shift), each of shape
+    (len(k), games) in the order the games were given.
+    """
+    import numpy as np
+
+    edge = settings.ELO_HOME_ADVANTAGE if home_advantage is None else home_advantage
+    ks = np.atleast_1d(np.asarray(k, dtype=np.float64))[:, None]
+    home, away = np.asarray(home, dtype=np.int64), np.asarray(away, dtype=np.int64)
+    margin = np.asarray(margin, dtype=np.float64)
+    season = np.asarray(season, dtype=np.int64)
+
+    levels = np.asarray(_levels(home.tolist(), away.tolist(), season.tolist()), dtype=np.int64)
+    order = np.argsort(levels, kind="stable")
+    home, away, margin, season = home[order], away[order], margin[order], season[order]
+    bounds = [0, *(np.flatnonzero(np.diff(levels[order])) + 1).tolist(), len(order)]
+    season_ends = [*(np.flatnonzero(np.diff(season)) + 1).tolist(), len(order)]
+
+    current = np.tile(np.asarray(ratings, dtype=np.float64), (len(ks), 1))
+    home_before, away_before = np.empty((len(ks), len(order))), np.empty((len(ks), len(order)))
+    terms = _margin_terms(margin)
+    season_end = 0
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == season_end:
+            # First step of a season: its teams move back toward the mean before their first game
+            season_end = next(e for e in season_ends if e > start)
+            teams = np.union1d(home[start:season_end], away[start:season_end])
+            returning = teams[(last_season[teams] >= 0) & (last_season[teams] != season[start])]
+            current[:, returning] = _carry_over(current[:, returning])
+            last_season[teams] = season[start]
+        h, a = home[start:end], away[start:end]
+        hb, ab = current[:, h], current[:, a]
+        _, shift = _shift(hb, ab, tuple(t[start:end] for t in terms), ks, edge)
+        current[:, h], current[:, a] = hb + shift, ab - shift
+        home_before[:, start:end], away_before[:, start:end] = hb, ab
+
+    expected, shift = _shift(home_before, away_before, terms, ks, edge)
+    unsorted = np.empty_like(order)
+    unsorted[order] = np.arange(len(order))
+    return home_before[:, unsorted], away_before[:, unsorted], expected[:, unsorted], shift[:, unsorted]
+
+
+def _completed_games_query(since: Optional[datetime] = None):
+    query = (
+        select(Game.id, Game.season, Game.game_date, Game.home_team_id, Game.away_team_id,
+               Game.home_score, Game.away_score)
+        .where(Game.status == "completed", Game.home_score.is_not(None), Game.away_score.is_not(None))
+        .order_by(Game.game_date, Game.id)
+    )
+    return query.where(Game.game_date >= since) if since is not None else query
+
+
+def latest_ratings_query(before: Optional[datetime] = None):
+    """
+    Each team's most recent rating row (optionally, the most recent before a date).
+
+    Per team, a correlated subquery walks the (team_id, game_date, game_id)
+    primary key backwards to the latest row, so the cost is a few index seeks
+    per team rather than a pass over the whole rating history.
+    """
+    def latest(column):
+        row = aliased(TeamEloRating)
+        query = select(getattr(row, column)).where(row.team_id == Team.id)
+        if before is not None:
+            query = query.where(row.game_date < before)
+        return (
+            query.order_by(row.game_date.desc(), row.game_id.desc())
+            .limit(1)
+            .correlate(Team)
+            .scalar_subquery()
+        )
+
+    return (
+        select(TeamEloRating.team_id, TeamEloRating.season, TeamEloRating.game_date, TeamEloRating.rating)
+        .select_from(Team)
+        .join(TeamEloRating, and_(
+            TeamEloRating.team_id == Team.id,
+            TeamEloRating.game_date == latest("game_date"),
+            TeamEloRating.game_id == latest("game_id"),
+        ))
+    )
+
+
+def ratings_as_of(connection: Connection, before: datetime, season: str) -> Dict[int, float]:
+    """
+    Each rated team's rating going into its next game of `season` after `before`.
+
+    A team whose last game was in an earlier season gets its carried-over
+    rating; teams without one are absent (they start at INITIAL_RATING).
+    """
+    return {
+        row.team_id: row.rating if row.season == season else _carry_over(row.rating)
+        for row in connection.execute(latest_ratings_query(before))
+    }
+
+
+def _team_latest_query(team_id: int):
+    return (
+        select(TeamEloRating.game_date, TeamEloRating.game_id, TeamEloRating.season, TeamEloRating.rating)
+        .where(TeamEloRating.team_id == team_id)
+        .order_by(TeamEloRating.game_date.desc(), TeamEloRating.game_id.desc())
+        .limit(1)
+    )
+
+
+def load_games(connection: Connection, since: Optional[datetime] = None) -> dict:
+    """Completed games (from a date on) as columnar arrays, in the order they are rated."""
+    import numpy as np
+
+    rows = connection.execute(_completed_games_query(since)).all()
+    team_ids = sorted({t for row in rows for t in (row.home_team_id, row.away_team_id)})
+    seasons = sorted({row.season for row in rows})
+    column = {team_id: i for i, team_id in enumerate(team_ids)}
+    code = {season: i for i, season in enumerate(seasons)}
+    return {
+        "team_ids": team_ids,
+        "seasons": seasons,
+        "game_id": [row.id for row in rows],
+        "game_date": [row.game_date for row in rows],
+        "home": np.fromiter((column[row.home_team_id] for row in rows), dtype=np.int64, count=len(rows)),
+        "away": np.fromiter((column[row.away_team_id] for row in rows), dtype=np.int64, count=len(rows)),
+        "margin": np.fromiter((row.home_score - row.away_score for row in rows), dtype=np.float64,
+                              count=len(rows)),
+        "season": np.fromiter((code[row.season] for row in rows), dtype=np.int64, count=len(rows)),
+    }
+
+
+def replay_elo(connection: Connection, since: Optional[datetime] = None) -> int:
+    """
+    Recompute the stored ratings of every completed game on or after `since` (default: all games).
+
+    Teams go in with their last stored rating before `since`. Returns the
+    number of games rated.
+    """
+    import numpy as np
+
+    games = load_games(connection, since)
+    state = {
+        row.team_id: (row.rating, row.season)
+        for row in connection.execute(latest_ratings_query(since))
+    } if since is not None else {}
+    stale = delete(TeamEloRating)
+    connection.execute(stale.where(TeamEloRating.game_date >= since) if since is not None else stale)
+    if not games["game_id"]:
+        return 0
+
+    # Only teams with a game in the replayed range need a column
+    team_ids, seasons = games["team_ids"], games["seasons"]
+    known = {season: i for i, season in enumerate(seasons)}
+    ratings = np.array([state.get(t, (INITIAL_RATING, None))[0] for t in team_ids])
+    # A season before the replayed range only needs a code different from every season in it
+    last_season = np.array([known.get(state[t][1], len(seasons)) if t in state else -1 for t in team_ids])
+
+    home_before, away_before, expected, shift = replay(
+        games["home"], games["away"], games["margin"], games["season"], ratings, last_season,
+        settings.ELO_K_FACTOR,
+    )
+    rows = []
+    for i, game_id in enumerate(games["game_id"]):
+        home, away = team_ids[games["home"][i]], team_ids[games["away"][i]]
+        common = {"game_id": game_id, "game_date": games["game_date"][i], "season": seasons[games["season"][i]]}
+        hb, ab, e, s = float(home_before[0, i]), float(away_before[0, i]), float(expected[0, i]), float(shift[0, i])
+        rows.append({**common, "team_id": home, "opponent_id": away, "is_home": True,
+                     "rating_before": hb, "rating": hb + s, "win_probability": e})
+        rows.append({**common, "team_id": away, "opponent_id": home, "is_home": False,
+                     "rating_before": ab, "rating": ab - s, "win_probability": 1.0 - e})
+    connection.execute(insert(TeamEloRating), rows)
+    logger.info(f"Replayed Elo for {len(games['game_id'])} games" + (f" since {since}" if since else ""))
+    return len(games["game_id"])
+
+
+def update_elo(connection: Connection, game: dict) -> bool:
+    """
+    Rate a newly completed game from the two teams' latest ratings.
+
+    If either team already has a rated game at or after this one (a late
+    result, or a game completed twice), the ratings from this game's date
+    on are replayed instead. Returns False if the game has no final score.
+    """
+    if game.get("status") != "completed" or game.get("home_score") is None or game.get("away_score") is None:
+        return False
+    home, away = game["home_team_id"], game["away_team_id"]
+    latest = {team: connection.execute(_team_latest_query(team)).first() for team in (home, away)}
+    if any(row is not None and (row.game_date, row.game_id) >= (game["game_date"], game["id"])
+           for row in latest.values()):
+        replay_elo(connection, since=game["game_date"])
+        return True
+
+    def rating_going_in(row) -> float:
+        if row is None:
+            return INITIAL_RATING
+        return row.rating if row.season == game["season"] else _carry_over(row.rating)
+
+    home_rating, away_rating = rating_going_in(latest[home]), rating_going_in(latest[away])
+    expected, shift = _update(
+        home_rating, away_rating, game["home_score"] - game["away_score"],
+        settings.ELO_K_FACTOR, settings.ELO_HOME_ADVANTAGE,
+    )
+    common = {"game_id": game["id"], "game_date": game["game_date"], "season": game["season"]}
+    connection.execute(insert(TeamEloRating), [
+        {**common, "team_id": home, "opponent_id": away, "is_home": True,
+         "rating_before": home_rating, "rating": home_rating + shift, "win_probability": expected},
+        {**common, "team_id": away, "opponent_id": home, "is_home": False,
+         "rating_before": away_rating, "rating": away_rating - shift, "win_probability": 1.0 - expected},
+    ])
+    return True
+
+
+def refresh_elo(connection: Connection, game_ids: Iterable[int]) -> bool:
+    """
+    Bring ratings in line with rewritten games (bulk upserts, corrected results).
+
+    Replays from the earliest of the games that are completed or already
+    rated; scheduled games that were never rated change nothing. Returns
+    whether anything was replayed.
+    """
+    game_ids = sorted(set(game_ids))
+    if not game_ids:
+        return False
+    since = min(
+        (d for d in (
+            connection.execute(
+                select(func.min(Game.game_date)).where(Game.id.in_(game_ids), Game.status == "completed")
+            ).scalar(),
+            connection.execute(
+                select(func.min(TeamEloRating.game_date)).where(TeamEloRating.game_id.in_(game_ids))
+            ).scalar(),
+        ) if d is not None),
+        default=None,
+    )
+    if since is None:
+        return False
+    replay_elo(connection, since=since)
+    return True
+
+
+def tune_k_factor(connection: Connection, k_grid: Sequence[float] = K_GRID, burn_in_seasons: int = 1) -> dict:
+    """
+    Grid search for the K factor that best predicts results.
+
+    Every K of the grid is replayed over all completed games in one pass;
+    each is scored by the log loss and Brier score of its pre-game win
+    probabilities, skipping the first burn_in_seasons while ratings settle.
+    """
+    import numpy as np
+
+    games = load_games(connection)
+    if not games["game_id"]:
+        return {"games": 0, "k_factor": None, "grid": []}
+    n = len(games["team_ids"])
+    _, _, expected, _ = replay(
+        games["home"], games["away"], games["margin"], games["season"],
+        np.full(n, INITIAL_RATING), np.full(n, -1), k_grid,
+    )
+    scored = games["season"] >= burn_in_seasons
+    if not scored.any():
+        scored[:] = True
+    outcome = np.where(games["margin"] > 0, 1.0, np.where(games["margin"] < 0, 0.0, 0.5))[scored]
+    p = np.clip(expected[:, scored], 1e-9, 1 - 1e-9)
+    log_loss = -(outcome * np.log(p) + (1 - outcome) * np.log(1 - p)).mean(axis=1)
+    brier = ((p - outcome) ** 2).mean(axis=1)
+
+    best = int(np.argmin(log_loss))
+    return {
+        "games": int(scored.sum()),
+        "k_factor": float(k_grid[best]),
+        "log_loss": round(float(log_loss[best]), 5),
+        "grid": [
+            {"k_factor": float(k), "log_loss": round(float(l), 5), "brier": round(float(b), 5)}
+            for k, l, b in zip(k_grid, log_loss, brier)
+        ],
+    }
+
+
+class EloService:
+    """
+    Service class for reading stored Elo ratings.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def current_ratings(self) -> List[dict]:
+        """Every team's latest rating, best first."""
+        latest = latest_ratings_query().subquery()
+        rows = self.db.execute(
+            select(latest, Team.name, Team.abbreviation)
+            .join(Team, Team.id == latest.c.team_id)
+            .order_by(latest.c.rating.desc(), latest.c.team_id)
+        ).all()
+        return [
+            {
+                "rank": rank,
+                "team_id": row.team_id,
+                "team_name": row.name,
+                "abbreviation": row.abbreviation,
+                "season": row.season,
+                "as_of": row.game_date,
+                "rating": round(row.rating, 1),
+            }
+            for rank, row in enumerate(rows, start=1)
+        ]
+
+    def _history_query(self, team_id: int, season: Optional[str] = None):
+        query = select(TeamEloRating).where(TeamEloRating.team_id == team_id)
+        if season:
+            query = query.where(TeamEloRating.season == season)
+        return query.order_by(TeamEloRating.game_date, TeamEloRating.game_id)
+
+    def team_history(self, team_id: int, season: Optional[str] = None) -> List[TeamEloRating]:
+        """A team's rating before and after each game, in date order."""
+        return list(self.db.execute(self._history_query(team_id, season)).scalars())
+
+
+@register_query("elo.team_history")
+def _team_history_plan(db: Session):
+    return EloService(db)._history_query(1, "2023-24")
+
+
+@register_query("elo.team_latest")
+def _team_latest_plan(db: Session):
+    return _team_latest_query(1)
+
+
+@register_query("elo.latest_ratings")
+def _latest_ratings_plan(db: Session):
+    return latest_ratings_query()
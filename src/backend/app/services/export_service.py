@@ -0,0 +1,205 @@
+"""
+Bulk export service for NBA Analytics.
+
+Builds the export queries for box scores, games and season aggregates and
+streams their results in fixed-size chunks from a server-side cursor, so a
+multi-season export uses constant memory no matter how many rows it returns.
+"""
+
+from sqlalchemy import Float, Select, cast, func, select
+from sqlalchemy.engine import Engine
+from typing import Iterator, List, Optional, Sequence
+import csv
+import io
+import logging
+
+import orjson
+
+from app.db.query_plans import register_query
+from app.models import Game, Player, PlayerStats, TeamSchedule
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+_BOX_SCORE_COLUMNS = [
+    "minutes_played", "points", "rebounds", "assists", "steals", "blocks",
+    "turnovers", "fouls", "field_goals_made", "field_goals_attempted",
+    "three_pointers_made", "three_pointers_attempted", "free_throws_made",
+    "free_throws_attempted", "plus_minus",
+]
+
+
+def player_stats_query(
+    season: Optional[str] = None,
+    team_id: Optional[int] = None,
+    player_id: Optional[int] = None
+) -> Select:
+    """Box score rows with their game's season and date."""
+    stmt = (
+        select(
+            PlayerStats.id,
+            PlayerStats.player_id,
+            PlayerStats.game_id,
+            PlayerStats.team_id,
+            Game.season,
+            Game.game_date,
+            *[getattr(PlayerStats, c) for c in _BOX_SCORE_COLUMNS],
+        )
+        .join(Game, PlayerStats.game_id == Game.id)
+    )
+    if season:
+        stmt = stmt.where(Game.season == season)
+    if team_id:
+        stmt = stmt.where(PlayerStats.team_id == team_id)
+    if player_id:
+        stmt = stmt.where(PlayerStats.player_id == player_id)
+    return stmt.order_by(PlayerStats.id)
+
+
+def games_query(
+    season: Optional[str] = None,
+    team_id: Optional[int] = None,
+    player_id: Optional[int] = None
+) -> Select:
+    """Game rows, optionally limited to one team's or one player's games."""
+    stmt = select(
+        Game.id,
+        Game.external_id,
+        Game.season,
+        Game.game_date,
+        Game.home_team_id,
+        Game.away_team_id,
+        Game.home_score,
+        Game.away_score,
+        Game.status,
+        Game.game_type,
+    )
+    if team_id:
+        # Filter and order on the schedule index; games rows are fetched by id
+        stmt = stmt.join(TeamSchedule, TeamSchedule.game_id == Game.id).where(TeamSchedule.team_id == team_id)
+        season_column, order = TeamSchedule.season, (TeamSchedule.game_date, TeamSchedule.game_id)
+    else:
+        season_column, order = Game.season, (Game.game_date, Game.id)
+    if season:
+        stmt = stmt.where(season_column == season)
+    if player_id:
+        stmt = stmt.where(
+            Game.id.in_(select(PlayerStats.game_id).where(PlayerStats.player_id == player_id))
+        )
+    return stmt.order_by(*order)
+
+
+def season_aggregates_query(
+    season: Optional[str] = None,
+    team_id: Optional[int] = None,
+    player_id: Optional[int] = None
+) -> Select:
+    """
+    Per-player, per-season totals and averages.
+
+    AVG() is cast to a float: PostgreSQL returns numeric (Decimal), which
+    neither orjson nor a float64 Arrow column accepts.
+    """
+    totals = [
+        func.sum(getattr(PlayerStats, c)).label(f"total_{c}")
+        for c in ("points", "rebounds", "assists", "steals", "blocks", "turnovers")
+    ]
+    stmt = (
+        select(
+            PlayerStats.player_id,
+            Player.name.label("player_name"),
+            Game.season,
+            func.count(PlayerStats.id).label("games_played"),
+            cast(func.avg(PlayerStats.minutes_played), Float).label("avg_minutes"),
+            cast(func.avg(PlayerStats.points), Float).label("avg_points"),
+            cast(func.avg(PlayerStats.rebounds), Float).label("avg_rebounds"),
+            cast(func.avg(PlayerStats.assists), Float).label("avg_assists"),
+            *totals,
+            func.sum(PlayerStats.field_goals_made).label("field_goals_made"),
+            func.sum(PlayerStats.field_goals_attempted).label("field_goals_attempted"),
+            func.sum(PlayerStats.three_pointers_made).label("three_pointers_made"),
+            func.sum(PlayerStats.three_pointers_attempted).label("three_pointers_attempted"),
+            func.sum(PlayerStats.free_throws_made).label("free_throws_made"),
+            func.sum(PlayerStats.free_throws_attempted).label("free_throws_attempted"),
+        )
+        .join(Game, PlayerStats.game_id == Game.id)
+        .join(Player, PlayerStats.player_id == Player.id)
+    )
+    if season:
+        stmt = stmt.where(Game.season == season)
+    if team_id:
+        stmt = stmt.where(PlayerStats.team_id == team_id)
+    if player_id:
+        stmt = stmt.where(PlayerStats.player_id == player_id)
+    return (
+        stmt.group_by(PlayerStats.player_id, Player.name, Game.season)
+        .order_by(Game.season, PlayerStats.player_id)
+    )
+
+
+EXPORT_QUERIES = {
+    "player-stats": player_stats_query,
+    "games": games_query,
+    "season-aggregates": season_aggregates_query,
+}
+
+# Filtered exports must stay index-driven; the unfiltered full dumps scan by design
+for _dataset, _build in EXPORT_QUERIES.items():
+    _name = _dataset.replace("-", "_")
+    register_query(f"exports.{_name}_by_season")(lambda db, b=_build: b(season="2023-24"))
+    register_query(f"exports.{_name}_by_team")(lambda db, b=_build: b(team_id=1))
+    register_query(f"exports.{_name}_by_player")(lambda db, b=_build: b(player_id=1))
+
+
+def stream_batches(
+    engine: Engine,
+    stmt: Select,
+    batch_size: int = 1000
+) -> Iterator[tuple]:
+    """
+    Yield (column_names, rows) batches from a server-side cursor.
+
+    stream_results keeps PostgreSQL from buffering the whole result set in the
+    client; only batch_size rows are held in memory at a time.
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        ).execute(stmt)
+        columns = list(result.keys())
+        empty = True
+        for partition in result.partitions(batch_size):
+            empty = False
+            yield columns, partition
+        if empty:
+            yield columns, []
+
+
+def _ndjson_chunk(columns: Sequence[str], rows: List) -> bytes:
+    return b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def encode_stream(
+    batches: Iterator[tuple],
+    export_format: str = "ndjson"
+) -> Iterator[bytes]:
+    """Encode row batches as NDJSON or CSV, one output chunk per batch."""
+    header_written = False
+    rows_written = 0
+    for columns, rows in batches:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+        else:
+            yield _ndjson_chunk(columns, rows)
+        rows_written += len(rows)
+    logger.info(f"Export finished: {rows_written} rows as {export_format}")
@@ -0,0 +1,171 @@
+"""
+Game service layer for NBA Analytics.
+
+Game search and schedule queries, and upkeep of the per-team schedule index
+(team_schedule) they read from.
+
+A team plays at home or away, so "a team's games" on games alone needs
+home_team_id = ? OR away_team_id = ?, which the planner answers with two
+index scans merged and sorted (or a table scan). team_schedule holds one row
+per team per game, keyed (team_id, game_date, game_id), so a team's games in
+a date range, or its next N games, is one ordered range of that key.
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased, joinedload
+from typing import Iterable, List, Optional, Tuple
+import logging
+
+from app.db.query_plans import register_query
+from app.models import Game, Team, TeamSchedule
+from app.schemas import GameSearch
+
+logger = logging.getLogger(__name__)
+
+_SCHEDULE_COLUMNS = ["team_id", "game_date", "game_id", "season", "opponent_id", "is_home"]
+
+
+def _schedule_rows(*criteria):
+    """Both sides of every game matching criteria, as team_schedule rows."""
+    return union_all(
+        select(Game.home_team_id, Game.game_date, Game.id, Game.season, Game.away_team_id,
+               literal(True)).where(*criteria),
+        select(Game.away_team_id, Game.game_date, Game.id, Game.season, Game.home_team_id,
+               literal(False)).where(*criteria),
+    )
+
+
+def refresh_team_schedule(connection: Connection, game_ids: Iterable[int]) -> None:
+    """
+    Rewrite the schedule rows of the given games from the games table.
+
+    Call in the same transaction as any write that inserts or deletes games
+    or changes their date, season or teams. Deleted games simply get no new
+    rows.
+    """
+    game_ids = sorted(set(game_ids))
+    if not game_ids:
+        return
+    connection.execute(delete(TeamSchedule).where(TeamSchedule.game_id.in_(game_ids)))
+    connection.execute(
+        insert(TeamSchedule).from_select(_SCHEDULE_COLUMNS, _schedule_rows(Game.id.in_(game_ids)))
+    )
+
+
+def rebuild_team_schedule(connection: Connection) -> int:
+    """Rebuild the whole schedule index from games (after a backfill that bypassed it)."""
+    connection.execute(delete(TeamSchedule))
+    connection.execute(insert(TeamSchedule).from_select(_SCHEDULE_COLUMNS, _schedule_rows()))
+    return connection.execute(select(func.count()).select_from(TeamSchedule)).scalar()
+
+
+class GameService:
+    """
+    Service class for game and schedule queries.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _games(self):
+        return self.db.query(Game).options(joinedload(Game.home_team), joinedload(Game.away_team))
+
+    def _search_query(self, search: GameSearch, count: bool = False):
+        query = self.db.query(func.count(Game.id)).select_from(Game) if count else self._games()
+        if search.team_id is not None:
+            # Filter and order on the schedule index; games rows are fetched by id
+            query = query.join(TeamSchedule, TeamSchedule.game_id == Game.id).filter(
+                TeamSchedule.team_id == search.team_id
+            )
+            season, game_date, order = TeamSchedule.season, TeamSchedule.game_date, TeamSchedule.game_id
+        else:
+            season, game_date, order = Game.season, Game.game_date, Game.id
+        if search.season:
+            query = query.filter(season == search.season)
+        if search.date_from:
+            query = query.filter(game_date >= search.date_from)
+        if search.date_to:
+            query = query.filter(game_date <= search.date_to)
+        if search.status:
+            query = query.filter(Game.status == search.status.value)
+        return query if count else query.order_by(game_date, order)
+
+    def search_games(self, search: GameSearch) -> Tuple[List[Game], int]:
+        """Games matching the search, in date order, and the total number of matches."""
+        total = self._search_query(search, count=True).scalar()
+        games = self._search_query(search).offset(search.offset).limit(search.limit).all()
+        return games, total
+
+    def get_game_by_id(self, game_id: int) -> Optional[Game]:
+        """Get a game by ID, with both teams loaded."""
+        return self._games().filter(Game.id == game_id).first()
+
+    def get_game_version(self, game_id: int) -> Optional[Tuple[int, Optional[int], Optional[int]]]:
+        """
+        Row versions of a game and its home and away teams, or None if the game doesn't exist.
+
+        The game response nests both teams, so all three versions feed the ETag.
+        """
+        home, away = aliased(Team), aliased(Team)
+        row = (
+            self.db.query(Game.version, home.version, away.version)
+            .outerjoin(home, Game.home_team_id == home.id)
+            .outerjoin(away, Game.away_team_id == away.id)
+            .filter(Game.id == game_id)
+            .first()
+        )
+        return tuple(row) if row else None
+
+    def _team_schedule_query(self, team_id: int, after: datetime, limit: int):
+        upcoming = (
+            select(TeamSchedule.game_id, TeamSchedule.game_date)
+            .where(TeamSchedule.team_id == team_id, TeamSchedule.game_date >= after)
+            .order_by(TeamSchedule.game_date, TeamSchedule.game_id)
+            .limit(limit)
+            .subquery()
+        )
+        return (
+            self._games()
+            .join(upcoming, upcoming.c.game_id == Game.id)
+            .order_by(upcoming.c.game_date, upcoming.c.game_id)
+        )
+
+    def get_team_schedule(self, team_id: int, after: Optional[datetime] = None, limit: int = 5) -> List[Game]:
+        """A team's next `limit` games on or after `after` (default: now)."""
+        return self._team_schedule_query(team_id, after or datetime.utcnow(), limit).all()
+
+    def _games_on_query(self, day: date):
+        start = datetime.combine(day, datetime.min.time())
+        return (
+            self._games()
+            .filter(Game.game_date >= start, Game.game_date < start + timedelta(days=1))
+            .order_by(Game.game_date, Game.id)
+        )
+
+    def get_games_on(self, day: date) -> List[Game]:
+        """All games played (or scheduled) on a calendar day."""
+        return self._games_on_query(day).all()
+
+
+@register_query("games.team_season")
+def _team_season_plan(db: Session):
+    return GameService(db)._search_query(GameSearch(team_id=1, season="2023-24"))
+
+
+@register_query("games.season_range")
+def _season_range_plan(db: Session):
+    return GameService(db)._search_query(
+        GameSearch(season="2023-24", date_from=datetime(2024, 1, 1), date_to=datetime(2024, 1, 31))
+    )
+
+
+@register_query("games.team_upcoming")
+def _team_upcoming_plan(db: Session):
+    return GameService(db)._team_schedule_query(1, datetime(2024, 1, 15), 5)
+
+
+@register_query("games.on_date")
+def _on_date_plan(db: Session):
+    return GameService(db)._games_on_query(date(2024, 1, 15))
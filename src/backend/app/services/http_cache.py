@@ -0,0 +1,157 @@
+"""
+Record/replay HTTP cache for the upstream NBA API client.
+
+Responses to GET requests are stored on disk, content-addressed:
+
+    <dir>/entries/<key[:2]>/<key>.json      request key -> status, headers, validators, body hash
+    <dir>/bodies/<sha[:2]>/<sha>            response body, named by its SHA-256
+
+The key is a hash of the method and the normalized URL (query parameters
+sorted), so the same request always maps to the same entry and identical
+bodies are stored once.
+
+Modes (HTTP_CACHE_MODE):
+    off     no caching
+    record  serve fresh entries (younger than HTTP_CACHE_TTL); revalidate
+            stale ones with If-None-Match / If-Modified-Since, and store
+            new responses
+    replay  serve only from recorded entries, whatever their age; a request
+            that was never recorded fails instead of touching the network
+"""
+
+from typing import Dict, Optional
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("off", "record", "replay")
+
+# Headers kept with a recorded response (hop-by-hop and encoding headers are dropped,
+# since the stored body is already decoded)
+_STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "date")
+
+
+def request_key(method: str, url: str) -> str:
+    """Stable key for a request: method + URL with sorted query parameters."""
+    parts = urlsplit(str(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    normalized = urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ""))
+    return hashlib.sha256(f"{method.upper()} {normalized}".encode("utf-8")).hexdigest()
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class CachedResponse:
+    """A recorded response and its metadata."""
+
+    def __init__(self, key: str, meta: dict, body: bytes):
+        self.key = key
+        self.meta = meta
+        self.body = body
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.meta["stored_at"]
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.meta["headers"].get("etag"):
+            headers["If-None-Match"] = self.meta["headers"]["etag"]
+        if self.meta["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = self.meta["headers"]["last-modified"]
+        return headers
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            self.meta["status"],
+            headers={**self.meta["headers"], "x-cache": "HIT"},
+            content=self.body,
+            request=request,
+        )
+
+
+class HttpCache:
+    """On-disk response store used by NBAApiClient."""
+
+    def __init__(self, directory: str, mode: str = "record", ttl: float = 3600):
+        if mode not in MODES:
+            raise ValueError(f"Unknown HTTP cache mode '{mode}' (expected one of {', '.join(MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.ttl = ttl
+        self.hits = 0
+        self.revalidated = 0
+        self.stored = 0
+
+    @classmethod
+    def from_settings(cls) -> Optional["HttpCache"]:
+        if settings.HTTP_CACHE_MODE == "off":
+            return None
+        return cls(settings.HTTP_CACHE_DIR, settings.HTTP_CACHE_MODE, settings.HTTP_CACHE_TTL)
+
+    @property
+    def replay(self) -> bool:
+        return self.mode == "replay"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, "entries", key[:2], f"{key}.json")
+
+    def _body_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "bodies", digest[:2], digest)
+
+    def lookup(self, method: str, url: str) -> Optional[CachedResponse]:
+        key = request_key(method, url)
+        try:
+            with open(self._entry_path(key)) as f:
+                meta = json.load(f)
+            with open(self._body_path(meta["body_sha256"]), "rb") as f:
+                body = f.read()
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        return CachedResponse(key, meta, body)
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        return self.replay or cached.age < self.ttl
+
+    def store(self, method: str, url: str, response: httpx.Response) -> None:
+        """Record a successful response (unless the upstream forbids storing it)."""
+        if "no-store" in response.headers.get("cache-control", ""):
+            return
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            _atomic_write(body_path, body)
+        meta = {
+            "method": method.upper(),
+            "url": str(url),
+            "status": response.status_code,
+            "headers": {k: response.headers[k] for k in _STORED_HEADERS if k in response.headers},
+            "body_sha256": digest,
+            "stored_at": time.time(),
+        }
+        _atomic_write(self._entry_path(request_key(method, url)), json.dumps(meta, indent=1).encode())
+        self.stored += 1
+
+    def touch(self, cached: CachedResponse) -> None:
+        """Mark an entry fresh again after a 304 Not Modified."""
+        cached.meta["stored_at"] = time.time()
+        _atomic_write(self._entry_path(cached.key), json.dumps(cached.meta, indent=1).encode())
+        self.revalidated += 1
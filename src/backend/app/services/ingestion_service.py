@@ -0,0 +1,155 @@
+"""
+Bulk ingestion service for NBA Analytics.
+
+Set-based upserts for loading large batches of teams, players, games and box
+scores (backfills, upstream syncs) without going through the ORM unit of work.
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from typing import Callable, Iterable, List, Optional, Sequence, Set
+import logging
+
+from app.db.events import publish_invalidation
+from app.services.game_service import refresh_team_schedule
+
+logger = logging.getLogger(__name__)
+
+# Row columns that map onto entity-scoped cache invalidation tags
+_TAG_COLUMNS = {
+    "player_id": "player",
+    "team_id": "team",
+    "home_team_id": "team",
+    "away_team_id": "team",
+    "game_id": "game",
+    "season": "season",
+}
+
+
+_ENTITY_TAGS = {"players": "player", "teams": "team", "games": "game"}
+
+# Tables bulk_upsert keeps in step with a written table
+_DERIVED_TABLES = {
+    "games": {"team_season_standings", "team_matchups", "team_elo_ratings"},
+    "player_stats": {"player_season_aggregates", "team_season_standings"},
+}
+
+
+def _row_tags(table_name: str, rows: List[dict]) -> Set[str]:
+    tags = set()
+    entity = _ENTITY_TAGS.get(table_name)
+    for row in rows:
+        if entity and row.get("id") is not None:
+            tags.add(f"{entity}:{row['id']}")
+        for column, prefix in _TAG_COLUMNS.items():
+            value = row.get(column)
+            if value is not None:
+                tags.add(f"{prefix}:{value}")
+    return tags
+
+
+def _insert_for(connection: Connection, table):
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Bulk upsert is not supported for dialect '{dialect}'")
+
+
+def _game_ids(connection: Connection, table, rows: List[dict]) -> List[int]:
+    ids = [row["id"] for row in rows if row.get("id") is not None]
+    external_ids = [row["external_id"] for row in rows if row.get("id") is None and row.get("external_id")]
+    if external_ids:
+        ids.extend(connection.execute(
+            select(table.c.id).where(table.c.external_id.in_(external_ids))
+        ).scalars())
+    return ids
+
+
+def bulk_upsert(
+    connection: Connection,
+    model,
+    rows: List[dict],
+    conflict_columns: Sequence[str]
+) -> int:
+    """
+    Insert rows, updating existing ones that collide on conflict_columns.
+
+    Only keys that are real columns of the model are written. Updated rows
+    get their version bumped and updated_at refreshed, exactly like an ORM
+    update, so ETags and optimistic locking keep working. Upserted games have
+    their team_schedule rows, and their teams' standings and head-to-head
+    rows, brought up to date in the same transaction; upserted box scores
+    their players' season aggregates and their games' team standings.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    columns = set(table.c.keys())
+    rows = [{k: v for k, v in row.items() if k in columns} for row in rows]
+    payload_columns = set().union(*(row.keys() for row in rows))
+
+    stmt = _insert_for(connection, table)
+    update_columns = {
+        name: stmt.excluded[name]
+        for name in payload_columns
+        if name not in conflict_columns and name not in ("id", "created_at", "version")
+    }
+    if "version" in columns:
+        update_columns["version"] = table.c.version + 1
+    if "updated_at" in columns:
+        update_columns["updated_at"] = func.now()
+
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=update_columns)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+    connection.execute(stmt, rows)
+    if table.name == "games":
+        # Imported here: aggregate_service builds on bulk_upsert
+        from app.services.aggregate_service import refresh_game_results
+        from app.services.elo_service import refresh_elo
+
+        game_ids = _game_ids(connection, table, rows)
+        refresh_team_schedule(connection, game_ids)
+        refresh_game_results(connection, game_ids)
+        refresh_elo(connection, game_ids)
+    elif table.name == "player_stats":
+        from app.services.aggregate_service import refresh_box_scores
+
+        refresh_box_scores(connection, rows)
+    return len(rows)
+
+
+def ingest_batches(
+    engine: Engine,
+    model,
+    batches: Iterable[List[dict]],
+    conflict_columns: Sequence[str],
+    after_batch: Optional[Callable[[Connection, List[dict]], Set[str]]] = None
+) -> int:
+    """
+    Upsert batches of rows, one transaction per batch.
+
+    Core statements bypass the ORM session events, so the table tag and the
+    entity tags found in the rows (player, team, game, season) are
+    invalidated here once the load is done. after_batch runs inside each
+    batch's transaction (for bookkeeping that must commit with the rows) and
+    may return extra tags to invalidate.
+    """
+    written = 0
+    tags = {model.__tablename__, *_DERIVED_TABLES.get(model.__tablename__, ())}
+    try:
+        for batch in batches:
+            with engine.begin() as connection:
+                written += bulk_upsert(connection, model, batch, conflict_columns)
+                if after_batch is not None:
+                    tags.update(after_batch(connection, batch) or ())
+            tags.update(_row_tags(model.__tablename__, batch))
+            logger.info(f"Ingested {written} {model.__tablename__} rows so far")
+    finally:
+        if written:
+            publish_invalidation(tags)
+    return written
@@ -0,0 +1,51 @@
+"""
+Live game service for NBA Analytics.
+
+Snapshots of a game's score and box score, sent to a live subscriber when it
+connects (and again if it falls too far behind), so clients can apply the
+patches that follow without polling.
+"""
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.live import BOX_SCORE_FIELDS, SCORE_FIELDS
+from app.db.query_plans import register_query
+from app.models import Game, PlayerStats
+
+
+def box_score_query(game_id: int) -> Select:
+    return (
+        select(
+            PlayerStats.player_id,
+            PlayerStats.team_id,
+            *[getattr(PlayerStats, f) for f in BOX_SCORE_FIELDS],
+        )
+        .where(PlayerStats.game_id == game_id)
+        .order_by(PlayerStats.team_id, PlayerStats.player_id)
+    )
+
+
+def game_snapshot(engine: Engine, game_id: int) -> Optional[dict]:
+    """Current score and box score of a game, or None if it does not exist."""
+    with engine.connect() as connection:
+        game = connection.execute(
+            select(Game.id, Game.home_team_id, Game.away_team_id, *[getattr(Game, f) for f in SCORE_FIELDS])
+            .where(Game.id == game_id)
+        ).first()
+        if game is None:
+            return None
+        box_score = connection.execute(box_score_query(game_id))
+        return {
+            "type": "snapshot",
+            "game_id": game_id,
+            "game": dict(game._mapping),
+            "box_score": [dict(row._mapping) for row in box_score],
+        }
+
+
+@register_query("live.box_score")
+def _box_score_plan(db: Session):
+    return box_score_query(1)
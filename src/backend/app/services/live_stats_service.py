@@ -0,0 +1,272 @@
+"""
+Live box score delta processing for NBA Analytics.
+
+During a game the feed sends partial updates (a new score, a player's new
+points and rebounds). Each batch is applied in one transaction:
+
+- only the game and box score fields whose values actually changed are
+  written;
+- the difference between each box score's old and new values is added to
+  the player's season aggregates, and a change in the game's result to both
+  teams' standings and their head-to-head record (see
+  app.services.aggregate_service);
+- a game that becomes final is Elo-rated, and a corrected final result
+  replays the ratings from that game on (see app.services.elo_service);
+- a final game is added to its players' prediction feature states, and a
+  box score correction after the final replays theirs (see
+  app.services.prediction_service);
+- the changes are pushed to live subscribers and the affected cache
+  entries evicted once the transaction commits.
+
+When a game becomes final, reconcile_game() checks the incrementally
+maintained totals of everyone involved against a full recompute.
+"""
+
+from dataclasses import asdict, dataclass, field
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection, Engine
+from typing import Any, Dict, List, Optional
+import logging
+
+from app.core.live import BOX_SCORE_FIELDS, box_score_update, live_hub, score_update
+from app.db.events import publish_invalidation
+from app.models import Game, Player, PlayerStats
+from app.services.aggregate_service import (
+    AGGREGATE_STATS,
+    TEAM_BOX_STATS,
+    add_matchup_delta,
+    add_player_deltas,
+    add_standings_delta,
+    game_contribution,
+    reconcile_matchups,
+    reconcile_player_aggregates,
+    reconcile_standings,
+    team_box_totals,
+)
+from app.services.elo_service import refresh_elo, update_elo
+from app.services.prediction_service import refresh_features, update_features
+
+logger = logging.getLogger(__name__)
+
+_PERCENTAGES = (
+    ("field_goal_percentage", "field_goals_made", "field_goals_attempted"),
+    ("three_point_percentage", "three_pointers_made", "three_pointers_attempted"),
+    ("free_throw_percentage", "free_throws_made", "free_throws_attempted"),
+)
+
+
+@dataclass
+class DeltaResult:
+    """What one batch of live changes touched."""
+
+    game_id: int
+    season: str
+    game_fields_changed: List[str] = field(default_factory=list)
+    box_scores_changed: int = 0
+    standings_changed: bool = False
+    ratings_changed: bool = False  # Elo ratings were written
+    features_changed: bool = False  # Player feature states were written
+    completed: bool = False  # The game became final in this batch
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _percentages(line: dict) -> dict:
+    return {
+        name: round(line[made] / line[attempted], 3) if line.get(attempted) else None
+        for name, made, attempted in _PERCENTAGES
+    }
+
+
+def _add_delta(deltas: Dict[int, dict], player_id: int, delta: dict) -> None:
+    totals = deltas.setdefault(player_id, {})
+    for name, value in delta.items():
+        totals[name] = value if name == "team_id" else totals.get(name, 0) + value
+
+
+def _without(team_totals: Dict[int, dict], deltas: Dict[int, dict]) -> Dict[int, dict]:
+    """Per-team box score totals as they were before this batch's player deltas."""
+    before = {team_id: dict(totals) for team_id, totals in team_totals.items()}
+    for delta in deltas.values():
+        team = before.setdefault(delta.get("team_id"), {})
+        for stat in TEAM_BOX_STATS:
+            team[stat] = team.get(stat, 0) - delta.get(stat, 0)
+    return before
+
+
+class LiveStatsService:
+    """Applies live game and box score deltas to games, player_stats and the season totals."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def apply(
+        self,
+        game_id: int,
+        game_update: Optional[Dict[str, Any]] = None,
+        box_scores: Optional[List[Dict[str, Any]]] = None
+    ) -> DeltaResult:
+        """
+        Apply one batch of partial updates to a game.
+
+        game_update holds new values for any of the game's score fields;
+        each box_scores entry holds a player_id and new values for any box
+        score fields. Raises LookupError if the game or a new line's player
+        does not exist, and ValueError if a new line's team is neither of the
+        game's teams; nothing is written in either case.
+        """
+        box_scores = box_scores or []
+        with self.engine.begin() as connection:
+            old_game = self._game(connection, game_id)
+            game_changes = {
+                k: v for k, v in (game_update or {}).items() if old_game.get(k) != v
+            }
+            new_game = {**old_game, **game_changes}
+            result = DeltaResult(game_id, old_game["season"], sorted(game_changes))
+            if game_changes:
+                connection.execute(
+                    update(Game.__table__)
+                    .where(Game.id == game_id)
+                    .values(**game_changes, version=Game.version + 1, updated_at=func.now())
+                )
+            result.completed = old_game["status"] != "completed" and new_game["status"] == "completed"
+
+            patches, deltas = self._apply_box_scores(connection, old_game, box_scores)
+            add_player_deltas(connection, old_game["season"], deltas)
+            result.box_scores_changed = len(patches)
+
+            old_box = new_box = None
+            if game_contribution(old_game) or game_contribution(new_game):
+                # Team rebounds/assists count toward standings only for final games
+                new_box = team_box_totals(connection, game_id)
+                old_box = _without(new_box, deltas)
+            result.standings_changed = add_standings_delta(connection, old_game, new_game, old_box, new_box)
+            add_matchup_delta(connection, old_game, new_game)
+            if result.completed:
+                result.ratings_changed = update_elo(connection, new_game)
+            elif game_contribution(old_game) != game_contribution(new_game):
+                # A final score was corrected, or the game is no longer final
+                result.ratings_changed = refresh_elo(connection, [game_id])
+            if result.completed:
+                result.features_changed = update_features(connection, new_game)
+            elif old_game["status"] == "completed" and (deltas or new_game["status"] != "completed"):
+                # A final game's box scores were corrected, or it is no longer final
+                result.features_changed = refresh_features(connection, [game_id])
+
+        if game_changes:
+            patches.insert(0, score_update(game_id, **game_changes))
+        if patches:
+            live_hub.publish(patches)
+            tags = {"games", "player_stats", "player_season_aggregates", f"game:{game_id}",
+                    f"season:{old_game['season']}"}
+            tags.update(f"player:{player_id}" for player_id in deltas)
+            if result.standings_changed:
+                tags.update({"team_season_standings", "team_matchups", f"team:{old_game['home_team_id']}",
+                             f"team:{old_game['away_team_id']}"})
+            if result.ratings_changed:
+                tags.add("team_elo_ratings")
+            if result.features_changed:
+                tags.add("player_feature_states")
+            publish_invalidation(tags)
+        return result
+
+    @staticmethod
+    def _game(connection: Connection, game_id: int) -> dict:
+        row = connection.execute(
+            select(Game.__table__).where(Game.id == game_id).with_for_update()
+        ).first()
+        if row is None:
+            raise LookupError(f"Game {game_id} not found")
+        return dict(row._mapping)
+
+    def _apply_box_scores(self, connection: Connection, game: dict, box_scores: List[dict]):
+        stats = PlayerStats.__table__
+        game_id = game["id"]
+        player_ids = {b["player_id"] for b in box_scores}
+        lines = {
+            row.player_id: dict(row._mapping)
+            for row in connection.execute(
+                select(stats).where(stats.c.game_id == game_id, stats.c.player_id.in_(player_ids))
+            )
+        }
+        new_players = [pid for pid in player_ids if pid not in lines]
+        rosters = dict(connection.execute(
+            select(Player.id, Player.team_id).where(Player.id.in_(new_players))
+        ).all()) if new_players else {}
+        for player_id in new_players:
+            if player_id not in rosters:
+                raise LookupError(f"Player {player_id} not found")
+
+        patches, deltas = [], {}
+        for entry in box_scores:
+            player_id = entry["player_id"]
+            values = {k: v for k, v in entry.items() if k in BOX_SCORE_FIELDS}
+            old = lines.get(player_id)
+            if old is None:
+                team_id = entry.get("team_id") or rosters.get(player_id)
+                if team_id not in (game["home_team_id"], game["away_team_id"]):
+                    raise ValueError(f"Player {player_id} is not on either team in game {game_id}")
+                line = {"player_id": player_id, "game_id": game_id, "team_id": team_id, **values}
+                line.update(_percentages({f: values.get(f, 0) for f in AGGREGATE_STATS}))
+                connection.execute(stats.insert().values(**line))
+                changed = values
+                delta = {f: values.get(f) or 0 for f in AGGREGATE_STATS}
+                delta["games_played"] = 1
+                lines[player_id] = {**{f: 0 for f in AGGREGATE_STATS}, "plus_minus": None, **line}
+            else:
+                team_id = old["team_id"]
+                changed = {k: v for k, v in values.items() if old.get(k) != v}
+                if not changed:
+                    continue
+                merged = {**old, **changed}
+                connection.execute(
+                    update(stats)
+                    .where(stats.c.id == old["id"])
+                    .values(**changed, **_percentages(merged), version=stats.c.version + 1,
+                            updated_at=func.now())
+                )
+                delta = {
+                    f: (changed[f] or 0) - (old.get(f) or 0) for f in AGGREGATE_STATS if f in changed
+                }
+                lines[player_id] = merged
+            _add_delta(deltas, player_id, {**delta, "team_id": team_id})
+            patches.append(box_score_update(game_id, player_id, team_id=team_id, **changed))
+        return patches, deltas
+
+    def reconcile_game(self, game_id: int) -> Dict[str, Any]:
+        """
+        Check the season totals touched by a final game against a full recompute.
+
+        Mismatches are logged and overwritten with the recomputed values.
+        """
+        with self.engine.begin() as connection:
+            game = self._game(connection, game_id)
+            season = game["season"]
+            player_ids = list(connection.execute(
+                select(PlayerStats.player_id).where(PlayerStats.game_id == game_id)
+            ).scalars())
+            teams = [game["home_team_id"], game["away_team_id"]]
+            player_mismatches = reconcile_player_aggregates(connection, season, player_ids)
+            team_mismatches = reconcile_standings(connection, season, teams)
+            matchup_mismatches = reconcile_matchups(connection, season, [(min(teams), max(teams))])
+
+        if player_mismatches or team_mismatches or matchup_mismatches:
+            logger.warning(
+                f"Game {game_id} reconciliation corrected {len(player_mismatches)} player, "
+                f"{len(team_mismatches)} team and {len(matchup_mismatches)} head-to-head totals: "
+                f"{player_mismatches} {team_mismatches} {matchup_mismatches}"
+            )
+            tags = {"player_season_aggregates", "team_season_standings", "team_matchups", f"season:{season}"}
+            tags.update(f"player:{pid}" for pid in player_mismatches)
+            tags.update(f"team:{tid}" for tid in team_mismatches)
+            publish_invalidation(tags)
+        return {
+            "game_id": game_id,
+            "season": season,
+            "players_checked": len(player_ids),
+            "teams_checked": len(teams),
+            "player_mismatches": player_mismatches,
+            "team_mismatches": team_mismatches,
+            "matchup_mismatches": matchup_mismatches,
+        }
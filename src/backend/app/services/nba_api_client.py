@@ -0,0 +1,307 @@
+"""
+Upstream NBA API client for NBA Analytics ingestion.
+
+One httpx.AsyncClient with a persistent connection pool serves every
+upstream (TheSportsDB, balldontlie). Per upstream host, requests are bounded
+by a semaphore (concurrency) and an async token bucket (the upstream's
+published quota), and transient failures (connection errors, 429, 5xx) are
+retried with capped exponential backoff and full jitter, honouring
+Retry-After when the upstream sends it.
+
+Usage:
+    async with NBAApiClient() as client:
+        teams = await client.thesportsdb_teams("NBA")
+        players = await client.gather(client.thesportsdb_player_search(n) for n in names)
+"""
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_cache import HttpCache
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Upstream:
+    """Quota and concurrency limits for one upstream host."""
+
+    base_url: str
+    requests_per_minute: float
+    max_concurrency: int
+    headers: Optional[Dict[str, str]] = None
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.base_url).netloc
+
+
+class AsyncTokenBucket:
+    """Client-side quota: callers wait until a token is available."""
+
+    def __init__(self, requests_per_minute: float, burst: Optional[float] = None):
+        self.rate = requests_per_minute / 60
+        self.capacity = burst if burst is not None else max(1.0, min(requests_per_minute, 10))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class UpstreamError(Exception):
+    """An upstream request failed (non-retryable status, or retries exhausted)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ReplayMiss(UpstreamError):
+    """Replay mode was asked for a request that was never recorded."""
+
+
+def default_upstreams() -> List[Upstream]:
+    balldontlie_headers = (
+        {"Authorization": settings.BALLDONTLIE_API_KEY} if settings.BALLDONTLIE_API_KEY else None
+    )
+    return [
+        Upstream(
+            settings.THESPORTSDB_BASE_URL,
+            settings.THESPORTSDB_REQUESTS_PER_MINUTE,
+            settings.INGEST_MAX_CONCURRENCY_PER_HOST,
+        ),
+        Upstream(
+            settings.BALLDONTLIE_BASE_URL,
+            settings.BALLDONTLIE_REQUESTS_PER_MINUTE,
+            settings.INGEST_MAX_CONCURRENCY_PER_HOST,
+            balldontlie_headers,
+        ),
+    ]
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class NBAApiClient:
+    """
+    Pooled, rate-limited async client for the upstream NBA APIs.
+
+    Unknown hosts get a conservative default (60 req/min, concurrency 2).
+    Pass transport= (e.g. httpx.MockTransport) or upstreams pointing at a
+    local server to run against a mock, or an HttpCache in replay mode to
+    run from recorded responses with no network at all.
+    """
+
+    def __init__(
+        self,
+        upstreams: Optional[Iterable[Upstream]] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[HttpCache] = None,
+    ):
+        self.upstreams = {u.host: u for u in (upstreams if upstreams is not None else default_upstreams())}
+        self.max_retries = settings.INGEST_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = settings.INGEST_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = settings.INGEST_BACKOFF_MAX if backoff_max is None else backoff_max
+        self._client = httpx.AsyncClient(
+            timeout=settings.INGEST_TIMEOUT if timeout is None else timeout,
+            limits=httpx.Limits(
+                max_connections=settings.INGEST_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.INGEST_MAX_CONNECTIONS,
+            ),
+            headers={"User-Agent": f"{settings.APP_NAME}/{settings.APP_VERSION}"},
+            transport=transport,
+            follow_redirects=True,
+        )
+        self.cache = cache if cache is not None else HttpCache.from_settings()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._buckets: Dict[str, AsyncTokenBucket] = {}
+        self.requests = 0
+        self.retries = 0
+
+    async def __aenter__(self) -> "NBAApiClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _upstream(self, host: str) -> Upstream:
+        upstream = self.upstreams.get(host)
+        if upstream is None:
+            upstream = Upstream(f"https://{host}", 60, 2)
+            self.upstreams[host] = upstream
+        return upstream
+
+    def _limits(self, host: str):
+        if host not in self._semaphores:
+            upstream = self._upstream(host)
+            self._semaphores[host] = asyncio.Semaphore(upstream.max_concurrency)
+            self._buckets[host] = AsyncTokenBucket(upstream.requests_per_minute)
+        return self._semaphores[host], self._buckets[host]
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full jitter: uniform(0, min(max, base * 2^attempt)), never below Retry-After."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send one request under the host's limits, retrying transient failures.
+
+        GET requests go through the HTTP cache when one is configured.
+        """
+        host = urlsplit(url).netloc
+        upstream = self._upstream(host)
+        if upstream.headers:
+            kwargs["headers"] = {**upstream.headers, **(kwargs.get("headers") or {})}
+        request = self._client.build_request(method, url, **kwargs)
+
+        cached = None
+        if self.cache is not None and request.method == "GET":
+            cached = self.cache.lookup(request.method, request.url)
+            if cached is not None and self.cache.is_fresh(cached):
+                self.cache.hits += 1
+                return cached.to_response(request)
+            if self.cache.replay:
+                raise ReplayMiss(f"No recorded response for {method} {request.url}")
+            if cached is not None:
+                request.headers.update(cached.validators())
+
+        semaphore, bucket = self._limits(host)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            async with semaphore:
+                await bucket.acquire()
+                self.requests += 1
+                try:
+                    response = await self._client.send(request)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        raise UpstreamError(f"{method} {url} failed: {e}") from e
+                    logger.warning(f"{method} {url} failed ({e!r}), retrying")
+                else:
+                    if response.status_code == 304 and cached is not None:
+                        self.cache.touch(cached)
+                        return cached.to_response(request)
+                    if response.status_code not in _RETRY_STATUSES:
+                        if response.is_error:
+                            raise UpstreamError(
+                                f"{method} {url} returned {response.status_code}",
+                                response.status_code,
+                            )
+                        if self.cache is not None and request.method == "GET":
+                            self.cache.store(request.method, request.url, response)
+                        return response
+                    if attempt == self.max_retries:
+                        raise UpstreamError(
+                            f"{method} {url} returned {response.status_code} after {attempt + 1} attempts",
+                            response.status_code,
+                        )
+                    retry_after = _retry_after_seconds(response)
+                    logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+            self.retries += 1
+            # Sleep outside the semaphore so other requests to the host can proceed
+            await asyncio.sleep(self._backoff(attempt, retry_after))
+        raise UpstreamError(f"{method} {url} failed")
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        response = await self.request("GET", url, params=params)
+        return response.json()
+
+    @staticmethod
+    async def gather(calls: Iterable[Awaitable], return_exceptions: bool = False) -> List[Any]:
+        """Run calls concurrently; the per-host limits still apply."""
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+    # TheSportsDB
+
+    def _thesportsdb_url(self, path: str) -> str:
+        return f"{settings.THESPORTSDB_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+    async def thesportsdb_teams(self, league: str = "NBA") -> List[dict]:
+        data = await self.get_json(self._thesportsdb_url("search_all_teams.php"), {"l": league})
+        return data.get("teams") or []
+
+    async def thesportsdb_player_search(self, name: str) -> List[dict]:
+        data = await self.get_json(self._thesportsdb_url("searchplayers.php"), {"p": name})
+        return data.get("player") or []
+
+    # balldontlie
+
+    def _balldontlie_url(self, path: str) -> str:
+        return f"{settings.BALLDONTLIE_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+    async def balldontlie_page(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        per_page: int = 100
+    ) -> Tuple[List[dict], Optional[Dict[str, Any]]]:
+        """
+        Fetch one page of a balldontlie list endpoint.
+
+        Returns (rows, params for the next page) following meta.next_cursor
+        (current API) or meta.next_page (v1); the second item is None on the
+        last page.
+        """
+        query = {**(params or {}), "per_page": per_page}
+        data = await self.get_json(self._balldontlie_url(path), query)
+        meta = data.get("meta") or {}
+        next_query = None
+        if meta.get("next_cursor"):
+            next_query = {**query, "cursor": meta["next_cursor"]}
+        elif meta.get("next_page"):
+            next_query = {**query, "page": meta["next_page"]}
+        return data.get("data") or [], next_query
+
+    async def balldontlie_pages(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        per_page: int = 100
+    ) -> AsyncIterator[List[dict]]:
+        """Yield each page of a balldontlie list endpoint."""
+        query: Optional[Dict[str, Any]] = params or {}
+        while query is not None:
+            rows, query = await self.balldontlie_page(path, query, per_page)
+            yield rows
@@ -0,0 +1,197 @@
+"""
+Player percentile ranks for NBA Analytics.
+
+"What percentile is this?" for every per-game and efficiency stat, against
+the league and against the player's position, without sorting the league
+on each request:
+
+- an index per season holds, for the league and for each position, one
+  sorted array per stat, built from player_season_aggregates (players with
+  at least PERCENTILE_MIN_GAMES games are ranked);
+- a value's rank and percentile are two bisections of the matching array,
+  O(log n);
+- the index is cached under the player_season_aggregates and players tags,
+  so it is rebuilt on the next lookup after season totals (or positions)
+  change.
+
+True shooting and usage are derived from the season totals; usage uses the
+summed totals of the players whose latest team is the player's, so a
+traded player's share is measured against their current team.
+"""
+
+from bisect import bisect_left, bisect_right
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import logging
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.query_plans import register_query
+from app.models import Player, PlayerSeasonAggregate
+
+logger = logging.getLogger(__name__)
+
+PER_GAME_STATS = (
+    "points", "rebounds", "assists", "steals", "blocks", "turnovers", "minutes_played", "three_pointers_made",
+)
+PERCENTILE_STATS = (
+    *PER_GAME_STATS,
+    "field_goal_percentage", "three_point_percentage", "free_throw_percentage",
+    "true_shooting_percentage", "usage_rate",
+)
+LOWER_IS_BETTER = {"turnovers"}
+LEAGUE = "ALL"
+_INDEX_TTL = 86400
+
+
+def _season_rows_query(season: str):
+    return (
+        select(PlayerSeasonAggregate.__table__, Player.position)
+        .join(Player, PlayerSeasonAggregate.player_id == Player.id)
+        .where(PlayerSeasonAggregate.season == season, PlayerSeasonAggregate.games_played > 0)
+    )
+
+
+def _ratio(made, attempted) -> Optional[float]:
+    return made / attempted if attempted else None
+
+
+def _possessions_used(row) -> float:
+    return row.field_goals_attempted + 0.44 * row.free_throws_attempted + row.turnovers
+
+
+def player_values(row, team: Optional[dict] = None) -> Dict[str, Optional[float]]:
+    """
+    Every PERCENTILE_STATS value of a season aggregate row (None where undefined).
+
+    team holds the summed minutes and possessions used of the player's team
+    ({"minutes_played": ..., "possessions_used": ...}), for usage.
+    """
+    games = row.games_played
+    values = {stat: (getattr(row, stat) or 0) / games for stat in PER_GAME_STATS}
+    values["field_goal_percentage"] = _ratio(row.field_goals_made, row.field_goals_attempted)
+    values["three_point_percentage"] = _ratio(row.three_pointers_made, row.three_pointers_attempted)
+    values["free_throw_percentage"] = _ratio(row.free_throws_made, row.free_throws_attempted)
+    values["true_shooting_percentage"] = _ratio(
+        row.points, 2 * (row.field_goals_attempted + 0.44 * row.free_throws_attempted)
+    )
+    values["usage_rate"] = None
+    if team and row.minutes_played and team["possessions_used"]:
+        # Share of the team's possessions used while on the floor
+        values["usage_rate"] = 100 * _possessions_used(row) * (team["minutes_played"] / 5) / (
+            row.minutes_played * team["possessions_used"]
+        )
+    return values
+
+
+def build_index(connection: Connection, season: str) -> dict:
+    """
+    Sorted per-stat arrays of a season, for the league and each position, and every player's values.
+
+    JSON-able, so it can be cached across workers.
+    """
+    rows = connection.execute(_season_rows_query(season)).all()
+    teams: Dict[int, dict] = {}
+    for row in rows:
+        team = teams.setdefault(row.team_id, {"minutes_played": 0.0, "possessions_used": 0.0})
+        team["minutes_played"] += row.minutes_played or 0
+        team["possessions_used"] += _possessions_used(row)
+
+    groups: Dict[str, Dict[str, List[float]]] = {}
+    players = {}
+    for row in rows:
+        values = player_values(row, teams.get(row.team_id))
+        qualified = row.games_played >= settings.PERCENTILE_MIN_GAMES
+        players[str(row.player_id)] = {
+            "position": row.position,
+            "team_id": row.team_id,
+            "games_played": row.games_played,
+            "qualified": qualified,
+            "values": values,
+        }
+        if not qualified:
+            continue
+        for group in (LEAGUE, row.position) if row.position else (LEAGUE,):
+            arrays = groups.setdefault(group, {stat: [] for stat in PERCENTILE_STATS})
+            for stat, value in values.items():
+                if value is not None:
+                    arrays[stat].append(value)
+    for arrays in groups.values():
+        for values in arrays.values():
+            values.sort()
+    logger.info(f"Built {season} percentile index: {len(players)} players, {len(groups) - 1} positions")
+    return {"season": season, "min_games": settings.PERCENTILE_MIN_GAMES, "groups": groups, "players": players}
+
+
+def get_index(db: Session, season: str) -> dict:
+    """Cached percentile index of a season (built on a miss)."""
+    return cache.get_or_set(
+        f"percentiles:{season}",
+        lambda: build_index(db.connection(), season),
+        ttl=_INDEX_TTL,
+        tags=("player_season_aggregates", "players"),
+    )
+
+
+def rank(values: List[float], value: float, lower_is_better: bool = False) -> Optional[dict]:
+    """
+    Rank (1 = best) and percentile of a value among sorted values, by bisection.
+
+    Ties share the best rank and sit at the midpoint of their percentile
+    range. None if there is nothing to compare against.
+    """
+    if not values:
+        return None
+    below, above = bisect_left(values, value), len(values) - bisect_right(values, value)
+    ties = len(values) - below - above
+    worse, better = (above, below) if lower_is_better else (below, above)
+    return {
+        "rank": better + 1,
+        "of": len(values),
+        "percentile": round(100 * (worse + ties / 2) / len(values), 1),
+    }
+
+
+def percentile_of(index: dict, stat: str, value: float, group: str = LEAGUE) -> Optional[dict]:
+    """Where a value of a stat falls in a season's league (or a position's) distribution."""
+    arrays = index["groups"].get(group)
+    return rank(arrays[stat], value, stat in LOWER_IS_BETTER) if arrays else None
+
+
+def player_profile(index: dict, player_id: int) -> Optional[dict]:
+    """A player's every stat with its league and position percentiles (None if not in the season)."""
+    player = index["players"].get(str(player_id))
+    if player is None:
+        return None
+    stats = {}
+    for stat in PERCENTILE_STATS:
+        value = player["values"][stat]
+        stats[stat] = {
+            "value": None if value is None else round(value, 3),
+            "league": None if value is None else percentile_of(index, stat, value),
+            "position": None if value is None or not player["position"]
+            else percentile_of(index, stat, value, player["position"]),
+        }
+    return {
+        "player_id": player_id,
+        "season": index["season"],
+        "position": player["position"],
+        "team_id": player["team_id"],
+        "games_played": player["games_played"],
+        "qualified": player["qualified"],
+        "min_games": index["min_games"],
+        "stats": stats,
+    }
+
+
+def latest_player_season(db: Session, player_id: int) -> Optional[str]:
+    return db.execute(
+        select(func.max(PlayerSeasonAggregate.season)).where(PlayerSeasonAggregate.player_id == player_id)
+    ).scalar()
+
+
+@register_query("percentiles.season_rows")
+def _season_rows_plan(db: Session):
+    return _season_rows_query("2023-24")
@@ -5,10 +5,11 @@ Business logic for player operations and data processing.
 This is where you'll implement complex data analysis and database operations.
 """
 
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple
 import logging
 
+from app.db.query_plans import register_query
 from app.models import Player, Team
 from app.schemas import PlayerCreate, PlayerUpdate, PlayerAnalytics
 
@@ -40,25 +41,51 @@ class PlayerService:
         This is where you'll implement complex SQL queries
         and database optimization techniques.
         """
-        # Placeholder implementation
         logger.info(f"Getting players: skip={skip}, limit={limit}, team_id={team_id}")
         
-        # In real implementation, this would be:
-        # query = self.db.query(Player)
-        # if team_id:
-        #     query = query.filter(Player.team_id == team_id)
-        # if position:
-        #     query = query.filter(Player.position == position)
-        # if is_active is not None:
-        #     query = query.filter(Player.is_active == is_active)
-        # return query.offset(skip).limit(limit).all()
-        
-        return []
+        return self._players_query(skip, limit, team_id, position, is_active).all()
+    
+    def _players_query(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        team_id: Optional[int] = None,
+        position: Optional[str] = None,
+        is_active: Optional[bool] = True
+    ):
+        query = self.db.query(Player).options(joinedload(Player.team))
+        if team_id:
+            query = query.filter(Player.team_id == team_id)
+        if position:
+            query = query.filter(Player.position == position)
+        if is_active is not None:
+            query = query.filter(Player.is_active == is_active)
+        return query.order_by(Player.id).offset(skip).limit(limit)
     
     def get_player_by_id(self, player_id: int) -> Optional[Player]:
-        """Get a player by ID."""
-        # Placeholder: return self.db.query(Player).filter(Player.id == player_id).first()
-        return None
+        """Get a player by ID (with their team loaded in the same query)."""
+        return self._player_query(player_id).first()
+    
+    def _player_query(self, player_id: int):
+        return (
+            self.db.query(Player)
+            .options(joinedload(Player.team))
+            .filter(Player.id == player_id)
+        )
+    
+    def get_player_version(self, player_id: int) -> Optional[Tuple[int, Optional[int]]]:
+        """
+        Row versions of a player and their team, or None if the player doesn't exist.
+        
+        The player response nests the team, so both versions feed the ETag.
+        """
+        row = (
+            self.db.query(Player.version, Team.version)
+            .outerjoin(Team, Player.team_id == Team.id)
+            .filter(Player.id == player_id)
+            .first()
+        )
+        return tuple(row) if row else None
     
     def get_player_by_external_id(self, external_id: str) -> Optional[Player]:
         """Get a player by external API ID."""
@@ -157,3 +184,18 @@ class PlayerService:
         # return False
         
         raise NotImplementedError("Soft delete will be implemented with database setup")
+
+
+@register_query("players.list")
+def _players_list_plan(db: Session):
+    return PlayerService(db)._players_query()
+
+
+@register_query("players.list_by_team")
+def _players_by_team_plan(db: Session):
+    return PlayerService(db)._players_query(team_id=1, position="G")
+
+
+@register_query("players.get_by_id")
+def _player_by_id_plan(db: Session):
+    return PlayerService(db)._player_query(1)
@@ -0,0 +1,571 @@
+"""
+Player performance predictions for NBA Analytics.
+
+A player's points, rebounds, assists and minutes in an upcoming game are
+predicted from a per-player feature state:
+
+- averages over the last 5, 10 and 20 games, kept as running window sums:
+  a new game adds its line to every window and subtracts the line that
+  drops out of it, so an update is O(1) however long the season;
+- home/away splits (running totals per venue), days of rest since the
+  previous game, and the opponent's points allowed per game against the
+  league average (from team_season_standings).
+
+States are stored per player per season in player_feature_states and
+updated as games become final (app.services.live_stats_service). A game
+that lands before a player's latest rated one, or a corrected box score,
+replays that player's season instead; after a bulk box score load, run the
+features.rebuild task.
+
+The model is a multi-output ridge regression fitted on the same features
+replayed through the most recent seasons by the predictions.train task,
+which the first prediction queues, and queues again once the served model
+is empty or older than MODEL_RETRAIN_INTERVAL. Requests never fit it: they
+serve the last trained model, or get None while the first one trains. A night's slate of a few
+hundred players is one feature matrix and one matrix product.
+
+NumPy is imported inside the functions that need it so it stays out of API
+startup.
+"""
+
+from collections import deque
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, distinct, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+import time
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.query_plans import register_query
+from app.models import Game, Player, PlayerFeatureState, PlayerStats, TeamSchedule, TeamSeasonStanding
+from app.services.ingestion_service import _insert_for
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("points", "rebounds", "assists", "minutes_played")
+WINDOWS = (5, 10, 20)
+MAX_REST_DAYS = 4  # Longer breaks count as fully rested
+FEATURES = (
+    "intercept",
+    *(f"{stat}_last_{window}" for window in WINDOWS for stat in TARGETS),
+    *(f"{stat}_at_venue" for stat in TARGETS),
+    "rest_days",
+    "is_home",
+    "opponent_points_allowed",  # Per game, relative to the league average
+    "experience",  # Share of the longest window played so far
+)
+
+_MODEL_KEY = "predictions:player_performance:model"
+_RIDGE = 1.0
+
+# The last model this process served, for when the cache entry has expired
+_last_model: Optional[dict] = None
+
+
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _line(row) -> List[float]:
+    return [float(getattr(row, stat) or 0) for stat in TARGETS]
+
+
+class FeatureState:
+    """
+    One player's rolling features within a season.
+
+    push() takes a completed game in O(1): every window sum gains the new
+    line and loses the one leaving the window, read from the bounded deque
+    of recent lines.
+    """
+
+    __slots__ = ("player_id", "season", "team_id", "games_played", "last_game_id", "last_game_date",
+                 "recent", "window_sums", "venue_games", "venue_totals")
+
+    def __init__(self, player_id: int, season: str):
+        self.player_id = player_id
+        self.season = season
+        self.team_id: Optional[int] = None
+        self.games_played = 0
+        self.last_game_id: Optional[int] = None
+        self.last_game_date: Optional[datetime] = None
+        self.recent: deque = deque(maxlen=WINDOWS[-1])
+        self.window_sums = {window: [0.0] * len(TARGETS) for window in WINDOWS}
+        self.venue_games = {True: 0, False: 0}
+        self.venue_totals = {True: [0.0] * len(TARGETS), False: [0.0] * len(TARGETS)}
+
+    @classmethod
+    def from_row(cls, row) -> "FeatureState":
+        state = cls(row.player_id, row.season)
+        state.team_id = row.team_id
+        state.games_played = row.games_played
+        state.last_game_id, state.last_game_date = row.last_game_id, row.last_game_date
+        state.recent.extend(row.recent)
+        state.window_sums = {int(window): list(sums) for window, sums in row.window_sums.items()}
+        state.venue_games = {True: row.home_games, False: row.away_games}
+        state.venue_totals = {True: list(row.home_totals), False: list(row.away_totals)}
+        return state
+
+    def to_row(self) -> dict:
+        return {
+            "player_id": self.player_id,
+            "season": self.season,
+            "team_id": self.team_id,
+            "games_played": self.games_played,
+            "last_game_id": self.last_game_id,
+            "last_game_date": self.last_game_date,
+            "recent": list(self.recent),
+            "window_sums": {str(window): sums for window, sums in self.window_sums.items()},
+            "home_games": self.venue_games[True],
+            "away_games": self.venue_games[False],
+            "home_totals": self.venue_totals[True],
+            "away_totals": self.venue_totals[False],
+        }
+
+    def push(self, line: Sequence[float], game_id: int, game_date: datetime, is_home: bool,
+             team_id: Optional[int] = None) -> None:
+        """Add a completed game's line (TARGETS order)."""
+        for window, sums in self.window_sums.items():
+            leaving = self.recent[-window] if len(self.recent) >= window else None
+            for i, value in enumerate(line):
+                # Rounded so the sums don't drift from the lines they hold
+                sums[i] = round(sums[i] + value - (leaving[i] if leaving else 0.0), 6)
+        totals = self.venue_totals[is_home]
+        for i, value in enumerate(line):
+            totals[i] += value
+        self.venue_games[is_home] += 1
+        self.recent.append(list(line))
+        self.games_played += 1
+        self.last_game_id, self.last_game_date = game_id, game_date
+        self.team_id = team_id if team_id is not None else self.team_id
+
+    def rest_days(self, game_date) -> int:
+        if self.last_game_date is None:
+            return MAX_REST_DAYS
+        return min(max((_day(game_date) - _day(self.last_game_date)).days, 0), MAX_REST_DAYS)
+
+    def features(self, game_date, is_home: Optional[bool], opponent_points_allowed: float) -> List[float]:
+        """The FEATURES row for a game on game_date (venue None when the player has no game that day)."""
+        row = [1.0]
+        for window in WINDOWS:
+            played = min(self.games_played, window)
+            row.extend(total / played if played else 0.0 for total in self.window_sums[window])
+        if is_home is None or not self.venue_games[is_home]:
+            # No split to go on: season averages
+            games = self.games_played
+            totals = [h + a for h, a in zip(self.venue_totals[True], self.venue_totals[False])]
+            row.extend(total / games if games else 0.0 for total in totals)
+        else:
+            row.extend(total / self.venue_games[is_home] for total in self.venue_totals[is_home])
+        row.extend([
+            float(self.rest_days(game_date)),
+            0.5 if is_home is None else float(is_home),
+            opponent_points_allowed,
+            min(self.games_played, WINDOWS[-1]) / WINDOWS[-1],
+        ])
+        return row
+
+
+# Feature states
+
+def _lines_query(season: str, player_ids: Optional[Iterable[int]] = None):
+    """Box score lines of a season's completed games, in the order they were played."""
+    stmt = (
+        select(PlayerStats.player_id, PlayerStats.team_id, PlayerStats.game_id,
+               *[getattr(PlayerStats, stat) for stat in TARGETS],
+               Game.game_date, Game.home_team_id)
+        .join(Game, PlayerStats.game_id == Game.id)
+        .where(Game.season == season, Game.status == "completed")
+        .order_by(Game.game_date, Game.id)
+    )
+    if player_ids is not None:
+        stmt = stmt.where(PlayerStats.player_id.in_(list(player_ids)))
+    return stmt
+
+
+def _write_states(connection: Connection, states: Iterable[FeatureState]) -> int:
+    rows = [state.to_row() for state in states]
+    if not rows:
+        return 0
+    table = PlayerFeatureState.__table__
+    stmt = _insert_for(connection, table)
+    connection.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["player_id", "season"],
+            set_={**{name: stmt.excluded[name] for name in rows[0] if name not in ("player_id", "season")},
+                  "updated_at": func.now()},
+        ),
+        rows,
+    )
+    return len(rows)
+
+
+def replay_features(connection: Connection, season: str, player_ids: Optional[Iterable[int]] = None) -> int:
+    """Rebuild the season's feature states (of the given players, default all) from box scores."""
+    player_ids = None if player_ids is None else sorted(set(player_ids))
+    stale = delete(PlayerFeatureState).where(PlayerFeatureState.season == season)
+    if player_ids is not None:
+        stale = stale.where(PlayerFeatureState.player_id.in_(player_ids))
+    connection.execute(stale)
+
+    states: Dict[int, FeatureState] = {}
+    for row in connection.execute(_lines_query(season, player_ids)):
+        state = states.get(row.player_id)
+        if state is None:
+            state = states[row.player_id] = FeatureState(row.player_id, season)
+        state.push(_line(row), row.game_id, row.game_date, row.team_id == row.home_team_id, row.team_id)
+    return _write_states(connection, states.values())
+
+
+def update_features(connection: Connection, game: dict) -> bool:
+    """
+    Add a newly completed game to its players' feature states.
+
+    Players who already have this game, or a later one, in their state (a
+    late result, or a game completed twice) have their season replayed
+    instead. Returns False if the game isn't completed.
+    """
+    if game.get("status") != "completed":
+        return False
+    lines = connection.execute(
+        select(PlayerStats.player_id, PlayerStats.team_id, *[getattr(PlayerStats, stat) for stat in TARGETS])
+        .where(PlayerStats.game_id == game["id"])
+    ).all()
+    if not lines:
+        return False
+    season = game["season"]
+    states = {
+        row.player_id: FeatureState.from_row(row)
+        for row in connection.execute(
+            select(PlayerFeatureState).where(
+                PlayerFeatureState.season == season,
+                PlayerFeatureState.player_id.in_([line.player_id for line in lines]),
+            )
+        )
+    }
+    position = (game["game_date"], game["id"])
+    late = [
+        player_id for player_id, state in states.items()
+        if (state.last_game_date, state.last_game_id) >= position
+    ]
+    updated = []
+    for line in lines:
+        if line.player_id in late:
+            continue
+        state = states.get(line.player_id) or FeatureState(line.player_id, season)
+        state.push(_line(line), game["id"], game["game_date"], line.team_id == game["home_team_id"], line.team_id)
+        updated.append(state)
+    _write_states(connection, updated)
+    if late:
+        replay_features(connection, season, late)
+    return True
+
+
+def refresh_features(connection: Connection, game_ids: Iterable[int]) -> bool:
+    """Replay the seasons of every player with a box score in the given games (corrections, withdrawn results)."""
+    game_ids = sorted(set(game_ids))
+    if not game_ids:
+        return False
+    affected: Dict[str, List[int]] = {}
+    for season, player_id in connection.execute(
+        select(Game.season, PlayerStats.player_id)
+        .join(Game, PlayerStats.game_id == Game.id)
+        .where(PlayerStats.game_id.in_(game_ids))
+    ):
+        affected.setdefault(season, []).append(player_id)
+    for season, player_ids in affected.items():
+        replay_features(connection, season, player_ids)
+    return bool(affected)
+
+
+# Model
+
+def _training_lines_query(seasons: Sequence[str]):
+    return (
+        select(PlayerStats.player_id, PlayerStats.team_id, PlayerStats.game_id,
+               *[getattr(PlayerStats, stat) for stat in TARGETS],
+               Game.season, Game.game_date, Game.home_team_id, Game.away_team_id,
+               Game.home_score, Game.away_score)
+        .join(Game, PlayerStats.game_id == Game.id)
+        .where(Game.season.in_(list(seasons)), Game.status == "completed")
+        .order_by(Game.season, Game.game_date, Game.id)
+    )
+
+
+def training_data(connection: Connection, seasons: Sequence[str]):
+    """
+    Feature rows and outcomes of every box score line in the given seasons.
+
+    Each line's features come from the state going into the game, exactly
+    as they would have been served; states and points allowed start over
+    each season. Returns (X, Y, season of each row).
+    """
+    import numpy as np
+
+    states: Dict[Tuple[str, int], FeatureState] = {}
+    allowed: Dict[Tuple[str, int], List[int]] = {}  # (season, team) -> [points allowed, games]
+    league: Dict[str, List[int]] = {}  # season -> [points, team games]
+    features, outcomes, row_seasons = [], [], []
+    current = None
+
+    def finish(game) -> None:
+        for team, points in ((game.home_team_id, game.away_score), (game.away_team_id, game.home_score)):
+            totals = allowed.setdefault((game.season, team), [0, 0])
+            totals[0] += points or 0
+            totals[1] += 1
+        season_totals = league.setdefault(game.season, [0, 0])
+        season_totals[0] += (game.home_score or 0) + (game.away_score or 0)
+        season_totals[1] += 2
+
+    for row in connection.execute(_training_lines_query(seasons)):
+        if current is not None and row.game_id != current.game_id:
+            finish(current)
+        current = row
+        is_home = row.team_id == row.home_team_id
+        opponent = row.away_team_id if is_home else row.home_team_id
+        key = (row.season, row.player_id)
+        state = states.get(key)
+        if state is None:
+            state = states[key] = FeatureState(row.player_id, row.season)
+        points, games = allowed.get((row.season, opponent), (0, 0))
+        league_points, team_games = league.get(row.season, (0, 0))
+        relative = points / games - league_points / team_games if games and team_games else 0.0
+        line = _line(row)
+        features.append(state.features(row.game_date, is_home, relative))
+        outcomes.append(line)
+        row_seasons.append(row.season)
+        state.push(line, row.game_id, row.game_date, is_home, row.team_id)
+    return (
+        np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURES)),
+        np.asarray(outcomes, dtype=np.float64).reshape(-1, len(TARGETS)),
+        np.asarray(row_seasons),
+    )
+
+
+def fit(X, Y, ridge: float = _RIDGE):
+    """Ridge regression weights (features x targets); the intercept isn't penalized."""
+    import numpy as np
+
+    penalty = ridge * np.eye(X.shape[1])
+    penalty[0, 0] = 0.0
+    return np.linalg.solve(X.T @ X + penalty, X.T @ Y)
+
+
+def _training_seasons(connection: Connection) -> List[str]:
+    seasons = connection.execute(
+        select(distinct(Game.season))
+        .where(Game.status == "completed")
+        .order_by(Game.season.desc())
+        .limit(settings.PLAYER_MODEL_TRAINING_SEASONS)
+    ).scalars().all()
+    return sorted(seasons)
+
+
+def train_model(connection: Connection, seasons: Optional[Sequence[str]] = None) -> dict:
+    """
+    Fit the model on the given seasons (default: the most recent PLAYER_MODEL_TRAINING_SEASONS).
+
+    With more than one season, the latest is first held out to report the
+    mean absolute error per target; the served weights are then fitted on
+    all of them. weights is None if there are no box scores to learn from.
+    """
+    import numpy as np
+
+    seasons = sorted(seasons) if seasons is not None else _training_seasons(connection)
+    X, Y, row_seasons = training_data(connection, seasons)
+    model = {
+        "version": f"ridge-{datetime.utcnow():%Y%m%d%H%M%S}",
+        "trained_at": time.time(),
+        "seasons": seasons,
+        "samples": len(X),
+        "features": list(FEATURES),
+        "targets": list(TARGETS),
+        "weights": None,
+        "holdout_mae": None,
+    }
+    if not len(X):
+        return model
+    held_out = row_seasons == seasons[-1]
+    if len(seasons) > 1 and held_out.any() and (~held_out).any():
+        errors = np.abs(X[held_out] @ fit(X[~held_out], Y[~held_out]) - Y[held_out]).mean(axis=0)
+        model["holdout_mae"] = {stat: round(float(e), 3) for stat, e in zip(TARGETS, errors)}
+    model["weights"] = fit(X, Y).tolist()
+    logger.info(f"Trained player performance model on {len(X)} lines from {seasons}: {model['holdout_mae']}")
+    return model
+
+
+def request_training() -> None:
+    """Queue predictions.train (the queue ignores it while one is already pending or running)."""
+    from app.core.tasks import get_task_queue
+    from app.services import task_service  # noqa: F401  (registers the tasks)
+
+    try:
+        get_task_queue().submit("predictions.train")
+    except Exception as e:
+        logger.warning(f"Could not queue player performance model training: {e}")
+
+
+def get_model() -> Optional[dict]:
+    """
+    The last trained model, or None before the first one; never trains.
+
+    A missing model, one fitted before there were box scores (no weights),
+    or one older than MODEL_RETRAIN_INTERVAL queues predictions.train and
+    the caller carries on with what there is.
+    """
+    global _last_model
+    model = cache.get(_MODEL_KEY)
+    if model is not None:
+        _last_model = model
+    model = _last_model
+    if model is None or model["weights"] is None \
+            or time.time() - model.get("trained_at", 0) > settings.MODEL_RETRAIN_INTERVAL:
+        request_training()
+    return model
+
+
+def retrain_model(connection: Connection) -> dict:
+    global _last_model
+    model = _last_model = train_model(connection)
+    # Kept past the retrain interval so every worker serves it while the next one trains
+    cache.set(_MODEL_KEY, model, ttl=2 * settings.MODEL_RETRAIN_INTERVAL)
+    return model
+
+
+# Serving
+
+def _states_query(season: str, player_ids: List[int]):
+    return select(PlayerFeatureState).where(
+        PlayerFeatureState.season == season, PlayerFeatureState.player_id.in_(player_ids)
+    )
+
+
+def _slate_query(team_ids: List[int], game_date: date):
+    start = datetime.combine(game_date, datetime.min.time())
+    return (
+        select(TeamSchedule.team_id, TeamSchedule.game_id, TeamSchedule.opponent_id, TeamSchedule.is_home)
+        .where(
+            TeamSchedule.team_id.in_(team_ids),
+            TeamSchedule.game_date >= start,
+            TeamSchedule.game_date < start + timedelta(days=1),
+        )
+    )
+
+
+def opponent_points_allowed(connection: Connection, season: str) -> Dict[int, float]:
+    """Each team's points allowed per game this season, relative to the league average."""
+    rows = connection.execute(
+        select(TeamSeasonStanding.team_id, TeamSeasonStanding.points_against,
+               TeamSeasonStanding.points_for, TeamSeasonStanding.wins, TeamSeasonStanding.losses)
+        .where(TeamSeasonStanding.season == season)
+    ).all()
+    games = sum(row.wins + row.losses for row in rows)
+    if not games:
+        return {}
+    league = sum(row.points_for for row in rows) / games
+    return {
+        row.team_id: row.points_against / (row.wins + row.losses) - league
+        for row in rows if row.wins + row.losses
+    }
+
+
+def latest_season(connection: Connection) -> Optional[str]:
+    return connection.execute(select(func.max(Game.season))).scalar()
+
+
+def predict_players(
+    db: Session,
+    player_ids: Sequence[int],
+    game_date: date,
+    season: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Predicted box score lines of the given players for game_date, in one batch.
+
+    Each player's game that day is looked up on their team's schedule;
+    players without one are predicted for a neutral game. Returns None if
+    there is no model yet (still training, or no box scores to train on).
+    """
+    import numpy as np
+
+    model = get_model()
+    if model is None or model["weights"] is None:
+        return None
+    connection = db.connection()
+    season = season or latest_season(connection)
+    if season is None:
+        return None
+    player_ids = list(dict.fromkeys(player_ids))
+    players = {
+        row.id: row
+        for row in connection.execute(
+            select(Player.id, Player.name, Player.team_id).where(Player.id.in_(player_ids))
+        )
+    }
+    states = {row.player_id: FeatureState.from_row(row) for row in connection.execute(_states_query(season, player_ids))}
+    known = [player_id for player_id in player_ids if player_id in players]
+    teams = {
+        player_id: players[player_id].team_id or (states[player_id].team_id if player_id in states else None)
+        for player_id in known
+    }
+    slate = {
+        row.team_id: row
+        for row in connection.execute(_slate_query([t for t in set(teams.values()) if t is not None], game_date))
+    }
+    allowed = opponent_points_allowed(connection, season)
+
+    rows, context = [], []
+    for player_id in known:
+        state = states.get(player_id) or FeatureState(player_id, season)
+        game = slate.get(teams[player_id])
+        rows.append(state.features(
+            game_date,
+            game.is_home if game else None,
+            allowed.get(game.opponent_id, 0.0) if game else 0.0,
+        ))
+        context.append((state, game))
+
+    # The whole slate in one model call
+    predicted = np.maximum(
+        np.asarray(rows, dtype=np.float64).reshape(-1, len(FEATURES)) @ np.asarray(model["weights"]), 0.0
+    )
+    predictions = []
+    for player_id, row, values, (state, game) in zip(known, rows, predicted, context):
+        predictions.append({
+            "player_id": player_id,
+            "player_name": players[player_id].name,
+            "team_id": teams[player_id],
+            "game_id": game.game_id if game else None,
+            "opponent_team_id": game.opponent_id if game else None,
+            "is_home": game.is_home if game else None,
+            "games_played": state.games_played,
+            "rest_days": state.rest_days(game_date),
+            "features": {name: round(value, 3) for name, value in zip(FEATURES[1:], row[1:])},
+            "predicted": {stat: round(float(value), 1) for stat, value in zip(TARGETS, values)},
+        })
+    return {
+        "season": season,
+        "game_date": game_date.isoformat(),
+        "model_version": model["version"],
+        "holdout_mae": model["holdout_mae"],
+        "predictions": predictions,
+        "unknown_player_ids": [player_id for player_id in player_ids if player_id not in players],
+    }
+
+
+@register_query("predictions.season_lines")
+def _season_lines_plan(db: Session):
+    return _lines_query("2023-24", [1, 2, 3])
+
+
+@register_query("predictions.feature_states")
+def _feature_states_plan(db: Session):
+    return _states_query("2023-24", list(range(1, 301)))
+
+
+@register_query("predictions.slate")
+def _slate_plan(db: Session):
+    return _slate_query(list(range(1, 31)), date(2024, 3, 1))
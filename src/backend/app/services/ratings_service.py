@@ -0,0 +1,216 @@
+"""
+Opponent-adjusted team ratings for NBA Analytics.
+
+Every completed game of a season gives two equations, one per team:
+
+    points scored = league average + home edge (home team only)
+                    + offense of the scorer + defense of the opponent
+
+The rows form a sparse (2 x games) by (2 x teams + 2) design matrix that is
+solved in one least-squares step (scipy.sparse.linalg.lsqr), with the
+offense and defense terms each constrained to sum to zero. From the solution:
+
+- offensive / defensive rating: points scored / allowed per game against an
+  average opponent;
+- SRS (simple rating system): offense - defense, the adjusted margin;
+- strength of schedule: SRS - average margin, i.e. how much the opponents
+  faced moved the team's raw margin.
+
+A season is ~2,500 rows by 62 columns and a solve from scratch converges
+in a handful of LSQR iterations (milliseconds). The solution is also kept
+in the cache, outliving the ratings, and is the starting point of the next
+solve: re-solving after an eviction that changed no result takes a single
+iteration. Ratings are cached per season and evicted when standings change
+(a game completes or a result is corrected).
+
+NumPy and SciPy are imported inside the functions that need them so they
+stay out of API startup.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import List, Optional, Sequence, Tuple
+import logging
+
+from app.core.cache import cache
+from app.db.query_plans import register_query
+from app.models import Game
+
+logger = logging.getLogger(__name__)
+
+# Weight of the sum-to-zero rows relative to a game row
+_CONSTRAINT_WEIGHT = 10.0
+_RATINGS_TTL = 86400
+_SOLUTION_TTL = 7 * 86400
+
+
+def season_results_query(season: str):
+    """Team ids and scores of every completed game of a season."""
+    return (
+        select(Game.home_team_id, Game.away_team_id, Game.home_score, Game.away_score)
+        .where(
+            Game.season == season,
+            Game.status == "completed",
+            Game.home_score.is_not(None),
+            Game.away_score.is_not(None),
+        )
+    )
+
+
+def build_system(results: Sequence[Tuple[int, int, int, int]], team_ids: List[int]):
+    """
+    Design matrix A and target b for a season's results.
+
+    Columns are [league average, home edge, offense x n, defense x n], in
+    team_ids order. The last two rows pin the sums of the offense and of the
+    defense terms to zero.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n, games = len(team_ids), len(results)
+    column = {team_id: i for i, team_id in enumerate(team_ids)}
+    data = np.asarray(results, dtype=np.float64).reshape(games, 4)
+    home = np.fromiter((column[int(t)] for t in data[:, 0]), dtype=np.int64, count=games)
+    away = np.fromiter((column[int(t)] for t in data[:, 1]), dtype=np.int64, count=games)
+
+    # Row 2g: the home team's points; row 2g + 1: the away team's points
+    rows = np.arange(2 * games)
+    scorer = np.empty(2 * games, dtype=np.int64)
+    scorer[0::2], scorer[1::2] = home, away
+    opponent = np.empty(2 * games, dtype=np.int64)
+    opponent[0::2], opponent[1::2] = away, home
+    is_home = np.zeros(2 * games)
+    is_home[0::2] = 1.0
+
+    game_rows = sparse.csr_matrix(
+        (
+            np.concatenate([np.ones(2 * games), is_home, np.ones(2 * games), np.ones(2 * games)]),
+            (
+                np.concatenate([rows, rows, rows, rows]),
+                np.concatenate([np.zeros(2 * games, dtype=np.int64), np.ones(2 * games, dtype=np.int64),
+                                2 + scorer, 2 + n + opponent]),
+            ),
+        ),
+        shape=(2 * games, 2 + 2 * n),
+    )
+    constraints = sparse.csr_matrix(
+        (
+            np.full(2 * n, _CONSTRAINT_WEIGHT),
+            (np.repeat([0, 1], n), np.arange(2, 2 + 2 * n)),
+        ),
+        shape=(2, 2 + 2 * n),
+    )
+    b = np.empty(2 * games + 2)
+    b[0:2 * games:2], b[1:2 * games:2] = data[:, 2], data[:, 3]
+    b[-2:] = 0.0
+    return sparse.vstack([game_rows, constraints]).tocsr(), b
+
+
+def solve_ratings(
+    results: Sequence[Tuple[int, int, int, int]],
+    previous: Optional[dict] = None
+) -> Tuple[List[dict], dict]:
+    """
+    Solve a season's ratings, warm-started from a previous solution.
+
+    previous is the solution dict this function returned last time (team
+    ids and coefficients); teams new to it start at zero. Returns the
+    per-team ratings, best first, and the new solution.
+    """
+    import numpy as np
+    from scipy.sparse.linalg import lsqr
+
+    if not results:
+        return [], {"team_ids": [], "x": [], "iterations": 0}
+    team_ids = sorted({t for game in results for t in game[:2]})
+    A, b = build_system(results, team_ids)
+
+    x0 = np.zeros(A.shape[1])
+    if previous and previous.get("x"):
+        old = {team_id: i for i, team_id in enumerate(previous["team_ids"])}
+        prev_x, prev_n = np.asarray(previous["x"]), len(previous["team_ids"])
+        x0[:2] = prev_x[:2]
+        for i, team_id in enumerate(team_ids):
+            if team_id in old:
+                x0[2 + i] = prev_x[2 + old[team_id]]
+                x0[2 + len(team_ids) + i] = prev_x[2 + prev_n + old[team_id]]
+    else:
+        x0[0] = b[:-2].mean()
+
+    # Ratings are reported to 0.01 points; 1e-8 leaves ample margin
+    x, _, iterations = lsqr(A, b, x0=x0, atol=1e-8, btol=1e-8, iter_lim=10 * A.shape[1])[:3]
+    n = len(team_ids)
+    average, home_edge = x[0], x[1]
+    offense, defense = x[2:2 + n], x[2 + n:]
+
+    data = np.asarray(results, dtype=np.float64).reshape(len(results), 4)
+    margins = np.zeros(n)
+    games = np.zeros(n)
+    index = {team_id: i for i, team_id in enumerate(team_ids)}
+    home = np.fromiter((index[int(t)] for t in data[:, 0]), dtype=np.int64, count=len(data))
+    away = np.fromiter((index[int(t)] for t in data[:, 1]), dtype=np.int64, count=len(data))
+    np.add.at(margins, home, data[:, 2] - data[:, 3])
+    np.add.at(margins, away, data[:, 3] - data[:, 2])
+    np.add.at(games, home, 1)
+    np.add.at(games, away, 1)
+    mov = margins / games
+
+    ratings = []
+    for i, team_id in enumerate(team_ids):
+        srs = float(offense[i] - defense[i])
+        ratings.append({
+            "team_id": team_id,
+            "games_played": int(games[i]),
+            "offensive_rating": round(float(average + offense[i]), 2),
+            "defensive_rating": round(float(average + defense[i]), 2),
+            "srs": round(srs, 2),
+            "margin_of_victory": round(float(mov[i]), 2),
+            "strength_of_schedule": round(srs - float(mov[i]), 2),
+        })
+    ratings.sort(key=lambda r: (-r["srs"], r["team_id"]))
+    for rank, rating in enumerate(ratings, start=1):
+        rating["rank"] = rank
+
+    solution = {
+        "team_ids": team_ids,
+        "x": [float(v) for v in x],
+        "iterations": int(iterations),
+        "league_average": round(float(average), 2),
+        "home_advantage": round(float(home_edge), 2),
+    }
+    return ratings, solution
+
+
+def compute_season_ratings(connection: Connection, season: str) -> dict:
+    """Solve a season's ratings from the database, warm-started from the last stored solution."""
+    solution_key = f"ratings:solution:{season}"
+    results = [tuple(row) for row in connection.execute(season_results_query(season))]
+    ratings, solution = solve_ratings(results, cache.get(solution_key))
+    # Untagged: the previous solution stays useful as a starting point after the ratings are evicted
+    cache.set(solution_key, solution, ttl=_SOLUTION_TTL)
+    logger.info(f"Solved {season} ratings for {len(ratings)} teams in {solution['iterations']} iterations")
+    return {
+        "season": season,
+        "games": len(results),
+        "league_average": solution.get("league_average"),
+        "home_advantage": solution.get("home_advantage"),
+        "iterations": solution["iterations"],
+        "teams": ratings,
+    }
+
+
+def get_season_ratings(db: Session, season: str) -> dict:
+    """Cached ratings of every team in a season (solved on a miss)."""
+    return cache.get_or_set(
+        f"ratings:{season}",
+        lambda: compute_season_ratings(db.connection(), season),
+        ttl=_RATINGS_TTL,
+        tags=("team_season_standings",),
+    )
+
+
+@register_query("ratings.season_results")
+def _season_results_plan(db: Session):
+    return season_results_query("2023-24")
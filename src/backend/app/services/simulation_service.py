@@ -0,0 +1,325 @@
+"""
+Monte Carlo season simulation for NBA Analytics.
+
+Playoff odds, seed and win-total distributions from playing out the rest
+of a regular season many times:
+
+- games completed before as_of_date count as played; every other regular
+  season game is decided by its home win probability from the two teams'
+  Elo ratings going into as_of_date (app.services.elo_service), held fixed
+  for the rest of the season;
+- a chunk of runs draws all remaining games at once, as one (runs x games)
+  uniform matrix compared against the probabilities, and turns the results
+  into per-run head-to-head counts with a single bincount;
+- every run's conference standings are ranked together: win percentage,
+  then record against the teams tied with it, then conference record, then
+  a random draw (no scores are simulated, so point differential can't
+  separate teams). Seeds 1-6 qualify and 7-10 play the play-in;
+- chunks of SIMULATION_CHUNK_SIZE runs are spread over a process pool.
+  Each chunk sends back only counts (seeds, playoff spots, win totals), so
+  little crosses the process boundary.
+
+Results are cached per (season, as_of_date, model_version, runs) and
+evicted when games or ratings change. NumPy is imported inside the
+functions that need it so it stays out of API startup.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import logging
+import multiprocessing
+import os
+import threading
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.db.query_plans import register_query
+from app.models import Game, Team
+from app.services.elo_service import INITIAL_RATING, ratings_as_of, win_probability
+
+logger = logging.getLogger(__name__)
+
+PLAYOFF_SEEDS = 6  # Seeds that qualify directly
+PLAY_IN_SEEDS = (7, 8, 9, 10)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def model_version() -> str:
+    """The win probability model behind a simulation (part of its cache key)."""
+    return f"elo-k{settings.ELO_K_FACTOR:g}-h{settings.ELO_HOME_ADVANTAGE:g}"
+
+
+def _season_games_query(season: str):
+    return (
+        select(Game.id, Game.game_date, Game.status, Game.home_team_id, Game.away_team_id,
+               Game.home_score, Game.away_score)
+        .where(Game.season == season, Game.game_type == "regular")
+    )
+
+
+def load_inputs(connection: Connection, season: str, as_of: datetime) -> Optional[dict]:
+    """
+    Everything a simulation needs, as arrays indexed by team column.
+
+    played[t, o] counts games team t won against o before as_of; home,
+    away and p describe the remaining games. None if the season has no
+    regular season games.
+    """
+    import numpy as np
+
+    games = connection.execute(_season_games_query(season)).all()
+    if not games:
+        return None
+    team_ids = sorted({t for g in games for t in (g.home_team_id, g.away_team_id)})
+    column = {team_id: i for i, team_id in enumerate(team_ids)}
+    teams = {
+        row.id: row
+        for row in connection.execute(
+            select(Team.id, Team.name, Team.conference).where(Team.id.in_(team_ids))
+        )
+    }
+    conferences = [teams[t].conference if t in teams else None for t in team_ids]
+    codes = {name: i for i, name in enumerate(sorted({c or "" for c in conferences}))}
+    conference = np.array([codes[c or ""] for c in conferences])
+
+    n = len(team_ids)
+    played = np.zeros((n, n), dtype=np.int64)
+    remaining = []
+    for g in games:
+        h, a = column[g.home_team_id], column[g.away_team_id]
+        if g.status == "completed" and g.home_score is not None and g.away_score is not None \
+                and g.game_date < as_of:
+            winner, loser = (h, a) if g.home_score > g.away_score else (a, h)
+            played[winner, loser] += 1
+        else:
+            remaining.append((h, a))
+
+    known = ratings_as_of(connection, as_of, season)
+    rating = np.array([known.get(t, INITIAL_RATING) for t in team_ids])
+    home = np.array([h for h, _ in remaining], dtype=np.int64)
+    away = np.array([a for _, a in remaining], dtype=np.int64)
+    same_conference = (conference[:, None] == conference[None, :]) & ~np.eye(n, dtype=bool)
+    remaining_per_team = np.bincount(home, minlength=n) + np.bincount(away, minlength=n)
+    games_per_team = played.sum(axis=0) + played.sum(axis=1) + remaining_per_team
+    return {
+        "team_ids": team_ids,
+        "team_names": [teams[t].name if t in teams else None for t in team_ids],
+        "conferences": conferences,
+        "conference": conference,
+        "same_conference": same_conference,
+        "played": played,
+        "home": home,
+        "away": away,
+        "p": win_probability(rating[home], rating[away]),
+        # Home win probability of every pairing, for the play-in (the better seed hosts)
+        "pair_p": win_probability(rating[:, None], rating[None, :]),
+        "max_wins": int(games_per_team.max()),
+        "ratings": rating,
+    }
+
+
+def _pct(won, games):
+    import numpy as np
+
+    return np.where(games > 0, won / np.maximum(games, 1), 0.5)
+
+
+def simulate_chunk(inputs: dict, runs: int, seed) -> dict:
+    """
+    Play out the remaining games `runs` times and count the outcomes.
+
+    Module-level so a process pool can run it. Returns per-team counts:
+    win totals (teams x wins), seeds (teams x seed), playoff spots and
+    play-in appearances.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n = len(inputs["team_ids"])
+    home, away = inputs["home"], inputs["away"]
+    run_rows = np.arange(runs)[:, None]
+
+    # Every remaining game of every run in one draw; each result lands in a (run, winner, loser) cell
+    home_won = rng.random((runs, len(home))) < inputs["p"]
+    cell = np.where(home_won, home * n + away, away * n + home) + run_rows * n * n
+    beat = np.bincount(cell.ravel(), minlength=runs * n * n).reshape(runs, n, n) + inputs["played"]
+    met = beat + beat.transpose(0, 2, 1)
+
+    wins = beat.sum(axis=2)
+    pct = _pct(wins, met.sum(axis=2))
+    same_conference = inputs["same_conference"]
+    conference_pct = _pct((beat * same_conference).sum(axis=2), (met * same_conference).sum(axis=2))
+    tied = (pct[:, :, None] == pct[:, None, :]) & same_conference
+    head_to_head = _pct((beat * tied).sum(axis=2), (met * tied).sum(axis=2))
+    draw = rng.random((runs, n))
+
+    seeds = np.zeros((runs, n), dtype=np.int64)
+    playoffs = np.zeros((runs, n), dtype=bool)
+    play_in = np.zeros((runs, n), dtype=bool)
+    for code in np.unique(inputs["conference"]):
+        columns = np.flatnonzero(inputs["conference"] == code)
+        # lexsort's last key is the primary one
+        ranked = np.lexsort(
+            (draw[:, columns], -conference_pct[:, columns], -head_to_head[:, columns], -pct[:, columns]),
+            axis=-1,
+        )
+        order = columns[ranked]  # order[r, k]: team column of seed k + 1 in run r
+        np.put_along_axis(seeds, order, np.arange(1, len(columns) + 1)[None, :].repeat(runs, axis=0), axis=1)
+        if len(columns) < PLAY_IN_SEEDS[-1]:
+            playoffs[run_rows, order[:, :min(8, len(columns))]] = True
+            continue
+        playoffs[run_rows, order[:, :PLAYOFF_SEEDS]] = True
+        play_in[run_rows, order[:, PLAY_IN_SEEDS[0] - 1:PLAY_IN_SEEDS[-1]]] = True
+        s7, s8, s9, s10 = (order[:, seed - 1] for seed in PLAY_IN_SEEDS)
+        pair_p = inputs["pair_p"]
+        first = rng.random(runs) < pair_p[s7, s8]
+        seventh, loser = np.where(first, s7, s8), np.where(first, s8, s7)
+        second = np.where(rng.random(runs) < pair_p[s9, s10], s9, s10)
+        eighth = np.where(rng.random(runs) < pair_p[loser, second], loser, second)
+        playoffs[run_rows[:, 0], seventh] = True
+        playoffs[run_rows[:, 0], eighth] = True
+
+    teams = np.arange(n)
+    win_bins, seed_bins = inputs["max_wins"] + 1, n + 1
+    return {
+        "runs": runs,
+        "wins": np.bincount((teams * win_bins + wins).ravel(), minlength=n * win_bins).reshape(n, win_bins),
+        "seeds": np.bincount((teams * seed_bins + seeds).ravel(), minlength=n * seed_bins).reshape(n, seed_bins),
+        "playoffs": playoffs.sum(axis=0),
+        "play_in": play_in.sum(axis=0),
+    }
+
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS / Windows
+        return os.cpu_count() or 1
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # Spawned, not forked: forking a process that runs server threads isn't safe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_size = workers
+        return _pool
+
+
+def shutdown_simulation_pool() -> None:
+    """Stop the simulation worker processes (no-op if none were started)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def run_simulation(
+    inputs: dict,
+    runs: int,
+    seed: int = 0,
+    chunk_size: Optional[int] = None,
+    workers: Optional[int] = None
+) -> dict:
+    """
+    Simulate `runs` seasons in chunks, over the process pool when there is more than one chunk.
+
+    The pool never has more workers than the CPUs this process may use; on
+    one CPU every chunk runs here. Each chunk gets its own random stream
+    spawned from `seed`, so the counts are the same whichever process runs
+    which chunk.
+    """
+    import numpy as np
+
+    chunk_size = chunk_size or settings.SIMULATION_CHUNK_SIZE
+    workers = min(settings.SIMULATION_WORKERS if workers is None else workers, _available_cpus())
+    sizes = [min(chunk_size, runs - start) for start in range(0, runs, chunk_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+    if len(sizes) > 1 and workers > 1:
+        results = list(_process_pool(workers).map(simulate_chunk, [inputs] * len(sizes), sizes, streams))
+    else:
+        results = [simulate_chunk(inputs, size, stream) for size, stream in zip(sizes, streams)]
+    return {key: sum(result[key] for result in results) for key in results[0]}
+
+
+def summarize(inputs: dict, counts: dict) -> Dict[str, List[dict]]:
+    """Per-team distributions from simulation counts, grouped by conference, best projection first."""
+    import numpy as np
+
+    runs = counts["runs"]
+    played = inputs["played"]
+    remaining = np.bincount(inputs["home"], minlength=len(played)) + np.bincount(inputs["away"], minlength=len(played))
+    conference_sizes = np.bincount(inputs["conference"])
+    groups: Dict[str, List[dict]] = {}
+    for i, team_id in enumerate(inputs["team_ids"]):
+        wins = counts["wins"][i] / runs
+        cumulative = np.cumsum(wins)
+
+        def percentile(q: float) -> int:
+            return int(np.searchsorted(cumulative, q - 1e-9))
+
+        size = conference_sizes[inputs["conference"][i]]
+        groups.setdefault(inputs["conferences"][i] or "Unassigned", []).append({
+            "team_id": team_id,
+            "team_name": inputs["team_names"][i],
+            "elo_rating": round(float(inputs["ratings"][i]), 1),
+            "wins": int(played[i].sum()),
+            "losses": int(played[:, i].sum()),
+            "remaining_games": int(remaining[i]),
+            "projected_wins": round(float((np.arange(len(wins)) * wins).sum()), 1),
+            "win_range": {"p10": percentile(0.1), "p50": percentile(0.5), "p90": percentile(0.9)},
+            "win_distribution": {str(w): round(float(p), 4) for w, p in enumerate(wins) if p > 0},
+            "playoff_probability": round(float(counts["playoffs"][i] / runs), 4),
+            "play_in_probability": round(float(counts["play_in"][i] / runs), 4),
+            "seed_probabilities": [round(float(c / runs), 4) for c in counts["seeds"][i][1:size + 1]],
+        })
+    for teams in groups.values():
+        teams.sort(key=lambda t: (-t["projected_wins"], t["team_id"]))
+    return dict(sorted(groups.items()))
+
+
+def latest_season(db: Session) -> Optional[str]:
+    return db.execute(select(func.max(Game.season))).scalar()
+
+
+def simulate_season(db: Session, season: str, as_of: date, runs: int) -> Optional[dict]:
+    """Cached simulation of the rest of a season from as_of (None if the season has no games)."""
+    version = model_version()
+
+    def simulate() -> Optional[dict]:
+        inputs = load_inputs(db.connection(), season, datetime.combine(as_of, datetime.min.time()))
+        if inputs is None:
+            return None
+        counts = run_simulation(inputs, runs)
+        logger.info(f"Simulated {runs} runs of {season} from {as_of} ({len(inputs['home'])} games left)")
+        return {
+            "season": season,
+            "as_of_date": as_of.isoformat(),
+            "model_version": version,
+            "simulations": runs,
+            "remaining_games": len(inputs["home"]),
+            "conferences": summarize(inputs, counts),
+        }
+
+    return cache.get_or_set(
+        f"simulation:{season}:{as_of.isoformat()}:{version}:{runs}",
+        simulate,
+        ttl=settings.SIMULATION_CACHE_TTL,
+        tags=("games", "team_elo_ratings"),
+    )
+
+
+@register_query("simulation.season_games")
+def _season_games_plan(db: Session):
+    return _season_games_query("2023-24")
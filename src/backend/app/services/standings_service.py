@@ -0,0 +1,196 @@
+"""
+Standings service layer for NBA Analytics.
+
+League, conference and division standings and per-team season analytics,
+read from team_season_standings (kept current as games complete, see
+app.services.aggregate_service) instead of aggregating a season of games.
+
+Teams level on win percentage are ordered by, in turn:
+
+1. win percentage in games among the tied teams (head-to-head, from
+   team_matchups);
+2. division win percentage, if all tied teams share a division;
+3. conference win percentage;
+4. point differential;
+5. team id, so the order is stable.
+
+This follows the NBA's criteria in simplified form: the tiebreakers are
+applied once to each group of tied teams rather than re-applied after each
+team is separated.
+"""
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from app.db.query_plans import register_query
+from app.models import Team, TeamMatchup, TeamSeasonStanding
+
+logger = logging.getLogger(__name__)
+
+STANDINGS_GROUPS = ("league", "conference", "division")
+
+
+def _pct(wins: int, losses: int, default: float = 0.0) -> float:
+    return wins / (wins + losses) if wins + losses else default
+
+
+def _record(matchups: Dict[Tuple[int, int], TeamMatchup], team_id: int, opponents) -> Tuple[int, int]:
+    """A team's wins and losses against a set of opponents in the season."""
+    wins = losses = 0
+    for other in opponents:
+        if other == team_id:
+            continue
+        row = matchups.get((min(team_id, other), max(team_id, other)))
+        if row is None:
+            continue
+        if team_id < other:
+            wins, losses = wins + row.min_team_wins, losses + row.max_team_wins
+        else:
+            wins, losses = wins + row.max_team_wins, losses + row.min_team_wins
+    return wins, losses
+
+
+class StandingsService:
+    """
+    Service class for standings and team season analytics.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _standings_query(self, season: str):
+        return (
+            select(TeamSeasonStanding, Team)
+            .join(Team, Team.id == TeamSeasonStanding.team_id)
+            .where(TeamSeasonStanding.season == season)
+        )
+
+    def latest_season(self, team_id: Optional[int] = None) -> Optional[str]:
+        query = select(func.max(TeamSeasonStanding.season))
+        if team_id is not None:
+            query = query.where(TeamSeasonStanding.team_id == team_id)
+        return self.db.execute(query).scalar()
+
+    def get_standings(self, season: str, group: str = "conference") -> Dict[str, List[dict]]:
+        """Ranked standings per conference, per division or for the whole league."""
+        rows = self.db.execute(self._standings_query(season)).all()
+        matchups = {
+            (m.min_team_id, m.max_team_id): m
+            for m in self.db.execute(select(TeamMatchup).where(TeamMatchup.season == season)).scalars()
+        }
+        teams = {team.id: team for _, team in rows}
+        conferences, divisions = {}, {}
+        for team in teams.values():
+            conferences.setdefault(team.conference, set()).add(team.id)
+            divisions.setdefault(team.division, set()).add(team.id)
+
+        entries = {}
+        for standing, team in rows:
+            conference = _record(matchups, team.id, conferences[team.conference])
+            division = _record(matchups, team.id, divisions[team.division])
+            entries[team.id] = {
+                "team_id": team.id,
+                "team_name": team.name,
+                "abbreviation": team.abbreviation,
+                "conference": team.conference,
+                "division": team.division,
+                "wins": standing.wins,
+                "losses": standing.losses,
+                "win_percentage": round(_pct(standing.wins, standing.losses), 3),
+                "point_differential": standing.points_for - standing.points_against,
+                "conference_record": f"{conference[0]}-{conference[1]}",
+                "division_record": f"{division[0]}-{division[1]}",
+                "_conference_pct": _pct(*conference),
+                "_division_pct": _pct(*division),
+            }
+
+        if group == "league":
+            groups = {"League": list(entries)}
+        else:
+            key = "conference" if group == "conference" else "division"
+            groups = {}
+            for team_id, entry in entries.items():
+                groups.setdefault(entry[key] or "Unassigned", []).append(team_id)
+
+        return {
+            name: self._ranked([entries[t] for t in team_ids], matchups)
+            for name, team_ids in sorted(groups.items())
+        }
+
+    @staticmethod
+    def _ranked(entries: List[dict], matchups: Dict[Tuple[int, int], TeamMatchup]) -> List[dict]:
+        by_pct: Dict[float, List[dict]] = {}
+        for entry in entries:
+            by_pct.setdefault(_pct(entry["wins"], entry["losses"]), []).append(entry)
+
+        ordered = []
+        for pct in sorted(by_pct, reverse=True):
+            tied = by_pct[pct]
+            if len(tied) > 1:
+                ids = {e["team_id"] for e in tied}
+                same_division = len({e["division"] for e in tied}) == 1
+
+                def tiebreak(entry):
+                    head_to_head = _pct(*_record(matchups, entry["team_id"], ids), default=0.5)
+                    return (
+                        -head_to_head,
+                        -entry["_division_pct"] if same_division else 0,
+                        -entry["_conference_pct"],
+                        -entry["point_differential"],
+                        entry["team_id"],
+                    )
+
+                tied = sorted(tied, key=tiebreak)
+            ordered.extend(tied)
+
+        if not ordered:
+            return []
+        leader = ordered[0]
+        ranked = []
+        for rank, entry in enumerate(ordered, start=1):
+            row = {k: v for k, v in entry.items() if not k.startswith("_")}
+            row["rank"] = rank
+            row["games_behind"] = ((leader["wins"] - entry["wins"]) + (entry["losses"] - leader["losses"])) / 2
+            ranked.append(row)
+        return ranked
+
+    def get_team_analytics(self, team_id: int, season: Optional[str] = None) -> Optional[dict]:
+        """A team's season record and per-game averages (None without a standings row)."""
+        season = season or self.latest_season(team_id)
+        if season is None:
+            return None
+        row = self.db.execute(
+            self._standings_query(season).where(TeamSeasonStanding.team_id == team_id)
+        ).first()
+        if row is None:
+            return None
+        standing, team = row
+        games = standing.wins + standing.losses
+
+        def per_game(total: int) -> float:
+            return round(total / games, 2) if games else 0.0
+
+        return {
+            "team_id": team.id,
+            "team_name": team.name,
+            "games_played": games,
+            "wins": standing.wins,
+            "losses": standing.losses,
+            "win_percentage": round(_pct(standing.wins, standing.losses), 3),
+            "avg_points_scored": per_game(standing.points_for),
+            "avg_points_allowed": per_game(standing.points_against),
+            "avg_rebounds": per_game(standing.rebounds),
+            "avg_assists": per_game(standing.assists),
+        }
+
+
+@register_query("standings.season")
+def _standings_plan(db: Session):
+    return StandingsService(db)._standings_query("2023-24")
+
+
+@register_query("standings.season_matchups")
+def _season_matchups_plan(db: Session):
+    return select(TeamMatchup).where(TeamMatchup.season == "2023-24")
@@ -0,0 +1,146 @@
+"""
+Background task definitions for NBA Analytics.
+
+Ingestion and heavy recomputation that should not run inside a request:
+Parquet backfills, upstream syncs, season aggregate rebuilds, Elo replays
+and K factor tuning, prediction feature rebuilds and model training, and
+the reconciliation of live-updated totals once a game is final. Each task
+returns counts that the queue sums across chunks (see app.core.tasks).
+"""
+
+from sqlalchemy import distinct, select
+from typing import Dict, List, Optional
+import asyncio
+import logging
+
+from app.core.tasks import register_task
+from app.db.database import engine
+from app.db.events import publish_invalidation
+from app.models import Game, PlayerStats
+from app.services.aggregate_service import (
+    reconcile_matchups,
+    reconcile_player_aggregates,
+    reconcile_standings,
+)
+from app.services.elo_service import replay_elo, tune_k_factor
+from app.services.live_stats_service import LiveStatsService
+from app.services.prediction_service import replay_features, retrain_model
+
+logger = logging.getLogger(__name__)
+
+
+@register_task("ingest.parquet")
+def ingest_parquet(dataset: str, path: str) -> Dict[str, int]:
+    """Backfill a dataset from a Parquet file (batched by BATCH_SIZE inside the import)."""
+    from app.core.config import settings
+    from app.services.arrow_service import import_parquet
+
+    return {"rows": import_parquet(engine, path, dataset, batch_size=settings.BATCH_SIZE)}
+
+
+@register_task("sync.upstream")
+def sync_upstream(streams: Optional[List[str]] = None, full: bool = False) -> Dict[str, int]:
+    """Incremental balldontlie sync of the given streams (default: all)."""
+    from app.services.nba_api_client import NBAApiClient
+    from app.services.sync_service import STREAMS, SyncService
+
+    async def run():
+        async with NBAApiClient() as client:
+            return await SyncService(engine, client, full=full).run(streams or STREAMS)
+
+    totals = {"fetched": 0, "skipped": 0, "written": 0}
+    for report in asyncio.run(run()):
+        for field in totals:
+            totals[field] += getattr(report, field)
+    return totals
+
+
+def _players_in_season(season: str) -> List[int]:
+    with engine.connect() as connection:
+        return list(connection.execute(
+            select(distinct(PlayerStats.player_id))
+            .join(Game, PlayerStats.game_id == Game.id)
+            .where(Game.season == season)
+            .order_by(PlayerStats.player_id)
+        ).scalars())
+
+
+@register_task("aggregates.rebuild", plan=_players_in_season)
+def rebuild_season_aggregates(player_ids: List[int], season: str) -> Dict[str, int]:
+    """Recompute player_season_aggregates for a chunk of players from their box scores."""
+    with engine.begin() as connection:
+        corrected = reconcile_player_aggregates(connection, season, player_ids)
+    if corrected:
+        publish_invalidation({"player_season_aggregates", f"season:{season}"})
+    return {"players": len(player_ids), "corrected": len(corrected)}
+
+
+@register_task("standings.rebuild")
+def rebuild_standings(season: str) -> Dict[str, int]:
+    """
+    Consistency check of a season's standings and head-to-head rows.
+
+    Both are recomputed from completed games; rows that drifted from the
+    incremental updates are logged and overwritten.
+    """
+    with engine.begin() as connection:
+        teams = reconcile_standings(connection, season)
+        matchups = reconcile_matchups(connection, season)
+    if teams or matchups:
+        logger.warning(
+            f"Standings rebuild for {season} corrected {len(teams)} teams and {len(matchups)} matchups"
+        )
+        publish_invalidation({"team_season_standings", "team_matchups", f"season:{season}"})
+    return {"teams_corrected": len(teams), "matchups_corrected": len(matchups)}
+
+
+@register_task("games.reconcile")
+def reconcile_game(game_id: int) -> Dict[str, int]:
+    """Check a final game's incrementally updated season totals against a full recompute."""
+    report = LiveStatsService(engine).reconcile_game(game_id)
+    return {
+        "players_checked": report["players_checked"],
+        "player_mismatches": len(report["player_mismatches"]),
+        "team_mismatches": len(report["team_mismatches"]),
+        "matchup_mismatches": len(report["matchup_mismatches"]),
+    }
+
+
+@register_task("elo.rebuild")
+def rebuild_elo() -> Dict[str, int]:
+    """Replay every completed game into team_elo_ratings (after a migration, a backfill or a K change)."""
+    with engine.begin() as connection:
+        games = replay_elo(connection)
+    publish_invalidation({"team_elo_ratings"})
+    return {"games": games}
+
+
+@register_task("elo.tune")
+def tune_elo(burn_in_seasons: int = 1) -> Dict[str, float]:
+    """
+    Grid search of ELO_K_FACTOR over all completed games.
+
+    Reports the best K and its log loss; the setting is left for an
+    operator to change, followed by elo.rebuild.
+    """
+    with engine.connect() as connection:
+        report = tune_k_factor(connection, burn_in_seasons=burn_in_seasons)
+    logger.info(f"Elo K grid search over {report['games']} games: {report['grid']}")
+    return {"games": report["games"], "k_factor": report["k_factor"], "log_loss": report.get("log_loss")}
+
+
+@register_task("features.rebuild", plan=_players_in_season)
+def rebuild_features(player_ids: List[int], season: str) -> Dict[str, int]:
+    """Replay a chunk of players' prediction feature states from their box scores (after a bulk load)."""
+    with engine.begin() as connection:
+        states = replay_features(connection, season, player_ids)
+    publish_invalidation({"player_feature_states"})
+    return {"players": len(player_ids), "states": states}
+
+
+@register_task("predictions.train")
+def train_player_model() -> Dict[str, float]:
+    """Refit the player performance model on the most recent seasons and replace the cached one."""
+    with engine.connect() as connection:
+        model = retrain_model(connection)
+    return {"samples": model["samples"], **{f"mae_{stat}": mae for stat, mae in (model["holdout_mae"] or {}).items()}}
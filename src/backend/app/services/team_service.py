@@ -0,0 +1,138 @@
+"""
+Team service layer for NBA Analytics.
+
+Business logic for team and roster queries.
+"""
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Tuple
+import logging
+
+from app.db.query_plans import register_query
+from app.models import Player, Team
+from app.services.aggregate_service import head_to_head_query
+
+logger = logging.getLogger(__name__)
+
+
+class TeamService:
+    """
+    Service class for team-related operations.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _team_query(self, conference: Optional[str] = None, is_active: Optional[bool] = True):
+        query = self.db.query(Team)
+        if conference:
+            query = query.filter(Team.conference == conference)
+        if is_active is not None:
+            query = query.filter(Team.is_active == is_active)
+        return query
+
+    def get_teams(
+        self,
+        skip: int = 0,
+        limit: int = 30,
+        conference: Optional[str] = None,
+        is_active: Optional[bool] = True
+    ) -> List[Team]:
+        """Get teams with optional conference/active filtering."""
+        return (
+            self._team_query(conference, is_active)
+            .order_by(Team.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_teams_version(
+        self,
+        conference: Optional[str] = None,
+        is_active: Optional[bool] = True
+    ) -> Tuple:
+        """
+        Version token for a filtered team list.
+
+        Row count, sum of row versions and max id change whenever a team in
+        the list is inserted, updated or deleted.
+        """
+        query = self._team_query(conference, is_active).with_entities(
+            func.count(Team.id), func.coalesce(func.sum(Team.version), 0), func.max(Team.id)
+        )
+        return tuple(query.one())
+
+    def get_team_by_id(self, team_id: int) -> Optional[Team]:
+        """Get a team by ID."""
+        return self.db.query(Team).filter(Team.id == team_id).first()
+
+    def get_team_version(self, team_id: int) -> Optional[int]:
+        """Row version of a team, or None if it doesn't exist."""
+        return self.db.query(Team.version).filter(Team.id == team_id).scalar()
+
+    def get_roster(self, team_id: int, is_active: Optional[bool] = True) -> List[Player]:
+        """Get the players currently on a team."""
+        return self._roster_query(team_id, is_active).all()
+
+    def _roster_query(self, team_id: int, is_active: Optional[bool] = True):
+        query = (
+            self.db.query(Player)
+            .options(joinedload(Player.team))
+            .filter(Player.team_id == team_id)
+        )
+        if is_active is not None:
+            query = query.filter(Player.is_active == is_active)
+        return query.order_by(Player.name)
+
+    def get_roster_version(self, team_id: int, is_active: Optional[bool] = True) -> Tuple:
+        """Version token for a team's roster (players joining, leaving or changing)."""
+        query = self.db.query(
+            func.count(Player.id), func.coalesce(func.sum(Player.version), 0), func.max(Player.id)
+        ).filter(Player.team_id == team_id)
+        if is_active is not None:
+            query = query.filter(Player.is_active == is_active)
+        return tuple(query.one())
+
+    def get_head_to_head(self, team_id: int, other_id: int, season: Optional[str] = None) -> dict:
+        """
+        Season-by-season record of team_id against other_id, with the running series record.
+
+        Read from team_matchups, which stores each pair once under
+        (min_team_id, max_team_id), so both directions are the same lookup.
+        """
+        low = team_id < other_id
+        seasons, wins, losses, margin = [], 0, 0, 0
+        for row in self.db.execute(head_to_head_query(team_id, other_id, season)).scalars():
+            won, lost = (row.min_team_wins, row.max_team_wins) if low else (row.max_team_wins, row.min_team_wins)
+            scored, allowed = (
+                (row.min_team_points, row.max_team_points) if low else (row.max_team_points, row.min_team_points)
+            )
+            wins, losses, margin = wins + won, losses + lost, margin + scored - allowed
+            seasons.append({
+                "season": row.season,
+                "games_played": row.games_played,
+                "wins": won,
+                "losses": lost,
+                "points_for": scored,
+                "points_against": allowed,
+                "avg_margin": round((scored - allowed) / row.games_played, 2) if row.games_played else 0.0,
+                "running_wins": wins,
+                "running_losses": losses,
+            })
+        games = sum(s["games_played"] for s in seasons)
+        return {
+            "team_id": team_id,
+            "opponent_id": other_id,
+            "games_played": games,
+            "wins": wins,
+            "losses": losses,
+            "avg_margin": round(margin / games, 2) if games else 0.0,
+            "seasons": seasons,
+        }
+
+
+@register_query("teams.roster")
+def _roster_plan(db: Session):
+    return TeamService(db)._roster_query(1)
@@ -0,0 +1,19 @@
+"""
+Celery worker entry point for NBA Analytics background tasks.
+
+    celery -A app.worker worker --concurrency $MAX_WORKERS
+
+Requires TASK_BACKEND=celery on the API side and a reachable Redis
+(CELERY_BROKER_URL or REDIS_URL). Like the API, the worker attaches the
+session listeners before any task runs, so ORM writes to games keep
+team_schedule in step and evict cached entries.
+"""
+
+from app.core.tasks import celery_app
+from app.db.events import register_cache_invalidation, register_data_upkeep
+from app.services import task_service  # noqa: F401  (registers the tasks)
+
+register_data_upkeep()
+register_cache_invalidation()
+
+celery = celery_app()
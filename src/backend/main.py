@@ -5,23 +5,66 @@ A backend API for NBA data analysis, statistics, and machine learning prediction
 Focus: Backend development, database optimization, and ML engineering practice.
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 import time
 import logging
 
 from app.core.config import settings
-from app.api.routes import players, teams, analytics, ml_models
-from app.db.database import engine
-from app.models import Base
+from app.core.cache import cache
+from app.core.live import live_hub
+from app.core.metrics import MetricsMiddleware, metrics
+from app.core.profiling import ProfilingMiddleware, profile_sync_routes
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.tasks import shutdown_task_queue
+from app.api.routes import players, teams, games, analytics, ml_models, exports, profiles, tasks, live
+from app.db.database import engine, SessionLocal
+from app.db.events import register_cache_invalidation, register_data_upkeep
+from app.db.instrumentation import register_sql_instrumentation
+from app.db.migrations import upgrade_database
+from app.services.simulation_service import shutdown_simulation_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Worker startup and shutdown.
+    
+    Importing this module has no side effects; the schema is managed by
+    Alembic (`alembic upgrade head`) and everything else starts here.
+    """
+    if settings.DATABASE_AUTO_MIGRATE:
+        upgrade_database(engine)
+
+    # Per-request query counts/timings, slow-query log and N+1 detection
+    register_sql_instrumentation(engine, metrics)
+
+    # Keep team_schedule in step with ORM writes to games, in every session
+    register_data_upkeep()
+
+    # Evict cached entries whenever players, teams, games or box scores are committed
+    register_cache_invalidation(SessionLocal)
+
+    # Cache invalidation broadcasts and live game updates from other workers
+    cache.start_invalidation_listener()
+    live_hub.start_listener()
+    try:
+        yield
+    finally:
+        live_hub.stop_listener()
+        cache.stop_invalidation_listener()
+        # Let in-process (TASK_BACKEND=local) tasks finish their current chunk
+        shutdown_task_queue()
+        shutdown_simulation_pool()
+        metrics.flush()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -50,6 +93,7 @@ app = FastAPI(
     **Perfect for**: Data analysts transitioning to ML engineering roles
     """,
     version="1.0.0",
+    lifespan=lifespan,
     contact={
         "name": "NBA Analytics Platform",
         "url": "https://github.com/yourusername/nba-analytics",
@@ -60,29 +104,41 @@ app = FastAPI(
     },
 )
 
-# Add CORS middleware
+# Opt-in (admin token) and sampled request profiling
+app.add_middleware(ProfilingMiddleware)
+
+# Per-client and per-route token buckets (REQUESTS_PER_MINUTE)
+app.add_middleware(RateLimitMiddleware)
+
+# CORS outside the rate limiter, so browsers can read a 429 and its Retry-After
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_HOSTS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-RateLimit-Limit", "X-RateLimit-Remaining"],
 )
 
-# Add timing middleware for performance monitoring
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Compress large payloads (player lists, rosters, analytics)
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
+# Request counts, errors, in-flight and per-route latency (outermost, so 429s count too)
+app.add_middleware(MetricsMiddleware)
 
 # Include API routes
 app.include_router(players.router, prefix="/api/players", tags=["Players"])
 app.include_router(teams.router, prefix="/api/teams", tags=["Teams"])
+app.include_router(games.router, prefix="/api/games", tags=["Games"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(ml_models.router, prefix="/api/ml", tags=["Machine Learning"])
+app.include_router(exports.router, prefix="/api/exports", tags=["Exports"])
+app.include_router(profiles.router, prefix="/api/admin/profiles", tags=["Admin"])
+app.include_router(tasks.router, prefix="/api/tasks", tags=["Tasks"])
+app.include_router(live.router, prefix="/api/live", tags=["Live"])
+
+# Profiled requests also cover sync (def) routes on their worker threads
+profile_sync_routes(app)
 
 # Root endpoint
 @app.get("/", tags=["Root"])
@@ -101,8 +157,12 @@ async def root():
         "endpoints": {
             "players": "/api/players",
             "teams": "/api/teams", 
+            "games": "/api/games",
             "analytics": "/api/analytics",
-            "machine_learning": "/api/ml"
+            "machine_learning": "/api/ml",
+            "exports": "/api/exports",
+            "tasks": "/api/tasks",
+            "live": "/api/live/games/{game_id}/events"
         },
         "focus": "Backend development, database optimization, ML engineering"
     }
@@ -119,6 +179,15 @@ async def health_check():
         "version": "1.0.0"
     }
 
+# Prometheus metrics endpoint
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics: per-route latency histograms, request and error
+    counters, in-flight requests, DB pool and cache hit-rate gauges.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,219 @@
+"""
+Shared pytest fixtures for the NBA Analytics backend.
+
+Puts src/backend on sys.path and provides a seeded synthetic database: 30
+teams, 15 players each and eight full regular seasons of games and box scores,
+which is enough rows for the query planner to prefer indexes the way it does
+in production.
+"""
+
+from datetime import datetime, timedelta
+import os
+import random
+import sqlite3
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "backend")
+sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+
+from sqlalchemy import create_engine, insert, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.models import Base, Game, Player, PlayerStats, Team  # noqa: E402
+from app.services.aggregate_service import reconcile_matchups, reconcile_standings  # noqa: E402
+from app.services.elo_service import replay_elo  # noqa: E402
+from app.services.prediction_service import replay_features  # noqa: E402
+from app.services.game_service import rebuild_team_schedule  # noqa: E402
+
+# Opening night of each seeded season
+SEASONS = {f"{year}-{(year + 1) % 100:02d}": datetime(year, 10, 20) for year in range(2016, 2024)}
+TEAMS = 30
+PLAYERS_PER_TEAM = 15
+PLAYERS_PER_BOX_SCORE = 10
+GAMES_PER_SEASON = 1230
+# What the sync stores: the API schema's positions only
+POSITIONS = ["PG", "SG", "SF", "PF", "C"]
+
+
+def seed_synthetic_data(engine, seed: int = 35) -> None:
+    """Fill an empty schema with a deterministic league's worth of data."""
+    rng = random.Random(seed)
+    teams = [
+        {
+            "id": t,
+            "external_id": f"team-{t}",
+            "name": f"Team {t}",
+            "city": f"City {t}",
+            "abbreviation": f"T{t:02d}",
+            "conference": "Eastern" if t <= 15 else "Western",
+            "division": f"Division {(t - 1) // 5 + 1}",
+            "is_active": True,
+        }
+        for t in range(1, TEAMS + 1)
+    ]
+    players = [
+        {
+            "id": p,
+            "external_id": f"player-{p}",
+            "name": f"Player {p}",
+            "position": rng.choice(POSITIONS),
+            "team_id": (p - 1) // PLAYERS_PER_TEAM + 1,
+            "is_active": rng.random() > 0.05,
+            "is_rookie": False,
+        }
+        for p in range(1, TEAMS * PLAYERS_PER_TEAM + 1)
+    ]
+    roster = {t: [p["id"] for p in players if p["team_id"] == t] for t in range(1, TEAMS + 1)}
+
+    games, box_scores = [], []
+    game_id = 0
+    for season, opening_night in SEASONS.items():
+        for n in range(GAMES_PER_SEASON):
+            game_id += 1
+            home, away = rng.sample(range(1, TEAMS + 1), 2)
+            home_score, away_score = rng.randint(90, 135), rng.randint(90, 135)
+            games.append({
+                "id": game_id,
+                "external_id": f"game-{game_id}",
+                "season": season,
+                "game_date": opening_night + timedelta(days=n * 170 // GAMES_PER_SEASON),
+                "home_team_id": home,
+                "away_team_id": away,
+                # NBA games can't end tied
+                "home_score": home_score + (home_score == away_score),
+                "away_score": away_score,
+                "status": "completed",
+                "game_type": "regular",
+            })
+            for team_id in (home, away):
+                for player_id in rng.sample(roster[team_id], PLAYERS_PER_BOX_SCORE):
+                    box_scores.append({
+                        "player_id": player_id,
+                        "game_id": game_id,
+                        "team_id": team_id,
+                        "minutes_played": round(rng.uniform(5, 40), 1),
+                        "points": rng.randint(0, 40),
+                        "rebounds": rng.randint(0, 15),
+                        "assists": rng.randint(0, 12),
+                    })
+
+    with engine.begin() as connection:
+        connection.execute(insert(Team), teams)
+        connection.execute(insert(Player), players)
+        connection.execute(insert(Game), games)
+        connection.execute(insert(PlayerStats), box_scores)
+        rebuild_team_schedule(connection)
+        for season in SEASONS:
+            reconcile_standings(connection, season)
+            reconcile_matchups(connection, season)
+            replay_features(connection, season)
+        replay_elo(connection)
+        # Planner statistics, as a production database would have them
+        connection.execute(text("ANALYZE"))
+
+
+@pytest.fixture(scope="session")
+def sqlite_engine(tmp_path_factory):
+    path = tmp_path_factory.mktemp("db") / "synthetic.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    seed_synthetic_data(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def postgresql_engine():
+    """
+    Seeded PostgreSQL engine from QUERY_PLAN_POSTGRES_URL (skipped if unset).
+
+    The database is treated as scratch: tables are created, seeded and dropped.
+    """
+    url = os.getenv("QUERY_PLAN_POSTGRES_URL")
+    if not url:
+        pytest.skip("QUERY_PLAN_POSTGRES_URL not set")
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    seed_synthetic_data(engine)
+    with engine.begin() as connection:
+        # Statistics from every row rather than a random sample, so the
+        # snapshotted plans are the same on every run
+        connection.execute(text("SET LOCAL default_statistics_target = 1000"))
+        connection.execute(text("ANALYZE"))
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _test_client(engine):
+    from fastapi.testclient import TestClient
+    from app.core.rate_limit import rate_limiter
+    from app.db.database import get_db
+    from app.db.events import register_cache_invalidation
+    from main import app
+
+    factory = sessionmaker(bind=engine)
+    # Writes through the API invalidate the cache as they do in production
+    register_cache_invalidation(factory)
+
+    def override_get_db():
+        with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    # Every test client shares one address; start each test with full buckets
+    rate_limiter.local.reset()
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def client(sqlite_engine):
+    """API test client whose requests read the seeded SQLite database."""
+    yield from _test_client(sqlite_engine)
+
+
+@pytest.fixture
+def scratch_engine(sqlite_engine, tmp_path):
+    """Private copy of the seeded SQLite database, for tests that write to it."""
+    path = tmp_path / "scratch.db"
+    source = sqlite_engine.raw_connection()
+    try:
+        with sqlite3.connect(path) as target:
+            source.driver_connection.backup(target)
+        target.close()
+    finally:
+        source.close()
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def scratch_client(scratch_engine):
+    """API test client over a private copy of the seeded database."""
+    yield from _test_client(scratch_engine)
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def plan_db(request):
+    """
+    Session on each seeded database the plans are checked against.
+
+    The seeded league is small enough that PostgreSQL would rather hash-join or
+    seq-scan games than seek into it, which it stops doing at production sizes.
+    Turning those plan types off makes it plan index access the way it would on
+    a full database, so a query that still scans has no index to use.
+    """
+    engine = request.getfixturevalue(f"{request.param}_engine")
+    session = sessionmaker(bind=engine)()
+    if request.param == "postgresql":
+        for setting in ("enable_seqscan", "enable_hashjoin", "enable_mergejoin"):
+            session.execute(text(f"SET {setting} = off"))
+    try:
+        yield session
+    finally:
+        session.close()
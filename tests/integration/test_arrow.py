@@ -0,0 +1,80 @@
+"""
+Tests for the Arrow IPC / Parquet exports and the Parquet backfill import.
+"""
+
+import io
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Game, PlayerStats
+from app.services.arrow_service import arrow_schema, import_parquet
+from app.services.export_service import EXPORT_QUERIES
+
+SEASON = "2022-23"
+
+
+def test_every_export_has_an_arrow_schema():
+    for build in EXPORT_QUERIES.values():
+        schema = arrow_schema(build())
+        assert len(schema) == len(build().selected_columns)
+    schema = arrow_schema(EXPORT_QUERIES["season-aggregates"]())
+    types = dict(zip(schema.names, schema.types))
+    assert types["avg_points"] == pa.float64() and types["games_played"] == pa.int64()
+
+
+def test_arrow_stream_matches_ndjson(client):
+    params = {"season": SEASON, "team_id": 5}
+    ndjson = client.get("/api/exports/season-aggregates", params=params)
+    arrow = client.get("/api/exports/season-aggregates", params={**params, "format": "arrow"})
+    assert arrow.status_code == 200
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+
+    table = pa.ipc.open_stream(io.BytesIO(arrow.content)).read_all()
+    expected = [orjson.loads(line) for line in ndjson.content.splitlines()]
+    assert table.num_rows == len(expected) > 0
+    assert table.to_pylist() == expected
+
+
+def test_parquet_export_and_import_round_trip(scratch_client, scratch_engine, tmp_path):
+    params = {"season": SEASON, "player_id": 77, "format": "parquet"}
+    response = scratch_client.get("/api/exports/player-stats", params=params)
+    assert response.status_code == 200
+    path = tmp_path / "player_77.parquet"
+    path.write_bytes(response.content)
+
+    table = pq.read_table(path)
+    assert table.schema.field("game_date").type == pa.timestamp("us")
+    rows = table.to_pylist()
+    assert rows and {r["player_id"] for r in rows} == {77}
+
+    def lines():
+        with scratch_engine.connect() as connection:
+            return {
+                row.game_id: row.points for row in connection.execute(
+                    select(PlayerStats.game_id, PlayerStats.points)
+                    .join(Game, PlayerStats.game_id == Game.id)
+                    .where(PlayerStats.player_id == 77, Game.season == SEASON)
+                )
+            }
+
+    before = lines()
+    with scratch_engine.connect() as connection:
+        total = connection.execute(select(func.count(PlayerStats.id))).scalar()
+
+    # Re-importing the export with corrected points updates the same rows
+    corrected = table.set_column(
+        table.schema.get_field_index("points"), "points", pa.array([r["points"] + 1 for r in rows])
+    )
+    pq.write_table(corrected, path)
+    assert import_parquet(scratch_engine, str(path), "player-stats", batch_size=7) == len(rows)
+
+    assert lines() == {game_id: points + 1 for game_id, points in before.items()}
+    with scratch_engine.connect() as connection:
+        assert connection.execute(select(func.count(PlayerStats.id))).scalar() == total
+
+    with pytest.raises(ValueError):
+        import_parquet(scratch_engine, str(path), "season-aggregates")
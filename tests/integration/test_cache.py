@@ -0,0 +1,133 @@
+"""
+Tests for the two-level cache: tag invalidation, loads racing a write, and the Redis (L2 / pub/sub) paths.
+"""
+
+import threading
+import time
+
+import fakeredis
+import pytest
+import redis
+
+from app.core.cache import Cache
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_tag_invalidation_evicts_and_changes_the_generation():
+    cache = Cache(redis_url=None)
+    cache.set("player:1:profile", {"points": 20}, tags=["player:1", "players"])
+    cache.set("team:1:roster", [1, 2], tags=["team:1"])
+    before = cache.generation("player:1")
+
+    cache.invalidate_tags(["player:1"])
+    assert cache.get("player:1:profile") is None
+    assert cache.get("team:1:roster") == [1, 2]
+    assert cache.generation("player:1") != before
+    assert cache.generation("team:1") == cache.generation("team:1")
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = Cache(redis_url=None)
+
+    def stale_loader():
+        # A write lands while the value is being computed from the old rows
+        cache.invalidate_tags(["games"])
+        return {"ratings": "old"}
+
+    assert cache.get_or_set("ratings:2023-24", stale_loader, tags=["games"]) == {"ratings": "old"}
+    assert cache.get("ratings:2023-24") is None
+    assert cache.get_or_set("ratings:2023-24", lambda: {"ratings": "new"}, tags=["games"]) == {"ratings": "new"}
+    assert cache.get("ratings:2023-24") == {"ratings": "new"}
+
+
+def test_concurrent_misses_load_once():
+    cache = Cache(redis_url=None)
+    calls = []
+    started = threading.Event()
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_set("key", slow_loader, tags=["t"])))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8 and len(calls) == 1
+    assert not cache._loading
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda *args, **kwargs: fakeredis.FakeRedis(server=server))
+    return server
+
+
+def test_l2_and_pubsub_keep_workers_in_step(server):
+    a = Cache(redis_url="redis://fake", reconnect_interval=0.05)
+    b = Cache(redis_url="redis://fake", reconnect_interval=0.05)
+    b.start_invalidation_listener()
+    try:
+        a.set("standings:2023-24", {"leader": 1}, tags=["games"])
+        # b misses L1, reads L2 and keeps an L1 copy
+        assert b.get("standings:2023-24") == {"leader": 1}
+        assert b.local.get("standings:2023-24") == (True, {"leader": 1})
+        assert a.generation("games") == b.generation("games")
+
+        a.invalidate_tags(["games"])
+        _wait_for(lambda: not b.local.get("standings:2023-24")[0])
+        assert b.get("standings:2023-24") is None
+        assert a.generation("games") == b.generation("games")
+    finally:
+        b.stop_invalidation_listener()
+
+
+def test_redis_outages_are_retried(server):
+    server.connected = False
+    cache = Cache(redis_url="redis://fake", reconnect_interval=0.05)
+    assert cache.redis is None
+    server.connected = True
+    # Not retried before the interval has passed
+    assert cache.redis is None
+    time.sleep(0.06)
+    assert cache.redis is not None
+
+
+def test_invalidation_listener_resubscribes(server):
+    a = Cache(redis_url="redis://fake", reconnect_interval=0.05)
+    b = Cache(redis_url="redis://fake", reconnect_interval=0.05)
+    b.start_invalidation_listener()
+    try:
+        b.local.set("key", "value", 60, ["games"])
+        server.connected = False
+        _wait_for(lambda: not b._listener.subscribed)
+        offline = b.generation("games")
+        server.connected = True
+        _wait_for(lambda: b._listener.reconnects == 1)
+        # Invalidations sent while disconnected are lost, so L1 starts over
+        assert b.local.get("key") == (False, None)
+        # and ETags built on this worker's own generations no longer match
+        server.connected = False
+        assert b.generation("games") != offline
+        server.connected = True
+        _wait_for(lambda: b._listener.subscribed)
+
+        b.local.set("key", "value", 60, ["games"])
+        a.invalidate_tags(["games"])
+        _wait_for(lambda: not b.local.get("key")[0])
+    finally:
+        b.stop_invalidation_listener()
@@ -0,0 +1,158 @@
+"""
+Tests for Elo ratings: incremental updates, vectorized replay and K tuning.
+"""
+
+from datetime import datetime, timedelta
+import random
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.models import Base, Game, Player, Team, TeamEloRating
+from app.services.elo_service import (
+    INITIAL_RATING, K_GRID, load_games, replay, replay_elo, tune_k_factor, update_elo,
+)
+from app.services.ingestion_service import ingest_batches
+from app.services.live_stats_service import LiveStatsService
+
+
+def _games(teams=6, per_season=40, seasons=("2022-23", "2023-24"), seed=3):
+    rng = random.Random(seed)
+    games, game_id = [], 0
+    for year, season in enumerate(seasons):
+        opening = datetime(2022 + year, 10, 20)
+        for n in range(per_season):
+            game_id += 1
+            home, away = rng.sample(range(1, teams + 1), 2)
+            games.append({
+                "id": game_id, "external_id": f"g-{game_id}", "season": season,
+                "game_date": opening + timedelta(days=n // 2), "home_team_id": home, "away_team_id": away,
+                "status": "completed", "home_score": rng.randint(90, 130), "away_score": rng.randint(90, 130),
+            })
+    return games
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'elo.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Team), [
+            {"id": t, "name": f"Team {t}", "city": f"City {t}", "abbreviation": f"T{t}"} for t in range(1, 7)
+        ])
+    yield engine
+    engine.dispose()
+
+
+def _ratings(engine):
+    with engine.connect() as connection:
+        return [
+            (r.team_id, r.game_id, r.season, round(r.rating_before, 9), round(r.rating, 9),
+             round(r.win_probability, 9))
+            for r in connection.execute(
+                select(TeamEloRating).order_by(TeamEloRating.game_id, TeamEloRating.team_id)
+            )
+        ]
+
+
+def test_incremental_updates_match_a_full_replay(engine):
+    games = _games()
+    with engine.begin() as connection:
+        connection.execute(insert(Game), games)
+        for game in games:
+            assert update_elo(connection, game)
+    incremental = _ratings(engine)
+
+    with engine.begin() as connection:
+        assert replay_elo(connection) == len(games)
+    assert _ratings(engine) == incremental
+    assert len(incremental) == 2 * len(games)
+
+    # Everyone starts at 1500, and a team's second-season opener starts a quarter of the way back
+    first = {}
+    for team_id, _, season, before, after, _ in incremental:
+        if (team_id, season) not in first:
+            first[team_id, season] = before
+            if season == "2022-23":
+                assert before == INITIAL_RATING
+    last_2022 = {team_id: after for team_id, _, season, _, after, _ in incremental if season == "2022-23"}
+    for team_id, rating in last_2022.items():
+        assert first[team_id, "2023-24"] == pytest.approx(rating + 0.25 * (INITIAL_RATING - rating))
+
+
+def test_late_and_corrected_results_replay_from_their_date(engine):
+    games = _games()
+    late, corrected = games[10], games[30]
+    with engine.begin() as connection:
+        connection.execute(insert(Game), games)
+        for game in games:
+            if game is not late:
+                update_elo(connection, game)
+        # A result that arrives after later games were rated
+        update_elo(connection, late)
+
+    # A bulk re-sync corrects an already rated score
+    fixed = {**corrected, "home_score": corrected["away_score"] + 20}
+    ingest_batches(engine, Game, [[{k: v for k, v in fixed.items() if k != "id"}]], ["external_id"])
+    after_fixes = _ratings(engine)
+
+    with engine.begin() as connection:
+        replay_elo(connection)
+    assert after_fixes == _ratings(engine)
+
+
+def test_live_completion_rates_the_game(engine):
+    games = _games()[:5]
+    games[-1].update({"status": "live", "home_score": 50, "away_score": 48})
+    with engine.begin() as connection:
+        connection.execute(insert(Game), games)
+        connection.execute(insert(Player), [{"id": 1, "name": "Player 1", "team_id": games[-1]["home_team_id"]}])
+        replay_elo(connection)
+    assert {game_id for _, game_id, *_ in _ratings(engine)} == {1, 2, 3, 4}
+
+    result = LiveStatsService(engine).apply(5, {"status": "completed", "home_score": 101, "away_score": 99})
+    assert result.completed and result.ratings_changed
+    rows = [r for r in _ratings(engine) if r[1] == 5]
+    assert len(rows) == 2 and rows[0][4] - rows[0][3] == pytest.approx(rows[1][3] - rows[1][4])
+
+    # A score correction after the final re-rates it; box score edits don't
+    service = LiveStatsService(engine)
+    assert service.apply(5, {"home_score": 90}).ratings_changed
+    assert not service.apply(5, box_scores=[{"player_id": 1, "points": 3}]).ratings_changed
+
+
+def test_k_grid_replays_every_k_at_once(sqlite_engine):
+    with sqlite_engine.connect() as connection:
+        games = load_games(connection)
+        report = tune_k_factor(connection)
+    n = len(games["team_ids"])
+    args = (games["home"], games["away"], games["margin"], games["season"], np.full(n, INITIAL_RATING))
+
+    grid = replay(*args, np.full(n, -1), K_GRID)
+    single = replay(*args, np.full(n, -1), K_GRID[3])
+    for together, alone in zip(grid, single):
+        assert np.allclose(together[3], alone[0])
+
+    assert [row["k_factor"] for row in report["grid"]] == list(K_GRID)
+    assert report["log_loss"] == min(row["log_loss"] for row in report["grid"])
+    assert report["games"] == 7 * 1230  # First season is burn-in
+
+
+def test_elo_endpoints(client):
+    current = client.get("/api/analytics/elo").json()
+    assert len(current["teams"]) == 30
+    ratings = [t["rating"] for t in current["teams"]]
+    assert ratings == sorted(ratings, reverse=True)
+    assert sum(ratings) / 30 == pytest.approx(INITIAL_RATING, abs=1)
+
+    series = client.get("/api/teams/7/elo", params={"season": "2023-24"}).json()
+    history = series["history"]
+    assert history and all(p["season"] == "2023-24" for p in history)
+    assert [p["game_date"] for p in history] == sorted(p["game_date"] for p in history)
+    for previous, point in zip(history, history[1:]):
+        assert point["rating_before"] == previous["rating"]
+    assert series["rating"] == history[-1]["rating"]
+    assert next(t for t in current["teams"] if t["team_id"] == 7)["rating"] == round(series["rating"], 1)
+
+    assert client.get("/api/teams/999/elo").status_code == 404
@@ -0,0 +1,111 @@
+"""
+Tests for ETags and 304s on player, game, team, roster and the generation-based analytics routes.
+"""
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db.events import register_cache_invalidation
+from app.models import Game, Player, PlayerStats, Team
+
+
+def _write(engine, change):
+    """Commit change(session) through a session that invalidates the cache like the app's."""
+    factory = sessionmaker(bind=engine)
+    register_cache_invalidation(factory)
+    with factory() as session:
+        change(session)
+        session.commit()
+
+
+def _etag(client, url, **params):
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    revalidated = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.headers["ETag"] == etag
+    assert not revalidated.content
+    return etag
+
+
+def _still_fresh(client, url, etag, **params):
+    return client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_player_etag_follows_the_player_and_their_team(scratch_client, scratch_engine):
+    url = "/api/players/1"
+    first = _etag(scratch_client, url)
+    assert scratch_client.get(url, headers={"If-None-Match": f'W/{first}, "other"'}).status_code == 304
+
+    _write(scratch_engine, lambda s: setattr(s.get(Player, 1), "jersey_number", 7))
+    second = _etag(scratch_client, url)
+    assert second != first and not _still_fresh(scratch_client, url, first)
+
+    # The response nests the team, so renaming it is a change too
+    _write(scratch_engine, lambda s: setattr(s.get(Team, 1), "name", "Renamed"))
+    assert _etag(scratch_client, url) != second
+    assert scratch_client.get(url).json()["team"]["name"] == "Renamed"
+    assert scratch_client.get("/api/players/99999").status_code == 404
+
+
+def test_game_etag_follows_the_game_and_both_teams(scratch_client, scratch_engine):
+    url = "/api/games/1"
+    first = _etag(scratch_client, url)
+    with scratch_engine.connect() as connection:
+        home_id, away_id = connection.execute(
+            Game.__table__.select().with_only_columns(Game.home_team_id, Game.away_team_id).where(Game.id == 1)
+        ).one()
+
+    _write(scratch_engine, lambda s: setattr(s.get(Team, away_id), "name", "Renamed"))
+    assert not _still_fresh(scratch_client, url, first)
+    second = _etag(scratch_client, url)
+    assert scratch_client.get(url).json()["away_team"]["name"] == "Renamed"
+
+    _write(scratch_engine, lambda s: setattr(s.get(Team, home_id), "city", "Elsewhere"))
+    assert not _still_fresh(scratch_client, url, second)
+    third = _etag(scratch_client, url)
+
+    _write(scratch_engine, lambda s: setattr(s.get(Game, 1), "home_score", 150))
+    assert not _still_fresh(scratch_client, url, third)
+    assert scratch_client.get("/api/games/99999").status_code == 404
+
+
+def test_team_and_roster_etags(scratch_client, scratch_engine):
+    team, roster, teams = _etag(scratch_client, "/api/teams/2"), _etag(scratch_client, "/api/teams/2/players"), \
+        _etag(scratch_client, "/api/teams/", conference="Eastern")
+
+    # A player joining changes the roster but not the team
+    _write(scratch_engine, lambda s: setattr(s.get(Player, 1), "team_id", 2))
+    assert _still_fresh(scratch_client, "/api/teams/2", team)
+    assert not _still_fresh(scratch_client, "/api/teams/2/players", roster)
+    roster = _etag(scratch_client, "/api/teams/2/players")
+    assert 1 in [p["id"] for p in scratch_client.get("/api/teams/2/players").json()]
+
+    _write(scratch_engine, lambda s: setattr(s.get(Team, 2), "city", "Elsewhere"))
+    assert not _still_fresh(scratch_client, "/api/teams/2", team)
+    assert not _still_fresh(scratch_client, "/api/teams/2/players", roster)
+    assert not _still_fresh(scratch_client, "/api/teams/", teams, conference="Eastern")
+
+
+def test_analytics_etag_changes_on_commit(scratch_client, scratch_engine):
+    url = "/api/analytics/league-leaders"
+    params = {"season": "2023-24", "stat": "points"}
+    first = _etag(scratch_client, url, **params)
+    # The query is part of the ETag
+    assert _etag(scratch_client, url, season="2023-24", stat="assists") != first
+
+    def correct_box_score(session):
+        stats = session.query(PlayerStats).filter(PlayerStats.game_id == 1).first()
+        stats.points += 1
+
+    _write(scratch_engine, correct_box_score)
+    assert not _still_fresh(scratch_client, url, first, **params)
+    second = _etag(scratch_client, url, **params)
+
+    # A rolled back write publishes nothing
+    factory = sessionmaker(bind=scratch_engine)
+    register_cache_invalidation(factory)
+    with factory() as session:
+        session.get(Player, 1).jersey_number = 99
+        session.flush()
+        session.rollback()
+    assert _still_fresh(scratch_client, url, second, **params)
@@ -0,0 +1,81 @@
+"""
+Tests for the streaming NDJSON/CSV exports.
+"""
+
+import csv
+import io
+
+import orjson
+import pytest
+from sqlalchemy import Float, func, or_, select
+from sqlalchemy.dialects import postgresql
+
+from app.models import Game, PlayerStats
+from app.services.export_service import encode_stream, season_aggregates_query, stream_batches
+
+SEASON = "2022-23"
+
+
+def _ndjson(response):
+    return [orjson.loads(line) for line in response.content.splitlines()]
+
+
+def test_season_aggregates_ndjson(client, sqlite_engine):
+    response = client.get("/api/exports/season-aggregates", params={"season": SEASON})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="season_aggregates_2022-23.ndjson"' in response.headers["content-disposition"]
+    rows = _ndjson(response)
+
+    with sqlite_engine.connect() as connection:
+        players, lines = connection.execute(
+            select(func.count(func.distinct(PlayerStats.player_id)), func.count(PlayerStats.id))
+            .join(Game, PlayerStats.game_id == Game.id).where(Game.season == SEASON)
+        ).one()
+    assert len(rows) == players and sum(r["games_played"] for r in rows) == lines
+    assert [(r["season"], r["player_id"]) for r in rows] == sorted((r["season"], r["player_id"]) for r in rows)
+    for row in rows[:50]:
+        assert isinstance(row["avg_points"], float)
+        assert row["avg_points"] * row["games_played"] == pytest.approx(row["total_points"])
+
+
+def test_averages_are_floats_on_postgresql():
+    # PostgreSQL AVG() is numeric; Decimal breaks orjson mid-stream
+    stmt = season_aggregates_query(season=SEASON)
+    for name in ("avg_minutes", "avg_points", "avg_rebounds", "avg_assists"):
+        assert isinstance(stmt.selected_columns[name].type, Float)
+    assert "CAST(avg(player_stats.points) AS FLOAT)" in str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_games_csv_for_a_team(client, sqlite_engine):
+    response = client.get("/api/exports/games", params={"format": "csv", "team_id": 3, "season": SEASON})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/csv")
+    header, *rows = list(csv.reader(io.StringIO(response.text)))
+    assert header[:3] == ["id", "external_id", "season"]
+
+    with sqlite_engine.connect() as connection:
+        expected = connection.execute(
+            select(Game.id).where(Game.season == SEASON, or_(Game.home_team_id == 3, Game.away_team_id == 3))
+            .order_by(Game.game_date, Game.id)
+        ).scalars().all()
+    assert [int(row[0]) for row in rows] == expected
+
+
+def test_player_stats_and_errors(client):
+    rows = _ndjson(client.get("/api/exports/player-stats", params={"player_id": 42, "season": SEASON}))
+    assert rows and {r["player_id"] for r in rows} == {42} and {r["season"] for r in rows} == {SEASON}
+    assert client.get("/api/exports/nothing").status_code == 404
+    assert client.get("/api/exports/games", params={"format": "xml"}).status_code == 400
+
+
+def test_streams_in_batches(sqlite_engine):
+    stmt = season_aggregates_query(season=SEASON)
+    batches = list(stream_batches(sqlite_engine, stmt, batch_size=100))
+    assert len(batches) > 1 and all(len(rows) <= 100 for _, rows in batches)
+    chunks = list(encode_stream(iter(batches), "csv"))
+    assert len(chunks) == len(batches) and chunks[0].startswith(b"player_id,player_name,season")
+    assert b"player_id" not in chunks[1]
+
+    # An empty result still yields its header
+    empty = list(stream_batches(sqlite_engine, season_aggregates_query(season="1999-00")))
+    assert empty == [(batches[0][0], [])]
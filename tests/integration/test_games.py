@@ -0,0 +1,107 @@
+"""
+Tests for game search, team schedules and upkeep of the team_schedule index.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.events import register_data_upkeep
+from app.models import Base, Game, Team, TeamSchedule
+from app.services.ingestion_service import ingest_batches
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'games.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    # Only the data upkeep: the index must not depend on cache invalidation being attached
+    register_data_upkeep(factory)
+    with factory() as db:
+        db.add_all([Team(id=t, name=f"Team {t}", city=f"City {t}", abbreviation=f"T{t}") for t in (1, 2, 3)])
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def _schedule(db):
+    return db.execute(
+        select(TeamSchedule.team_id, TeamSchedule.game_id, TeamSchedule.opponent_id, TeamSchedule.is_home)
+        .order_by(TeamSchedule.game_id, TeamSchedule.team_id)
+    ).all()
+
+
+def test_orm_writes_keep_the_schedule_in_step(session_factory):
+    with session_factory() as db:
+        db.add(Game(id=1, season="2023-24", game_date=datetime(2023, 10, 25), home_team_id=1, away_team_id=2))
+        db.commit()
+        assert _schedule(db) == [(1, 1, 2, True), (2, 1, 1, False)]
+
+        game = db.get(Game, 1)
+        game.away_team_id = 3
+        db.commit()
+        assert _schedule(db) == [(1, 1, 3, True), (3, 1, 1, False)]
+
+        # Score changes don't touch the index
+        game.home_score = 101
+        db.commit()
+        assert len(_schedule(db)) == 2
+
+        db.delete(game)
+        db.commit()
+        assert _schedule(db) == []
+
+
+def test_bulk_upserts_keep_the_schedule_in_step(session_factory):
+    engine = session_factory.kw["bind"]
+    rows = [
+        {"external_id": "g-1", "season": "2023-24", "game_date": datetime(2023, 10, 25),
+         "home_team_id": 1, "away_team_id": 2},
+        {"external_id": "g-2", "season": "2023-24", "game_date": datetime(2023, 10, 27),
+         "home_team_id": 3, "away_team_id": 1},
+    ]
+    ingest_batches(engine, Game, [rows], ["external_id"])
+    # Re-sync with a rescheduled game
+    ingest_batches(engine, Game, [[{**rows[1], "game_date": datetime(2023, 10, 28)}]], ["external_id"])
+
+    with session_factory() as db:
+        dates = db.execute(
+            select(TeamSchedule.team_id, TeamSchedule.game_date)
+            .where(TeamSchedule.team_id == 1)
+            .order_by(TeamSchedule.game_date)
+        ).all()
+    assert dates == [(1, datetime(2023, 10, 25)), (1, datetime(2023, 10, 28))]
+
+
+def test_team_search_matches_home_or_away(client, sqlite_engine):
+    with sqlite_engine.connect() as connection:
+        expected = connection.execute(
+            select(func.count(Game.id)).where(
+                Game.season == "2023-24", or_(Game.home_team_id == 7, Game.away_team_id == 7)
+            )
+        ).scalar()
+
+    page = client.get("/api/games/", params={"team_id": 7, "season": "2023-24", "limit": 100}).json()
+    assert page["total"] == expected
+    assert all(7 in (g["home_team_id"], g["away_team_id"]) for g in page["items"])
+    dates = [g["game_date"] for g in page["items"]]
+    assert dates == sorted(dates)
+    assert page["has_next"] is (expected > 100)
+
+
+def test_schedule_and_daily_slate(client):
+    upcoming = client.get("/api/games/schedule/7", params={"after": "2024-01-15T00:00:00", "limit": 3}).json()
+    assert len(upcoming) == 3
+    assert all(g["game_date"] >= "2024-01-15" and 7 in (g["home_team_id"], g["away_team_id"]) for g in upcoming)
+    assert upcoming[0]["home_team"]["id"] == upcoming[0]["home_team_id"]
+
+    slate = client.get("/api/games/on/2024-01-15").json()
+    assert slate and all(g["game_date"].startswith("2024-01-15") for g in slate)
+
+    game = client.get(f"/api/games/{slate[0]['id']}")
+    assert game.status_code == 200
+    assert client.get(f"/api/games/{slate[0]['id']}", headers={"If-None-Match": game.headers["ETag"]}).status_code == 304
+    assert client.get("/api/games/999999").status_code == 404
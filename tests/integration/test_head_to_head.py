@@ -0,0 +1,45 @@
+"""
+Tests for the head-to-head endpoint over team_matchups.
+"""
+
+from sqlalchemy import and_, case, func, or_, select
+
+from app.models import Game
+
+
+def _naive_record(engine, team_id, other_id):
+    """The OR query the matchup table replaces."""
+    scored = case((Game.home_team_id == team_id, Game.home_score), else_=Game.away_score)
+    allowed = case((Game.home_team_id == team_id, Game.away_score), else_=Game.home_score)
+    with engine.connect() as connection:
+        return tuple(connection.execute(
+            select(
+                func.count(Game.id),
+                func.sum(case((scored > allowed, 1), else_=0)),
+                func.sum(case((scored < allowed, 1), else_=0)),
+            ).where(
+                Game.status == "completed",
+                or_(
+                    and_(Game.home_team_id == team_id, Game.away_team_id == other_id),
+                    and_(Game.home_team_id == other_id, Game.away_team_id == team_id),
+                ),
+            )
+        ).one())
+
+
+def test_head_to_head_matches_games_from_either_side(client, sqlite_engine):
+    forward = client.get("/api/teams/3/vs/11").json()
+    backward = client.get("/api/teams/11/vs/3").json()
+
+    assert (forward["games_played"], forward["wins"], forward["losses"]) == _naive_record(sqlite_engine, 3, 11)
+    assert (backward["wins"], backward["losses"]) == (forward["losses"], forward["wins"])
+    assert backward["avg_margin"] == -forward["avg_margin"]
+    last = forward["seasons"][-1]
+    assert (last["running_wins"], last["running_losses"]) == (forward["wins"], forward["losses"])
+    assert [s["season"] for s in forward["seasons"]] == sorted(s["season"] for s in forward["seasons"])
+
+
+def test_head_to_head_single_season_and_validation(client):
+    season = client.get("/api/teams/3/vs/11", params={"season": "2023-24"}).json()
+    assert [s["season"] for s in season["seasons"]] in (["2023-24"], [])
+    assert client.get("/api/teams/3/vs/3").status_code == 400
@@ -0,0 +1,87 @@
+"""
+Tests for the record/replay HTTP cache used by the upstream API client.
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.services.http_cache import HttpCache, request_key
+from app.services.nba_api_client import NBAApiClient, ReplayMiss, Upstream
+
+BASE_URL = "https://api.example.test"
+
+
+class Upstream304:
+    """Serves a JSON body with an ETag, answering 304 to a matching If-None-Match."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json={"path": request.url.path}, headers={"ETag": '"v1"'})
+
+
+def _get(cache, handler, path, params=None):
+    async def run():
+        client = NBAApiClient(
+            [Upstream(BASE_URL, 60000, 4)], transport=httpx.MockTransport(handler), cache=cache
+        )
+        async with client:
+            return await client.get_json(f"{BASE_URL}{path}", params)
+
+    return asyncio.run(run())
+
+
+def _offline(request):
+    raise AssertionError(f"unexpected network request to {request.url}")
+
+
+def test_request_key_ignores_query_order():
+    assert request_key("GET", f"{BASE_URL}/players?a=1&b=2") == request_key("get", f"{BASE_URL}/players?b=2&a=1")
+    assert request_key("GET", f"{BASE_URL}/players?a=1") != request_key("GET", f"{BASE_URL}/players?a=2")
+
+
+def test_fresh_entries_are_served_without_network(tmp_path):
+    upstream = Upstream304()
+    cache = HttpCache(str(tmp_path), "record", ttl=60)
+
+    assert _get(cache, upstream, "/teams", {"l": "NBA"}) == {"path": "/teams"}
+    assert _get(cache, _offline, "/teams", {"l": "NBA"}) == {"path": "/teams"}
+    assert (len(upstream.calls), cache.stored, cache.hits) == (1, 1, 1)
+
+
+def test_stale_entries_are_revalidated(tmp_path):
+    upstream = Upstream304()
+    cache = HttpCache(str(tmp_path), "record", ttl=0)
+
+    _get(cache, upstream, "/teams")
+    assert _get(cache, upstream, "/teams") == {"path": "/teams"}
+    assert upstream.calls[-1].headers["if-none-match"] == '"v1"'
+    assert cache.revalidated == 1
+
+
+def test_replay_serves_recordings_and_never_touches_network(tmp_path):
+    _get(HttpCache(str(tmp_path), "record", ttl=0), Upstream304(), "/games", {"cursor": "5"})
+    replay = HttpCache(str(tmp_path), "replay", ttl=0)
+
+    assert _get(replay, _offline, "/games", {"cursor": "5"}) == {"path": "/games"}
+    with pytest.raises(ReplayMiss):
+        _get(replay, _offline, "/games", {"cursor": "6"})
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    def same_body(request):
+        return httpx.Response(200, json={"ok": True})
+
+    cache = HttpCache(str(tmp_path), "record")
+    _get(cache, same_body, "/a")
+    _get(cache, same_body, "/b")
+
+    bodies = [f for _, _, files in os.walk(tmp_path / "bodies") for f in files]
+    assert cache.stored == 2 and len(bodies) == 1
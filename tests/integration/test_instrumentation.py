@@ -0,0 +1,90 @@
+"""
+Tests for SQL instrumentation: fingerprints, the slow-query log, N+1 detection and failed statements.
+"""
+
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.db import instrumentation
+from app.db.instrumentation import fingerprint, register_sql_instrumentation
+
+
+class _Registry:
+    def __init__(self):
+        self.counters, self.observed = [], []
+
+    def inc(self, name, amount=1, **labels):
+        self.counters.append((name, labels))
+
+    def observe(self, name, value, **labels):
+        self.observed.append((name, value, labels))
+
+
+@pytest.fixture
+def registry():
+    return _Registry()
+
+
+@pytest.fixture
+def engine(registry):
+    engine = create_engine("sqlite://")
+    register_sql_instrumentation(engine, registry)
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE players (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("INSERT INTO players VALUES (1, 'A'), (2, 'B'), (3, 'C')"))
+    yield engine
+    engine.dispose()
+
+
+def test_fingerprint_normalizes_literals_and_in_lists():
+    assert fingerprint("SELECT * FROM players WHERE id IN (1, 2, 3) AND name = 'O''Neal'") == \
+        "SELECT * FROM players WHERE id IN (?+) AND name = ?"
+    assert fingerprint("SELECT  *\n FROM players WHERE id = :id_1 LIMIT 10") == \
+        fingerprint("SELECT * FROM players WHERE id = ? LIMIT 5")
+
+
+def test_slow_queries_are_logged(engine, registry, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 0.0)
+    with caplog.at_level(logging.WARNING, logger="app.sql.slow"), engine.connect() as connection:
+        connection.execute(text("SELECT name FROM players WHERE id = 2"))
+    slow = [r.getMessage() for r in caplog.records if r.name == "app.sql.slow"]
+    assert slow and "SELECT name FROM players WHERE id = ?" in slow[-1]
+    assert ("db_slow_queries_total", {"fingerprint": slow[-1].split("[")[1][:12]}) in registry.counters
+
+    caplog.clear()
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 10_000.0)
+    with caplog.at_level(logging.WARNING, logger="app.sql.slow"), engine.connect() as connection:
+        connection.execute(text("SELECT name FROM players WHERE id = 2"))
+    assert not caplog.records
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(engine, registry, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 3)
+    stats, token = instrumentation.begin_request()
+    with engine.connect() as connection:
+        connection.execute(text("SELECT id FROM players"))
+        for player_id in (1, 2, 3):
+            connection.execute(text("SELECT name FROM players WHERE id = :id"), {"id": player_id})
+    with caplog.at_level(logging.WARNING, logger="app.db.instrumentation"):
+        instrumentation.end_request(stats, token, "/api/players/{player_id}", registry)
+
+    assert stats.count == 4
+    assert stats.repeated_shapes(3) == [("SELECT name FROM players WHERE id = ?", 3)]
+    assert any("Possible N+1 on /api/players/{player_id}: 3 executions" in r.getMessage() for r in caplog.records)
+    assert ("db_n_plus_one_total", {"route": "/api/players/{player_id}"}) in registry.counters
+    assert ("db_queries_per_request", 4, {"route": "/api/players/{player_id}"}) in registry.observed
+    # Outside a request nothing is collected
+    assert instrumentation.current_stats() is None
+
+
+def test_failed_statements_do_not_leak_start_times(engine):
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(Exception):
+                connection.execute(text("SELECT * FROM missing_table"))
+        assert connection.info["query_start_time"] == []
+        connection.execute(text("SELECT 1"))
+        assert connection.info["query_start_time"] == []
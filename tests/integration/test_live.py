@@ -0,0 +1,185 @@
+"""
+Tests for the live game push hub and its WebSocket/SSE endpoints.
+"""
+
+from datetime import datetime
+import asyncio
+import time
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import live as live_module
+from app.core.live import LiveHub, box_score_update, score_update
+from app.db.events import register_cache_invalidation
+from app.models import Base, Game, PlayerStats, Team
+
+
+def test_rapid_updates_are_coalesced():
+    async def run():
+        hub = LiveHub()
+        subscriber = hub.subscribe(7)
+        other = hub.subscribe(8)
+        hub.publish([score_update(7, home_score=score) for score in range(10, 20)])
+        hub.publish([box_score_update(7, 23, points=5), box_score_update(7, 23, rebounds=2)])
+        await asyncio.sleep(0)
+        return await subscriber.next_batch(timeout=1), other.pending, subscriber
+
+    batch, other_pending, subscriber = asyncio.run(run())
+
+    assert batch == [
+        {"type": "score", "game_id": 7, "home_score": 19},
+        {"type": "box_score", "game_id": 7, "player_id": 23, "points": 5, "rebounds": 2},
+    ]
+    assert (subscriber.received, subscriber.coalesced) == (12, 10)
+    assert not other_pending
+
+
+def test_subscriber_that_falls_behind_gets_a_snapshot():
+    async def run():
+        hub = LiveHub(max_pending=3)
+        subscriber = hub.subscribe(7)
+        hub.publish([box_score_update(7, player_id, points=1) for player_id in range(5)])
+        await asyncio.sleep(0)
+        first = await subscriber.next_batch(timeout=1)
+        second = await subscriber.next_batch(timeout=0.01)
+        return first, second
+
+    assert asyncio.run(run()) == (None, [])
+
+
+def test_updates_reach_subscribers_on_other_workers():
+    server = fakeredis.FakeServer()
+    publisher = LiveHub(lambda: fakeredis.FakeRedis(server=server))
+    receiver = LiveHub(lambda: fakeredis.FakeRedis(server=server))
+
+    async def run():
+        subscriber = receiver.subscribe(7)
+        receiver.start_listener()
+        try:
+            for _ in range(50):
+                publisher.publish([score_update(7, away_score=101)])
+                batch = await subscriber.next_batch(timeout=0.1)
+                if batch:
+                    return batch
+        finally:
+            receiver.stop_listener()
+
+    assert asyncio.run(run()) == [{"type": "score", "game_id": 7, "away_score": 101}]
+
+
+def test_listener_resubscribes_after_a_redis_outage():
+    server = fakeredis.FakeServer()
+    publisher = LiveHub(lambda: fakeredis.FakeRedis(server=server))
+    receiver = LiveHub(lambda: fakeredis.FakeRedis(server=server))
+
+    async def run():
+        subscriber = receiver.subscribe(7)
+        receiver.start_listener()
+        try:
+            server.connected = False
+            while receiver._listener.subscribed:
+                await asyncio.sleep(0.01)
+            server.connected = True
+            # Patches published during the outage are lost: the connection resends a snapshot
+            assert await subscriber.next_batch(timeout=5) is None
+            assert receiver._listener.reconnects == 1
+
+            for _ in range(50):
+                publisher.publish([score_update(7, home_score=99)])
+                batch = await subscriber.next_batch(timeout=0.1)
+                if batch:
+                    return batch
+        finally:
+            receiver.stop_listener()
+
+    assert asyncio.run(run()) == [{"type": "score", "game_id": 7, "home_score": 99}]
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'live.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    register_cache_invalidation(factory)
+    with factory() as db:
+        db.add_all([
+            Team(id=1, name="Hawks", city="Atlanta", abbreviation="ATL"),
+            Team(id=2, name="Celtics", city="Boston", abbreviation="BOS"),
+            Game(id=1, season="2023-24", game_date=datetime(2023, 10, 25), home_team_id=1,
+                 away_team_id=2, status="live", home_score=0, away_score=0, quarter=1),
+        ])
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def test_committed_score_changes_are_published(session_factory, monkeypatch):
+    published = []
+    monkeypatch.setattr(live_module.live_hub, "publish", published.extend)
+
+    with session_factory() as db:
+        game = db.get(Game, 1)
+        game.home_score = 3
+        game.quarter = 2
+        db.add(PlayerStats(player_id=9, game_id=1, team_id=1, points=3))
+        db.flush()
+        assert published == []
+        db.commit()
+
+    assert score_update(1, home_score=3, quarter=2) in published
+    box = next(u for u in published if u["type"] == "box_score")
+    assert (box["player_id"], box["team_id"], box["points"], box["rebounds"]) == (9, 1, 3, 0)
+
+    with session_factory() as db:
+        db.get(Game, 1).away_score = 2
+        db.rollback()
+    assert len(published) == 2
+
+
+def test_websocket_sends_snapshot_then_updates(sqlite_engine, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api.routes import live
+    from main import app
+
+    monkeypatch.setattr(live, "engine", sqlite_engine)
+    monkeypatch.setattr(live.live_hub, "coalesce_seconds", 0)
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/live/games/1/ws") as ws:
+            snapshot = ws.receive_json()
+            assert snapshot["type"] == "snapshot" and snapshot["game"]["id"] == 1
+            assert len(snapshot["box_score"]) == 20
+
+            live.live_hub.publish([score_update(1, home_score=120), score_update(2, home_score=1)])
+            update = ws.receive_json()
+            assert update == {"type": "update", "game_id": 1,
+                              "updates": [{"type": "score", "game_id": 1, "home_score": 120}]}
+
+        deadline = time.time() + 2
+        while live.live_hub.subscriber_count(1) and time.time() < deadline:
+            time.sleep(0.01)
+        assert live.live_hub.subscriber_count(1) == 0
+
+
+def test_event_stream_format(sqlite_engine, monkeypatch):
+    from app.api.routes import live
+
+    monkeypatch.setattr(live, "engine", sqlite_engine)
+
+    async def run():
+        hub = LiveHub(coalesce_seconds=0)
+        monkeypatch.setattr(live, "live_hub", hub)
+        subscriber = hub.subscribe(1)
+        stream = live._event_stream(1, {"type": "snapshot", "game_id": 1}, subscriber)
+        first = await stream.__anext__()
+        hub.publish([score_update(1, quarter=4)])
+        second = await stream.__anext__()
+        await stream.aclose()
+        return first, second, hub.subscriber_count(1)
+
+    first, second, remaining = asyncio.run(run())
+    assert first.startswith("retry: 3000\nevent: snapshot\ndata: {")
+    assert second == 'event: update\ndata: [{"type":"score","game_id":1,"quarter":4}]\n\n'
+    assert remaining == 0
@@ -0,0 +1,217 @@
+"""
+Tests for incremental live box score processing and final-game reconciliation.
+"""
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+
+from app.core import live as live_module
+from app.models import (
+    Base, Game, Player, PlayerSeasonAggregate, PlayerStats, Team, TeamSeasonStanding,
+)
+from app.services import ingestion_service
+from app.services.aggregate_service import reconcile_player_aggregates, reconcile_standings
+from app.services.live_stats_service import LiveStatsService
+
+SEASON = "2023-24"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'live_stats.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Team), [
+            {"id": 1, "name": "Hawks", "city": "Atlanta", "abbreviation": "ATL"},
+            {"id": 2, "name": "Celtics", "city": "Boston", "abbreviation": "BOS"},
+        ])
+        connection.execute(insert(Player), [
+            {"id": pid, "name": f"Player {pid}", "team_id": 1 if pid < 20 else 2} for pid in (10, 11, 20)
+        ])
+        connection.execute(insert(Game), [
+            {"id": 1, "season": SEASON, "game_date": datetime(2023, 10, 25), "home_team_id": 1,
+             "away_team_id": 2, "status": "completed", "home_score": 100, "away_score": 90},
+            {"id": 2, "season": SEASON, "game_date": datetime(2023, 10, 27), "home_team_id": 2,
+             "away_team_id": 1, "status": "live", "home_score": 0, "away_score": 0, "quarter": 1},
+        ])
+        connection.execute(insert(PlayerStats), [
+            {"player_id": 10, "game_id": 1, "team_id": 1, "points": 30, "rebounds": 5, "assists": 0,
+             "minutes_played": 36.0},
+            {"player_id": 20, "game_id": 1, "team_id": 2, "points": 25, "rebounds": 0, "assists": 8,
+             "minutes_played": 34.0},
+        ])
+        # Season totals as a rebuild would leave them before game 2 tips off
+        reconcile_player_aggregates(connection, SEASON, [10, 20])
+        reconcile_standings(connection, SEASON, [1, 2])
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def published(monkeypatch):
+    updates = []
+    monkeypatch.setattr(live_module.live_hub, "publish", updates.extend)
+    return updates
+
+
+def _aggregate(engine, player_id):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(PlayerSeasonAggregate).where(PlayerSeasonAggregate.player_id == player_id)
+        ).one()._mapping
+
+
+def _standings(engine):
+    with engine.connect() as connection:
+        rows = connection.execute(select(TeamSeasonStanding).order_by(TeamSeasonStanding.team_id))
+        return [(r.team_id, r.wins, r.losses, r.points_for, r.points_against) for r in rows]
+
+
+def test_box_score_deltas_update_season_totals(engine, published):
+    service = LiveStatsService(engine)
+
+    service.apply(2, {"home_score": 2}, [{"player_id": 20, "points": 2}, {"player_id": 10, "team_id": 1}])
+    result = service.apply(2, {"away_score": 3}, [
+        {"player_id": 20, "points": 2, "rebounds": 1},  # points unchanged
+        {"player_id": 10, "points": 3, "three_pointers_made": 1, "three_pointers_attempted": 1},
+    ])
+
+    assert (result.game_fields_changed, result.box_scores_changed) == (["away_score"], 2)
+    assert published[-2:] == [
+        {"type": "box_score", "game_id": 2, "player_id": 20, "team_id": 2, "rebounds": 1},
+        {"type": "box_score", "game_id": 2, "player_id": 10, "team_id": 1, "points": 3,
+         "three_pointers_made": 1, "three_pointers_attempted": 1},
+    ]
+    star = _aggregate(engine, 20)
+    assert (star["games_played"], star["points"], star["rebounds"], star["assists"]) == (2, 27, 1, 8)
+    assert _aggregate(engine, 10)["points"] == 33
+    with engine.connect() as connection:
+        line = connection.execute(
+            select(PlayerStats).where(PlayerStats.player_id == 10, PlayerStats.game_id == 2)
+        ).one()
+    assert (line.points, line.three_point_percentage, line.version) == (3, 1.0, 2)
+
+
+def test_standings_change_only_when_a_game_becomes_final(engine, published):
+    service = LiveStatsService(engine)
+    assert _standings(engine) == [(1, 1, 0, 100, 90), (2, 0, 1, 90, 100)]
+
+    assert not service.apply(2, {"home_score": 99, "away_score": 101}).standings_changed
+    result = service.apply(2, {"status": "completed"})
+    assert result.completed and result.standings_changed
+    assert _standings(engine) == [(1, 2, 0, 201, 189), (2, 0, 2, 189, 201)]
+
+    # A corrected final score moves the result from one team to the other
+    service.apply(2, {"home_score": 103})
+    assert _standings(engine) == [(1, 1, 1, 201, 193), (2, 1, 1, 193, 201)]
+
+
+def test_reconciliation_matches_incremental_totals(engine, published):
+    service = LiveStatsService(engine)
+    for minute in range(1, 6):
+        service.apply(2, {"home_score": 2 * minute}, [
+            {"player_id": 20, "points": 2 * minute, "minutes_played": float(minute)},
+            {"player_id": 11, "team_id": 1, "rebounds": minute},
+        ])
+    service.apply(2, {"status": "completed", "away_score": 4})
+
+    report = service.reconcile_game(2)
+    assert (report["players_checked"], report["player_mismatches"], report["team_mismatches"]) == (2, {}, {})
+
+    # Drift introduced outside the delta path is found and corrected
+    with engine.begin() as connection:
+        connection.execute(
+            PlayerSeasonAggregate.__table__.update()
+            .where(PlayerSeasonAggregate.player_id == 20)
+            .values(points=0)
+        )
+    report = service.reconcile_game(2)
+    assert report["player_mismatches"] == {20: {"points": (0, 35)}}
+    assert _aggregate(engine, 20)["points"] == 35
+
+
+def test_bulk_loaded_box_scores_update_season_totals(engine, monkeypatch):
+    invalidated = set()
+    monkeypatch.setattr(ingestion_service, "publish_invalidation", invalidated.update)
+
+    # A corrected line for player 10 and a late line for player 11, as a sync would write them
+    ingestion_service.ingest_batches(engine, PlayerStats, [[
+        {"player_id": 10, "game_id": 1, "team_id": 1, "points": 32, "rebounds": 7, "assists": 0,
+         "minutes_played": 36.0},
+        {"player_id": 11, "game_id": 1, "team_id": 1, "points": 4, "rebounds": 2, "assists": 1,
+         "minutes_played": 12.0},
+    ]], ["player_id", "game_id"])
+
+    assert (_aggregate(engine, 10)["points"], _aggregate(engine, 10)["rebounds"]) == (32, 7)
+    assert (_aggregate(engine, 11)["games_played"], _aggregate(engine, 11)["team_id"]) == (1, 1)
+    with engine.connect() as connection:
+        home = connection.execute(select(TeamSeasonStanding).where(TeamSeasonStanding.team_id == 1)).one()
+        assert (home.rebounds, home.assists) == (9, 1)
+        assert reconcile_player_aggregates(connection, SEASON, [10, 11, 20]) == {}
+        assert reconcile_standings(connection, SEASON, [1, 2]) == {}
+    assert {"player_season_aggregates", "team_season_standings", "player:11"} <= invalidated
+
+
+def test_unknown_game(engine):
+    with pytest.raises(LookupError):
+        LiveStatsService(engine).apply(99, {"home_score": 1})
+
+
+def test_deltas_endpoint(engine, published, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.api.routes import live
+    from app.core.config import settings
+    from main import app
+
+    monkeypatch.setattr(live, "engine", engine)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    with engine.begin() as connection:
+        connection.execute(insert(Team), [{"id": 3, "name": "Nets", "city": "Brooklyn", "abbreviation": "BKN"}])
+        connection.execute(insert(Player), [{"id": 30, "name": "Player 30", "team_id": 3}])
+    client = TestClient(app)
+    admin = {"X-Admin-Token": "secret"}
+    url = "/api/live/games/2/deltas"
+
+    assert client.post(url, json={"game": {"home_score": 2}}).status_code == 403
+    assert client.post(url, json={"game": {"home_score": 2}}, headers={"X-Admin-Token": "x"}).status_code == 403
+
+    response = client.post(url, headers=admin, json={
+        "game": {"home_score": 2}, "box_scores": [{"player_id": 20, "points": 2}],
+    })
+    assert response.status_code == 200
+    assert (response.json()["game_fields_changed"], response.json()["box_scores_changed"]) == (["home_score"], 1)
+    assert _aggregate(engine, 20)["points"] == 27
+
+    # Rejected batches write nothing, including their valid parts
+    for body, status in [
+        ({"box_scores": [{"player_id": 20, "points": None}]}, 422),
+        ({"game": {"status": None}}, 422),
+        ({"game": {"home_score": 4}, "box_scores": [{"player_id": 999, "points": 2}]}, 404),
+        ({"game": {"home_score": 4}, "box_scores": [{"player_id": 30, "points": 2}]}, 422),
+        ({"box_scores": [{"player_id": 10, "team_id": 3, "points": 2}]}, 422),
+    ]:
+        assert client.post(url, headers=admin, json=body).status_code == status, body
+    assert client.post("/api/live/games/99/deltas", headers=admin, json={}).status_code == 404
+    with engine.connect() as connection:
+        assert connection.execute(select(Game.home_score).where(Game.id == 2)).scalar() == 2
+        assert connection.execute(select(func.count()).select_from(PlayerStats)).scalar() == 3
+    assert _aggregate(engine, 20)["points"] == 27
+
+
+def test_head_to_head_follows_results(engine, published):
+    from app.models import TeamMatchup
+    from app.services.aggregate_service import reconcile_matchups
+
+    with engine.begin() as connection:
+        reconcile_matchups(connection, SEASON)
+    service = LiveStatsService(engine)
+    service.apply(2, {"home_score": 110, "away_score": 95, "status": "completed"})
+
+    with engine.connect() as connection:
+        row = connection.execute(select(TeamMatchup)).one()
+    # Team 1 won game 1 100-90 at home; team 2 won game 2 110-95 at home
+    assert (row.min_team_id, row.max_team_id, row.games_played) == (1, 2, 2)
+    assert (row.min_team_wins, row.max_team_wins, row.min_team_points, row.max_team_points) == (1, 1, 195, 200)
+    assert service.reconcile_game(2)["matchup_mismatches"] == {}
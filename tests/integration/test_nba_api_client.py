@@ -0,0 +1,153 @@
+"""
+Tests for the upstream NBA API client against a local mock HTTP server.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.services.nba_api_client import NBAApiClient, Upstream, UpstreamError
+
+
+class MockUpstream(BaseHTTPRequestHandler):
+    """Routes: /ok, /slow, /flaky (503 twice), /missing (404), /players (cursor pages)."""
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        with server.lock:
+            server.hits[url.path] = server.hits.get(url.path, 0) + 1
+            hits = server.hits[url.path]
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            if url.path == "/slow":
+                time.sleep(0.05)
+                self._json(200, {"ok": True})
+            elif url.path == "/flaky" and hits <= 2:
+                self._json(503, {"error": "busy"}, {"Retry-After": "0"})
+            elif url.path == "/missing":
+                self._json(404, {"error": "not found"})
+            elif url.path == "/players":
+                cursor = int(query.get("cursor", ["0"])[0])
+                next_cursor = cursor + 2 if cursor < 4 else None
+                self._json(200, {
+                    "data": [{"id": cursor + 1}, {"id": cursor + 2}],
+                    "meta": {"next_cursor": next_cursor},
+                })
+            else:
+                self._json(200, {"ok": True})
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockUpstream)
+    server.lock = threading.Lock()
+    server.hits = {}
+    server.in_flight = 0
+    server.max_in_flight = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _client(server, requests_per_minute=6000, max_concurrency=4, **kwargs):
+    upstream = Upstream(_base_url(server), requests_per_minute, max_concurrency)
+    return NBAApiClient([upstream], backoff_base=0.01, backoff_max=0.05, **kwargs)
+
+
+def test_retries_transient_errors(mock_server):
+    async def run():
+        async with _client(mock_server) as client:
+            data = await client.get_json(f"{_base_url(mock_server)}/flaky")
+            return data, client.retries
+
+    data, retries = asyncio.run(run())
+    assert data == {"ok": True}
+    assert retries == 2
+    assert mock_server.hits["/flaky"] == 3
+
+
+def test_client_errors_are_not_retried(mock_server):
+    async def run():
+        async with _client(mock_server) as client:
+            await client.get_json(f"{_base_url(mock_server)}/missing")
+
+    with pytest.raises(UpstreamError) as exc_info:
+        asyncio.run(run())
+    assert exc_info.value.status_code == 404
+    assert mock_server.hits["/missing"] == 1
+
+
+def test_gives_up_after_max_retries(mock_server):
+    async def run():
+        async with _client(mock_server, max_retries=1) as client:
+            await client.get_json(f"{_base_url(mock_server)}/flaky")
+
+    with pytest.raises(UpstreamError) as exc_info:
+        asyncio.run(run())
+    assert exc_info.value.status_code == 503
+    assert mock_server.hits["/flaky"] == 2
+
+
+def test_concurrency_is_bounded_per_host(mock_server):
+    async def run():
+        async with _client(mock_server, max_concurrency=3) as client:
+            url = f"{_base_url(mock_server)}/slow"
+            return await client.gather(client.get_json(url) for _ in range(12))
+
+    results = asyncio.run(run())
+    assert len(results) == 12
+    assert mock_server.max_in_flight <= 3
+
+
+def test_quota_limits_request_rate(mock_server):
+    async def run():
+        # 600/min = 10/s with a burst of 10: 15 requests need about 0.5s
+        async with _client(mock_server, requests_per_minute=600) as client:
+            url = f"{_base_url(mock_server)}/ok"
+            start = time.perf_counter()
+            await client.gather(client.get_json(url) for _ in range(15))
+            return time.perf_counter() - start
+
+    assert asyncio.run(run()) >= 0.4
+
+
+def test_balldontlie_pages_follow_cursor(mock_server, monkeypatch):
+    monkeypatch.setattr(settings, "BALLDONTLIE_BASE_URL", _base_url(mock_server))
+
+    async def run():
+        async with _client(mock_server) as client:
+            return [page async for page in client.balldontlie_pages("/players")]
+
+    pages = asyncio.run(run())
+    assert [row["id"] for page in pages for row in page] == [1, 2, 3, 4, 5, 6]
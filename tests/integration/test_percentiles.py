@@ -0,0 +1,108 @@
+"""
+Tests for the per-season percentile index and the player percentile profile.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import distinct, select
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.models import Game, PlayerStats
+from app.services.aggregate_service import add_player_deltas, reconcile_player_aggregates
+from app.services.percentile_service import (
+    LEAGUE, LOWER_IS_BETTER, PERCENTILE_STATS, build_index, player_profile, player_values, rank,
+)
+
+SEASON = "2021-22"
+
+
+def _brute_force(values, value, lower_is_better=False):
+    better = sum(v < value if lower_is_better else v > value for v in values)
+    worse = sum(v > value if lower_is_better else v < value for v in values)
+    ties = len(values) - better - worse
+    return {"rank": better + 1, "of": len(values), "percentile": round(100 * (worse + ties / 2) / len(values), 1)}
+
+
+def test_rank_matches_a_full_comparison():
+    rng = random.Random(2)
+    values = sorted(rng.choice([0.5, 1.0, 2.5, 3.0, 7.25]) + rng.randint(0, 3) for _ in range(200))
+    for value in set(values) | {-1.0, 0.75, 100.0}:
+        for lower_is_better in (False, True):
+            assert rank(values, value, lower_is_better) == _brute_force(values, value, lower_is_better)
+    assert rank([], 1.0) is None
+
+
+def test_true_shooting_and_usage():
+    row = SimpleNamespace(
+        games_played=10, minutes_played=300.0, points=250, rebounds=50, assists=40, steals=10, blocks=5,
+        turnovers=20, three_pointers_made=20, field_goals_made=90, field_goals_attempted=200,
+        three_pointers_attempted=50, free_throws_made=50, free_throws_attempted=60,
+    )
+    values = player_values(row, {"minutes_played": 2400.0, "possessions_used": 1000.0})
+    assert values["points"] == 25.0 and values["field_goal_percentage"] == 0.45
+    assert values["true_shooting_percentage"] == pytest.approx(250 / (2 * (200 + 0.44 * 60)))
+    # 246.4 possessions used in 300 of the team's 480 five-man minutes, out of 1000
+    assert values["usage_rate"] == pytest.approx(100 * 246.4 * 480 / (300 * 1000))
+    assert player_values(row)["usage_rate"] is None
+
+
+@pytest.fixture
+def season_index(scratch_engine):
+    """The season's index, built after rebuilding its aggregates in a private copy of the database."""
+    with scratch_engine.begin() as connection:
+        player_ids = list(connection.execute(
+            select(distinct(PlayerStats.player_id)).join(Game, PlayerStats.game_id == Game.id)
+            .where(Game.season == SEASON)
+        ).scalars())
+        reconcile_player_aggregates(connection, SEASON, player_ids)
+        return build_index(connection, SEASON)
+
+
+def test_index_matches_sorting_the_league(season_index):
+    players = season_index["players"]
+    qualified = {pid: p for pid, p in players.items() if p["qualified"]}
+    assert qualified and all(p["games_played"] >= settings.PERCENTILE_MIN_GAMES for p in qualified.values())
+
+    league = season_index["groups"][LEAGUE]
+    for stat in PERCENTILE_STATS:
+        values = [p["values"][stat] for p in qualified.values() if p["values"][stat] is not None]
+        assert league[stat] == sorted(values)
+        positions = [arrays[stat] for group, arrays in season_index["groups"].items() if group != LEAGUE]
+        assert sorted(v for array in positions for v in array) == league[stat]
+
+    for player_id, player in list(players.items())[:40]:
+        profile = player_profile(season_index, int(player_id))
+        peers = [p for p in qualified.values() if p["position"] == player["position"]]
+        for stat, entry in profile["stats"].items():
+            value = player["values"][stat]
+            if value is None:
+                assert entry["league"] is None
+                continue
+            lower = stat in LOWER_IS_BETTER
+            everyone = [p["values"][stat] for p in qualified.values() if p["values"][stat] is not None]
+            assert entry["league"] == _brute_force(everyone, value, lower)
+            assert entry["position"] == _brute_force([p["values"][stat] for p in peers], value, lower)
+
+
+def test_percentile_profile_endpoint(scratch_client, scratch_engine, season_index):
+    cache.clear()
+    player_id = next(int(pid) for pid, p in season_index["players"].items() if p["qualified"])
+    params = {"season": SEASON}
+    body = scratch_client.get(f"/api/players/{player_id}/percentiles", params=params).json()
+    assert body["player_id"] == player_id and body["season"] == SEASON
+    assert set(body["stats"]) == set(PERCENTILE_STATS)
+    assert body["stats"] == player_profile(season_index, player_id)["stats"]
+    before = body["stats"]["points"]
+
+    # New season totals evict the index; the next lookup ranks the new value
+    with scratch_engine.begin() as connection:
+        add_player_deltas(connection, SEASON, {player_id: {"points": 5000}})
+    cache.invalidate_tags(["player_season_aggregates"])
+    after = scratch_client.get(f"/api/players/{player_id}/percentiles", params=params).json()["stats"]["points"]
+    assert after["value"] > before["value"] and after["league"]["rank"] == 1
+
+    assert scratch_client.get("/api/players/99999/percentiles").status_code == 404
+    assert scratch_client.get(f"/api/players/{player_id}/percentiles", params={"season": "1999-00"}).status_code == 404
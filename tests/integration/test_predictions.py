@@ -0,0 +1,199 @@
+"""
+Tests for player performance predictions: streaming feature state, live updates and the batch endpoint.
+"""
+
+from datetime import datetime, timedelta
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert, select
+
+from app.core import tasks
+from app.core.cache import cache
+from app.core.config import settings
+from app.models import Base, Game, Player, PlayerFeatureState, PlayerStats, Team
+from app.services import prediction_service, task_service
+from app.services.live_stats_service import LiveStatsService
+from app.services.prediction_service import (
+    FEATURES, MAX_REST_DAYS, TARGETS, WINDOWS, FeatureState, fit, replay_features,
+)
+
+
+def test_window_sums_match_the_last_n_games():
+    rng = random.Random(11)
+    state = FeatureState(1, "2023-24")
+    lines, venues, day = [], [], datetime(2023, 10, 24)
+    for game_id in range(1, 31):
+        day += timedelta(days=rng.choice([1, 2, 3, 6]))
+        line = [rng.randint(0, 40), rng.randint(0, 15), rng.randint(0, 12), round(rng.uniform(5, 40), 1)]
+        is_home = rng.random() < 0.5
+        # Features going into a game only know the games before it
+        row = dict(zip(FEATURES, state.features(day, is_home, 1.5)))
+        for window in WINDOWS:
+            recent = lines[-window:]
+            for i, stat in enumerate(TARGETS):
+                expected = sum(l[i] for l in recent) / len(recent) if recent else 0.0
+                assert row[f"{stat}_last_{window}"] == pytest.approx(expected)
+        at_venue = [l for l, v in zip(lines, venues) if v == is_home] or lines
+        for i, stat in enumerate(TARGETS):
+            expected = sum(l[i] for l in at_venue) / len(at_venue) if at_venue else 0.0
+            assert row[f"{stat}_at_venue"] == pytest.approx(expected)
+        previous = state.last_game_date
+        assert row["rest_days"] == (MAX_REST_DAYS if previous is None else min((day - previous).days, MAX_REST_DAYS))
+        assert row["opponent_points_allowed"] == 1.5 and row["is_home"] == float(is_home)
+
+        state.push(line, game_id, day, is_home, team_id=3)
+        lines.append(line)
+        venues.append(is_home)
+
+    # The stored row round-trips
+    restored = FeatureState.from_row(SimpleNamespace(**state.to_row()))
+    assert restored.features(day, True, 0.0) == state.features(day, True, 0.0)
+    assert restored.games_played == 30 and len(restored.recent) == WINDOWS[-1]
+
+
+def test_fit_recovers_linear_weights():
+    rng = np.random.default_rng(4)
+    X = np.column_stack([np.ones(2000), rng.normal(size=(2000, 3))])
+    W = np.array([[10.0, 2.0], [1.5, 0.0], [-2.0, 1.0], [0.5, -0.5]])
+    assert fit(X, X @ W + rng.normal(scale=0.1, size=(2000, 2)), ridge=0.0) == pytest.approx(W, abs=0.02)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'features.db'}")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(5)
+    with engine.begin() as connection:
+        connection.execute(insert(Team), [
+            {"id": t, "name": f"Team {t}", "city": f"City {t}", "abbreviation": f"T{t}"} for t in range(1, 5)
+        ])
+        connection.execute(insert(Player), [
+            {"id": p, "name": f"Player {p}", "team_id": (p - 1) // 3 + 1} for p in range(1, 13)
+        ])
+        games, lines = [], []
+        for game_id in range(1, 41):
+            home, away = rng.sample(range(1, 5), 2)
+            games.append({
+                "id": game_id, "external_id": f"g-{game_id}", "season": "2023-24", "status": "live",
+                "game_date": datetime(2023, 10, 24) + timedelta(days=game_id // 2),
+                "home_team_id": home, "away_team_id": away, "home_score": 0, "away_score": 0,
+            })
+            for team in (home, away):
+                for player_id in range(3 * team - 2, 3 * team + 1):
+                    lines.append({"player_id": player_id, "game_id": game_id, "team_id": team,
+                                  "points": rng.randint(0, 30), "rebounds": rng.randint(0, 12),
+                                  "assists": rng.randint(0, 9), "minutes_played": rng.randint(10, 38)})
+        connection.execute(insert(Game), games)
+        connection.execute(insert(PlayerStats), lines)
+    yield engine
+    engine.dispose()
+
+
+def _states(engine):
+    with engine.connect() as connection:
+        return {
+            row.player_id: FeatureState.from_row(row).features(datetime(2024, 1, 1), True, 0.0)
+            for row in connection.execute(select(PlayerFeatureState))
+        }
+
+
+def test_live_updates_match_a_replay(engine):
+    service = LiveStatsService(engine)
+    late = 12
+    for game_id in range(1, 41):
+        if game_id != late:
+            assert service.apply(game_id, {"status": "completed", "home_score": 101, "away_score": 99}).features_changed
+    # A result that arrives after later games were added replays its players' season
+    assert service.apply(late, {"status": "completed", "home_score": 90, "away_score": 80}).features_changed
+    # So does a box score corrected after the final
+    with engine.connect() as connection:
+        player_id = connection.execute(select(PlayerStats.player_id).where(PlayerStats.game_id == 30)).scalars().first()
+    assert service.apply(30, box_scores=[{"player_id": player_id, "points": 55}]).features_changed
+    assert not service.apply(30, {"quarter": 4}).features_changed
+    incremental = _states(engine)
+
+    with engine.begin() as connection:
+        assert replay_features(connection, "2023-24") == 12
+    assert _states(engine) == incremental
+
+
+@pytest.fixture
+def training_requests(monkeypatch):
+    """Records predictions.train submissions instead of queueing them; starts with no model."""
+    cache.clear()
+    monkeypatch.setattr(prediction_service, "_last_model", None)
+    requests = []
+    monkeypatch.setattr(prediction_service, "request_training", lambda: requests.append(1))
+    return requests
+
+
+def test_requests_never_train(client, sqlite_engine, training_requests, monkeypatch):
+    payload = {"player_ids": [1, 2], "game_date": "2024-03-01", "season": "2023-24"}
+    # No model yet: 503 and training is queued rather than run in the request
+    assert client.post("/api/ml/predict/player-performance", json=payload).status_code == 503
+    assert training_requests
+
+    with sqlite_engine.connect() as connection:
+        model = prediction_service.retrain_model(connection)
+    training_requests.clear()
+    assert client.post("/api/ml/predict/player-performance", json=payload).json()["model_version"] == model["version"]
+    assert not training_requests
+
+    # Once the cache entry is gone and the model is stale, it is still served while a new one trains
+    cache.clear()
+    monkeypatch.setattr(settings, "MODEL_RETRAIN_INTERVAL", 0)
+    response = client.post("/api/ml/predict/player-performance", json=payload)
+    assert response.status_code == 200 and response.json()["model_version"] == model["version"]
+    assert training_requests
+
+
+def test_model_trained_before_any_box_scores_is_retrained(scratch_client, scratch_engine, monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(prediction_service, "_last_model", None)
+    # Queued training runs right away, against this test's database
+    monkeypatch.setattr(tasks, "_queue", tasks.TaskQueue("eager"))
+    monkeypatch.setattr(task_service, "engine", scratch_engine)
+    with scratch_engine.begin() as connection:
+        box_scores = [dict(row) for row in connection.execute(select(PlayerStats.__table__)).mappings()]
+        connection.execute(PlayerStats.__table__.delete())
+        assert prediction_service.retrain_model(connection)["weights"] is None
+
+    payload = {"player_ids": [1, 2], "game_date": "2024-03-01", "season": "2023-24"}
+    assert scratch_client.post("/api/ml/predict/player-performance", json=payload).status_code == 503
+    with scratch_engine.begin() as connection:
+        connection.execute(insert(PlayerStats), box_scores)
+    # The empty model is not served for its retrain interval: the next request queues training
+    scratch_client.post("/api/ml/predict/player-performance", json=payload)
+    response = scratch_client.post("/api/ml/predict/player-performance", json=payload)
+    assert response.status_code == 200 and response.json()["predictions"]
+
+
+def test_batch_predictions(client, sqlite_engine, training_requests):
+    with sqlite_engine.connect() as connection:
+        prediction_service.retrain_model(connection)
+    slate = list(range(1, 301))
+    response = client.post("/api/ml/predict/player-performance", json={
+        "player_ids": slate + [slate[0], 9999], "game_date": "2024-03-01", "season": "2023-24",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert [p["player_id"] for p in body["predictions"]] == slate
+    assert body["unknown_player_ids"] == [9999]
+    assert body["holdout_mae"]["points"] > 0 and body["features_used"] == list(FEATURES[1:])
+
+    playing = [p for p in body["predictions"] if p["game_id"] is not None]
+    assert playing and all(p["opponent_team_id"] != p["team_id"] for p in playing)
+    for prediction in body["predictions"]:
+        assert set(prediction["predicted"]) == set(TARGETS)
+        assert all(value >= 0 for value in prediction["predicted"].values())
+
+    # A batch of one gets the same prediction as its row in the full slate
+    one = client.post("/api/ml/predict/player-performance", json={
+        "player_ids": [playing[0]["player_id"]], "game_date": "2024-03-01", "season": "2023-24",
+    }).json()
+    assert one["predictions"] == [playing[0]] and one["model_version"] == body["model_version"]
+
+    assert client.post("/api/ml/predict/player-performance", json={"player_ids": []}).status_code == 422
@@ -0,0 +1,96 @@
+"""
+Tests for request profiling: opt-in, isolation from concurrent requests, sync routes and the admin API.
+"""
+
+import asyncio
+import pstats
+
+import httpx
+import pytest
+
+from app.core import profiling
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware
+
+TOKEN = "admin-secret"
+OPT_IN = {"X-Profile": "1", "X-Admin-Token": TOKEN}
+
+
+@pytest.fixture(autouse=True)
+def profiles_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "PROFILING_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILER", "cprofile")
+    return tmp_path
+
+
+def _functions(path):
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def only_in_profiled_request():
+    return sum(range(1000))
+
+
+def only_in_other_request():
+    return sum(range(1000))
+
+
+async def _app(scope, receive, send):
+    if scope["path"] == "/profiled":
+        for _ in range(20):
+            only_in_profiled_request()
+            await asyncio.sleep(0.001)
+    else:
+        for _ in range(200):
+            only_in_other_request()
+            await asyncio.sleep(0)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_profile_excludes_concurrent_requests(profiles_dir):
+    async def run():
+        transport = httpx.ASGITransport(app=ProfilingMiddleware(_app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(client.get("/profiled", headers=OPT_IN), client.get("/other"))
+
+    profiled, other = asyncio.run(run())
+    assert "x-profile-id" in profiled.headers and "x-profile-id" not in other.headers
+    functions = _functions(profiles_dir / f"{profiled.headers['x-profile-id']}.prof")
+    assert "only_in_profiled_request" in functions
+    assert "only_in_other_request" not in functions
+
+
+def test_opt_in_needs_the_admin_token(client, profiles_dir):
+    assert "x-profile-id" not in client.get("/api/teams/", headers={"X-Profile": "1"}).headers
+    assert "x-profile-id" not in client.get(
+        "/api/teams/", headers={"X-Profile": "1", "X-Admin-Token": "wrong"}
+    ).headers
+    # The token is only accepted in a header, never in the (logged) query string
+    assert "x-profile-id" not in client.get("/api/teams/", params={"profile": TOKEN}).headers
+    assert not list(profiles_dir.glob("*.prof"))
+
+
+def test_sync_routes_are_profiled_on_their_worker_thread(client, profiles_dir):
+    response = client.get("/api/exports/games", params={"season": "2020-21", "format": "csv"}, headers=OPT_IN)
+    assert response.status_code == 200
+    functions = _functions(profiles_dir / f"{response.headers['x-profile-id']}.prof")
+    # The route body and the streamed chunks both run in the threadpool
+    assert {"export_dataset", "encode_stream", "stream_batches"} <= functions
+
+
+def test_admin_api_lists_and_serves_profiles(client, profiles_dir):
+    profile_id = client.get("/api/teams/", headers=OPT_IN).headers["x-profile-id"]
+
+    assert client.get("/api/admin/profiles/").status_code == 403
+    assert client.get("/api/admin/profiles/", headers={"X-Profile": TOKEN}).status_code == 403
+    listing = client.get("/api/admin/profiles/", headers={"X-Admin-Token": TOKEN}).json()
+    assert [p["id"] for p in listing["profiles"]] == [profile_id]
+    assert listing["profiles"][0]["route"] == "/api/teams/" and listing["profiles"][0]["status"] == 200
+
+    download = client.get(f"/api/admin/profiles/{profile_id}", headers={"X-Admin-Token": TOKEN})
+    assert download.status_code == 200 and download.content
+    assert client.get("/api/admin/profiles/" + "0" * 32, headers={"X-Admin-Token": TOKEN}).status_code == 404
+    assert profiling.read_index()[0]["id"] == profile_id
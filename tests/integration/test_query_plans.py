@@ -0,0 +1,70 @@
+"""
+Query-plan regression tests for registered service queries.
+
+Every query registered with app.db.query_plans.register_query is EXPLAINed
+against the seeded synthetic database. A test fails when the plan reads all of
+player_stats, games or team_elo_ratings, through an index or not, or when the
+plan differs from the snapshot stored in
+tests/fixtures/query_plans/<dialect>/<query>.txt.
+
+After an intended plan change, refresh the snapshots and commit them with the
+change so the new plans show up in review:
+
+    UPDATE_QUERY_PLAN_SNAPSHOTS=1 python -m pytest tests/integration/test_query_plans.py
+"""
+
+import os
+
+import pytest
+
+from app.db.query_plans import explain, full_scans, load_service_queries
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "..", "fixtures", "query_plans")
+UPDATE_SNAPSHOTS = os.getenv("UPDATE_QUERY_PLAN_SNAPSHOTS") == "1"
+
+QUERIES = load_service_queries()
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_query_plan(plan_db, name):
+    plan = explain(plan_db, QUERIES[name](plan_db))
+
+    scans = full_scans(plan)
+    assert not scans, f"{name} scans a large table without an index:\n" + "\n".join(plan)
+
+    dialect = plan_db.get_bind().dialect.name
+    path = os.path.join(SNAPSHOT_DIR, dialect, f"{name}.txt")
+    rendered = "\n".join(plan) + "\n"
+    if UPDATE_SNAPSHOTS:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(rendered)
+        return
+
+    assert os.path.exists(path), (
+        f"No plan snapshot for {name} ({dialect}); run with UPDATE_QUERY_PLAN_SNAPSHOTS=1"
+    )
+    with open(path) as f:
+        expected = f.read()
+    assert rendered == expected, f"Plan for {name} changed:\n{rendered}"
+
+
+def test_full_index_scans_are_flagged():
+    assert full_scans(["SCAN games USING INDEX ix_games_season_game_date"])
+    assert full_scans(["  SCAN player_stats USING COVERING INDEX ix_player_stats_game_id"])
+    assert not full_scans(["SEARCH games USING INDEX ix_games_season_game_date (season=?)"])
+    assert not full_scans(["SCAN players USING INDEX ix_players_team_id"])
+
+    unbounded = [
+        "Nested Loop",
+        "  ->  Index Scan using ix_games_id on games",
+        "  ->  Index Scan using ix_player_stats_game_id on player_stats",
+        "        Index Cond: (game_id = games.id)",
+    ]
+    assert full_scans(unbounded) == ["  ->  Index Scan using ix_games_id on games"]
+    # The Index Cond belongs to the child, not to the scan above it
+    assert full_scans([
+        "Index Only Scan Backward using ix_games_game_date on games",
+        "  ->  Index Scan using ix_teams_id on teams",
+        "        Index Cond: (id = 1)",
+    ])
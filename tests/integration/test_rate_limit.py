@@ -0,0 +1,93 @@
+"""
+Tests for the token-bucket rate limiter: costs, shared route buckets, eviction and the 429 response.
+"""
+
+import time
+
+import fakeredis
+import pytest
+from pydantic import ValidationError
+
+from app.core.config import Settings, settings
+from app.core.rate_limit import LocalRateLimiter, RateLimiter, RedisRateLimiter
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter()
+    # Local buckets regardless of whether a Redis is reachable
+    monkeypatch.setattr(RateLimiter, "backend", property(lambda self: self.local))
+    return limiter
+
+
+def test_route_bucket_counts_requests(limiter):
+    exports = settings.RATE_LIMIT_ROUTE_LIMITS["/api/exports"]
+    results = [limiter.check(f"10.0.0.{n}", "/api/exports/games") for n in range(exports)]
+    assert all(allowed for allowed, _, _ in results)
+    # Each client paid the route's cost; the shared bucket one request each
+    assert results[0][2] == settings.REQUESTS_PER_MINUTE - settings.RATE_LIMIT_COSTS["/api/exports"]
+    assert results[-1][2] == 0
+    allowed, retry_after, _ = limiter.check("10.0.1.1", "/api/exports/games")
+    assert not allowed and 0 < retry_after <= 60 / exports
+    # Other groups are unaffected
+    assert limiter.check("10.0.1.1", "/api/players/")[0]
+
+
+def test_client_bucket_draws_the_route_cost(limiter):
+    cost = settings.RATE_LIMIT_COSTS["/api/ml"]
+    served = 0
+    while limiter.check("10.0.0.1", "/api/ml/predict")[0]:
+        served += 1
+    assert served == settings.REQUESTS_PER_MINUTE // cost
+    allowed, retry_after, _ = limiter.check("10.0.0.1", "/api/ml/predict")
+    assert not allowed and retry_after <= cost * 60 / settings.REQUESTS_PER_MINUTE
+
+
+def test_costs_above_the_bucket_are_rejected_at_startup():
+    with pytest.raises(ValidationError, match="exceed REQUESTS_PER_MINUTE"):
+        Settings(REQUESTS_PER_MINUTE=5)
+    assert Settings(REQUESTS_PER_MINUTE=5, RATE_LIMIT_COSTS={"/api/ml": 5}).RATE_LIMIT_COSTS == {"/api/ml": 5}
+
+
+def test_local_buckets_are_evicted():
+    local = LocalRateLimiter(max_buckets=3)
+    for n in range(10):
+        assert local.acquire([(f"client:{n}", 60, 1, 1)])[0]
+    assert len(local) == 3
+
+    # A bucket that has refilled is dropped once it is the least recently used
+    local.reset()
+    local.acquire([("client:fast", 1, 1000, 1)])
+    local.acquire([("client:slow", 60, 1, 1)])
+    time.sleep(0.01)
+    local.acquire([("client:slow", 60, 1, 1)])
+    assert len(local) == 1
+
+
+def test_redis_buckets_match_local():
+    redis_limiter = RedisRateLimiter(fakeredis.FakeRedis())
+    local = LocalRateLimiter()
+    buckets = [("client:a", 20, 20 / 60, 10), ("route:/api/ml", 3, 3 / 60, 1)]
+    for backend in (redis_limiter, local):
+        assert [backend.acquire(buckets)[:1] for _ in range(3)] == [(True,), (True,), (False,)]
+    # All or nothing: with the route bucket empty, another client's bucket stays full
+    other = [("client:b", 20, 20 / 60, 10), ("route:/api/ml", 3, 3 / 60, 1)]
+    assert redis_limiter.acquire(other)[0] and not redis_limiter.acquire(other)[0]
+    assert redis_limiter.acquire([("client:b", 20, 20 / 60, 10)]) == (True, 0.0, 0)
+
+
+def test_429_carries_cors_headers(client, monkeypatch):
+    monkeypatch.setattr(RateLimiter, "backend", property(lambda self: self.local))
+    monkeypatch.setattr(settings, "REQUESTS_PER_MINUTE", 2)
+    origin = {"Origin": "http://localhost:3000"}
+    assert [client.get("/api/teams/", headers=origin).status_code for _ in range(2)] == [200, 200]
+
+    response = client.get("/api/teams/", headers=origin)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.headers["access-control-allow-origin"] in ("*", "http://localhost:3000")
+    assert "Retry-After" in response.headers["access-control-expose-headers"]
+
+    # Preflights are answered before the limiter
+    preflight = client.options("/api/teams/", headers={**origin, "Access-Control-Request-Method": "GET"})
+    assert preflight.status_code == 200
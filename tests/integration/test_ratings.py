@@ -0,0 +1,86 @@
+"""
+Tests for the opponent-adjusted team ratings (SRS / strength of schedule).
+"""
+
+import random
+
+import pytest
+
+from app.core.cache import cache
+from app.services.ratings_service import solve_ratings
+
+
+def _synthetic_season(offense, defense, home_edge=3.0, average=110.0, rounds=6, seed=7):
+    """Every team hosts every other `rounds` times, scores from the given ratings plus noise."""
+    rng = random.Random(seed)
+    results = []
+    for _ in range(rounds):
+        for home in offense:
+            for away in offense:
+                if home == away:
+                    continue
+                home_points = average + home_edge + offense[home] + defense[away] + rng.gauss(0, 4)
+                away_points = average + offense[away] + defense[home] + rng.gauss(0, 4)
+                results.append((home, away, round(home_points), round(away_points)))
+    return results
+
+
+def test_solve_recovers_known_ratings():
+    offense = {1: 6.0, 2: 2.0, 3: 0.0, 4: -3.0, 5: -5.0}
+    defense = {1: -4.0, 2: 1.0, 3: 2.0, 4: 0.0, 5: 1.0}
+    ratings, solution = solve_ratings(_synthetic_season(offense, defense))
+
+    assert [r["team_id"] for r in ratings] == [1, 2, 3, 4, 5]
+    assert solution["home_advantage"] == pytest.approx(3.0, abs=0.5)
+    for rating in ratings:
+        team_id = rating["team_id"]
+        assert rating["srs"] == pytest.approx(offense[team_id] - defense[team_id], abs=0.6)
+        assert rating["strength_of_schedule"] == pytest.approx(rating["srs"] - rating["margin_of_victory"], abs=0.011)
+    assert sum(r["srs"] for r in ratings) == pytest.approx(0.0, abs=0.05)
+
+
+def test_warm_start_reaches_the_same_solution():
+    offense = {t: (t - 8) * 0.8 for t in range(1, 16)}
+    defense = {t: (t % 5 - 2) * 0.6 for t in range(1, 16)}
+    results = _synthetic_season(offense, defense, rounds=2)
+
+    _, previous = solve_ratings(results[:-20])
+    _, cold = solve_ratings(results)
+    _, warm = solve_ratings(results, previous)
+    assert warm["x"] == pytest.approx(cold["x"], abs=1e-8)
+
+    # Nothing new since the last solve: the stored solution is already optimal
+    _, again = solve_ratings(results, cold)
+    assert again["iterations"] <= 1 < cold["iterations"]
+    assert again["x"] == pytest.approx(cold["x"], abs=1e-8)
+
+
+def test_advanced_metrics_rates_every_team(client):
+    cache.clear()
+    body = client.get("/api/analytics/advanced-metrics", params={"season": "2023-24"}).json()
+
+    assert body["season"] == "2023-24" and body["games"] == 1230
+    teams = body["teams"]
+    assert len(teams) == 30 and [t["rank"] for t in teams] == list(range(1, 31))
+    assert [t["srs"] for t in teams] == sorted((t["srs"] for t in teams), reverse=True)
+    assert sum(t["games_played"] for t in teams) == 2 * 1230
+    for team in teams:
+        assert team["srs"] == pytest.approx(team["offensive_rating"] - team["defensive_rating"], abs=0.011)
+        assert team["strength_of_schedule"] == pytest.approx(team["srs"] - team["margin_of_victory"], abs=0.011)
+
+    # Latest season by default; invalid types are rejected
+    assert client.get("/api/analytics/advanced-metrics").json()["season"] == "2023-24"
+    assert client.get("/api/analytics/advanced-metrics", params={"metric_type": "coach"}).status_code == 400
+
+
+def test_ratings_are_cached_until_standings_change(client):
+    cache.clear()
+    first = client.get("/api/analytics/advanced-metrics", params={"season": "2022-23"}).json()
+    assert cache.get("ratings:2022-23") == first
+    assert cache.get("ratings:solution:2022-23")["team_ids"] == sorted(t["team_id"] for t in first["teams"])
+
+    cache.invalidate_tags(["team_season_standings"])
+    assert cache.get("ratings:2022-23") is None
+    # The stored solution outlives the ratings and seeds the next solve
+    assert cache.get("ratings:solution:2022-23") is not None
+    assert client.get("/api/analytics/advanced-metrics", params={"season": "2022-23"}).json()["teams"] == first["teams"]
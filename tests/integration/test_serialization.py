@@ -0,0 +1,42 @@
+"""
+Tests that the orjson fast path returns exactly what response_model serialization would.
+"""
+
+from typing import List
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.serialization import dumps, get_serializer
+from app.schemas import Player
+from app.services.team_service import TeamService
+
+LIST_URLS = [
+    ("/api/players/", {"limit": 1000, "is_active": "true"}),
+    ("/api/players/", {"team_id": 4, "position": "C"}),
+    ("/api/teams/7/players", {}),
+]
+
+
+@pytest.mark.parametrize("url,params", LIST_URLS)
+def test_fast_path_matches_response_model(client, monkeypatch, url, params):
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = client.get(url, params=params)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    validated = client.get(url, params=params)
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.json() and fast.json() == validated.json()
+    assert fast.headers.get("ETag") == validated.headers.get("ETag")
+
+
+def test_serializer_matches_pydantic_dump(sqlite_engine):
+    with Session(sqlite_engine) as db:
+        roster = TeamService(db).get_roster(3, is_active=None)
+        expected = TypeAdapter(List[Player]).dump_python(roster, mode="json")
+        assert orjson.loads(dumps(get_serializer(Player).to_list(roster))) == expected
+        # Nested team included
+        assert expected[0]["team"]["id"] == 3
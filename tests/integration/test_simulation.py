@@ -0,0 +1,148 @@
+"""
+Tests for the Monte Carlo season simulator: tiebreakers, chunking and the endpoint.
+"""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.api.routes import ml_models
+from app.core.cache import cache
+from app.services import simulation_service
+from app.services.simulation_service import load_inputs, run_simulation, simulate_chunk, summarize
+
+
+def _finished_season(conferences, results):
+    """Inputs for a season with no games left; results are (winner, loser) column pairs."""
+    n = len(conferences)
+    played = np.zeros((n, n), dtype=np.int64)
+    for winner, loser in results:
+        played[winner, loser] += 1
+    codes = {name: i for i, name in enumerate(sorted(set(conferences)))}
+    conference = np.array([codes[c] for c in conferences])
+    empty = np.zeros(0, dtype=np.int64)
+    return {
+        "team_ids": list(range(1, n + 1)),
+        "team_names": [f"Team {t}" for t in range(1, n + 1)],
+        "conferences": conferences,
+        "conference": conference,
+        "same_conference": (conference[:, None] == conference[None, :]) & ~np.eye(n, dtype=bool),
+        "played": played,
+        "home": empty,
+        "away": empty,
+        "p": np.zeros(0),
+        "pair_p": np.full((n, n), 0.5),
+        "max_wins": int(played.sum(axis=1).max()),
+        "ratings": np.full(n, 1500.0),
+    }
+
+
+def test_tiebreakers():
+    # East: 0 and 1 finish 2-2, and 0 took the season series 2-1; 2 is 2-1, 3 is 0-1.
+    # West: 4 and 5 both beat 6 and never met, so only the draw separates them.
+    inputs = _finished_season(
+        ["East"] * 4 + ["West"] * 3,
+        [(0, 1), (0, 1), (1, 0), (2, 0), (1, 2), (2, 3), (4, 6), (5, 6)],
+    )
+    counts = simulate_chunk(inputs, 4000, seed=1)
+    seeds = counts["seeds"]
+
+    assert seeds[2, 1] == seeds[0, 2] == seeds[1, 3] == seeds[3, 4] == 4000
+    assert seeds[6, 3] == 4000
+    assert seeds[4, 1] + seeds[5, 1] == 4000
+    assert seeds[4, 1] / 4000 == pytest.approx(0.5, abs=0.05)
+    # Short conferences skip the play-in and send everyone
+    assert list(counts["playoffs"]) == [4000] * 7 and not counts["play_in"].any()
+
+
+@pytest.fixture(scope="module")
+def february(sqlite_engine):
+    with sqlite_engine.connect() as connection:
+        return load_inputs(connection, "2023-24", datetime(2024, 2, 1))
+
+
+def test_chunks_match_across_processes(february, monkeypatch):
+    inline = run_simulation(february, 600, seed=5, chunk_size=200, workers=1)
+    monkeypatch.setattr(simulation_service, "_available_cpus", lambda: 2)
+    try:
+        pooled = run_simulation(february, 600, seed=5, chunk_size=200, workers=2)
+    finally:
+        simulation_service.shutdown_simulation_pool()
+    for key in inline:
+        assert np.array_equal(inline[key], pooled[key])
+    assert inline["runs"] == 600
+
+
+def test_simulated_standings_are_consistent(february):
+    runs = 2000
+    conferences = summarize(february, run_simulation(february, runs, seed=2))
+    assert 0 < len(february["home"]) < 1230
+
+    assert set(conferences) == {"Eastern", "Western"}
+    for teams in conferences.values():
+        assert len(teams) == 15
+        assert sum(t["playoff_probability"] for t in teams) == pytest.approx(8, abs=0.01)
+        assert sum(t["play_in_probability"] for t in teams) == pytest.approx(4, abs=0.01)
+        for seed in range(15):
+            assert sum(t["seed_probabilities"][seed] for t in teams) == pytest.approx(1, abs=0.01)
+        for team in teams:
+            assert sum(team["seed_probabilities"]) == pytest.approx(1, abs=0.01)
+            assert sum(team["win_distribution"].values()) == pytest.approx(1, abs=0.01)
+            wins = [int(w) for w in team["win_distribution"]]
+            assert team["wins"] <= min(wins) and max(wins) <= team["wins"] + team["remaining_games"]
+            assert team["win_range"]["p10"] <= team["win_range"]["p50"] <= team["win_range"]["p90"]
+        assert [t["projected_wins"] for t in teams] == sorted((t["projected_wins"] for t in teams), reverse=True)
+
+
+def test_simulation_endpoint_is_cached(client):
+    cache.clear()
+    params = {"season": "2023-24", "as_of_date": "2024-03-01", "simulations": 500}
+    first = client.get("/api/ml/simulate/season", params=params)
+    assert first.status_code == 200
+    body = first.json()
+    assert body["model_version"] == simulation_service.model_version()
+    assert body["simulations"] == 500 and body["as_of_date"] == "2024-03-01"
+
+    key = f"simulation:2023-24:2024-03-01:{body['model_version']}:500"
+    assert cache.get(key) == body
+    assert client.get("/api/ml/simulate/season", params=params).json() == body
+    cache.invalidate_tags(["team_elo_ratings"])
+    assert cache.get(key) is None
+
+    # After the last game nothing is left to draw
+    done = client.get("/api/ml/simulate/season", params={"season": "2023-24", "as_of_date": date(2024, 12, 1).isoformat(),
+                                                         "simulations": 100}).json()
+    assert done["season"] == "2023-24" and done["remaining_games"] == 0
+
+    assert client.get("/api/ml/simulate/season", params={"season": "1999-00"}).status_code == 404
+    assert client.get("/api/ml/simulate/season", params={"simulations": 10}).status_code == 422
+
+
+def test_simulation_etag_follows_the_resolved_date(client, monkeypatch):
+    cache.clear()
+    params = {"season": "2023-24", "simulations": 100}
+    first = client.get("/api/ml/simulate/season", params=params)
+    etag = first.headers["ETag"]
+    assert client.get("/api/ml/simulate/season", params=params, headers={"If-None-Match": etag}).status_code == 304
+
+    class Tomorrow(date):
+        @classmethod
+        def today(cls):
+            return date.today() + timedelta(days=1)
+
+    # The same URL defaults to a different as_of_date the next day
+    monkeypatch.setattr(ml_models, "date", Tomorrow)
+    second = client.get("/api/ml/simulate/season", params=params, headers={"If-None-Match": etag})
+    assert second.status_code == 200 and second.headers["ETag"] != etag
+    assert second.json()["as_of_date"] == Tomorrow.today().isoformat()
+    explicit = {**params, "as_of_date": Tomorrow.today().isoformat()}
+    assert client.get("/api/ml/simulate/season", params=explicit,
+                      headers={"If-None-Match": second.headers["ETag"]}).status_code == 304
+
+    # The default season is resolved before the ETag is built too
+    latest = {"simulations": 100, "as_of_date": "2024-03-01"}
+    default = client.get("/api/ml/simulate/season", params=latest)
+    explicit = {**latest, "season": default.json()["season"]}
+    assert client.get("/api/ml/simulate/season", params=explicit,
+                      headers={"If-None-Match": default.headers["ETag"]}).status_code == 304
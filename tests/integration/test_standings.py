@@ -0,0 +1,165 @@
+"""
+Tests for standings upkeep, tiebreakers and team season analytics.
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import case, create_engine, func, insert, or_, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core import live as live_module
+from app.db.events import register_data_upkeep
+from app.models import Base, Game, Player, PlayerStats, Team, TeamEloRating, TeamSeasonStanding
+from app.services.ingestion_service import ingest_batches
+from app.services.live_stats_service import LiveStatsService
+from app.services.standings_service import StandingsService
+
+SEASON = "2023-24"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(live_module.live_hub, "publish", lambda updates: None)
+    engine = create_engine(f"sqlite:///{tmp_path / 'standings.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Team), [
+            {"id": t, "name": f"Team {t}", "city": f"City {t}", "abbreviation": f"T{t}"} for t in (1, 2)
+        ])
+        connection.execute(insert(Player), [
+            {"id": pid, "name": f"Player {pid}", "team_id": pid // 10} for pid in (10, 20)
+        ])
+        connection.execute(insert(Game), [
+            {"id": 1, "season": SEASON, "game_date": datetime(2023, 10, 25), "home_team_id": 1,
+             "away_team_id": 2, "status": "live", "home_score": 0, "away_score": 0},
+        ])
+    yield engine
+    engine.dispose()
+
+
+def _standing(engine, team_id):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(TeamSeasonStanding).where(TeamSeasonStanding.team_id == team_id)
+        ).one()
+
+
+def test_completion_adds_team_box_totals(engine):
+    service = LiveStatsService(engine)
+    service.apply(1, {"home_score": 98, "away_score": 91}, [
+        {"player_id": 10, "team_id": 1, "rebounds": 7, "assists": 3},
+        {"player_id": 20, "team_id": 2, "rebounds": 4, "assists": 9},
+    ])
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(TeamSeasonStanding)).scalar() == 0
+
+    # The final box score arrives in the same batch as the result
+    service.apply(1, {"status": "completed"}, [{"player_id": 10, "rebounds": 8}])
+    home = _standing(engine, 1)
+    assert (home.wins, home.losses, home.points_for, home.rebounds, home.assists) == (1, 0, 98, 8, 3)
+
+    # A stat correction after the final moves the team total by the difference
+    service.apply(1, box_scores=[{"player_id": 20, "assists": 10}])
+    assert _standing(engine, 2).assists == 10
+    assert service.reconcile_game(1)["team_mismatches"] == {}
+
+
+def test_bulk_loaded_results_update_standings_in_the_same_write(engine):
+    ingest_batches(engine, Game, [[
+        {"id": 1, "season": SEASON, "game_date": datetime(2023, 10, 25), "home_team_id": 1,
+         "away_team_id": 2, "status": "completed", "home_score": 90, "away_score": 99},
+    ]], ["id"])
+    assert (_standing(engine, 2).wins, _standing(engine, 1).losses) == (1, 1)
+
+
+def test_orm_result_writes_update_standings_in_the_same_transaction(engine):
+    factory = sessionmaker(bind=engine)
+    register_data_upkeep(factory)
+    with factory() as db:
+        game = db.get(Game, 1)
+        game.home_score, game.away_score, game.status = 104, 100, "completed"
+        db.flush()
+        # Already visible inside the transaction that completed the game
+        assert db.get(TeamSeasonStanding, (1, SEASON)).wins == 1
+        assert db.info["cache_invalidation_tags"] >= {"team_season_standings", "team_matchups", "team_elo_ratings"}
+        db.commit()
+    assert (_standing(engine, 1).wins, _standing(engine, 2).losses) == (1, 1)
+    with engine.connect() as connection:
+        assert connection.execute(select(func.count()).select_from(TeamEloRating)).scalar() == 2
+
+    # A corrected final result moves the standings; withdrawing it removes them
+    with factory() as db:
+        db.get(Game, 1).away_score = 110
+        db.commit()
+    assert (_standing(engine, 1).losses, _standing(engine, 2).wins) == (1, 1)
+    with factory() as db:
+        db.get(Game, 1).status = "scheduled"
+        db.commit()
+    assert (_standing(engine, 1).losses, _standing(engine, 2).wins) == (0, 0)
+
+
+def test_standings_rebuild_corrects_drift(engine, monkeypatch):
+    from app.core.tasks import MemoryTaskStore, TaskQueue
+    from app.services import task_service
+
+    monkeypatch.setattr(task_service, "engine", engine)
+    LiveStatsService(engine).apply(1, {"home_score": 100, "away_score": 90, "status": "completed"})
+    with engine.begin() as connection:
+        connection.execute(update(TeamSeasonStanding).where(TeamSeasonStanding.team_id == 1).values(wins=5))
+
+    task, _ = TaskQueue("eager", MemoryTaskStore()).submit("standings.rebuild", {"season": SEASON})
+    assert task["result"] == {"teams_corrected": 1, "matchups_corrected": 0}
+    assert _standing(engine, 1).wins == 1
+
+
+def _entry(team_id, wins, losses, division="Atlantic", diff=0):
+    return {
+        "team_id": team_id, "wins": wins, "losses": losses, "division": division,
+        "point_differential": diff, "_division_pct": 0.5, "_conference_pct": 0.5,
+    }
+
+
+def test_ties_broken_by_head_to_head_then_point_differential():
+    # 2 beat 1 in both meetings; 3 never played either
+    matchups = {(1, 2): SimpleNamespace(min_team_wins=0, max_team_wins=2)}
+    ranked = StandingsService._ranked(
+        [_entry(1, 40, 20, diff=300), _entry(2, 40, 20, diff=100), _entry(3, 50, 10)], matchups
+    )
+    assert [r["team_id"] for r in ranked] == [3, 2, 1]
+    assert [r["games_behind"] for r in ranked] == [0, 10, 10]
+
+    ranked = StandingsService._ranked([_entry(1, 40, 20, diff=300), _entry(2, 40, 20, diff=100)], {})
+    assert [r["team_id"] for r in ranked] == [1, 2]
+
+
+def test_conference_standings(client):
+    body = client.get("/api/teams/standings", params={"season": "2023-24"}).json()
+    assert sorted(body["standings"]) == ["Eastern", "Western"]
+    east = body["standings"]["Eastern"]
+    assert len(east) == 15 and east[0]["games_behind"] == 0
+    pcts = [team["win_percentage"] for team in east]
+    assert pcts == sorted(pcts, reverse=True)
+    assert client.get("/api/teams/standings", params={"group": "nope"}).status_code == 400
+
+
+def test_team_analytics_matches_a_full_aggregate(client, sqlite_engine):
+    scored = case((Game.home_team_id == 4, Game.home_score), else_=Game.away_score)
+    allowed = case((Game.home_team_id == 4, Game.away_score), else_=Game.home_score)
+    with sqlite_engine.connect() as connection:
+        games, wins, points = connection.execute(
+            select(func.count(), func.sum(case((scored > allowed, 1), else_=0)), func.sum(scored))
+            .where(Game.season == "2023-24", or_(Game.home_team_id == 4, Game.away_team_id == 4))
+        ).one()
+        rebounds = connection.execute(
+            select(func.sum(PlayerStats.rebounds))
+            .join(Game, Game.id == PlayerStats.game_id)
+            .where(Game.season == "2023-24", PlayerStats.team_id == 4)
+        ).scalar()
+
+    analytics = client.get("/api/teams/4/analytics", params={"season": "2023-24"}).json()
+    assert (analytics["games_played"], analytics["wins"]) == (games, wins)
+    assert analytics["avg_points_scored"] == round(points / games, 2)
+    assert analytics["avg_rebounds"] == round(rebounds / games, 2)
+    assert client.get("/api/teams/4/analytics", params={"season": "1999-00"}).status_code == 404
@@ -0,0 +1,127 @@
+"""
+Tests for the incremental upstream sync, using a mocked balldontlie API.
+"""
+
+from sqlalchemy import create_engine, select
+import asyncio
+import copy
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.models import Base, Game, Player, SyncCheckpoint, Team
+from app.services.nba_api_client import NBAApiClient, Upstream
+from app.services.sync_service import SyncService
+
+TEAMS = [
+    {"id": 1, "abbreviation": "ATL", "city": "Atlanta", "conference": "East",
+     "division": "Southeast", "full_name": "Atlanta Hawks", "name": "Hawks"},
+    {"id": 2, "abbreviation": "BOS", "city": "Boston", "conference": "East",
+     "division": "Atlantic", "full_name": "Boston Celtics", "name": "Celtics"},
+]
+PLAYERS = [
+    {"id": 10 + i, "first_name": "Player", "last_name": str(i), "position": "C",
+     "height": "7-0", "weight": "250", "jersey_number": str(i), "college": None,
+     "team": TEAMS[i % 2]}
+    for i in range(5)
+]
+GAMES = [
+    {"id": 100, "date": "2023-10-25", "season": 2023, "status": "Final", "period": 4,
+     "time": "Final", "postseason": False, "home_team_score": 110, "visitor_team_score": 104,
+     "home_team": TEAMS[0], "visitor_team": TEAMS[1]},
+    {"id": 101, "date": "2023-10-27", "season": 2023, "status": "7:30 pm ET", "period": 0,
+     "time": "", "postseason": False, "home_team_score": 0, "visitor_team_score": 0,
+     "home_team": TEAMS[1], "visitor_team": TEAMS[0]},
+]
+
+
+class MockBalldontlie:
+    """Serves TEAMS/PLAYERS/GAMES, two items per page, with cursor pagination."""
+
+    def __init__(self):
+        self.data = {"teams": TEAMS, "players": copy.deepcopy(PLAYERS), "games": copy.deepcopy(GAMES)}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        resource = request.url.path.rsplit("/", 1)[-1]
+        rows = self.data[resource]
+        if resource == "games" and "start_date" in request.url.params:
+            rows = [g for g in rows if g["date"] >= request.url.params["start_date"]]
+        cursor = int(request.url.params.get("cursor", 0))
+        page = rows[cursor:cursor + 2]
+        next_cursor = cursor + 2 if cursor + 2 < len(rows) else None
+        return httpx.Response(200, json={"data": page, "meta": {"next_cursor": next_cursor}})
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _sync(engine, upstream, **kwargs):
+    async def run():
+        client = NBAApiClient(
+            [Upstream(settings.BALLDONTLIE_BASE_URL, 60000, 4)],
+            transport=httpx.MockTransport(upstream),
+        )
+        async with client:
+            return await SyncService(engine, client, **kwargs).run()
+
+    return {r.stream: r for r in asyncio.run(run())}
+
+
+def test_first_run_writes_everything(engine):
+    reports = _sync(engine, MockBalldontlie())
+
+    assert [(r.fetched, r.skipped, r.written) for r in reports.values()] == [(2, 0, 2), (5, 0, 5), (2, 0, 2)]
+    with engine.connect() as connection:
+        assert connection.execute(select(Player.team_id).where(Player.external_id == "11")).scalar() == \
+            connection.execute(select(Team.id).where(Team.external_id == "2")).scalar()
+        statuses = dict(connection.execute(select(Game.external_id, Game.status)).all())
+    assert statuses == {"100": "completed", "101": "scheduled"}
+
+
+def test_unchanged_payloads_are_skipped(engine):
+    upstream = MockBalldontlie()
+    _sync(engine, upstream)
+    upstream.data["players"][3]["jersey_number"] = "99"
+
+    reports = _sync(engine, upstream)
+
+    assert (reports["teams"].skipped, reports["teams"].written) == (2, 0)
+    assert (reports["players"].skipped, reports["players"].written) == (4, 1)
+    with engine.connect() as connection:
+        player = connection.execute(
+            select(Player.jersey_number, Player.version).where(Player.external_id == "13")
+        ).one()
+    assert tuple(player) == (99, 2)
+
+
+def test_games_resume_from_checkpoint(engine):
+    upstream = MockBalldontlie()
+    _sync(engine, upstream)
+    with engine.connect() as connection:
+        checkpoint = connection.execute(
+            select(SyncCheckpoint).where(SyncCheckpoint.stream == "games")
+        ).one()
+    assert checkpoint.last_game_date.date().isoformat() == "2023-10-25"
+    assert (checkpoint.last_fetched, checkpoint.last_written) == (2, 2)
+
+    upstream.requests.clear()
+    _sync(engine, upstream)
+    games_requests = [r for r in upstream.requests if r.url.path.endswith("/games")]
+    assert games_requests[0].url.params["start_date"] == "2023-10-22"
+
+
+def test_full_sync_rewrites_everything(engine):
+    upstream = MockBalldontlie()
+    _sync(engine, upstream)
+
+    reports = _sync(engine, upstream, full=True)
+
+    assert all(r.skipped == 0 and r.written == r.fetched for r in reports.values())
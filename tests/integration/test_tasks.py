@@ -0,0 +1,144 @@
+"""
+Tests for the background task queue: chunking, idempotent submission and status.
+"""
+
+import threading
+
+import fakeredis
+import pytest
+from sqlalchemy import select
+
+from app.core import tasks
+from app.core.tasks import MemoryTaskStore, RedisTaskStore, TaskQueue, register_task
+from app.models import PlayerSeasonAggregate
+
+release = threading.Event()
+seen_chunks = []
+
+
+@register_task("test.count", plan=lambda n: list(range(n)))
+def count_items(items, n):
+    seen_chunks.append(list(items))
+    return {"items": len(items), "total": sum(items)}
+
+
+@register_task("test.blocking")
+def blocking():
+    release.wait(5)
+    return {"runs": 1}
+
+
+@register_task("test.broken", plan=lambda: [1, 2, 3])
+def broken(items):
+    raise ValueError("bad chunk")
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemoryTaskStore()
+    return RedisTaskStore(fakeredis.FakeRedis())
+
+
+def test_items_are_chunked_by_batch_size(store):
+    seen_chunks.clear()
+    queue = TaskQueue("eager", store, batch_size=4)
+
+    task, created = queue.submit("test.count", {"n": 10})
+
+    assert created and task["status"] == "succeeded"
+    assert [len(c) for c in seen_chunks] == [4, 4, 2]
+    assert (task["chunks_total"], task["chunks_done"]) == (3, 3)
+    assert task["result"] == {"items": 10, "total": 45}
+
+
+def test_duplicate_triggers_do_not_double_run(store):
+    release.clear()
+    queue = TaskQueue("local", store, concurrency=2)
+
+    first, created = queue.submit("test.blocking")
+    duplicate, duplicate_created = queue.submit("test.blocking")
+    release.set()
+    queue.shutdown()
+
+    assert created and not duplicate_created
+    assert duplicate["id"] == first["id"]
+    assert queue.status(first["id"])["result"] == {"runs": 1}
+
+    # Once finished, the same trigger starts a new run
+    rerun, rerun_created = queue.submit("test.blocking")
+    queue.shutdown()
+    assert rerun_created and rerun["id"] != first["id"]
+
+
+def test_memory_store_keeps_active_tasks_when_full():
+    release.clear()
+    queue = TaskQueue("local", MemoryTaskStore(max_tasks=2), batch_size=5, concurrency=1)
+    running, _ = queue.submit("test.blocking")
+    for n in (1, 2, 3):
+        queue.submit("test.count", {"n": n})
+    # The running task survives the evictions and still holds its key
+    assert queue.status(running["id"])["status"] in ("pending", "running")
+    assert queue.submit("test.blocking")[0]["id"] == running["id"]
+
+    release.set()
+    queue.shutdown()
+    assert queue.status(running["id"])["result"] == {"runs": 1}
+    # Finished records are trimmed on the next submission
+    queue.submit("test.count", {"n": 4})
+    queue.shutdown()
+    assert len(queue.recent()) == 2
+
+
+def test_failed_chunk_marks_the_task_failed(store):
+    queue = TaskQueue("eager", store, batch_size=1)
+
+    task, _ = queue.submit("test.broken")
+
+    assert task["status"] == "failed"
+    assert task["error"] == "ValueError: bad chunk"
+
+
+def test_season_aggregates_rebuild(sqlite_engine, monkeypatch):
+    from app.services import task_service
+
+    monkeypatch.setattr(task_service, "engine", sqlite_engine)
+    queue = TaskQueue("eager", MemoryTaskStore(), batch_size=200)
+
+    task, _ = queue.submit("aggregates.rebuild", {"season": "2023-24"})
+
+    assert (task["status"], task["chunks_total"], task["result"]["players"]) == ("succeeded", 3, 450)
+    with sqlite_engine.connect() as connection:
+        row = connection.execute(
+            select(PlayerSeasonAggregate)
+            .where(PlayerSeasonAggregate.player_id == 1, PlayerSeasonAggregate.season == "2023-24")
+        ).one()
+    assert row.games_played > 0 and row.points > 0
+
+    # A second rebuild finds nothing to correct
+    task, _ = queue.submit("aggregates.rebuild", {"season": "2023-24"})
+    assert task["result"] == {"players": 450, "corrected": 0}
+
+
+def test_status_api(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    monkeypatch.setattr(tasks, "_queue", TaskQueue("eager", MemoryTaskStore(), batch_size=5))
+    monkeypatch.setattr(tasks.settings, "ADMIN_TOKEN", "secret")
+    client = TestClient(app)
+
+    admin = {"X-Admin-Token": "secret"}
+
+    assert client.post("/api/tasks/test.count", json={"n": 3}).status_code == 403
+    response = client.post("/api/tasks/test.count", json={"n": 12}, headers=admin)
+    assert response.status_code == 202
+
+    # Listing and polling need the token too
+    assert client.get(response.headers["Location"]).status_code == 403
+    assert client.get("/api/tasks/", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    status = client.get(response.headers["Location"], headers=admin).json()
+    assert (status["status"], status["chunks_total"], status["result"]["items"]) == ("succeeded", 3, 12)
+    assert client.get("/api/tasks/", headers=admin).json()["tasks"][0]["id"] == status["id"]
+    assert client.get("/api/tasks/status/missing", headers=admin).status_code == 404
+    assert client.post("/api/tasks/nope", headers=admin).status_code == 404